@@ -11,7 +11,10 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import task_failure, task_prerun, task_postrun, task_retry
+from celery.signals import (
+    task_failure, task_prerun, task_postrun, task_retry,
+    worker_process_init, worker_process_shutdown,
+)
 from django.conf import settings
 
 logger = logging.getLogger('hrms')
@@ -47,9 +50,20 @@ app.conf.update(
     # Result backend settings
     result_expires=86400,  # Results expire after 24 hours
 
-    # Task routing
+    # Redis broker priorities (0 = highest) so interactive report jobs
+    # overtake scheduled batch reports within a queue
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+    task_default_priority=5,
+
+    # Task routing. Export jobs are routed per job by reports.admission to
+    # reports_light or reports_heavy; 'reports' is kept for in-flight messages.
     task_routes={
-        'reports.tasks.*': {'queue': 'reports'},
+        'reports.tasks.compute_payroll_task': {'queue': 'payroll'},
+        'reports.tasks.*': {'queue': 'reports_light'},
         'payroll.tasks.*': {'queue': 'payroll'},
         'finance.tasks.*': {'queue': 'finance'},
         'procurement.tasks.*': {'queue': 'procurement'},
@@ -100,6 +114,12 @@ app.conf.update(
             'schedule': crontab(hour=0, minute=30),  # Daily at 00:30
         },
 
+        # ── Inventory ─────────────────────────────────────────────
+        'take-stock-valuation-snapshot': {
+            'task': 'inventory.tasks.take_stock_valuation_snapshot',
+            'schedule': crontab(hour=0, minute=15),  # Daily at 00:15, as of yesterday
+        },
+
         # ── Backup & Restore ──────────────────────────────────────
         'cleanup-expired-backups': {
             'task': 'core.backup_tasks.cleanup_expired_backups_task',
@@ -135,6 +155,10 @@ _task_timing = threading.local()
 def handle_task_prerun(sender=None, task_id=None, args=None, kwargs=None, **kw):
     """Record task start time and log task execution start."""
     _task_timing.start = _time.monotonic()
+
+    # Each task starts with fresh read-replica routing state
+    from core.db_routing import reset_routing_state
+    reset_routing_state()
     logger.info(
         "Celery task started: %s[%s]",
         sender.name if sender else 'unknown',
@@ -214,6 +238,26 @@ def handle_task_retry(sender=None, request=None, reason=None, einfo=None, **kw):
     )
 
 
+@worker_process_init.connect
+def handle_worker_process_init(**kw):
+    """Warm matplotlib once per worker process so report charts render at full speed."""
+    try:
+        from reports.chart_utils import warm_up
+        warm_up()
+    except Exception as e:
+        logger.warning("Chart warm-up failed: %s", e)
+
+
+@worker_process_shutdown.connect
+def handle_worker_process_shutdown(**kw):
+    """Stop the chart rendering pool, if this worker started one."""
+    try:
+        from reports.chart_service import shutdown_pool
+        shutdown_pool()
+    except Exception:
+        pass
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task for testing Celery."""
@@ -69,6 +69,7 @@ MIDDLEWARE = [
     'core.middleware.TenantMiddleware',
     'core.middleware.ModuleAccessMiddleware',
     'core.middleware.CurrentUserMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.AuditLogMiddleware',
@@ -277,6 +278,46 @@ BACKUP_SETTINGS = {
     'COMPRESSION': 'gzip',
 }
 
+# Read-replica routing (core.db_routing). Reads use the 'replica' alias only
+# inside read-only scopes, and only when one is configured in DATABASES.
+DATABASE_ROUTERS = ['core.db_routing.ReplicaRouter']
+DATABASE_REPLICA_SETTINGS = {
+    'MAX_LAG_SECONDS': float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', 30)),
+    'LAG_CHECK_INTERVAL': 5,  # Seconds between replica lag probes per process
+    'PIN_SECONDS': 15,  # Keep a user's reads on the primary this long after a write
+    'READ_ONLY_PATHS': ['/api/v1/reports/'],  # GET requests here run read-only
+}
+
+# Analytics dashboard KPI execution
+ANALYTICS_SETTINGS = {
+    'KPI_MAX_WORKERS': int(os.getenv('KPI_MAX_WORKERS', 6)),
+    'KPI_TIMEOUT_SECONDS': float(os.getenv('KPI_TIMEOUT_SECONDS', 10)),
+}
+
+# Report chart rendering (reports.chart_service)
+REPORT_CHART_SETTINGS = {
+    'CACHE_TIMEOUT': 86400,  # Rendered chart bytes, keyed by data/style hash
+    'POOL_WORKERS': int(os.getenv('REPORT_CHART_POOL_WORKERS', 2)),
+    'BATCH_POOL_THRESHOLD': 8,  # Minimum cache misses before using the process pool
+}
+
+# Report job admission control (reports.admission)
+REPORT_QUEUE_SETTINGS = {
+    # Estimated cost (rows x format weight) at which a job goes to reports_heavy
+    'HEAVY_COST_THRESHOLD': int(os.getenv('REPORT_HEAVY_COST_THRESHOLD', 20000)),
+    # Concurrent jobs per tenant in each tier; excess jobs are requeued
+    'TENANT_CONCURRENCY': {'light': 4, 'heavy': 1},
+    'ADMISSION_RETRY_SECONDS': 15,
+}
+
+# Bank statement auto-reconciliation (finance.reconciliation)
+BANK_RECONCILIATION_SETTINGS = {
+    'DATE_WINDOW_DAYS': 5,  # Payment date may differ from the statement line by this much
+    'AMOUNT_TOLERANCE': '5.00',  # Absolute difference allowed in the tolerance pass (bank charges)
+    'AUTO_RECONCILE_CONFIDENCE': 90,  # Weaker matches are stored as suggestions only
+    'IMPORT_BATCH_SIZE': 1000,
+}
+
 # ── Ollama AI Assistant ──────────────────────────────────────────
 OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
 OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama3.1')
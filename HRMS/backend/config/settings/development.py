@@ -35,6 +35,17 @@ if os.getenv('USE_POSTGRES', 'false').lower() == 'true':
             },
         }
     }
+
+    # Optional replica for reports/analytics (see core.db_routing). Point it at
+    # a second local database or a streaming replica; tests mirror 'default'.
+    if os.getenv('DB_REPLICA_NAME') or os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+            'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+            'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     DATABASES = {
         'default': {
@@ -47,6 +47,15 @@ DATABASES = {
     }
 }
 
+# Optional streaming read replica for reports/analytics (see core.db_routing)
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
 # ── CORS — strict whitelist ──────────────────────────────────────────────────
 CORS_ALLOWED_ORIGINS = [
     o.strip()
@@ -24,3 +24,7 @@ class CoreConfig(AppConfig):
             import logging
             logger = logging.getLogger(__name__)
             logger.warning(f"Failed to setup audit signals: {e}")
+
+        # Index the records of every app's deadline scanners on save
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('deadlines')
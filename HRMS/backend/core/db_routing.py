@@ -0,0 +1,234 @@
+"""
+Read-replica routing for reporting and analytics workloads.
+
+Reads are sent to the ``replica`` database alias only inside an explicit
+read-only scope (the ``read_only`` context manager/decorator, or report GET
+requests matched by ``ReplicaRoutingMiddleware``). Everything else, and every
+write, uses ``default``.
+
+A read-only scope falls back to the primary when:
+- no replica alias is configured,
+- the replica is lagging more than ``MAX_LAG_SECONDS`` (checked at most every
+  ``LAG_CHECK_INTERVAL`` seconds per process) or cannot be reached,
+- the current request/task has already written (read-your-writes), or the
+  current user wrote within the last ``PIN_SECONDS``,
+- the code is inside a transaction on the primary.
+"""
+
+import logging
+import threading
+import time
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('hrms')
+
+PRIMARY_ALIAS = 'default'
+REPLICA_ALIAS = 'replica'
+
+DEFAULT_MAX_LAG_SECONDS = 30
+DEFAULT_LAG_CHECK_INTERVAL = 5
+DEFAULT_PIN_SECONDS = 15
+
+
+def _routing_setting(key, default):
+    return getattr(settings, 'DATABASE_REPLICA_SETTINGS', {}).get(key, default)
+
+
+class _RoutingState(threading.local):
+    read_only_depth = 0
+    force_primary_depth = 0
+    wrote = False
+    pin_checked = False
+    pinned = False
+
+
+_state = _RoutingState()
+
+# Process-wide replica health, refreshed lazily
+_health = {'checked_at': 0.0, 'healthy': False, 'lag': None}
+_health_lock = threading.Lock()
+
+
+def reset_routing_state():
+    """Clear per-request/per-task routing state (called by middleware and Celery)."""
+    _state.read_only_depth = 0
+    _state.force_primary_depth = 0
+    _state.wrote = False
+    _state.pin_checked = False
+    _state.pinned = False
+
+
+def has_written():
+    """True if the current request/task has written to the primary."""
+    return _state.wrote
+
+
+def mark_written():
+    """Record a write so subsequent reads in this request go to the primary."""
+    _state.wrote = True
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _measure_replica_lag():
+    """Return replica lag in seconds (0 for a non-streaming copy)."""
+    conn = connections[REPLICA_ALIAS]
+    with conn.cursor() as cursor:
+        if conn.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0.0
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() THEN "
+            "COALESCE(EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp())), 0) "
+            "ELSE 0 END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def replica_lag():
+    """Last measured replica lag in seconds, or None if unknown/unreachable."""
+    replica_is_healthy()
+    return _health['lag']
+
+
+def replica_is_healthy():
+    """True if the replica is reachable and within the allowed lag."""
+    if not replica_configured():
+        return False
+
+    now = time.monotonic()
+    interval = _routing_setting('LAG_CHECK_INTERVAL', DEFAULT_LAG_CHECK_INTERVAL)
+    if now - _health['checked_at'] < interval:
+        return _health['healthy']
+
+    with _health_lock:
+        if now - _health['checked_at'] < interval:
+            return _health['healthy']
+        try:
+            lag = _measure_replica_lag()
+            healthy = lag <= _routing_setting('MAX_LAG_SECONDS', DEFAULT_MAX_LAG_SECONDS)
+            if not healthy:
+                logger.warning("Replica lag %.1fs exceeds limit; reading from primary", lag)
+        except Exception as e:
+            logger.warning("Replica health check failed; reading from primary: %s", e)
+            lag, healthy = None, False
+        _health.update(checked_at=time.monotonic(), healthy=healthy, lag=lag)
+        return healthy
+
+
+def _pin_key(user_id):
+    return f'db_pin:{user_id}'
+
+
+def pin_user_to_primary(user):
+    """After a write, keep this user's reads on the primary for PIN_SECONDS."""
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return
+    from core.caching import get_cache, VOLATILE_CACHE
+    try:
+        get_cache(VOLATILE_CACHE).set(
+            _pin_key(user.pk), True, _routing_setting('PIN_SECONDS', DEFAULT_PIN_SECONDS)
+        )
+    except Exception as e:
+        logger.warning("Could not pin user %s to primary: %s", user.pk, e)
+
+
+def _user_is_pinned():
+    if _state.pin_checked:
+        return _state.pinned
+    _state.pin_checked = True
+    from core.middleware import get_current_user
+    user = get_current_user()
+    if user is not None:
+        from core.caching import get_cache, VOLATILE_CACHE
+        try:
+            _state.pinned = bool(get_cache(VOLATILE_CACHE).get(_pin_key(user.pk)))
+        except Exception:
+            _state.pinned = False
+    return _state.pinned
+
+
+def current_read_alias():
+    """Database alias reads should use right now."""
+    if _state.read_only_depth <= 0 or _state.force_primary_depth > 0:
+        return PRIMARY_ALIAS
+    if _state.wrote or not replica_configured():
+        return PRIMARY_ALIAS
+    if connections[PRIMARY_ALIAS].in_atomic_block:
+        return PRIMARY_ALIAS
+    if _user_is_pinned():
+        return PRIMARY_ALIAS
+    if not replica_is_healthy():
+        return PRIMARY_ALIAS
+    return REPLICA_ALIAS
+
+
+class read_only(ContextDecorator):
+    """
+    Mark a block or function as read-only so its queries may use the replica.
+
+    Usage:
+        with read_only():
+            rows = list(JournalLine.objects.filter(...))
+
+        @read_only()
+        def generate_report(...):
+            ...
+
+    Pass pin_primary=True to carry a caller's read-your-writes state into
+    another thread (see reports.kpi_engine).
+    """
+
+    def __init__(self, pin_primary=False):
+        self.pin_primary = pin_primary
+
+    def __enter__(self):
+        _state.read_only_depth += 1
+        if self.pin_primary:
+            _state.wrote = True
+        return self
+
+    def __exit__(self, *exc):
+        _state.read_only_depth -= 1
+        return False
+
+
+class use_primary(ContextDecorator):
+    """Force primary reads inside a read-only scope (e.g. before a write decision)."""
+
+    def __enter__(self):
+        _state.force_primary_depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        _state.force_primary_depth -= 1
+        return False
+
+
+class ReplicaRouter:
+    """
+    Database router: writes always go to the primary; reads go to the replica
+    only inside a read-only scope and when the replica is healthy.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == PRIMARY_ALIAS and _state.wrote:
+            return PRIMARY_ALIAS
+        return current_read_alias()
+
+    def db_for_write(self, model, **hints):
+        mark_written()
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_ALIAS
@@ -0,0 +1,253 @@
+"""
+Deadline scanners.
+
+Records that fall due on a date (purchase order deliveries, contract
+expiries, work order ends, maintenance visits) are scanned through one
+due-date index instead of each scheduled check filtering its whole table:
+
+- each scanned model has a ``DeadlineScanner`` registered in its app's
+  ``deadlines`` module (discovered when the core app is ready)
+- saving a record keeps its Deadline row in step: OPEN with the record's
+  due date while the scanner considers it open, CLOSED otherwise
+- ``scan_deadlines(kind)`` finds the due deadlines with one range query
+  on (kind, state, due_date), loads only those records and bulk-creates
+  the notifications of the ones not yet alerted at their stage
+- a deadline alerts once as UPCOMING (inside the scanner's lead time) and
+  once as OVERDUE; moving its due date re-arms it
+
+Queryset ``update()`` and ``bulk_update`` do not send post_save: code that
+changes a scanned record's due date or open state in bulk should pass the
+records to ``sync_deadlines``. ``rebuild_deadlines`` reindexes from scratch
+(``manage.py rebuild_deadlines``).
+"""
+
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger('hrms')
+
+BATCH_SIZE = 1000
+
+_scanners = {}
+
+
+class DeadlineScanner:
+    """
+    How one kind of record falls due.
+
+    Subclasses set the class attributes and implement ``recipients``,
+    ``notice`` and ``summary``.
+    """
+    kind = None              # index key, e.g. 'procurement.po_delivery'
+    model = None             # 'app_label.ModelName'
+    date_field = None        # the record's due date
+    reference_field = None   # shown on the index row and in logs
+    open_filter = {}         # exact/__in lookups an open record matches
+    lead_days = 0            # alert this many days ahead; -1 alerts once overdue
+    select_related = ()
+    link = ''
+
+    def queryset(self):
+        return apps.get_model(self.model).all_objects.filter(is_deleted=False).select_related(
+            *self.select_related
+        )
+
+    def is_open(self, record):
+        if record.is_deleted:
+            return False
+        for lookup, value in self.open_filter.items():
+            if lookup.endswith('__in'):
+                if getattr(record, lookup[:-4]) not in value:
+                    return False
+            elif getattr(record, lookup) != value:
+                return False
+        return True
+
+    def due_date(self, record):
+        """The record's due date while it is open, else None."""
+        return getattr(record, self.date_field) if self.is_open(record) else None
+
+    def watched_fields(self):
+        """Fields whose change can move the record's deadline."""
+        return {self.date_field, 'is_deleted'} | {
+            lookup.split('__')[0] for lookup in self.open_filter
+        }
+
+    def reference(self, record):
+        return str(getattr(record, self.reference_field))[:100]
+
+    def notification_type(self, stage):
+        Deadline = apps.get_model('core', 'Deadline')
+        return 'WARNING' if stage == Deadline.Stage.OVERDUE else 'TASK'
+
+    def recipients(self, record):
+        """User ids to notify about ``record``."""
+        raise NotImplementedError
+
+    def notice(self, record, stage, today):
+        """(title, message) of the alert for ``record`` at ``stage``."""
+        raise NotImplementedError
+
+    def summary(self, record, today):
+        """JSON-serializable details of a due record (report and extra_data)."""
+        raise NotImplementedError
+
+
+def register(scanner_class):
+    """Register a DeadlineScanner subclass and index its model on save."""
+    scanner = scanner_class()
+    _scanners[scanner.kind] = scanner
+    post_save.connect(_record_saved, sender=scanner.model, dispatch_uid=f'deadlines:{scanner.model}')
+    return scanner_class
+
+
+def get_scanner(kind):
+    try:
+        return _scanners[kind]
+    except KeyError:
+        raise ValueError(f"Unknown deadline kind: {kind}") from None
+
+
+def _record_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for scanner in _scanners.values():
+        if scanner.model != sender._meta.label:
+            continue
+        if update_fields and not scanner.watched_fields() & set(update_fields):
+            continue
+        sync_deadlines(scanner, [instance])
+
+
+def sync_deadlines(scanner, records):
+    """Bring the index rows of ``records`` in line with the records."""
+    Deadline = apps.get_model('core', 'Deadline')
+
+    records = list(records)
+    existing = {
+        row.object_id: row
+        for row in Deadline.all_objects.filter(kind=scanner.kind, object_id__in=[r.pk for r in records])
+    }
+    now = timezone.now()
+    new, changed = [], []
+    for record in records:
+        due_date = scanner.due_date(record)
+        row = existing.get(record.pk)
+        if row is None:
+            if due_date:
+                new.append(Deadline(
+                    tenant_id=record.tenant_id, kind=scanner.kind, object_id=record.pk,
+                    reference=scanner.reference(record), due_date=due_date,
+                ))
+            continue
+
+        state = Deadline.State.OPEN if due_date else Deadline.State.CLOSED
+        if state == row.state and (not due_date or due_date == row.due_date):
+            continue
+        if due_date and due_date != row.due_date:
+            row.due_date = due_date
+            row.alerted_stage = ''
+            row.alerted_at = None
+        row.state = state
+        row.reference = scanner.reference(record)
+        row.updated_at = now
+        changed.append(row)
+
+    Deadline.all_objects.bulk_create(new, batch_size=BATCH_SIZE)
+    Deadline.all_objects.bulk_update(
+        changed, ['due_date', 'state', 'reference', 'alerted_stage', 'alerted_at', 'updated_at'],
+        batch_size=BATCH_SIZE,
+    )
+    return len(new) + len(changed)
+
+
+def rebuild_deadlines(kinds=None):
+    """Reindex every open record of ``kinds`` (all kinds when None). Returns {kind: open}."""
+    Deadline = apps.get_model('core', 'Deadline')
+
+    counts = {}
+    for kind in kinds or sorted(_scanners):
+        scanner = get_scanner(kind)
+        records = scanner.queryset().filter(**scanner.open_filter).exclude(
+            **{f'{scanner.date_field}__isnull': True}
+        ).order_by('pk')
+        with transaction.atomic():
+            batch, counts[kind] = [], 0
+            for record in records.iterator(chunk_size=BATCH_SIZE):
+                batch.append(record)
+                if len(batch) == BATCH_SIZE:
+                    sync_deadlines(scanner, batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            sync_deadlines(scanner, batch)
+            counts[kind] += len(batch)
+            Deadline.all_objects.filter(kind=kind, state=Deadline.State.OPEN).exclude(
+                object_id__in=records.values('pk'),
+            ).update(state=Deadline.State.CLOSED, updated_at=timezone.now())
+    return counts
+
+
+def scan_deadlines(kind, today=None):
+    """
+    Alert on the due deadlines of ``kind``.
+
+    A deadline is due from ``lead_days`` before its due date; it is OVERDUE
+    once the date has passed, UPCOMING before. Returns {'due': [summary with
+    'stage'], 'notified': notifications created, 'alerted': deadlines
+    alerted this scan}.
+    """
+    Deadline = apps.get_model('core', 'Deadline')
+    Notification = apps.get_model('core', 'Notification')
+
+    scanner = get_scanner(kind)
+    today = today or timezone.now().date()
+    due = list(
+        Deadline.all_objects.filter(
+            kind=kind, state=Deadline.State.OPEN, is_deleted=False,
+            due_date__lte=today + timedelta(days=scanner.lead_days),
+        ).order_by('due_date', 'reference')
+    )
+    records = {record.pk: record for record in scanner.queryset().filter(pk__in=[d.object_id for d in due])}
+
+    now = timezone.now()
+    notifications, summaries = [], []
+    alerted = {Deadline.Stage.UPCOMING: [], Deadline.Stage.OVERDUE: []}
+    for deadline in due:
+        record = records.get(deadline.object_id)
+        if record is None:
+            continue
+        stage = Deadline.Stage.OVERDUE if deadline.due_date < today else Deadline.Stage.UPCOMING
+        summary = scanner.summary(record, today)
+        summary['stage'] = stage
+        summaries.append(summary)
+        if deadline.alerted_stage in (stage, Deadline.Stage.OVERDUE):
+            continue
+
+        alerted[stage].append(deadline.pk)
+        title, message = scanner.notice(record, stage, today)
+        notifications.extend(
+            Notification(
+                tenant_id=record.tenant_id, user_id=user_id,
+                notification_type=scanner.notification_type(stage),
+                title=title[:200], message=message, link=scanner.link, extra_data=summary,
+            )
+            for user_id in sorted(scanner.recipients(record), key=str)
+        )
+
+    with transaction.atomic():
+        Notification.all_objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        for stage, ids in alerted.items():
+            if ids:
+                Deadline.all_objects.filter(pk__in=ids).update(alerted_stage=stage, alerted_at=now, updated_at=now)
+
+    alerted_count = sum(len(ids) for ids in alerted.values())
+    logger.info(
+        f"Deadline scan {kind}: {len(summaries)} due, {alerted_count} alerted, "
+        f"{len(notifications)} notifications"
+    )
+    return {'due': summaries, 'notified': len(notifications), 'alerted': alerted_count}
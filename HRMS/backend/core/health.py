@@ -95,7 +95,7 @@ def system_status(request):
     Detailed system status — admin-only.
 
     Returns versions, uptime, dependency health, request timing percentiles,
-    Celery worker status, and cache hit statistics.
+    Celery worker status, report queue wait/run times, and cache hit statistics.
     """
     from core.logging import request_stats
 
@@ -171,6 +171,13 @@ def system_status(request):
         celery_status['status'] = f'error: {e}'
     status['celery'] = celery_status
 
+    # ── Report queues ──────────────────────────────────────────────────────
+    try:
+        from reports.admission import get_queue_stats
+        status['report_queues'] = get_queue_stats()
+    except Exception as e:
+        status['report_queues'] = {'error': str(e)}
+
     # ── Cached health metrics (from periodic task) ─────────────────────────
     try:
         from django.core.cache import caches
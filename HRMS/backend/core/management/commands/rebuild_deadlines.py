@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the deadline index (see core.deadlines).
+
+Usage:
+    python manage.py rebuild_deadlines                                  # All kinds
+    python manage.py rebuild_deadlines --kind procurement.po_delivery   # One kind
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Reindex the due dates scanned by the deadline checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            help='Deadline kind to rebuild (repeatable; default: all)',
+        )
+
+    def handle(self, *args, **options):
+        from core.deadlines import rebuild_deadlines
+
+        try:
+            counts = rebuild_deadlines(options['kind'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for kind, count in counts.items():
+            self.stdout.write(f'  {kind}: {count} open')
+        self.stdout.write(self.style.SUCCESS('Deadline index rebuilt.'))
@@ -73,7 +73,7 @@ class Command(BaseCommand):
         )
         from inventory.models import (
             AssetDepreciation, AssetTransfer, Asset, StockEntry,
-            StockLedger, Item, ItemCategory, Warehouse,
+            StockLedger, StockMovement, Item, ItemCategory, Warehouse,
         )
         from procurement.models import (
             GRNItem, GoodsReceiptNote, PurchaseOrderItem, PurchaseOrder,
@@ -102,6 +102,7 @@ class Command(BaseCommand):
         AssetDepreciation.objects.all().delete()
         AssetTransfer.objects.all().delete()
         Asset.objects.all().delete()
+        StockMovement.objects.all().delete()
         StockEntry.objects.all().delete()
         StockLedger.objects.all().delete()
         Item.objects.all().delete()
@@ -539,6 +540,7 @@ class Command(BaseCommand):
     # Journal Entries (sample GL transactions)
     # ------------------------------------------------------------------
     def seed_journal_entries(self):
+        from finance.balances import record_posting
         from finance.models import JournalEntry, JournalLine, FiscalPeriod, Account
 
         if JournalEntry.objects.exists():
@@ -605,6 +607,7 @@ class Command(BaseCommand):
                         debit_amount=dr,
                         credit_amount=cr,
                     )
+            record_posting(je)
 
         self.stdout.write(self.style.SUCCESS(f'  Created {len(entries)} journal entries'))
 
@@ -461,3 +461,42 @@ class TenantMiddleware:
             return Organization.objects.filter(is_active=True).first()
         except Exception:
             return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scope read-replica routing to a request.
+
+    Resets per-request routing state, runs safe (GET/HEAD) requests under
+    report/analytics path prefixes inside core.db_routing.read_only, and
+    pins users who just wrote to the primary so their next reads see their
+    own writes.
+    """
+    SAFE_METHODS = ('GET', 'HEAD')
+    DEFAULT_READ_ONLY_PATHS = ('/api/v1/reports/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        from django.conf import settings
+        self.read_only_paths = tuple(
+            getattr(settings, 'DATABASE_REPLICA_SETTINGS', {}).get(
+                'READ_ONLY_PATHS', self.DEFAULT_READ_ONLY_PATHS
+            )
+        )
+
+    def __call__(self, request):
+        from core import db_routing
+
+        db_routing.reset_routing_state()
+        try:
+            if request.method in self.SAFE_METHODS and request.path.startswith(self.read_only_paths):
+                with db_routing.read_only():
+                    response = self.get_response(request)
+            else:
+                response = self.get_response(request)
+
+            if db_routing.has_written():
+                db_routing.pin_user_to_primary(get_current_user() or getattr(request, 'user', None))
+            return response
+        finally:
+            db_routing.reset_routing_state()
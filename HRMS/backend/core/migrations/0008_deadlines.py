@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-19 00:49
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_document_sequences'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deadline',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=50)),
+                ('object_id', models.UUIDField()),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('due_date', models.DateField()),
+                ('state', models.CharField(choices=[('OPEN', 'Open'), ('CLOSED', 'Closed')], default='OPEN', max_length=10)),
+                ('alerted_stage', models.CharField(blank=True, choices=[('UPCOMING', 'Upcoming'), ('OVERDUE', 'Overdue')], max_length=10)),
+                ('alerted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'core_deadlines',
+                'ordering': ['due_date'],
+                'indexes': [models.Index(fields=['kind', 'state', 'due_date'], name='core_deadline_scan_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='core_deadline_unique_record')],
+            },
+        ),
+    ]
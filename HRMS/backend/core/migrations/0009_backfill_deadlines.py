@@ -0,0 +1,62 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# The scanners registered when deadlines were introduced, as they stood then:
+# kind -> (model, date field, reference field, open filter). Later scanners
+# index their own records in the migration that adds them.
+KINDS = {
+    'inventory.maintenance': (
+        'inventory.MaintenanceSchedule', 'next_due_date', 'title', {'is_active': True},
+    ),
+    'manufacturing.work_order_end': (
+        'manufacturing.WorkOrder', 'planned_end', 'work_order_number',
+        {'status__in': ('RELEASED', 'IN_PROGRESS')},
+    ),
+    'procurement.contract_renewal': (
+        'procurement.Contract', 'end_date', 'contract_number', {'status': 'ACTIVE'},
+    ),
+    'procurement.po_delivery': (
+        'procurement.PurchaseOrder', 'delivery_date', 'po_number',
+        {'status__in': ('APPROVED', 'SENT', 'PARTIAL')},
+    ),
+}
+
+
+def backfill_deadlines(apps, schema_editor):
+    """Index the open records that existed before the deadline index."""
+    Deadline = apps.get_model('core', 'Deadline')
+
+    for kind, (model, date_field, reference_field, open_filter) in KINDS.items():
+        indexed = set(Deadline._base_manager.filter(kind=kind).values_list('object_id', flat=True))
+        records = apps.get_model(model)._base_manager.filter(
+            is_deleted=False, **open_filter,
+        ).exclude(**{f'{date_field}__isnull': True}).values_list(
+            'pk', 'tenant_id', date_field, reference_field,
+        ).order_by('pk')
+
+        Deadline._base_manager.bulk_create(
+            [
+                Deadline(
+                    tenant_id=tenant_id, kind=kind, object_id=pk,
+                    reference=str(reference)[:100], due_date=due_date, state='OPEN',
+                )
+                for pk, tenant_id, due_date, reference in records.iterator(chunk_size=BATCH_SIZE)
+                if pk not in indexed
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_deadlines'),
+        ('inventory', '0005_item_lead_time'),
+        ('manufacturing', '0003_work_order_cost_rollup'),
+        ('procurement', '0004_purchase_order_delivery_currency'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
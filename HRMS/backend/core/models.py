@@ -391,6 +391,64 @@ class SystemConfiguration(BaseModel):
         return self.value
 
 
+class DocumentSequence(BaseModel):
+    """
+    Row-locked counter behind document numbers (see core.numbering).
+
+    One row per tenant, prefix and scope (e.g. JV-PAY for 2026-02); key
+    combines the three so the row is unique even when tenant is null.
+    """
+    key = models.CharField(max_length=150, unique=True)
+    prefix = models.CharField(max_length=30)
+    scope = models.CharField(max_length=20)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'core_document_sequences'
+        ordering = ['prefix', 'scope']
+
+    def __str__(self):
+        return f"{self.prefix}-{self.scope}: {self.last_value}"
+
+
+class Deadline(BaseModel):
+    """
+    Due-date index row behind the deadline scanners (see core.deadlines).
+
+    One row per scanned record and kind, kept in step with the record on
+    save. alerted_stage records the last alert sent so a scan never
+    notifies the same stage twice.
+    """
+    class State(models.TextChoices):
+        OPEN = 'OPEN', 'Open'
+        CLOSED = 'CLOSED', 'Closed'
+
+    class Stage(models.TextChoices):
+        UPCOMING = 'UPCOMING', 'Upcoming'
+        OVERDUE = 'OVERDUE', 'Overdue'
+
+    kind = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+    reference = models.CharField(max_length=100, blank=True)
+    due_date = models.DateField()
+    state = models.CharField(max_length=10, choices=State.choices, default=State.OPEN)
+    alerted_stage = models.CharField(max_length=10, choices=Stage.choices, blank=True)
+    alerted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_deadlines'
+        ordering = ['due_date']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='core_deadline_unique_record'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'state', 'due_date'], name='core_deadline_scan_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.reference}: {self.due_date} ({self.state})"
+
+
 class Country(models.Model):
     """
     Country reference data.
@@ -1,3 +1,115 @@
-from django.test import TestCase
+import threading
+from unittest.mock import patch
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core import db_routing
+from core.db_routing import (
+    PRIMARY_ALIAS, REPLICA_ALIAS, ReplicaRouter,
+    current_read_alias, read_only, reset_routing_state, use_primary,
+)
+from core.numbering import allocate_numbers, next_number
+
+
+@patch.object(db_routing, 'replica_is_healthy', lambda: True)
+@patch.object(db_routing, 'replica_configured', lambda: True)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Read-only scopes use the replica only when that is safe."""
+
+    def setUp(self):
+        reset_routing_state()
+        self.addCleanup(reset_routing_state)
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_read_only_scope_use_primary(self):
+        self.assertEqual(self.router.db_for_read(None), PRIMARY_ALIAS)
+
+    def test_read_only_scope_uses_replica(self):
+        with read_only():
+            self.assertEqual(self.router.db_for_read(None), REPLICA_ALIAS)
+        self.assertEqual(current_read_alias(), PRIMARY_ALIAS)
+
+    def test_write_pins_request_to_primary(self):
+        with read_only():
+            self.assertEqual(self.router.db_for_write(None), PRIMARY_ALIAS)
+            self.assertEqual(self.router.db_for_read(None), PRIMARY_ALIAS)
+
+    def test_use_primary_overrides_read_only(self):
+        with read_only():
+            with use_primary():
+                self.assertEqual(current_read_alias(), PRIMARY_ALIAS)
+            self.assertEqual(current_read_alias(), REPLICA_ALIAS)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with patch.object(db_routing, 'replica_is_healthy', lambda: False):
+            with read_only():
+                self.assertEqual(current_read_alias(), PRIMARY_ALIAS)
+
+
+@patch.object(db_routing, 'replica_is_healthy', lambda: True)
+@patch.object(db_routing, 'replica_configured', lambda: True)
+class ReplicaRoutingTransactionTest(TestCase):
+
+    def test_atomic_block_reads_from_primary(self):
+        reset_routing_state()
+        with transaction.atomic(), read_only():
+            self.assertEqual(current_read_alias(), PRIMARY_ALIAS)
+
+
+class DocumentNumberingTest(TestCase):
+
+    def test_new_counter_continues_after_existing_numbers(self):
+        from finance.models import FiscalPeriod, FiscalYear, JournalEntry
+
+        now = timezone.now()
+        base = f'JV-SEED-{now.year}{now.month:02d}'
+        fy = FiscalYear.objects.create(name='FY', start_date='2026-01-01', end_date='2026-12-31')
+        period = FiscalPeriod.objects.create(
+            fiscal_year=fy, period_number=1, name='P1',
+            start_date='2026-01-01', end_date='2026-01-31',
+        )
+        for seq in (3, 12):
+            JournalEntry.objects.create(
+                entry_number=f'{base}-{seq:04d}', journal_date='2026-01-05',
+                fiscal_period=period, description='legacy',
+            )
+
+        numbers = allocate_numbers('JV-SEED', 3, model=JournalEntry, field='entry_number')
+
+        self.assertEqual(numbers, [f'{base}-0013', f'{base}-0014', f'{base}-0015'])
+        self.assertEqual(next_number('JV-SEED', model=JournalEntry, field='entry_number'),
+                         f'{base}-0016')
+
+
+class DocumentNumberingConcurrencyTest(TransactionTestCase):
+
+    def test_concurrent_allocators_never_duplicate(self):
+        workers, rounds, block = 8, 10, 5
+        issued, errors = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(workers)
+
+        def allocate():
+            try:
+                start.wait()
+                for _ in range(rounds):
+                    with transaction.atomic():
+                        numbers = [next_number('CONC')] + allocate_numbers('CONC', block)
+                    with lock:
+                        issued.extend(numbers)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=allocate) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        sequence = sorted(int(n.rsplit('-', 1)[-1]) for n in issued)
+        self.assertEqual(sequence, list(range(1, workers * rounds * (block + 1) + 1)))
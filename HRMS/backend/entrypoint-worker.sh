@@ -31,9 +31,10 @@ server.serve_forever()
 HEALTH_PID=$!
 
 echo "Starting Celery worker..."
+# Run a dedicated heavy-report worker by setting CELERY_QUEUES=reports_heavy
 celery -A config worker --loglevel=info \
-    -Q default,imports,reports,payroll \
-    --concurrency=4 &
+    -Q "${CELERY_QUEUES:-default,imports,reports,reports_light,reports_heavy,payroll}" \
+    --concurrency="${CELERY_CONCURRENCY:-4}" &
 CELERY_PID=$!
 
 wait "$CELERY_PID"
@@ -0,0 +1,221 @@
+"""
+Set-based AP/AR aging.
+
+Aging is computed in the database: one query yields an outstanding balance
+per invoice, and an outer query buckets and sums those balances per vendor
+or customer with conditional aggregation. Buckets are decided by comparing
+the due date with precomputed cut-off dates, so no per-row date arithmetic
+is needed:
+
+    current   due_date >= as_of
+    days_30   as_of - 30 <= due_date < as_of
+    days_60   as_of - 60 <= due_date < as_of - 30
+    days_90   as_of - 90 <= due_date < as_of - 60
+    over_90   due_date < as_of - 90
+
+Two balance bases are supported:
+
+- Current (as_of_date today or later): ``total_amount - paid_amount`` for
+  invoices not PAID or CANCELLED.
+- Historical (as_of_date in the past): every invoice dated on or before
+  as_of_date that was not cancelled. The party's amount paid at that date
+  is what it has paid in total less the payments dated after as_of_date,
+  and it is applied to the party's invoices oldest due date first.
+
+``aging_detail`` returns the per-invoice rows as a lazy queryset so the API
+can page through it and exports can stream it with ``.iterator()``.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When, Window,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+
+ZERO = Decimal('0.00')
+
+BUCKETS = ('current', 'days_30', 'days_60', 'days_90', 'over_90')
+
+AMOUNT = DecimalField(max_digits=15, decimal_places=2)
+
+# kind -> (invoice model name, party field on invoices and payments)
+KINDS = {
+    'AP': ('VendorInvoice', 'vendor'),
+    'AR': ('CustomerInvoice', 'customer'),
+}
+
+
+def _invoice_model(kind):
+    from . import models
+
+    try:
+        model_name, party = KINDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown aging kind: {kind}")
+    return getattr(models, model_name), party
+
+
+def _cutoffs(as_of_date):
+    """Lower due-date bound of each bucket except over_90."""
+    return [as_of_date - timedelta(days=d) for d in (0, 30, 60, 90)]
+
+
+def _is_historical(as_of_date):
+    return as_of_date < date.today()
+
+
+def _party_paid_as_of(model, party, as_of_date):
+    """Subquery: amount the outer invoice's party had paid at as_of_date."""
+    from .models import Payment
+
+    paid_total = (
+        model.objects.filter(**{party: OuterRef(party)})
+        .exclude(status='CANCELLED')
+        .order_by()
+        .values(party)
+        .annotate(total=Sum('paid_amount'))
+        .values('total')
+    )
+    paid_later = (
+        Payment.objects.filter(**{party: OuterRef(party), 'payment_date__gt': as_of_date})
+        .order_by()
+        .values(party)
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    return Greatest(
+        Coalesce(Subquery(paid_total, output_field=AMOUNT), Value(ZERO))
+        - Coalesce(Subquery(paid_later, output_field=AMOUNT), Value(ZERO)),
+        Value(ZERO),
+        output_field=AMOUNT,
+    )
+
+
+def _outstanding_invoices(kind, as_of_date):
+    """Invoices of ``kind`` annotated with their ``outstanding`` balance at as_of_date."""
+    model, party = _invoice_model(kind)
+
+    if not _is_historical(as_of_date):
+        qs = model.objects.filter(~Q(status__in=['PAID', 'CANCELLED']))
+        return qs.annotate(
+            outstanding=ExpressionWrapper(F('total_amount') - F('paid_amount'), output_field=AMOUNT),
+        ), party
+
+    qs = model.objects.filter(invoice_date__lte=as_of_date).exclude(status='CANCELLED')
+    billed_to_date = Window(
+        Sum('total_amount'),
+        partition_by=[F(party)],
+        order_by=[F('due_date').asc(), F('id').asc()],
+    )
+    qs = qs.annotate(paid_as_of=_party_paid_as_of(model, party, as_of_date)).annotate(
+        outstanding=Least(
+            F('total_amount'),
+            Greatest(billed_to_date - F('paid_as_of'), Value(ZERO)),
+            output_field=AMOUNT,
+        ),
+    )
+    return qs, party
+
+
+def aging_summary(kind, as_of_date=None):
+    """
+    Aging buckets per vendor (kind='AP') or customer (kind='AR').
+
+    Returns the same shape as the report endpoints: {'as_of_date', 'detail',
+    'summary'} where each detail row holds the party name/code, the five
+    bucket amounts and the total.
+    """
+    if as_of_date is None:
+        as_of_date = date.today()
+
+    invoices, party = _outstanding_invoices(kind, as_of_date)
+    inner = invoices.order_by().values(
+        party_id=F(f'{party}_id'),
+        party_name=F(f'{party}__name'),
+        party_code=F(f'{party}__code'),
+        due=F('due_date'),
+        balance=F('outstanding'),
+    )
+    inner_sql, inner_params = inner.query.get_compiler(using=invoices.db).as_sql()
+
+    cutoffs = _cutoffs(as_of_date)
+    bucket_sql = ', '.join([
+        'SUM(CASE WHEN due >= %s THEN balance ELSE 0 END)',
+        'SUM(CASE WHEN due < %s AND due >= %s THEN balance ELSE 0 END)',
+        'SUM(CASE WHEN due < %s AND due >= %s THEN balance ELSE 0 END)',
+        'SUM(CASE WHEN due < %s AND due >= %s THEN balance ELSE 0 END)',
+        'SUM(CASE WHEN due < %s THEN balance ELSE 0 END)',
+        'SUM(balance)',
+    ])
+    bucket_params = [
+        cutoffs[0],
+        cutoffs[0], cutoffs[1],
+        cutoffs[1], cutoffs[2],
+        cutoffs[2], cutoffs[3],
+        cutoffs[3],
+    ]
+    sql = (
+        f'SELECT party_id, party_name, party_code, {bucket_sql} '
+        f'FROM ({inner_sql}) aging WHERE balance > 0 '
+        'GROUP BY party_id, party_name, party_code ORDER BY party_name, party_id'
+    )
+
+    with connections[invoices.db].cursor() as cursor:
+        cursor.execute(sql, bucket_params + list(inner_params))
+        rows = cursor.fetchall()
+
+    detail = []
+    summary = {key: ZERO for key in BUCKETS + ('total',)}
+    for _party_id, name, code, *amounts in rows:
+        row = {f'{party}_name': name, f'{party}_code': code}
+        for key, amount in zip(BUCKETS + ('total',), amounts):
+            amount = Decimal(amount or 0).quantize(ZERO)
+            row[key] = amount
+            summary[key] += amount
+        detail.append(row)
+
+    return {
+        'as_of_date': as_of_date.isoformat(),
+        'detail': detail,
+        'summary': summary,
+    }
+
+
+def aging_detail(kind, as_of_date=None, party_id=None):
+    """
+    Per-invoice aging rows, ordered by party and due date.
+
+    Returns a lazy values() queryset with invoice_id, invoice_number,
+    party id/name/code, invoice_date, due_date, total_amount, balance and
+    bucket. Only invoices with a positive balance are included; ``party_id``
+    limits the rows to one vendor or customer.
+    """
+    if as_of_date is None:
+        as_of_date = date.today()
+
+    invoices, party = _outstanding_invoices(kind, as_of_date)
+    cutoffs = _cutoffs(as_of_date)
+    qs = invoices.annotate(
+        bucket=Case(
+            When(due_date__gte=cutoffs[0], then=Value('current')),
+            When(due_date__gte=cutoffs[1], then=Value('days_30')),
+            When(due_date__gte=cutoffs[2], then=Value('days_60')),
+            When(due_date__gte=cutoffs[3], then=Value('days_90')),
+            default=Value('over_90'),
+        ),
+    ).filter(outstanding__gt=0)
+    if party_id:
+        # Safe alongside the historical window: it is partitioned by party
+        qs = qs.filter(**{f'{party}_id': party_id})
+
+    return qs.order_by(f'{party}__name', f'{party}_id', 'due_date', 'id').values(
+        'invoice_number', 'invoice_date', 'due_date', 'total_amount', 'bucket',
+        invoice_id=F('id'),
+        party_id=F(f'{party}_id'),
+        party_name=F(f'{party}__name'),
+        party_code=F(f'{party}__code'),
+        balance=F('outstanding'),
+    )
@@ -0,0 +1,458 @@
+"""
+Per-account, per-fiscal-period balance snapshots.
+
+AccountPeriodBalance holds the posted debit/credit totals of every account in
+every fiscal period, so statements never need to scan the JournalLine history.
+AccountDimensionBalance holds the same totals split by cost center and
+department, for budget vs actual:
+
+- Posting or reversing a journal entry applies the entry's totals to its
+  period's rows in the same transaction (``record_posting`` /
+  ``record_reversal``), using F-expression upserts so parallel postings
+  never lose an update. The budget actual counters move with them (see
+  finance.budgets).
+- When a period closes its rows are frozen: the opening and closing balance
+  (net debit) of every account with a balance is materialised.
+- Cumulative balances as of a period are the latest frozen snapshot at or
+  before it plus the period totals of the periods after that snapshot.
+
+Any change to a period's totals unfreezes the snapshots of that period and
+every later one; they are frozen again when those periods close, or by the
+``rebuild_account_balances`` management command, which also verifies the
+aggregates against the raw ledger (run it with ``--verify`` after bulk
+imports that write JournalLine rows directly).
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .budgets import apply_posting, rebuild_budget_counters
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+
+PERIOD_ORDER = ('fiscal_year__start_date', 'period_number')
+
+
+# ── Period ordering ──────────────────────────────────────────────────────────
+
+def _upto_q(period, prefix=''):
+    """Periods of the same tenant up to and including ``period``."""
+    fy = period.fiscal_year
+    return Q(**{f'{prefix}tenant_id': period.tenant_id}) & (
+        Q(**{f'{prefix}fiscal_year': fy, f'{prefix}period_number__lte': period.period_number})
+        | Q(**{f'{prefix}fiscal_year__start_date__lt': fy.start_date})
+    )
+
+
+def _after_q(period, prefix=''):
+    """Periods of the same tenant strictly after ``period``."""
+    fy = period.fiscal_year
+    return Q(**{f'{prefix}tenant_id': period.tenant_id}) & (
+        Q(**{f'{prefix}fiscal_year': fy, f'{prefix}period_number__gt': period.period_number})
+        | Q(**{f'{prefix}fiscal_year__start_date__gt': fy.start_date})
+    )
+
+
+def previous_period(period):
+    from .models import FiscalPeriod
+
+    return FiscalPeriod.all_objects.filter(
+        _upto_q(period)
+    ).exclude(pk=period.pk).select_related('fiscal_year').order_by(
+        *(f'-{f}' for f in PERIOD_ORDER)
+    ).first()
+
+
+# ── Maintenance on posting ───────────────────────────────────────────────────
+
+def dimension_key(cost_center_id, department_id):
+    return f'{cost_center_id or "-"}:{department_id or "-"}'
+
+
+def entry_line_totals(entry):
+    """
+    Debit/credit totals of an entry's lines per (account, cost center, department).
+
+    Ordered by account so concurrent postings lock balance rows in the same order.
+    """
+    from .models import JournalLine
+
+    return list(JournalLine.all_objects.filter(
+        journal_entry=entry, is_deleted=False,
+    ).values('account_id', 'cost_center_id', 'department_id').annotate(
+        debit=Sum('debit_amount'),
+        credit=Sum('credit_amount'),
+    ).order_by('account_id', 'cost_center_id', 'department_id'))
+
+
+def _by_account(line_totals):
+    totals = {}
+    for row in line_totals:
+        debit, credit = totals.get(row['account_id'], (ZERO, ZERO))
+        totals[row['account_id']] = (debit + (row['debit'] or ZERO), credit + (row['credit'] or ZERO))
+    return sorted(totals.items(), key=lambda item: item[0])
+
+
+def _upsert(model, lookup, changes, values):
+    """Apply F-expression ``changes`` to the row matching ``lookup``, creating it if needed."""
+    rows = model.all_objects.filter(**lookup)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.all_objects.create(**lookup, **values)
+    except IntegrityError:
+        # A concurrent posting created the row first
+        rows.update(**changes)
+
+
+def _add_to_period(tenant_id, account_id, fiscal_period_id, debit, credit):
+    """Atomically add amounts to an (account, period) row, creating it if needed."""
+    from .models import AccountPeriodBalance
+
+    _upsert(
+        AccountPeriodBalance,
+        dict(account_id=account_id, fiscal_period_id=fiscal_period_id),
+        dict(
+            period_debit=F('period_debit') + debit,
+            period_credit=F('period_credit') + credit,
+            closing_balance=F('closing_balance') + (debit - credit),
+            updated_at=timezone.now(),
+        ),
+        dict(tenant_id=tenant_id, period_debit=debit, period_credit=credit,
+             closing_balance=debit - credit),
+    )
+
+
+def _add_to_dimension(tenant_id, fiscal_period_id, row, sign):
+    from .models import AccountDimensionBalance
+
+    debit = sign * (row['debit'] or ZERO)
+    credit = sign * (row['credit'] or ZERO)
+    _upsert(
+        AccountDimensionBalance,
+        dict(account_id=row['account_id'], fiscal_period_id=fiscal_period_id,
+             dimension_key=dimension_key(row['cost_center_id'], row['department_id'])),
+        dict(
+            period_debit=F('period_debit') + debit,
+            period_credit=F('period_credit') + credit,
+            updated_at=timezone.now(),
+        ),
+        dict(tenant_id=tenant_id, cost_center_id=row['cost_center_id'],
+             department_id=row['department_id'], period_debit=debit, period_credit=credit),
+    )
+
+
+def invalidate_from(period):
+    """Unfreeze snapshots of ``period`` and every later period."""
+    from .models import AccountPeriodBalance
+
+    return AccountPeriodBalance.all_objects.filter(is_frozen=True).filter(
+        Q(fiscal_period=period) | _after_q(period, 'fiscal_period__')
+    ).update(is_frozen=False, frozen_at=None)
+
+
+def _apply_totals(tenant_id, fiscal_period, line_totals, sign):
+    if not line_totals:
+        return
+    with transaction.atomic():
+        for account_id, (debit, credit) in _by_account(line_totals):
+            _add_to_period(tenant_id, account_id, fiscal_period.pk, sign * debit, sign * credit)
+        for row in line_totals:
+            _add_to_dimension(tenant_id, fiscal_period.pk, row, sign)
+        apply_posting(fiscal_period, line_totals, sign)
+        invalidate_from(fiscal_period)
+
+
+def _apply_entry(entry, sign, line_totals=None):
+    if line_totals is None:
+        line_totals = entry_line_totals(entry)
+    _apply_totals(entry.tenant_id, entry.fiscal_period, line_totals, sign)
+
+
+def record_posting(entry, line_totals=None):
+    """
+    Add a newly posted entry's lines to its period balances (call after lines exist).
+
+    ``line_totals`` may be passed when the caller has already fetched
+    ``entry_line_totals(entry)``.
+    """
+    _apply_entry(entry, 1, line_totals)
+
+
+def record_reversal(entry):
+    """Remove a previously posted entry's lines from its period balances."""
+    _apply_entry(entry, -1)
+
+
+def record_bulk_posting(tenant_id, fiscal_period, line_totals):
+    """
+    Add the combined lines of many entries posted to one period at once.
+
+    ``line_totals`` has the shape of ``entry_line_totals`` summed over the
+    entries, ordered by account, so a bulk job touches each balance row once
+    instead of once per entry.
+    """
+    _apply_totals(tenant_id, fiscal_period, line_totals, 1)
+
+
+# ── Period close ─────────────────────────────────────────────────────────────
+
+def freeze_period(period):
+    """Materialise opening/closing balances for a closed period."""
+    from .models import AccountPeriodBalance
+
+    with transaction.atomic():
+        prev = previous_period(period)
+        opening = cumulative_balances(prev) if prev else {}
+        rows = {
+            r.account_id: r for r in
+            AccountPeriodBalance.all_objects.select_for_update().filter(fiscal_period=period)
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+        for account_id in set(opening) | set(rows):
+            balance = opening.get(account_id, ZERO)
+            row = rows.get(account_id)
+            if row is None:
+                if balance == ZERO:
+                    continue
+                to_create.append(AccountPeriodBalance(
+                    tenant_id=period.tenant_id, account_id=account_id, fiscal_period=period,
+                    opening_balance=balance, closing_balance=balance,
+                    is_frozen=True, frozen_at=now,
+                ))
+                continue
+            row.opening_balance = balance
+            row.closing_balance = balance + row.period_debit - row.period_credit
+            row.is_frozen = True
+            row.frozen_at = now
+            to_update.append(row)
+
+        AccountPeriodBalance.all_objects.bulk_create(to_create)
+        AccountPeriodBalance.all_objects.bulk_update(
+            to_update, ['opening_balance', 'closing_balance', 'is_frozen', 'frozen_at'],
+        )
+    return len(to_create) + len(to_update)
+
+
+def unfreeze_period(period):
+    from .models import AccountPeriodBalance
+
+    AccountPeriodBalance.all_objects.filter(
+        fiscal_period=period, is_frozen=True,
+    ).update(is_frozen=False, frozen_at=None)
+
+
+def is_period_frozen(period):
+    from .models import AccountPeriodBalance
+
+    rows = AccountPeriodBalance.all_objects.filter(fiscal_period=period)
+    return rows.exists() and not rows.filter(is_frozen=False).exists()
+
+
+# ── Reads ────────────────────────────────────────────────────────────────────
+
+def cumulative_balances(period, account_types=None):
+    """
+    Net debit balance of each account as of the end of ``period``.
+
+    Returns:
+        {account_id: Decimal}
+    """
+    from .models import AccountPeriodBalance
+
+    rows = AccountPeriodBalance.all_objects.filter(_upto_q(period, 'fiscal_period__'))
+    if account_types:
+        rows = rows.filter(account__account_type__in=account_types)
+
+    balances = defaultdict(lambda: ZERO)
+    anchor = rows.filter(is_frozen=True).select_related(
+        'fiscal_period__fiscal_year'
+    ).order_by(*(f'-fiscal_period__{f}' for f in PERIOD_ORDER)).first()
+    if anchor is not None:
+        for account_id, closing in rows.filter(
+            fiscal_period_id=anchor.fiscal_period_id
+        ).values_list('account_id', 'closing_balance'):
+            balances[account_id] += closing
+        rows = rows.filter(_after_q(anchor.fiscal_period, 'fiscal_period__'))
+
+    for row in rows.values('account_id').annotate(
+        debit=Sum('period_debit'), credit=Sum('period_credit'),
+    ).order_by():
+        balances[row['account_id']] += row['debit'] - row['credit']
+    return dict(balances)
+
+
+def period_account_totals(period, account_types=None):
+    """
+    Posted debit/credit totals of each account for a single period.
+
+    Accounts whose postings net to nothing (e.g. fully reversed) are omitted.
+    """
+    from .models import AccountPeriodBalance
+
+    rows = AccountPeriodBalance.all_objects.filter(fiscal_period=period).exclude(
+        period_debit=0, period_credit=0,
+    )
+    if account_types:
+        rows = rows.filter(account__account_type__in=account_types)
+    return rows.values(
+        'account__code', 'account__name', 'account__account_type',
+        total_debit=F('period_debit'), total_credit=F('period_credit'),
+    )
+
+
+def period_totals_by_type(period):
+    """Posted debit/credit totals of a single period, per account type."""
+    from .models import AccountPeriodBalance
+
+    totals = {}
+    for row in AccountPeriodBalance.all_objects.filter(fiscal_period=period).values(
+        'account__account_type'
+    ).annotate(debit=Sum('period_debit'), credit=Sum('period_credit')).order_by():
+        totals[row['account__account_type']] = (row['debit'] or ZERO, row['credit'] or ZERO)
+    return totals
+
+
+# ── Rebuild / verify ─────────────────────────────────────────────────────────
+
+def _ledger_rows(tenant_id, *dimensions):
+    from .models import JournalLine
+
+    return JournalLine.all_objects.filter(
+        is_deleted=False,
+        journal_entry__status='POSTED',
+        journal_entry__fiscal_period__tenant_id=tenant_id,
+    ).values('account_id', 'journal_entry__fiscal_period_id', *dimensions).annotate(
+        debit=Sum('debit_amount'), credit=Sum('credit_amount'),
+    ).order_by()
+
+
+def _ledger_totals(tenant_id):
+    """Raw posted totals per (account, period) straight from JournalLine."""
+    return {
+        (row['account_id'], row['journal_entry__fiscal_period_id']): (
+            row['debit'] or ZERO, row['credit'] or ZERO,
+        )
+        for row in _ledger_rows(tenant_id)
+    }
+
+
+def _ledger_dimension_totals(tenant_id):
+    """Raw posted totals per (account, period, dimension_key) with the dimension ids."""
+    return {
+        (row['account_id'], row['journal_entry__fiscal_period_id'],
+         dimension_key(row['cost_center_id'], row['department_id'])): row
+        for row in _ledger_rows(tenant_id, 'cost_center_id', 'department_id')
+    }
+
+
+def _compare_totals(ledger, snapshots, check):
+    problems = []
+    for key in set(ledger) | set(snapshots):
+        expected = ledger.get(key, (ZERO, ZERO))
+        row = snapshots.get(key)
+        got = (row.period_debit, row.period_credit) if row else (ZERO, ZERO)
+        if got != expected:
+            problems.append({
+                'account_id': key[0], 'fiscal_period_id': key[1], 'check': check,
+                'expected': expected, 'actual': got,
+            })
+    return problems
+
+
+def _ordered_periods(tenant_id):
+    from .models import FiscalPeriod
+
+    return list(FiscalPeriod.all_objects.filter(
+        tenant_id=tenant_id,
+    ).select_related('fiscal_year').order_by(*PERIOD_ORDER))
+
+
+def verify_balances(tenant_id=None):
+    """
+    Compare the period and dimension aggregates with the raw ledger.
+
+    Returns a list of discrepancy dicts (empty when consistent).
+    """
+    from .models import AccountDimensionBalance, AccountPeriodBalance
+
+    ledger = _ledger_totals(tenant_id)
+    snapshots = {
+        (r.account_id, r.fiscal_period_id): r
+        for r in AccountPeriodBalance.all_objects.filter(fiscal_period__tenant_id=tenant_id)
+    }
+    problems = _compare_totals(ledger, snapshots, 'period_totals')
+
+    problems += _compare_totals(
+        {key: (row['debit'] or ZERO, row['credit'] or ZERO)
+         for key, row in _ledger_dimension_totals(tenant_id).items()},
+        {(r.account_id, r.fiscal_period_id, r.dimension_key): r
+         for r in AccountDimensionBalance.all_objects.filter(fiscal_period__tenant_id=tenant_id)},
+        'dimension_totals',
+    )
+
+    # Frozen closing balances must equal the running ledger balance
+    ledger_by_period = defaultdict(list)
+    for (account_id, period_id), (debit, credit) in ledger.items():
+        ledger_by_period[period_id].append((account_id, debit - credit))
+    frozen_by_period = defaultdict(list)
+    for row in snapshots.values():
+        if row.is_frozen:
+            frozen_by_period[row.fiscal_period_id].append(row)
+
+    running = defaultdict(lambda: ZERO)
+    for period in _ordered_periods(tenant_id):
+        for account_id, net in ledger_by_period[period.pk]:
+            running[account_id] += net
+        for row in frozen_by_period[period.pk]:
+            if row.closing_balance != running[row.account_id]:
+                problems.append({
+                    'account_id': row.account_id, 'fiscal_period_id': period.pk,
+                    'check': 'closing_balance',
+                    'expected': running[row.account_id], 'actual': row.closing_balance,
+                })
+    return problems
+
+
+def rebuild_balances(tenant_id=None):
+    """Recreate all aggregates for a tenant from the ledger and refreeze closed periods."""
+    from .models import AccountDimensionBalance, AccountPeriodBalance
+
+    with transaction.atomic():
+        AccountPeriodBalance.all_objects.filter(fiscal_period__tenant_id=tenant_id).delete()
+        AccountPeriodBalance.all_objects.bulk_create([
+            AccountPeriodBalance(
+                tenant_id=tenant_id, account_id=account_id, fiscal_period_id=period_id,
+                period_debit=debit, period_credit=credit, closing_balance=debit - credit,
+            )
+            for (account_id, period_id), (debit, credit) in _ledger_totals(tenant_id).items()
+        ], batch_size=1000)
+
+        AccountDimensionBalance.all_objects.filter(fiscal_period__tenant_id=tenant_id).delete()
+        AccountDimensionBalance.all_objects.bulk_create([
+            AccountDimensionBalance(
+                tenant_id=tenant_id, account_id=account_id, fiscal_period_id=period_id,
+                dimension_key=key, cost_center_id=row['cost_center_id'],
+                department_id=row['department_id'],
+                period_debit=row['debit'] or ZERO, period_credit=row['credit'] or ZERO,
+            )
+            for (account_id, period_id, key), row in _ledger_dimension_totals(tenant_id).items()
+        ], batch_size=1000)
+
+        frozen = 0
+        for period in _ordered_periods(tenant_id):
+            if period.is_closed:
+                freeze_period(period)
+                frozen += 1
+        rebuild_budget_counters(tenant_id)
+    logger.info("Rebuilt account period balances for tenant %s (%d periods frozen)", tenant_id, frozen)
+    return frozen
@@ -0,0 +1,356 @@
+"""
+Budget consumption counters and availability checks.
+
+Every Budget row carries ``committed_amount`` and ``actual_amount``, so its
+availability (current amount - committed - actual) is a single row read
+instead of a commitment sum plus a journal line scan:
+
+- committed_amount follows the budget's COMMITTED BudgetCommitment rows.
+  The commitment save/delete signals apply each change in the saving
+  transaction; ``commit_to_budgets`` bulk-creates commitments and bumps the
+  counters itself.
+- actual_amount follows the posted ledger. ``record_posting``,
+  ``record_reversal`` and ``record_bulk_posting`` pass the posted totals
+  per account, cost center and department to ``apply_posting``. These go
+  to the fiscal year's budgets for those accounts whose cost center and
+  department are blank or match, the same rule budget vs actual uses.
+
+Counters move with F-expression updates taken in budget id order, so
+concurrent postings and commitments never lose an update or deadlock.
+``check_budget_lines`` validates all lines of a document in one query, and
+with ``reserve=True`` it locks the budget rows (select_for_update) so the
+availability it saw still holds when the caller commits.
+``refresh_budget_counters`` (run when a budget is saved) and
+``rebuild_budget_counters`` recompute the counters from the commitments and
+the AccountDimensionBalance aggregates.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+
+
+def budget_actual(account_type, debit, credit):
+    """Spend against a budget: net credits for revenue, net debits otherwise."""
+    if account_type == 'REVENUE':
+        return credit - debit
+    return debit - credit
+
+
+def commitment_value(status, amount, is_deleted=False):
+    """What a commitment contributes to its budget's committed_amount."""
+    if status == 'COMMITTED' and not is_deleted:
+        return amount or ZERO
+    return ZERO
+
+
+def _bump(field, deltas):
+    """Add ``deltas`` {budget_id: amount} to a counter, in id order."""
+    from .models import Budget
+
+    for budget_id in sorted(deltas, key=str):
+        if deltas[budget_id]:
+            Budget.all_objects.filter(pk=budget_id).update(**{field: F(field) + deltas[budget_id]})
+
+
+# ── Maintenance ─────────────────────────────────────────────────────────────
+
+def apply_posting(fiscal_period, line_totals, sign):
+    """Apply posted (sign=1) or reversed (sign=-1) line totals of a period to budget actuals."""
+    from .models import Budget
+
+    by_account = defaultdict(list)
+    for row in line_totals:
+        by_account[row['account_id']].append(row)
+
+    budgets = Budget.all_objects.filter(
+        is_deleted=False,
+        fiscal_year_id=fiscal_period.fiscal_year_id,
+        account_id__in=list(by_account),
+    ).values_list('pk', 'account_id', 'cost_center_id', 'department_id', 'account__account_type')
+
+    deltas = {}
+    for budget_id, account_id, cost_center_id, department_id, account_type in budgets:
+        debit = credit = ZERO
+        for row in by_account[account_id]:
+            if cost_center_id and row['cost_center_id'] != cost_center_id:
+                continue
+            if department_id and row['department_id'] != department_id:
+                continue
+            debit += row['debit'] or ZERO
+            credit += row['credit'] or ZERO
+        deltas[budget_id] = sign * budget_actual(account_type, debit, credit)
+    _bump('actual_amount', deltas)
+
+
+def apply_commitment_change(old, new):
+    """
+    Move committed_amount for one commitment change.
+
+    ``old`` and ``new`` are (budget_id, value) pairs (see commitment_value);
+    either may be None for a create or delete.
+    """
+    deltas = defaultdict(Decimal)
+    if old and old[0]:
+        deltas[old[0]] -= old[1]
+    if new and new[0]:
+        deltas[new[0]] += new[1]
+    with transaction.atomic():
+        _bump('committed_amount', deltas)
+
+
+def commit_to_budgets(commitments):
+    """Bulk-create BudgetCommitment rows and add them to the budget counters."""
+    from .models import BudgetCommitment
+
+    deltas = defaultdict(Decimal)
+    for c in commitments:
+        deltas[c.budget_id] += commitment_value(c.status, c.amount, c.is_deleted)
+    with transaction.atomic():
+        created = BudgetCommitment.objects.bulk_create(commitments, batch_size=1000)
+        _bump('committed_amount', deltas)
+    return created
+
+
+def purchase_order_commitments(purchase_orders):
+    """
+    Unsaved COMMITTED BudgetCommitments for the lines of ``purchase_orders``.
+
+    A line commits its total to its requisition item's budget, else to the
+    latest budget for its item category's GL account, restricted to the
+    cost center of the line's (or the PO's) requisition when it has one.
+    Lines already committed, without value or without a budget are
+    skipped. Uses three queries however many orders and lines are given.
+    """
+    from django.utils import timezone
+    from procurement.models import PurchaseOrderItem
+    from .models import Budget, BudgetCommitment
+
+    orders = {po.pk: po for po in purchase_orders}
+    po_items = list(
+        PurchaseOrderItem.objects.filter(purchase_order_id__in=orders).select_related(
+            'requisition_item__budget', 'requisition_item__requisition', 'item__category',
+            'purchase_order__requisition',
+        ).order_by('purchase_order_id', 'id')
+    )
+
+    # Resolve each line's budget: the requisition item's budget first, then
+    # the latest budget for the item category's GL account (one query for all)
+    line_budgets = {}
+    fallback_accounts = {}
+    for po_item in po_items:
+        requisition_item = po_item.requisition_item
+        if requisition_item and requisition_item.budget_id:
+            line_budgets[po_item.id] = requisition_item.budget
+        elif po_item.item and po_item.item.category:
+            gl_account_id = getattr(po_item.item.category, 'gl_account_id', None)
+            if gl_account_id:
+                requisition = (requisition_item.requisition if requisition_item
+                               else po_item.purchase_order.requisition)
+                fallback_accounts[po_item.id] = (gl_account_id, requisition.cost_center_id if requisition else None)
+
+    if fallback_accounts:
+        latest = {}
+        for budget in Budget.objects.filter(
+            account_id__in={account_id for account_id, _ in fallback_accounts.values()},
+            status__in=['DRAFT', 'APPROVED', 'REVISED'],
+        ).order_by('-fiscal_year__start_date'):
+            latest.setdefault((budget.account_id, None), budget)
+            if budget.cost_center_id:
+                latest.setdefault((budget.account_id, budget.cost_center_id), budget)
+        for po_item_id, key in fallback_accounts.items():
+            if key in latest:
+                line_budgets[po_item_id] = latest[key]
+
+    # Avoid duplicate commitments
+    references = {po_item.id: f"{orders[po_item.purchase_order_id].po_number}:{po_item.id}" for po_item in po_items}
+    existing = set(BudgetCommitment.objects.filter(
+        source='PO', source_reference__in=references.values(),
+    ).values_list('budget_id', 'source_reference'))
+
+    commitments = []
+    for po_item in po_items:
+        po = orders[po_item.purchase_order_id]
+        line_total = po_item.total or (po_item.quantity * po_item.unit_price)
+        if line_total <= 0:
+            continue
+
+        budget = line_budgets.get(po_item.id)
+        if budget is None:
+            logger.warning(
+                "No budget found for PO %s line item '%s'; skipping commitment creation.",
+                po.po_number, po_item.description,
+            )
+            continue
+        if (budget.id, references[po_item.id]) in existing:
+            continue
+
+        commitments.append(BudgetCommitment(
+            tenant_id=po.tenant_id,
+            budget=budget,
+            commitment_date=po.order_date or timezone.now().date(),
+            amount=line_total,
+            source='PO',
+            source_reference=references[po_item.id],
+            status=BudgetCommitment.CommitmentStatus.COMMITTED,
+        ))
+    return commitments
+
+
+def _recompute(budgets):
+    """Overwrite the counters of ``budgets`` (a queryset) from the source rows."""
+    from .models import AccountDimensionBalance, Budget, BudgetCommitment
+
+    committed = dict(
+        BudgetCommitment.all_objects.filter(
+            budget__in=budgets, is_deleted=False, status='COMMITTED',
+        ).values('budget_id').annotate(total=Sum('amount')).order_by().values_list('budget_id', 'total')
+    )
+    rows = list(budgets.values_list(
+        'pk', 'fiscal_year_id', 'account_id', 'cost_center_id', 'department_id',
+        'account__account_type',
+    ))
+    totals = defaultdict(list)
+    for row in AccountDimensionBalance.all_objects.filter(
+        fiscal_period__fiscal_year_id__in={r[1] for r in rows},
+        account_id__in={r[2] for r in rows},
+    ).values('fiscal_period__fiscal_year_id', 'account_id', 'cost_center_id', 'department_id').annotate(
+        debit=Sum('period_debit'), credit=Sum('period_credit'),
+    ).order_by():
+        totals[(row['fiscal_period__fiscal_year_id'], row['account_id'])].append(row)
+
+    updated = []
+    for budget_id, fy_id, account_id, cost_center_id, department_id, account_type in rows:
+        debit = credit = ZERO
+        for row in totals[(fy_id, account_id)]:
+            if cost_center_id and row['cost_center_id'] != cost_center_id:
+                continue
+            if department_id and row['department_id'] != department_id:
+                continue
+            debit += row['debit'] or ZERO
+            credit += row['credit'] or ZERO
+        updated.append(Budget(
+            pk=budget_id,
+            committed_amount=committed.get(budget_id) or ZERO,
+            actual_amount=budget_actual(account_type, debit, credit),
+        ))
+    Budget.all_objects.bulk_update(updated, ['committed_amount', 'actual_amount'], batch_size=1000)
+    return len(updated)
+
+
+def refresh_budget_counters(budget_ids):
+    """
+    Recompute the counters of specific budgets, e.g. after one is created or
+    its account or dimensions change. The rows are locked first so postings
+    running at the same time are either counted here or applied afterwards.
+    """
+    from .models import Budget
+
+    with transaction.atomic():
+        locked = list(
+            Budget.all_objects.select_for_update().filter(pk__in=budget_ids).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        return _recompute(Budget.all_objects.filter(pk__in=locked))
+
+
+def rebuild_budget_counters(tenant_id=None):
+    """Recompute a tenant's budget counters from commitments and posted aggregates."""
+    from .models import Budget
+
+    with transaction.atomic():
+        return _recompute(
+            Budget.all_objects.filter(is_deleted=False, fiscal_year__tenant_id=tenant_id)
+        )
+
+
+# ── Availability checks ─────────────────────────────────────────────────────
+
+def _line_key(account, cost_center):
+    """(account_id, cost_center_id) as strings; accepts instances or ids."""
+    cost_center_id = getattr(cost_center, 'pk', cost_center)
+    return (str(getattr(account, 'pk', account)), str(cost_center_id) if cost_center_id else None)
+
+
+def check_budget_lines(lines, fiscal_year, reserve=False):
+    """
+    Check the availability of every line of a document at once.
+
+    Args:
+        lines: Iterable of dicts with 'account', 'cost_center' (None for
+            budgets without one) and 'amount'; accounts and cost centers may
+            be instances or ids. Lines on the same budget are checked against
+            their combined amount.
+        fiscal_year: FiscalYear (or its id) the spend falls in
+        reserve: Lock the matched budget rows (select_for_update) so the
+            result holds until the caller's transaction ends; must be called
+            inside a transaction
+
+    Returns:
+        (bool, list): whether every line is covered, and per line the
+        budget figures in the same shape as check_budget_availability.
+    """
+    from .models import Budget
+
+    lines = list(lines)
+    keys = {_line_key(line['account'], line.get('cost_center')) for line in lines}
+    if not keys:
+        return True, []
+
+    match = Q()
+    for account_id, cost_center_id in keys:
+        if cost_center_id:
+            match |= Q(account_id=account_id, cost_center_id=cost_center_id)
+        else:
+            match |= Q(account_id=account_id, cost_center__isnull=True)
+
+    qs = Budget.objects.filter(match, fiscal_year=fiscal_year)
+    if reserve:
+        qs = qs.select_for_update().order_by('pk')
+    budgets = {}
+    for budget in qs.only(
+        'pk', 'account_id', 'cost_center_id', 'original_amount', 'revised_amount',
+        'committed_amount', 'actual_amount',
+    ):
+        budgets.setdefault(_line_key(budget.account_id, budget.cost_center_id), budget)
+
+    requested = defaultdict(Decimal)
+    for line in lines:
+        requested[_line_key(line['account'], line.get('cost_center'))] += Decimal(line['amount'])
+
+    all_ok = True
+    results = []
+    for line in lines:
+        key = _line_key(line['account'], line.get('cost_center'))
+        budget = budgets.get(key)
+        amount = Decimal(line['amount'])
+        if budget is None:
+            all_ok = False
+            results.append({
+                'error': 'No budget found for the given account, cost center, and fiscal year.',
+                'account': key[0],
+                'cost_center': key[1],
+                'fiscal_year': str(getattr(fiscal_year, 'pk', fiscal_year)),
+                'requested': amount,
+            })
+            continue
+        available = budget.available_amount
+        shortfall = max(requested[key] - available, ZERO)
+        all_ok = all_ok and not shortfall
+        results.append({
+            'budget_id': str(budget.pk),
+            'budget_amount': budget.current_amount,
+            'committed': budget.committed_amount,
+            'actual': budget.actual_amount,
+            'available': available,
+            'requested': amount,
+            'shortfall': shortfall,
+        })
+    return all_ok, results
@@ -0,0 +1,332 @@
+"""
+Batch depreciation engine.
+
+A run loads every active asset once, together with the start date of the
+last period it was depreciated for (one grouped query), computes the
+period's depreciation for all of them in memory and writes the results in
+bulk:
+
+- one summarized journal entry per fiscal period (depreciation expense
+  against accumulated depreciation)
+- AssetDepreciation records via bulk_create, already linked to the entry
+- the assets' accumulated depreciation and book value via bulk_update
+
+With ``catch_up`` the open periods before the target are processed too, in
+date order, and each asset is depreciated for those after its last
+depreciated period, so months missed by a failed or skipped run are booked
+in their own periods. With
+``dry_run`` nothing is written and the result carries a preview of the
+amounts instead.
+"""
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .posting import DEFAULT_ACCOUNT_CODES, AccountResolver, JournalBuilder, allocate_entry_numbers
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+BATCH_SIZE = 1000
+PREVIEW_LIMIT = 200
+
+
+def _calculate_syd_depreciation(acquisition_cost, salvage_value, useful_life_months, months_elapsed):
+    """
+    Sum-of-Years-Digits monthly depreciation.
+
+    SYD uses years as the base:
+        remaining_years = total_years - years_elapsed
+        yearly_depreciation = (depreciable_base * remaining_years) / sum_of_years
+        monthly = yearly / 12
+
+    We convert months to years for the formula, computing the current year's
+    monthly rate.
+    """
+    depreciable_base = acquisition_cost - salvage_value
+    if depreciable_base <= ZERO:
+        return ZERO
+
+    useful_life_years = Decimal(useful_life_months) / Decimal('12')
+    # Round to nearest whole year for SYD formula (standard practice)
+    n = int(useful_life_years) if useful_life_years == int(useful_life_years) else int(useful_life_years) + 1
+    if n <= 0:
+        return ZERO
+
+    sum_of_years = Decimal(n * (n + 1)) / Decimal('2')
+
+    # Determine which "year" we are in (1-based)
+    current_year = int(months_elapsed / 12) + 1
+    if current_year > n:
+        return ZERO
+
+    remaining_years = n - current_year + 1
+    yearly_depreciation = (depreciable_base * Decimal(remaining_years)) / sum_of_years
+    monthly_depreciation = yearly_depreciation / Decimal('12')
+
+    return monthly_depreciation.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def monthly_depreciation(method, cost, salvage, useful_life, book_value, months_elapsed):
+    """
+    One month's depreciation for an asset, or None for an unsupported method.
+
+    Methods:
+        - STRAIGHT_LINE:     (cost - salvage) / useful_life_months
+        - DECLINING_BALANCE: book_value * (2 / useful_life_months)  [double declining]
+        - SUM_OF_YEARS:      standard SYD formula
+    """
+    if method == 'STRAIGHT_LINE':
+        return ((cost - salvage) / Decimal(useful_life)).quantize(CENT, rounding=ROUND_HALF_UP)
+    if method == 'DECLINING_BALANCE':
+        rate = Decimal('2') / Decimal(useful_life)
+        return (book_value * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+    if method == 'SUM_OF_YEARS':
+        return _calculate_syd_depreciation(cost, salvage, useful_life, months_elapsed)
+    return None
+
+
+@dataclass
+class _AssetState:
+    """Working copy of an asset's depreciation fields during a run."""
+    pk: object
+    asset_number: str
+    acquisition_date: object
+    cost: Decimal
+    salvage: Decimal
+    useful_life: int
+    method: str
+    accumulated: Decimal
+    book_value: Decimal
+    last_depreciated_on: object
+    changed: bool = False
+
+
+def load_depreciable_assets(tenant=None):
+    """Active assets with the start date of their last depreciated period."""
+    Asset = apps.get_model('inventory', 'Asset')
+
+    qs = Asset.all_objects.filter(status=Asset.Status.ACTIVE, is_deleted=False)
+    if tenant:
+        qs = qs.filter(tenant=tenant)
+    rows = qs.annotate(
+        last_depreciated_on=Max(
+            'depreciations__fiscal_period__start_date',
+            filter=Q(depreciations__is_deleted=False),
+        ),
+    ).order_by('asset_number').values_list(
+        'pk', 'asset_number', 'acquisition_date', 'acquisition_cost', 'salvage_value',
+        'useful_life_months', 'depreciation_method', 'accumulated_depreciation',
+        'current_value', 'last_depreciated_on',
+    )
+    return [_AssetState(*row) for row in rows.iterator(chunk_size=BATCH_SIZE)]
+
+
+def periods_to_run(fiscal_period, catch_up=False):
+    """The target period, preceded by the earlier open periods when catching up."""
+    if not catch_up:
+        return [fiscal_period]
+    FiscalPeriod = apps.get_model('finance', 'FiscalPeriod')
+    return list(
+        FiscalPeriod.all_objects.filter(
+            tenant_id=fiscal_period.tenant_id, is_deleted=False, is_closed=False,
+            start_date__lte=fiscal_period.start_date,
+        ).order_by('start_date')
+    )
+
+
+def compute_period(assets, period):
+    """
+    Depreciate every eligible asset for ``period``, advancing its state.
+
+    Returns (rows, skipped) where each row is (asset_state, amount,
+    accumulated_depreciation, book_value) as of the end of the period.
+    """
+    rows = []
+    skipped = 0
+    for asset in assets:
+        if asset.last_depreciated_on and asset.last_depreciated_on >= period.start_date:
+            skipped += 1
+            continue
+        if asset.book_value <= asset.salvage or asset.cost - asset.salvage <= ZERO:
+            skipped += 1
+            continue
+        months_elapsed = (
+            (period.start_date.year - asset.acquisition_date.year) * 12
+            + (period.start_date.month - asset.acquisition_date.month)
+        )
+        if months_elapsed < 0 or asset.useful_life <= 0:
+            skipped += 1
+            continue
+
+        amount = monthly_depreciation(
+            asset.method, asset.cost, asset.salvage, asset.useful_life,
+            asset.book_value, months_elapsed,
+        )
+        if amount is None:
+            logger.warning(
+                f"Unsupported depreciation method '{asset.method}' for asset {asset.asset_number}"
+            )
+            skipped += 1
+            continue
+
+        # Never depreciate below salvage value
+        amount = min(amount, asset.book_value - asset.salvage)
+        if amount <= ZERO:
+            skipped += 1
+            continue
+
+        asset.accumulated += amount
+        asset.book_value = asset.cost - asset.accumulated
+        asset.last_depreciated_on = period.start_date
+        asset.changed = True
+        rows.append((asset, amount, asset.accumulated, asset.book_value))
+    return rows, skipped
+
+
+def _write_period(period, rows, accounts, entry_number):
+    """Post the period's summarized journal and bulk-create its records."""
+    AssetDepreciation = apps.get_model('inventory', 'AssetDepreciation')
+
+    total = sum((amount for _, amount, _, _ in rows), ZERO)
+    expense_account, accumulated_account = accounts
+    builder = JournalBuilder()
+    builder.debit(expense_account, total, f"Depreciation expense - {period.name}")
+    builder.credit(accumulated_account, total, f"Accumulated depreciation - {period.name}")
+    entry = builder.post(
+        tenant=period.tenant,
+        fiscal_period=period,
+        journal_date=period.end_date,
+        description=f"Monthly depreciation - {period.name}",
+        source='DEPRECIATION',
+        source_reference=f"DEP-{period.name}",
+        entry_prefix='JV-DEP',
+        entry_number=entry_number,
+    )
+
+    AssetDepreciation.objects.bulk_create(
+        [
+            AssetDepreciation(
+                tenant=period.tenant,
+                asset_id=asset.pk,
+                fiscal_period=period,
+                depreciation_amount=amount,
+                accumulated_depreciation=accumulated,
+                book_value=book_value,
+                journal_entry=entry,
+            )
+            for asset, amount, accumulated, book_value in rows
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return entry
+
+
+def _save_assets(assets):
+    """Write the advanced accumulated depreciation and book values back."""
+    Asset = apps.get_model('inventory', 'Asset')
+
+    now = timezone.now()
+    Asset.all_objects.bulk_update(
+        [
+            Asset(pk=a.pk, accumulated_depreciation=a.accumulated, current_value=a.book_value,
+                  updated_at=now)
+            for a in assets if a.changed
+        ],
+        ['accumulated_depreciation', 'current_value', 'updated_at'],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def run_depreciation(fiscal_period, dry_run=False, catch_up=False):
+    """
+    Depreciate all active assets for ``fiscal_period``.
+
+    Returns a summary with per-period totals and, for dry runs, a preview of
+    the per-asset amounts. Raises ValueError when the depreciation GL
+    accounts are missing (not checked for dry runs).
+    """
+    tenant = fiscal_period.tenant
+    accounts = None
+    if not dry_run:
+        resolver = AccountResolver(tenant)
+        accounts = (
+            resolver.code(DEFAULT_ACCOUNT_CODES['DEPRECIATION_EXPENSE']),
+            resolver.code(DEFAULT_ACCOUNT_CODES['ACCUMULATED_DEPRECIATION']),
+        )
+        if not all(accounts):
+            raise ValueError(
+                "Depreciation GL accounts not configured. "
+                f"Need accounts with codes: {DEFAULT_ACCOUNT_CODES['DEPRECIATION_EXPENSE']}, "
+                f"{DEFAULT_ACCOUNT_CODES['ACCUMULATED_DEPRECIATION']}"
+            )
+
+    with transaction.atomic():
+        periods = periods_to_run(fiscal_period, catch_up)
+        if not dry_run:
+            # Serialize runs over the same periods before reading asset state
+            FiscalPeriod = apps.get_model('finance', 'FiscalPeriod')
+            list(FiscalPeriod.all_objects.select_for_update()
+                 .filter(pk__in=[p.pk for p in periods]).order_by('pk').values_list('pk'))
+
+        assets = load_depreciable_assets(tenant)
+        schedule = [(period, *compute_period(assets, period)) for period in periods]
+
+        entries = {}
+        if not dry_run:
+            posted = [(period, rows) for period, rows, _ in schedule if rows]
+            numbers = allocate_entry_numbers('JV-DEP', len(posted), tenant=tenant) if posted else []
+            for (period, rows), number in zip(posted, numbers):
+                entries[period.pk] = _write_period(period, rows, accounts, number).entry_number
+            _save_assets(assets)
+
+    depreciated = {asset.pk for _, rows, _ in schedule for asset, *_ in rows}
+    total = sum((amount for _, rows, _ in schedule for _, amount, _, _ in rows), ZERO)
+    result = {
+        'status': 'success',
+        'dry_run': dry_run,
+        'fiscal_period_id': str(fiscal_period.pk),
+        'assets_processed': len(depreciated),
+        'assets_skipped': len(assets) - len(depreciated),
+        'total_depreciation': str(total),
+        'journal_entry': entries.get(fiscal_period.pk),
+        'periods': [
+            {
+                'fiscal_period_id': str(period.pk),
+                'fiscal_period': period.name,
+                'assets': len(rows),
+                'assets_skipped': skipped,
+                'total_depreciation': str(sum((r[1] for r in rows), ZERO)),
+                'journal_entry': entries.get(period.pk),
+            }
+            for period, rows, skipped in schedule
+        ],
+    }
+    if dry_run:
+        preview = [
+            {
+                'asset_number': asset.asset_number,
+                'fiscal_period': period.name,
+                'depreciation_amount': str(amount),
+                'accumulated_depreciation': str(accumulated),
+                'book_value': str(book_value),
+            }
+            for period, rows, _ in schedule
+            for asset, amount, accumulated, book_value in rows
+        ]
+        result['preview'] = preview[:PREVIEW_LIMIT]
+        result['preview_truncated'] = len(preview) > PREVIEW_LIMIT
+
+    logger.info(
+        f"Depreciation {'preview' if dry_run else 'complete'} for period {fiscal_period.name}: "
+        f"{result['assets_processed']} assets processed, {result['assets_skipped']} skipped, "
+        f"total depreciation: {total}"
+    )
+    return result
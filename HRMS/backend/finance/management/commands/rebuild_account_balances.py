@@ -0,0 +1,62 @@
+"""
+Rebuild or verify per-period account balance snapshots and the per cost
+center/department aggregates (a rebuild also recomputes the budget
+committed/actual counters).
+
+Run with --verify after bulk imports that write journal lines directly.
+
+Usage:
+    # Check aggregates against the raw ledger (non-zero exit on mismatch)
+    python manage.py rebuild_account_balances --verify
+
+    # Recreate snapshots from JournalLine and refreeze closed periods
+    python manage.py rebuild_account_balances
+
+    # Limit to one tenant
+    python manage.py rebuild_account_balances --tenant <organization-id>
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.balances import rebuild_balances, verify_balances
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify account balance aggregates against the posted ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare snapshots with the ledger; do not rebuild')
+        parser.add_argument('--tenant', help='Organization id to process (default: all)')
+
+    def _tenant_ids(self, tenant):
+        from finance.models import FiscalPeriod
+
+        if tenant:
+            return [tenant]
+        return list(
+            FiscalPeriod.all_objects.values_list('tenant_id', flat=True).distinct().order_by()
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+        for tenant_id in self._tenant_ids(options['tenant']):
+            label = tenant_id or 'no tenant'
+            if not options['verify']:
+                frozen = rebuild_balances(tenant_id)
+                self.stdout.write(f'Rebuilt balances for {label} ({frozen} closed periods frozen)')
+
+            problems = verify_balances(tenant_id)
+            if problems:
+                failures += len(problems)
+                self.stdout.write(self.style.ERROR(f'{len(problems)} mismatches for {label}:'))
+                for p in problems[:50]:
+                    self.stdout.write(
+                        f"  account={p['account_id']} period={p['fiscal_period_id']} "
+                        f"{p['check']}: expected {p['expected']}, found {p['actual']}"
+                    )
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Balances consistent for {label}'))
+
+        if failures:
+            raise CommandError(f'{failures} balance mismatches found')
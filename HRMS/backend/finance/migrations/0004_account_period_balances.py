@@ -0,0 +1,74 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_period_balances(apps, schema_editor):
+    """Seed period totals from the posted ledger (snapshots start unfrozen)."""
+    JournalLine = apps.get_model('finance', 'JournalLine')
+    AccountPeriodBalance = apps.get_model('finance', 'AccountPeriodBalance')
+
+    rows = JournalLine.objects.filter(
+        is_deleted=False, journal_entry__status='POSTED',
+    ).values(
+        'account_id', 'journal_entry__fiscal_period_id', 'journal_entry__fiscal_period__tenant_id',
+    ).annotate(
+        debit=Sum('debit_amount'), credit=Sum('credit_amount'),
+    ).order_by()
+
+    AccountPeriodBalance.objects.bulk_create([
+        AccountPeriodBalance(
+            tenant_id=row['journal_entry__fiscal_period__tenant_id'],
+            account_id=row['account_id'],
+            fiscal_period_id=row['journal_entry__fiscal_period_id'],
+            period_debit=row['debit'] or 0,
+            period_credit=row['credit'] or 0,
+            closing_balance=(row['debit'] or 0) - (row['credit'] or 0),
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_add_tax_credit_debit_recurring'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPeriodBalance',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('period_debit', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('period_credit', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('is_frozen', models.BooleanField(default=False)),
+                ('frozen_at', models.DateTimeField(blank=True, null=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='finance.account')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('fiscal_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_balances', to='finance.fiscalperiod')),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'finance_account_period_balances',
+                'ordering': ['fiscal_period', 'account__code'],
+                'indexes': [models.Index(fields=['fiscal_period', 'is_frozen'], name='finance_acc_fiscal__88aef3_idx')],
+                'unique_together': {('account', 'fiscal_period')},
+            },
+        ),
+        migrations.RunPython(backfill_period_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:12
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_dimension_balances(apps, schema_editor):
+    """Seed per cost center/department totals from the posted ledger."""
+    JournalLine = apps.get_model('finance', 'JournalLine')
+    AccountDimensionBalance = apps.get_model('finance', 'AccountDimensionBalance')
+
+    rows = JournalLine.objects.filter(
+        is_deleted=False, journal_entry__status='POSTED',
+    ).values(
+        'account_id', 'cost_center_id', 'department_id',
+        'journal_entry__fiscal_period_id', 'journal_entry__fiscal_period__tenant_id',
+    ).annotate(
+        debit=Sum('debit_amount'), credit=Sum('credit_amount'),
+    ).order_by()
+
+    AccountDimensionBalance.objects.bulk_create([
+        AccountDimensionBalance(
+            tenant_id=row['journal_entry__fiscal_period__tenant_id'],
+            account_id=row['account_id'],
+            fiscal_period_id=row['journal_entry__fiscal_period_id'],
+            cost_center_id=row['cost_center_id'],
+            department_id=row['department_id'],
+            dimension_key=f"{row['cost_center_id'] or '-'}:{row['department_id'] or '-'}",
+            period_debit=row['debit'] or 0,
+            period_credit=row['credit'] or 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_account_period_balances'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDimensionBalance',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('dimension_key', models.CharField(max_length=80)),
+                ('period_debit', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('period_credit', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dimension_balances', to='finance.account')),
+                ('cost_center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='account_balances', to='organization.costcenter')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='account_balances', to='organization.department')),
+                ('fiscal_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dimension_balances', to='finance.fiscalperiod')),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'finance_account_dimension_balances',
+                'ordering': ['fiscal_period', 'account__code'],
+                'unique_together': {('account', 'fiscal_period', 'dimension_key')},
+            },
+        ),
+        migrations.RunPython(backfill_dimension_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_account_dimension_balances'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='match_confidence',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='0-100; lines below the auto-reconcile threshold are suggestions', null=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='match_method',
+            field=models.CharField(blank=True, choices=[('EXACT', 'Exact'), ('TOLERANCE', 'Tolerance'), ('GROUPED', 'Many-to-one'), ('MANUAL', 'Manual')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='bankstatementline',
+            index=models.Index(fields=['statement', 'is_reconciled'], name='finance_ban_stateme_933c26_idx'),
+        ),
+    ]
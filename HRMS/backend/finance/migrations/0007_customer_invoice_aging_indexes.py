@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_bank_statement_line_matching'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customerinvoice',
+            index=models.Index(fields=['customer', 'status'], name='finance_cus_custome_a11d5e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerinvoice',
+            index=models.Index(fields=['status', '-due_date'], name='finance_cus_status_3ce5cd_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:33
+
+from django.conf import settings
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_budget_counters(apps, schema_editor):
+    """Seed committed/actual counters from commitments and the posted aggregates."""
+    Budget = apps.get_model('finance', 'Budget')
+    BudgetCommitment = apps.get_model('finance', 'BudgetCommitment')
+    AccountDimensionBalance = apps.get_model('finance', 'AccountDimensionBalance')
+
+    committed = dict(
+        BudgetCommitment.objects.filter(is_deleted=False, status='COMMITTED')
+        .values('budget_id').annotate(total=Sum('amount')).order_by()
+        .values_list('budget_id', 'total')
+    )
+    totals = defaultdict(list)
+    for row in AccountDimensionBalance.objects.values(
+        'fiscal_period__fiscal_year_id', 'account_id', 'cost_center_id', 'department_id',
+    ).annotate(debit=Sum('period_debit'), credit=Sum('period_credit')).order_by():
+        totals[(row['fiscal_period__fiscal_year_id'], row['account_id'])].append(row)
+
+    budgets = []
+    for budget in Budget.objects.filter(is_deleted=False).select_related('account'):
+        debit = credit = Decimal('0')
+        for row in totals[(budget.fiscal_year_id, budget.account_id)]:
+            if budget.cost_center_id and row['cost_center_id'] != budget.cost_center_id:
+                continue
+            if budget.department_id and row['department_id'] != budget.department_id:
+                continue
+            debit += row['debit'] or 0
+            credit += row['credit'] or 0
+        budget.committed_amount = committed.get(budget.pk) or 0
+        budget.actual_amount = credit - debit if budget.account.account_type == 'REVENUE' else debit - credit
+        budgets.append(budget)
+    Budget.objects.bulk_update(budgets, ['committed_amount', 'actual_amount'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_customer_invoice_aging_indexes'),
+        ('organization', '0007_add_license_model'),
+        ('projects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='actual_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=17),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='committed_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=17),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['fiscal_year', 'account', 'cost_center'], name='finance_bud_fiscal__1369be_idx'),
+        ),
+        migrations.RunPython(backfill_budget_counters, migrations.RunPython.noop),
+    ]
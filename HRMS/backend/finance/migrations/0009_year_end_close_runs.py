@@ -0,0 +1,87 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_budget_counters'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YearEndCloseRun',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='RUNNING', max_length=12)),
+                ('chunk_size', models.PositiveIntegerField(default=200)),
+                ('phase_timings', models.JSONField(blank=True, default=dict, help_text='Start, finish and duration of each phase')),
+                ('revenue_total', models.DecimalField(blank=True, decimal_places=2, max_digits=17, null=True)),
+                ('expense_total', models.DecimalField(blank=True, decimal_places=2, max_digits=17, null=True)),
+                ('net_income', models.DecimalField(blank=True, decimal_places=2, max_digits=17, null=True)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('closing_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='year_end_close_runs', to='finance.journalentry')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('fiscal_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='close_runs', to='finance.fiscalyear')),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'finance_year_end_close_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='YearEndCloseChunk',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sequence', models.PositiveIntegerField()),
+                ('first_code', models.CharField(max_length=20)),
+                ('last_code', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('account_count', models.PositiveIntegerField(default=0)),
+                ('revenue_total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('balances', models.JSONField(blank=True, default=list, help_text='[account_id, account_type, balance] of each account to close')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='finance.yearendcloserun')),
+            ],
+            options={
+                'db_table': 'finance_year_end_close_chunks',
+                'ordering': ['run', 'sequence'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='yearendcloserun',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('status', 'COMPLETED'), _negated=True), ('is_deleted', False)), fields=('fiscal_year',), name='finance_one_open_close_run_per_year'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='yearendclosechunk',
+            unique_together={('run', 'sequence')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_year_end_close_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Set by generators so the same occurrence is never posted twice', max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -121,6 +121,10 @@ class JournalEntry(BaseModel):
         'self', on_delete=models.SET_NULL, null=True, blank=True,
         related_name='reversals'
     )
+    idempotency_key = models.CharField(
+        max_length=100, null=True, blank=True, unique=True,
+        help_text='Set by generators so the same occurrence is never posted twice'
+    )
 
     class Meta:
         db_table = 'finance_journal_entries'
@@ -169,6 +173,74 @@ class JournalLine(BaseModel):
         return f"{self.account.code} {side} {amt}"
 
 
+class AccountPeriodBalance(BaseModel):
+    """
+    Posted totals of an account for one fiscal period (see finance.balances).
+
+    period_debit/period_credit are maintained as entries are posted or
+    reversed. opening_balance/closing_balance (net debit) are materialised
+    when the period closes and are only authoritative while is_frozen.
+    """
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name='period_balances'
+    )
+    fiscal_period = models.ForeignKey(
+        FiscalPeriod, on_delete=models.CASCADE, related_name='account_balances'
+    )
+    opening_balance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    period_debit = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    period_credit = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    closing_balance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    is_frozen = models.BooleanField(default=False)
+    frozen_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'finance_account_period_balances'
+        ordering = ['fiscal_period', 'account__code']
+        unique_together = [('account', 'fiscal_period')]
+        indexes = [
+            models.Index(fields=['fiscal_period', 'is_frozen']),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} @ {self.fiscal_period}: {self.closing_balance}"
+
+
+class AccountDimensionBalance(BaseModel):
+    """
+    Posted totals of an account for one fiscal period, per cost center and
+    department combination (see finance.balances). Used for budget vs actual.
+
+    dimension_key identifies the combination so rows stay unique even when a
+    cost center or department is later removed and its FK is nulled.
+    """
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name='dimension_balances'
+    )
+    fiscal_period = models.ForeignKey(
+        FiscalPeriod, on_delete=models.CASCADE, related_name='dimension_balances'
+    )
+    cost_center = models.ForeignKey(
+        'organization.CostCenter', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='account_balances'
+    )
+    department = models.ForeignKey(
+        'organization.Department', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='account_balances'
+    )
+    dimension_key = models.CharField(max_length=80)
+    period_debit = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    period_credit = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'finance_account_dimension_balances'
+        ordering = ['fiscal_period', 'account__code']
+        unique_together = [('account', 'fiscal_period', 'dimension_key')]
+
+    def __str__(self):
+        return f"{self.account.code} @ {self.fiscal_period} [{self.dimension_key}]"
+
+
 class Budget(BaseModel):
     """Budget per account per dimension."""
     class BudgetStatus(models.TextChoices):
@@ -205,10 +277,16 @@ class Budget(BaseModel):
     status = models.CharField(
         max_length=10, choices=BudgetStatus.choices, default=BudgetStatus.DRAFT
     )
+    # Consumption counters maintained by finance.budgets
+    committed_amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    actual_amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
 
     class Meta:
         db_table = 'finance_budgets'
         ordering = ['fiscal_year', 'account__code']
+        indexes = [
+            models.Index(fields=['fiscal_year', 'account', 'cost_center']),
+        ]
 
     def __str__(self):
         return f"Budget: {self.account.code} - {self.fiscal_year.name}"
@@ -217,6 +295,10 @@ class Budget(BaseModel):
     def current_amount(self):
         return self.revised_amount if self.revised_amount else self.original_amount
 
+    @property
+    def available_amount(self):
+        return self.current_amount - self.committed_amount - self.actual_amount
+
 
 class BudgetCommitment(BaseModel):
     """Encumbrance tracking for budgets."""
@@ -369,6 +451,10 @@ class CustomerInvoice(BaseModel):
     class Meta:
         db_table = 'finance_customer_invoices'
         ordering = ['-invoice_date']
+        indexes = [
+            models.Index(fields=['customer', 'status']),
+            models.Index(fields=['status', '-due_date']),
+        ]
 
     def __str__(self):
         return f"{self.customer.name} - {self.invoice_number}"
@@ -461,6 +547,12 @@ class BankStatement(BaseModel):
 
 class BankStatementLine(BaseModel):
     """Individual transactions on a bank statement."""
+    class MatchMethod(models.TextChoices):
+        EXACT = 'EXACT', 'Exact'
+        TOLERANCE = 'TOLERANCE', 'Tolerance'
+        GROUPED = 'GROUPED', 'Many-to-one'
+        MANUAL = 'MANUAL', 'Manual'
+
     statement = models.ForeignKey(
         BankStatement, on_delete=models.CASCADE, related_name='lines'
     )
@@ -474,10 +566,17 @@ class BankStatementLine(BaseModel):
         related_name='statement_lines'
     )
     reference = models.CharField(max_length=100, blank=True)
+    match_method = models.CharField(max_length=10, choices=MatchMethod.choices, blank=True)
+    match_confidence = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text='0-100; lines below the auto-reconcile threshold are suggestions'
+    )
 
     class Meta:
         db_table = 'finance_bank_statement_lines'
         ordering = ['transaction_date']
+        indexes = [
+            models.Index(fields=['statement', 'is_reconciled']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_date} - {self.description}"
@@ -663,3 +762,90 @@ class RecurringJournal(BaseModel):
 
     def __str__(self):
         return f"{self.template_name} ({self.frequency})"
+
+
+# =========================================================================
+# Year-End Close
+# =========================================================================
+
+class YearEndCloseRun(BaseModel):
+    """
+    A resumable year-end close of one fiscal year (see finance.year_end).
+
+    The revenue and expense accounts are split into code ranges (chunks)
+    that are aggregated independently; the closing entry is posted by a
+    single finalize step once every chunk is done.
+    """
+    class RunStatus(models.TextChoices):
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    fiscal_year = models.ForeignKey(
+        FiscalYear, on_delete=models.CASCADE, related_name='close_runs'
+    )
+    status = models.CharField(max_length=12, choices=RunStatus.choices, default=RunStatus.RUNNING)
+    chunk_size = models.PositiveIntegerField(default=200)
+    phase_timings = models.JSONField(
+        default=dict, blank=True, help_text='Start, finish and duration of each phase'
+    )
+    revenue_total = models.DecimalField(max_digits=17, decimal_places=2, null=True, blank=True)
+    expense_total = models.DecimalField(max_digits=17, decimal_places=2, null=True, blank=True)
+    net_income = models.DecimalField(max_digits=17, decimal_places=2, null=True, blank=True)
+    closing_entry = models.ForeignKey(
+        JournalEntry, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='year_end_close_runs'
+    )
+    task_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'finance_year_end_close_runs'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fiscal_year'],
+                condition=~models.Q(status='COMPLETED') & models.Q(is_deleted=False),
+                name='finance_one_open_close_run_per_year',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Year-end close {self.fiscal_year.name} ({self.status})"
+
+
+class YearEndCloseChunk(BaseModel):
+    """Checkpointed closing balances of one account code range of a close run."""
+    class ChunkStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    run = models.ForeignKey(
+        YearEndCloseRun, on_delete=models.CASCADE, related_name='chunks'
+    )
+    sequence = models.PositiveIntegerField()
+    first_code = models.CharField(max_length=20)
+    last_code = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=ChunkStatus.choices, default=ChunkStatus.PENDING)
+    account_count = models.PositiveIntegerField(default=0)
+    revenue_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    balances = models.JSONField(
+        default=list, blank=True,
+        help_text='[account_id, account_type, balance] of each account to close'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'finance_year_end_close_chunks'
+        ordering = ['run', 'sequence']
+        unique_together = [('run', 'sequence')]
+
+    def __str__(self):
+        return f"{self.run} #{self.sequence}: {self.first_code}-{self.last_code}"
@@ -0,0 +1,278 @@
+"""
+GL posting engine shared by the post_*_to_gl tasks.
+
+- AccountResolver resolves GL accounts once per posting run: account codes
+  and pay components are looked up on first use and cached, so a payroll run
+  with tens of thousands of detail lines does one lookup per distinct
+  component instead of one per line.
+- JournalBuilder accumulates debit/credit amounts per (account, cost center,
+  department, project) and writes a single posted JournalEntry with its lines
+  in one bulk_create, applying them to the period balances in the same
+  transaction.
+"""
+
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.apps import apps
+from django.utils import timezone
+
+from core.numbering import allocate_numbers
+
+from .balances import record_posting
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+# ---------------------------------------------------------------------------
+# Default GL account code mapping used when a PayComponent has no gl_account
+# ---------------------------------------------------------------------------
+DEFAULT_ACCOUNT_CODES = {
+    # Expense (debit) side - maps to Account.code (max 20 chars)
+    'BASIC': '5110',
+    'ALLOWANCE': '5120',
+    'BONUS': '5130',
+    'OVERTIME': '5140',
+    'SHIFT': '5150',
+    'EMPLOYER_SSNIT': '5160',
+    'EMPLOYER_TIER2': '5170',
+    'OTHER_EARNING': '5110',
+    # Liability / payable (credit) side
+    'PAYE_PAYABLE': '2130',
+    'SSNIT_PAYABLE': '2140',
+    'TIER2_PAYABLE': '2150',
+    'NET_PAY_PAYABLE': '2160',
+    'LOAN_PAYABLE': '2170',
+    'DEDUCTION_PAYABLE': '2180',
+    # Depreciation
+    'DEPRECIATION_EXPENSE': '5280',
+    'ACCUMULATED_DEPRECIATION': '1250',
+}
+
+
+def _lookup_account(code, tenant=None):
+    """
+    Look up an Account by its code.  Returns the Account instance or None.
+    """
+    from finance.models import Account
+    try:
+        qs = Account.all_objects.filter(code=code, is_active=True)
+        if tenant:
+            qs = qs.filter(tenant=tenant)
+        return qs.first()
+    except Exception:
+        return None
+
+
+def _resolve_account(component, side='expense', tenant=None, lookup=None):
+    """
+    Resolve the GL account for a payroll component.
+
+    For earnings the *expense* account is on the debit side (component.gl_account).
+    For employer contributions we prefer employer_gl_account, falling back to gl_account.
+    For deductions (credit side) we use the component's gl_account (the liability).
+
+    If the component has no gl_account configured, we fall back to
+    DEFAULT_ACCOUNT_CODES based on the component's category/type.  ``lookup``
+    replaces ``_lookup_account`` for those codes (AccountResolver passes its
+    cached lookup).
+    """
+    PayComponent = apps.get_model('payroll', 'PayComponent')
+
+    # 1. Try explicit GL account on the component
+    if side == 'employer' and component.employer_gl_account_id:
+        return component.employer_gl_account
+    if component.gl_account_id:
+        return component.gl_account
+
+    # 2. Fall back to default account codes
+    category = component.category  # BASIC, ALLOWANCE, BONUS, etc.
+    comp_type = component.component_type  # EARNING, DEDUCTION, EMPLOYER
+
+    if comp_type == PayComponent.ComponentType.EMPLOYER_CONTRIBUTION:
+        if 'SSNIT' in component.code.upper() or 'SSNIT' in component.name.upper():
+            default_code = DEFAULT_ACCOUNT_CODES.get('EMPLOYER_SSNIT')
+        elif 'TIER' in component.code.upper() or 'TIER' in component.name.upper():
+            default_code = DEFAULT_ACCOUNT_CODES.get('EMPLOYER_TIER2')
+        else:
+            default_code = DEFAULT_ACCOUNT_CODES.get('EMPLOYER_SSNIT')
+    elif comp_type == PayComponent.ComponentType.DEDUCTION:
+        if 'PAYE' in component.code.upper() or 'TAX' in component.code.upper():
+            default_code = DEFAULT_ACCOUNT_CODES.get('PAYE_PAYABLE')
+        elif 'SSNIT' in component.code.upper():
+            default_code = DEFAULT_ACCOUNT_CODES.get('SSNIT_PAYABLE')
+        elif 'TIER' in component.code.upper():
+            default_code = DEFAULT_ACCOUNT_CODES.get('TIER2_PAYABLE')
+        elif category == PayComponent.ComponentCategory.LOAN:
+            default_code = DEFAULT_ACCOUNT_CODES.get('LOAN_PAYABLE')
+        else:
+            default_code = DEFAULT_ACCOUNT_CODES.get('DEDUCTION_PAYABLE')
+    else:
+        # Earnings
+        default_code = DEFAULT_ACCOUNT_CODES.get(category, DEFAULT_ACCOUNT_CODES['OTHER_EARNING'])
+
+    if default_code:
+        acct = lookup(default_code) if lookup else _lookup_account(default_code, tenant=tenant)
+        if acct:
+            return acct
+
+    return None
+
+
+def _generate_entry_number(prefix, tenant=None):
+    """Allocate a journal entry number like JV-PAY-202602-0001 (see core.numbering)."""
+    return allocate_entry_numbers(prefix, 1, tenant=tenant)[0]
+
+
+def allocate_entry_numbers(prefix, count, tenant=None):
+    """Reserve a block of consecutive journal entry numbers for a bulk job."""
+    from finance.models import JournalEntry
+
+    return allocate_numbers(prefix, count, tenant=tenant, model=JournalEntry, field='entry_number')
+
+
+def open_fiscal_period(day):
+    """The open FiscalPeriod covering ``day`` (any tenant), or None."""
+    FiscalPeriod = apps.get_model('finance', 'FiscalPeriod')
+    return FiscalPeriod.all_objects.filter(
+        start_date__lte=day, end_date__gte=day, is_closed=False
+    ).first()
+
+
+class AccountResolver:
+    """Per-run cache of GL account lookups for one tenant."""
+
+    def __init__(self, tenant=None):
+        self.tenant = tenant
+        self._by_code = {}
+        self._by_component = {}
+
+    def code(self, code):
+        """Active Account with this code, or None."""
+        if code not in self._by_code:
+            self._by_code[code] = _lookup_account(code, tenant=self.tenant)
+        return self._by_code[code]
+
+    def component(self, component, side='expense'):
+        """GL account for a pay component on the given side (see _resolve_account)."""
+        key = (component.pk, side)
+        if key not in self._by_component:
+            self._by_component[key] = _resolve_account(
+                component, side=side, tenant=self.tenant, lookup=self.code,
+            )
+        return self._by_component[key]
+
+
+class JournalBuilder:
+    """
+    Accumulate journal amounts and write them as one posted entry.
+
+    Amounts added for the same account, side and dimensions are summed into a
+    single line; lines are rounded to cents and zero lines dropped. Negative
+    amounts are rejected (post the opposite side instead), and an entry whose
+    rounded debits and credits differ is not written.
+    """
+
+    def __init__(self):
+        self._amounts = defaultdict(Decimal)
+        self._accounts = {}
+        self._descriptions = {}
+
+    def _add(self, side, account, amount, description, cost_center_id, department_id, project_id):
+        if amount < ZERO:
+            raise ValueError(f"Negative {side} amount {amount} for account {account.code}")
+        key = (side, account.pk, cost_center_id, department_id, project_id)
+        self._amounts[key] += amount
+        self._accounts[account.pk] = account
+        self._descriptions.setdefault(key, description)
+
+    def debit(self, account, amount, description='', cost_center_id=None,
+              department_id=None, project_id=None):
+        self._add('debit', account, amount, description, cost_center_id, department_id, project_id)
+
+    def credit(self, account, amount, description='', cost_center_id=None,
+               department_id=None, project_id=None):
+        self._add('credit', account, amount, description, cost_center_id, department_id, project_id)
+
+    def _rounded(self):
+        for key, amount in self._amounts.items():
+            rounded = amount.quantize(CENT, rounding=ROUND_HALF_UP)
+            if rounded > ZERO:
+                yield key, rounded
+
+    def totals(self):
+        """(total_debit, total_credit) of the lines that will be written."""
+        debit = credit = ZERO
+        for (side, *_), amount in self._rounded():
+            if side == 'debit':
+                debit += amount
+            else:
+                credit += amount
+        return debit, credit
+
+    def is_empty(self):
+        return self.totals() == (ZERO, ZERO)
+
+    def post(self, *, tenant, fiscal_period, journal_date, description, source,
+             source_reference, entry_prefix, entry_number=None):
+        """
+        Create the posted JournalEntry and its lines.
+
+        ``entry_number`` may come from a block reserved with
+        allocate_entry_numbers; otherwise one is allocated for ``entry_prefix``.
+        Must be called inside a transaction; returns the entry.
+
+        Raises:
+            ValueError: If the rounded debits and credits differ
+        """
+        from .models import JournalEntry, JournalLine
+
+        total_debit, total_credit = self.totals()
+        if total_debit != total_credit:
+            raise ValueError(
+                f"Unbalanced journal '{description}': debits {total_debit} != credits {total_credit}"
+            )
+        entry = JournalEntry(
+            tenant=tenant,
+            entry_number=entry_number or _generate_entry_number(entry_prefix, tenant=tenant),
+            journal_date=journal_date,
+            fiscal_period=fiscal_period,
+            description=description,
+            source=source,
+            source_reference=source_reference,
+            status=JournalEntry.EntryStatus.POSTED,
+            total_debit=total_debit,
+            total_credit=total_credit,
+            posted_at=timezone.now(),
+        )
+        entry.save()
+
+        lines = []
+        line_totals = defaultdict(lambda: [ZERO, ZERO])
+        for key, amount in self._rounded():
+            side, account_id, cost_center_id, department_id, project_id = key
+            debit, credit = (amount, ZERO) if side == 'debit' else (ZERO, amount)
+            lines.append(JournalLine(
+                tenant=tenant,
+                journal_entry=entry,
+                account=self._accounts[account_id],
+                description=self._descriptions[key][:255],
+                debit_amount=debit,
+                credit_amount=credit,
+                cost_center_id=cost_center_id,
+                department_id=department_id,
+                project_id=project_id,
+            ))
+            totals = line_totals[(account_id, cost_center_id, department_id)]
+            totals[0] += debit
+            totals[1] += credit
+
+        JournalLine.objects.bulk_create(lines, batch_size=1000)
+        record_posting(entry, [
+            {'account_id': account_id, 'cost_center_id': cost_center_id,
+             'department_id': department_id, 'debit': debit, 'credit': credit}
+            for (account_id, cost_center_id, department_id), (debit, credit) in sorted(
+                line_totals.items(), key=lambda item: tuple(str(k) for k in item[0]),
+            )
+        ])
+        return entry
@@ -0,0 +1,463 @@
+"""
+Bank statement import and auto-reconciliation.
+
+Import streams a CSV or OFX-style statement file into BankStatementLine rows
+in batches, so a statement with tens of thousands of lines never has to be
+held in memory as a whole.
+
+Reconciliation loads the statement's open lines and the bank account's
+unreconciled payments once, indexes the payments by signed amount and by
+reference, and matches in memory in three passes:
+
+1. EXACT      same amount and a shared reference, or same amount on the same
+              day when exactly one payment qualifies
+2. TOLERANCE  amount within AMOUNT_TOLERANCE (bank charges) and date within
+              DATE_WINDOW_DAYS; the best candidate by reference, date and
+              amount wins
+3. GROUPED    several lines sharing a reference whose total settles one
+              payment (many-to-one)
+
+Every match gets a 0-100 confidence. Matches at or above
+AUTO_RECONCILE_CONFIDENCE are marked reconciled; weaker ones are stored as
+suggestions (matched_payment set, is_reconciled left False) for review.
+All changes are written with a single bulk_update.
+"""
+
+import bisect
+import csv
+import io
+import logging
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+
+DEFAULT_DATE_WINDOW_DAYS = 5
+DEFAULT_AMOUNT_TOLERANCE = Decimal('5.00')
+DEFAULT_AUTO_RECONCILE_CONFIDENCE = 90
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+REPORT_LIMIT = 200
+
+# CSV header aliases (compared lower-cased, without spaces/underscores)
+CSV_COLUMNS = {
+    'date': ('date', 'transactiondate', 'valuedate', 'postingdate', 'txndate'),
+    'description': ('description', 'narration', 'details', 'particulars', 'memo'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'debitamount', 'moneyout'),
+    'credit': ('credit', 'deposit', 'deposits', 'creditamount', 'moneyin'),
+    'amount': ('amount', 'transactionamount'),
+    'reference': ('reference', 'ref', 'chequeno', 'checkno', 'referenceno', 'transactionid'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d-%b-%Y', '%d %b %Y', '%Y%m%d')
+
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+def _setting(key, default):
+    return getattr(settings, 'BANK_RECONCILIATION_SETTINGS', {}).get(key, default)
+
+
+# ── Statement import ─────────────────────────────────────────────────────────
+
+def _parse_amount(value):
+    value = (value or '').strip().replace(',', '')
+    for symbol in ('GHS', 'GH₵', '₵', '$'):
+        value = value.replace(symbol, '')
+    negative = value.startswith('(') and value.endswith(')')
+    value = value.strip('()').strip()
+    if not value:
+        return ZERO
+    amount = Decimal(value)
+    return -amount if negative else amount
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def _csv_rows(stream):
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        return
+    normalised = [h.strip().lower().replace(' ', '').replace('_', '') for h in header]
+    columns = {}
+    for name, aliases in CSV_COLUMNS.items():
+        for i, h in enumerate(normalised):
+            if h in aliases:
+                columns[name] = i
+                break
+    if 'date' not in columns or not ({'amount', 'debit', 'credit'} & set(columns)):
+        raise ValueError("CSV needs a date column and an amount or debit/credit columns")
+
+    def cell(row, name):
+        i = columns.get(name)
+        return row[i] if i is not None and i < len(row) else ''
+
+    for line_no, row in enumerate(reader, start=2):
+        if not any(c.strip() for c in row):
+            continue
+        try:
+            if 'amount' in columns:
+                amount = _parse_amount(cell(row, 'amount'))
+                debit, credit = (-amount, ZERO) if amount < 0 else (ZERO, amount)
+            else:
+                debit = abs(_parse_amount(cell(row, 'debit')))
+                credit = abs(_parse_amount(cell(row, 'credit')))
+            yield {
+                'transaction_date': _parse_date(cell(row, 'date')),
+                'description': cell(row, 'description').strip(),
+                'reference': cell(row, 'reference').strip(),
+                'debit_amount': debit,
+                'credit_amount': credit,
+            }
+        except (ValueError, InvalidOperation) as e:
+            raise ValueError(f"Line {line_no}: {e}") from e
+
+
+def _ofx_rows(stream, chunk_size=64 * 1024):
+    buffer = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        last_end = 0
+        for match in OFX_TRANSACTION.finditer(buffer):
+            last_end = match.end()
+            tags = {k.upper(): v.strip() for k, v in OFX_TAG.findall(match.group(1))}
+            try:
+                amount = _parse_amount(tags.get('TRNAMT'))
+                posted = tags.get('DTPOSTED', '')[:8]
+                transaction_date = datetime.strptime(posted, '%Y%m%d').date()
+            except (ValueError, InvalidOperation) as e:
+                raise ValueError(f"Transaction {tags.get('FITID', '?')}: {e}") from e
+            yield {
+                'transaction_date': transaction_date,
+                'description': ' '.join(filter(None, (tags.get('NAME'), tags.get('MEMO')))),
+                'reference': tags.get('CHECKNUM') or tags.get('REFNUM') or tags.get('FITID', ''),
+                'debit_amount': -amount if amount < 0 else ZERO,
+                'credit_amount': amount if amount > 0 else ZERO,
+            }
+        buffer = buffer[last_end:]
+        if not chunk:
+            return
+
+
+def _detect_format(file_name, file_format):
+    if file_format:
+        return file_format.lower()
+    if (file_name or '').lower().endswith(('.ofx', '.qfx')):
+        return 'ofx'
+    return 'csv'
+
+
+def import_statement_file(statement, fileobj, file_name='', file_format=None):
+    """
+    Stream a CSV or OFX statement file into lines of ``statement``.
+
+    Returns the number of lines created. Raises ValueError on unparseable
+    input; nothing is written in that case.
+    """
+    from .models import BankStatementLine
+
+    file_format = _detect_format(file_name, file_format)
+    if file_format not in ('csv', 'ofx'):
+        raise ValueError(f"Unsupported statement format '{file_format}'")
+
+    raw = getattr(fileobj, 'file', fileobj)
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+    rows = _csv_rows(stream) if file_format == 'csv' else _ofx_rows(stream)
+    batch_size = _setting('IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+
+    created = 0
+    batch = []
+    try:
+        with transaction.atomic():
+            for row in rows:
+                row['description'] = row['description'][:255]
+                row['reference'] = row['reference'][:100]
+                batch.append(BankStatementLine(tenant_id=statement.tenant_id, statement=statement, **row))
+                if len(batch) >= batch_size:
+                    BankStatementLine.all_objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                BankStatementLine.all_objects.bulk_create(batch)
+                created += len(batch)
+            if file_name:
+                statement.import_file_name = file_name[:255]
+                statement.save(update_fields=['import_file_name', 'updated_at'])
+    finally:
+        stream.detach()  # Leave the uploaded file open for the caller
+
+    logger.info("Imported %d lines into bank statement %s", created, statement.pk)
+    return created
+
+
+# ── Matching ─────────────────────────────────────────────────────────────────
+
+def _compact(value):
+    return NON_ALNUM.sub('', (value or '').upper())
+
+
+def _reference_tokens(*values):
+    """Whole values plus words containing a digit, upper-cased without punctuation."""
+    tokens = set()
+    for value in values:
+        for candidate in [value, *(value or '').split()]:
+            token = _compact(candidate)
+            if len(token) >= 4 and any(c.isdigit() for c in token):
+                tokens.add(token)
+    return tokens
+
+
+@dataclass
+class _Line:
+    id: object
+    date: date
+    amount: Decimal  # Signed: money in is positive
+    refs: set
+    previous: tuple
+
+
+@dataclass
+class _Payment:
+    id: object
+    date: date
+    amount: Decimal  # Signed: receipts positive, disbursements negative
+    refs: set
+    number: str
+    used: bool = False
+
+
+@dataclass
+class _Match:
+    payment_id: object
+    method: str
+    confidence: int
+
+
+@dataclass
+class _PaymentIndex:
+    by_amount: dict = field(default_factory=lambda: defaultdict(list))
+    by_ref: dict = field(default_factory=lambda: defaultdict(list))
+    amounts: list = field(default_factory=list)
+
+    @classmethod
+    def build(cls, payments):
+        index = cls()
+        for p in payments:
+            index.by_amount[p.amount].append(p)
+            for ref in p.refs:
+                index.by_ref[ref].append(p)
+        index.amounts = sorted(index.by_amount)
+        return index
+
+    def near_amount(self, amount, tolerance):
+        lo = bisect.bisect_left(self.amounts, amount - tolerance)
+        hi = bisect.bisect_right(self.amounts, amount + tolerance)
+        for key in self.amounts[lo:hi]:
+            yield from self.by_amount[key]
+
+
+def _load_lines(statement):
+    from .models import BankStatementLine
+
+    return [
+        _Line(
+            id=row['id'], date=row['transaction_date'],
+            amount=row['credit_amount'] - row['debit_amount'],
+            refs=_reference_tokens(row['reference'], row['description']),
+            previous=(row['matched_payment_id'], row['match_method'], row['match_confidence']),
+        )
+        for row in BankStatementLine.all_objects.filter(
+            statement=statement, is_deleted=False, is_reconciled=False,
+        ).values(
+            'id', 'transaction_date', 'credit_amount', 'debit_amount', 'reference',
+            'description', 'matched_payment_id', 'match_method', 'match_confidence',
+        ).iterator(chunk_size=5000)
+    ]
+
+
+def _load_payments(statement, lines, window):
+    from .models import Payment
+
+    if not lines:
+        return []
+    start = min(l.date for l in lines) - timedelta(days=window)
+    end = max(l.date for l in lines) + timedelta(days=window)
+    rows = Payment.all_objects.filter(
+        bank_account_id=statement.bank_account_id, is_deleted=False,
+        payment_date__range=(start, end),
+    ).exclude(
+        statement_lines__is_reconciled=True,
+    ).values('id', 'payment_number', 'reference', 'amount', 'payment_date', 'customer_id')
+    return [
+        _Payment(
+            id=row['id'], date=row['payment_date'],
+            amount=row['amount'] if row['customer_id'] else -row['amount'],
+            refs=_reference_tokens(row['payment_number'], row['reference']),
+            number=row['payment_number'],
+        )
+        for row in rows.iterator(chunk_size=5000)
+    ]
+
+
+def _days(a, b):
+    return abs((a - b).days)
+
+
+def _exact_pass(lines, index, matches, window):
+    for line in lines:
+        candidates = {
+            p.id: p for ref in line.refs for p in index.by_ref.get(ref, ())
+            if not p.used and p.amount == line.amount and _days(p.date, line.date) <= window
+        }
+        if candidates:
+            payment = min(candidates.values(), key=lambda p: _days(p.date, line.date))
+            confidence = 100 - 2 * _days(payment.date, line.date)
+        else:
+            same_day = [p for p in index.by_amount.get(line.amount, ())
+                        if not p.used and p.date == line.date]
+            if len(same_day) != 1:
+                continue
+            payment, confidence = same_day[0], 90
+        payment.used = True
+        matches[line.id] = _Match(payment.id, 'EXACT', confidence)
+
+
+def _tolerance_pass(lines, index, matches, window, tolerance):
+    for line in lines:
+        if line.id in matches:
+            continue
+        best = None
+        for p in index.near_amount(line.amount, tolerance):
+            if p.used or _days(p.date, line.date) > window:
+                continue
+            # Rank: shared reference, then closest date, then smallest amount difference
+            rank = (not (p.refs & line.refs), _days(p.date, line.date), abs(p.amount - line.amount))
+            if best is None or rank < best[0]:
+                best = (rank, p)
+        if best is None:
+            continue
+        (no_ref, days, diff), payment = best
+        confidence = 85 - 5 * days - (10 if diff else 0) + (0 if no_ref else 10)
+        payment.used = True
+        matches[line.id] = _Match(payment.id, 'TOLERANCE', max(10, min(confidence, 89)))
+
+
+def _grouped_pass(lines, index, matches, window):
+    groups = defaultdict(list)
+    for line in lines:
+        if line.id not in matches:
+            for ref in line.refs:
+                groups[ref].append(line)
+
+    for ref, group in sorted(groups.items(), key=lambda g: -len(g[1])):
+        group = [l for l in group if l.id not in matches]
+        if len(group) < 2:
+            continue
+        total = sum((l.amount for l in group), ZERO)
+        latest = max(l.date for l in group)
+        candidates = [p for p in index.by_amount.get(total, ())
+                      if not p.used and _days(p.date, latest) <= window]
+        if not candidates:
+            continue
+        payment = min(candidates, key=lambda p: (ref not in p.refs, _days(p.date, latest)))
+        payment.used = True
+        confidence = 85 if ref in payment.refs else 70
+        for line in group:
+            matches[line.id] = _Match(payment.id, 'GROUPED', confidence)
+
+
+def auto_reconcile(statement):
+    """
+    Match a statement's open lines against the bank account's open payments.
+
+    Returns a report dict with match counts per method, how many lines were
+    reconciled or only suggested, and the unmatched lines and payments.
+    """
+    from .models import BankStatementLine
+
+    started = time.monotonic()
+    window = _setting('DATE_WINDOW_DAYS', DEFAULT_DATE_WINDOW_DAYS)
+    tolerance = Decimal(str(_setting('AMOUNT_TOLERANCE', DEFAULT_AMOUNT_TOLERANCE)))
+    threshold = _setting('AUTO_RECONCILE_CONFIDENCE', DEFAULT_AUTO_RECONCILE_CONFIDENCE)
+
+    lines = _load_lines(statement)
+    payments = _load_payments(statement, lines, window)
+    index = _PaymentIndex.build(payments)
+
+    matches = {}
+    _exact_pass(lines, index, matches, window)
+    _tolerance_pass(lines, index, matches, window, tolerance)
+    _grouped_pass(lines, index, matches, window)
+
+    now = timezone.now()
+    updates = []
+    counts = defaultdict(int)
+    reconciled = 0
+    for line in lines:
+        match = matches.get(line.id)
+        if match:
+            counts[match.method] += 1
+            state = (match.payment_id, match.method, match.confidence)
+            is_reconciled = match.confidence >= threshold
+            reconciled += is_reconciled
+        else:
+            state, is_reconciled = (None, '', None), False
+        if state == line.previous and not is_reconciled:
+            continue
+        updates.append(BankStatementLine(
+            pk=line.id, matched_payment_id=state[0], match_method=state[1],
+            match_confidence=state[2], is_reconciled=is_reconciled, updated_at=now,
+        ))
+
+    BankStatementLine.all_objects.bulk_update(
+        updates,
+        ['matched_payment', 'match_method', 'match_confidence', 'is_reconciled', 'updated_at'],
+        batch_size=1000,
+    )
+
+    unmatched_lines = [l for l in lines if l.id not in matches]
+    unmatched_payments = [p for p in payments if not p.used]
+    elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+    logger.info(
+        "Reconciled statement %s: %d open lines, %d matched, %d reconciled in %sms",
+        statement.pk, len(lines), len(matches), reconciled, elapsed_ms,
+    )
+    return {
+        'statement_id': str(statement.pk),
+        'open_lines': len(lines),
+        'matched': {method: counts[method] for method in ('EXACT', 'TOLERANCE', 'GROUPED')},
+        'reconciled': reconciled,
+        'suggested': len(matches) - reconciled,
+        'unmatched_lines_count': len(unmatched_lines),
+        'unmatched_lines': [
+            {'id': str(l.id), 'transaction_date': l.date.isoformat(), 'amount': l.amount}
+            for l in unmatched_lines[:REPORT_LIMIT]
+        ],
+        'unmatched_payments_count': len(unmatched_payments),
+        'unmatched_payments': [
+            {'id': str(p.id), 'payment_number': p.number,
+             'payment_date': p.date.isoformat(), 'amount': p.amount}
+            for p in unmatched_payments[:REPORT_LIMIT]
+        ],
+        'elapsed_ms': elapsed_ms,
+    }
@@ -0,0 +1,239 @@
+"""
+Bulk recurring journal generation.
+
+``generate_due_journals`` works out every occurrence each active
+RecurringJournal template owes up to a date, not just the next one, so a
+beat schedule that was down for months catches up in a single run. The
+occurrences of a batch of templates are written together:
+
+- the templates, their source lines and the open fiscal periods are read
+  once per batch
+- entries and lines are built in memory, numbered from one reserved block
+  per tenant and saved with bulk_create
+- period balances and budget actuals are applied once per period, account
+  and dimension (``record_bulk_posting``) rather than once per entry
+
+Each occurrence carries an idempotency key (template id and date) that is
+unique on JournalEntry, so an occurrence already posted is skipped instead
+of duplicated. Templates are locked while their batch is written
+(skip_locked), so concurrent runs split the work between them.
+
+Occurrences are counted from the template's current next_run_date
+(``next_run_date + n * frequency``), so month-end schedules keep their day
+instead of drifting after a short month.
+"""
+
+import bisect
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .balances import record_bulk_posting
+from .posting import allocate_entry_numbers
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+TEMPLATE_BATCH_SIZE = 200
+BATCH_SIZE = 1000
+
+FREQUENCY_STEPS = {
+    'MONTHLY': relativedelta(months=1),
+    'QUARTERLY': relativedelta(months=3),
+    'SEMI_ANNUAL': relativedelta(months=6),
+    'ANNUAL': relativedelta(years=1),
+}
+
+
+def occurrence_key(template_id, day):
+    """Idempotency key of one occurrence of a template."""
+    return f"RJ:{template_id}:{day.isoformat()}"
+
+
+def due_dates(next_run_date, frequency, until, end_date=None):
+    """
+    Occurrence dates from ``next_run_date`` up to ``until`` (and end_date).
+
+    Returns (dates, following): the due dates and the first date after them.
+    """
+    step = FREQUENCY_STEPS[frequency]
+    limit = min(until, end_date) if end_date else until
+    dates = []
+    day = next_run_date
+    while day <= limit:
+        dates.append(day)
+        day = next_run_date + step * len(dates)
+    return dates, day
+
+
+class _PeriodIndex:
+    """Open fiscal periods per tenant, looked up by date."""
+
+    def __init__(self, tenant_ids, start, end):
+        FiscalPeriod = apps.get_model('finance', 'FiscalPeriod')
+
+        tenants = Q(tenant_id__in=[t for t in tenant_ids if t is not None])
+        if None in tenant_ids:
+            tenants |= Q(tenant__isnull=True)
+        self._periods = defaultdict(list)
+        for period in FiscalPeriod.all_objects.filter(
+            tenants, is_closed=False, is_deleted=False,
+            start_date__lte=end, end_date__gte=start,
+        ).select_related('fiscal_year').order_by('start_date'):
+            self._periods[period.tenant_id].append(period)
+        self._starts = {t: [p.start_date for p in ps] for t, ps in self._periods.items()}
+
+    def find(self, tenant_id, day):
+        periods = self._periods.get(tenant_id, [])
+        i = bisect.bisect_right(self._starts.get(tenant_id, []), day) - 1
+        if i >= 0 and periods[i].end_date >= day:
+            return periods[i]
+        return None
+
+
+def _source_lines(templates):
+    JournalLine = apps.get_model('finance', 'JournalLine')
+
+    lines = defaultdict(list)
+    for line in JournalLine.all_objects.filter(
+        journal_entry_id__in={t.source_entry_id for t in templates}, is_deleted=False,
+    ).values(
+        'journal_entry_id', 'account_id', 'description', 'debit_amount', 'credit_amount',
+        'cost_center_id', 'department_id', 'project_id',
+    ).order_by('journal_entry_id', 'created_at'):
+        lines[line.pop('journal_entry_id')].append(line)
+    return lines
+
+
+def _plan(templates, until):
+    """Due occurrences of ``templates`` as (template, date, period); advances the templates."""
+    schedules = {
+        t.pk: due_dates(t.next_run_date, t.frequency, until, t.end_date)
+        for t in templates if t.frequency in FREQUENCY_STEPS
+    }
+    days = [d for dates, _ in schedules.values() for d in dates]
+    periods = _PeriodIndex({t.tenant_id for t in templates}, min(days), max(days)) if days else None
+
+    planned = []
+    for template in templates:
+        if template.pk not in schedules:
+            logger.warning(f"Unknown frequency '{template.frequency}' for recurring journal "
+                           f"{template.template_name}")
+            continue
+        dates, following = schedules[template.pk]
+        for day in dates:
+            period = periods.find(template.tenant_id, day)
+            if period is None:
+                logger.warning(f"No open fiscal period for recurring journal "
+                               f"{template.template_name} on {day}")
+                following = day
+                break
+            planned.append((template, day, period))
+        template.next_run_date = following
+        template.is_active = not (template.end_date and following > template.end_date)
+    return planned
+
+
+def _generate_batch(templates, until):
+    JournalEntry = apps.get_model('finance', 'JournalEntry')
+    JournalLine = apps.get_model('finance', 'JournalLine')
+    RecurringJournal = apps.get_model('finance', 'RecurringJournal')
+
+    planned = _plan(templates, until)
+    existing = set(JournalEntry.all_objects.filter(
+        idempotency_key__in=[occurrence_key(t.pk, day) for t, day, _ in planned],
+    ).values_list('idempotency_key', flat=True))
+    todo = [(t, day, period) for t, day, period in planned
+            if occurrence_key(t.pk, day) not in existing]
+
+    numbers = {}
+    for tenant_id in {t.tenant_id for t, _, _ in todo}:
+        count = sum(1 for t, _, _ in todo if t.tenant_id == tenant_id)
+        numbers[tenant_id] = iter(allocate_entry_numbers('JV-REC', count, tenant=tenant_id))
+
+    source_lines = _source_lines(templates)
+    now = timezone.now()
+    entries, lines = [], []
+    totals = defaultdict(lambda: defaultdict(lambda: [ZERO, ZERO]))
+    for template, day, period in todo:
+        template_lines = source_lines.get(template.source_entry_id, [])
+        entry = JournalEntry(
+            tenant_id=template.tenant_id,
+            entry_number=next(numbers[template.tenant_id]),
+            journal_date=day,
+            fiscal_period=period,
+            description=f"Recurring: {template.template_name}",
+            source='RECURRING',
+            source_reference=template.template_name[:100],
+            status=JournalEntry.EntryStatus.POSTED,
+            total_debit=sum((line['debit_amount'] for line in template_lines), ZERO),
+            total_credit=sum((line['credit_amount'] for line in template_lines), ZERO),
+            posted_at=now,
+            idempotency_key=occurrence_key(template.pk, day),
+        )
+        entries.append(entry)
+        period_totals = totals[(template.tenant_id, period)]
+        for line in template_lines:
+            lines.append(JournalLine(tenant_id=template.tenant_id, journal_entry=entry, **line))
+            row = period_totals[(line['account_id'], line['cost_center_id'], line['department_id'])]
+            row[0] += line['debit_amount']
+            row[1] += line['credit_amount']
+        template.last_generated = now
+
+    JournalEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    JournalLine.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+    for (tenant_id, period), rows in totals.items():
+        record_bulk_posting(tenant_id, period, [
+            {'account_id': account_id, 'cost_center_id': cost_center_id,
+             'department_id': department_id, 'debit': debit, 'credit': credit}
+            for (account_id, cost_center_id, department_id), (debit, credit) in sorted(
+                rows.items(), key=lambda item: tuple(str(k) for k in item[0]),
+            )
+        ])
+
+    for template in templates:
+        template.updated_at = now
+    RecurringJournal.all_objects.bulk_update(
+        templates, ['next_run_date', 'is_active', 'last_generated', 'updated_at'],
+        batch_size=BATCH_SIZE,
+    )
+    return [e.entry_number for e in entries], len(planned) - len(todo)
+
+
+def generate_due_journals(until=None, recurring_id=None):
+    """
+    Post every occurrence of the active recurring journals due up to ``until``
+    (default today). Returns the created entry numbers and the number of
+    occurrences skipped because they had already been posted.
+    """
+    RecurringJournal = apps.get_model('finance', 'RecurringJournal')
+
+    until = until or timezone.now().date()
+    qs = RecurringJournal.all_objects.filter(
+        is_active=True, is_deleted=False, next_run_date__lte=until,
+    )
+    if recurring_id:
+        qs = qs.filter(pk=recurring_id)
+    ids = list(qs.order_by('pk').values_list('pk', flat=True))
+
+    generated, skipped = [], 0
+    for start in range(0, len(ids), TEMPLATE_BATCH_SIZE):
+        with transaction.atomic():
+            templates = list(
+                RecurringJournal.all_objects.select_for_update(skip_locked=True)
+                .filter(pk__in=ids[start:start + TEMPLATE_BATCH_SIZE], is_active=True,
+                        next_run_date__lte=until)
+                .order_by('pk')
+            )
+            if not templates:
+                continue
+            numbers, already = _generate_batch(templates, until)
+        generated.extend(numbers)
+        skipped += already
+    return generated, skipped
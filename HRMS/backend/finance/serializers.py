@@ -78,7 +78,7 @@ class JournalEntryDetailSerializer(serializers.ModelSerializer):
         model = JournalEntry
         fields = '__all__'
         read_only_fields = ['id', 'entry_number', 'total_debit', 'total_credit',
-                           'posted_by', 'posted_at', 'created_at', 'updated_at']
+                           'posted_by', 'posted_at', 'idempotency_key', 'created_at', 'updated_at']
 
 
 # Keep BudgetSerializer alias for backward compatibility in other modules
@@ -105,20 +105,12 @@ class BudgetDetailSerializer(serializers.ModelSerializer):
     """Full serializer for budget detail with computed amounts."""
     account_code = serializers.CharField(source='account.code', read_only=True)
     account_name = serializers.CharField(source='account.name', read_only=True)
-    committed_amount = serializers.SerializerMethodField()
-    available_amount = serializers.SerializerMethodField()
+    available_amount = serializers.DecimalField(max_digits=17, decimal_places=2, read_only=True)
 
     class Meta:
         model = Budget
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at']
-
-    def get_committed_amount(self, obj):
-        return sum(c.amount for c in obj.commitments.filter(status='COMMITTED'))
-
-    def get_available_amount(self, obj):
-        committed = self.get_committed_amount(obj)
-        return obj.current_amount - committed
+        read_only_fields = ['id', 'created_at', 'updated_at', 'committed_amount', 'actual_amount']
 
 
 class BudgetSerializer(BudgetDetailSerializer):
@@ -10,8 +10,7 @@ from decimal import Decimal
 
 from django.apps import apps
 from django.db import transaction
-from django.db.models import Sum, Q
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -31,16 +30,16 @@ logger = logging.getLogger('hrms')
 def grn_accepted_create_stock_entries(sender, instance, **kwargs):
     """
     When a GoodsReceiptNote status changes to ACCEPTED, create a StockEntry
-    (type=RECEIPT) for every GRNItem whose accepted_qty > 0.
-    Also update (or create) the StockLedger balance for each item/warehouse.
+    (type=RECEIPT) for every GRNItem whose accepted_qty > 0, and post the
+    receipts to the stock ledger as one batch.
     """
+    from inventory.ledger import post_stock_entries
     from procurement.models import GoodsReceiptNote
 
     if instance.status != GoodsReceiptNote.Status.ACCEPTED:
         return
 
     StockEntry = _get_model('inventory', 'StockEntry')
-    StockLedger = _get_model('inventory', 'StockLedger')
 
     grn_items = instance.items.select_related('po_item', 'po_item__item').all()
     warehouse = instance.warehouse
@@ -54,6 +53,7 @@ def grn_accepted_create_stock_entries(sender, instance, **kwargs):
         return
 
     with transaction.atomic():
+        receipts = []
         for grn_item in grn_items:
             if grn_item.accepted_qty <= 0:
                 continue
@@ -87,7 +87,7 @@ def grn_accepted_create_stock_entries(sender, instance, **kwargs):
             unit_cost = po_item.unit_price
             total_cost = grn_item.accepted_qty * unit_cost
 
-            StockEntry.objects.create(
+            receipts.append(StockEntry.objects.create(
                 entry_type=StockEntry.EntryType.RECEIPT,
                 entry_date=instance.receipt_date,
                 item=item,
@@ -99,23 +99,7 @@ def grn_accepted_create_stock_entries(sender, instance, **kwargs):
                 source_reference=instance.grn_number,
                 reference_number=instance.purchase_order.po_number,
                 notes=f"Auto-created from GRN {instance.grn_number}",
-            )
-
-            # Update or create the StockLedger running balance
-            ledger, _created = StockLedger.objects.get_or_create(
-                item=item,
-                warehouse=warehouse,
-                defaults={
-                    'balance_qty': Decimal('0'),
-                    'valuation_amount': Decimal('0'),
-                },
-            )
-            ledger.balance_qty += grn_item.accepted_qty
-            ledger.valuation_amount += total_cost
-            ledger.last_movement_date = instance.receipt_date
-            ledger.save(update_fields=[
-                'balance_qty', 'valuation_amount', 'last_movement_date',
-            ])
+            ))
 
             logger.info(
                 "Created StockEntry RECEIPT for item %s qty %s from GRN %s",
@@ -124,6 +108,8 @@ def grn_accepted_create_stock_entries(sender, instance, **kwargs):
                 instance.grn_number,
             )
 
+        post_stock_entries(receipts)
+
 
 # ---------------------------------------------------------------------------
 # 2. Budget enforcement helper
@@ -133,81 +119,22 @@ def check_budget_availability(account, cost_center, fiscal_year, amount):
     """
     Check whether sufficient budget is available for a proposed expenditure.
 
+    Reads the budget's maintained counters (see finance.budgets); use
+    check_budget_lines to validate a whole document at once.
+
     Returns:
         (bool, dict): Tuple of (is_available, details).
     """
-    from finance.models import Budget, BudgetCommitment, JournalLine
-
-    budget_qs = Budget.objects.filter(
-        account=account,
-        fiscal_year=fiscal_year,
-    )
-    if cost_center is not None:
-        budget_qs = budget_qs.filter(cost_center=cost_center)
-    else:
-        budget_qs = budget_qs.filter(cost_center__isnull=True)
-
-    budget = budget_qs.first()
-
-    if budget is None:
-        return False, {
-            'error': 'No budget found for the given account, cost center, and fiscal year.',
-            'account': str(account),
-            'cost_center': str(cost_center) if cost_center else None,
-            'fiscal_year': str(fiscal_year),
-            'requested': amount,
-        }
-
-    budget_amount = budget.revised_amount or budget.original_amount
-
-    # Sum of COMMITTED encumbrances
-    committed_agg = BudgetCommitment.objects.filter(
-        budget=budget,
-        status=BudgetCommitment.CommitmentStatus.COMMITTED,
-    ).aggregate(total=Sum('amount'))
-    committed = committed_agg['total'] or Decimal('0')
-
-    # Actual spend from posted journal lines
-    journal_filter = Q(
-        account=account,
-        journal_entry__status='POSTED',
-        journal_entry__journal_date__gte=fiscal_year.start_date,
-        journal_entry__journal_date__lte=fiscal_year.end_date,
-    )
-    if cost_center is not None:
-        journal_filter &= Q(cost_center=cost_center)
+    from finance.budgets import check_budget_lines
 
-    actuals_agg = JournalLine.objects.filter(journal_filter).aggregate(
-        total_debit=Sum('debit_amount'),
-        total_credit=Sum('credit_amount'),
+    _, (details,) = check_budget_lines(
+        [{'account': account, 'cost_center': cost_center, 'amount': amount}], fiscal_year,
     )
-
-    if account.account_type == 'EXPENSE':
-        actual = (actuals_agg['total_debit'] or Decimal('0')) - (
-            actuals_agg['total_credit'] or Decimal('0')
-        )
-    else:
-        actual = (actuals_agg['total_credit'] or Decimal('0')) - (
-            actuals_agg['total_debit'] or Decimal('0')
-        )
-
-    available = budget_amount - committed - actual
-
-    details = {
-        'budget_id': str(budget.id),
-        'budget_amount': budget_amount,
-        'committed': committed,
-        'actual': actual,
-        'available': available,
-        'requested': amount,
-    }
-
-    if available >= amount:
-        details['shortfall'] = Decimal('0')
-        return True, details
-    else:
-        details['shortfall'] = amount - available
+    if 'error' in details:
+        details.update(account=str(account), cost_center=str(cost_center) if cost_center else None,
+                       fiscal_year=str(fiscal_year))
         return False, details
+    return details['shortfall'] == Decimal('0'), details
 
 
 # ---------------------------------------------------------------------------
@@ -269,81 +196,17 @@ def po_approved_create_budget_commitments(sender, instance, **kwargs):
     if instance.status != PurchaseOrder.Status.APPROVED:
         return
 
-    from finance.models import Budget, BudgetCommitment
-
-    po_items = instance.items.select_related(
-        'requisition_item', 'item',
-    ).all()
-
-    with transaction.atomic():
-        for po_item in po_items:
-            line_total = po_item.total or (po_item.quantity * po_item.unit_price)
-
-            if line_total <= 0:
-                continue
-
-            # Determine the budget to commit against
-            budget = None
-
-            # First: try the budget linked via the requisition item
-            if hasattr(po_item, 'requisition_item') and po_item.requisition_item:
-                if hasattr(po_item.requisition_item, 'budget_id') and po_item.requisition_item.budget_id:
-                    budget = po_item.requisition_item.budget
-
-            # Fallback: look up budget by item category GL account
-            if budget is None and po_item.item and po_item.item.category:
-                gl_account = getattr(po_item.item.category, 'gl_account', None)
-                if gl_account:
-                    cost_center = (
-                        instance.requisition.cost_center
-                        if instance.requisition
-                        else None
-                    )
-                    budget_qs = Budget.objects.filter(
-                        account=gl_account,
-                        status__in=['DRAFT', 'APPROVED', 'REVISED'],
-                    )
-                    if cost_center:
-                        budget_qs = budget_qs.filter(cost_center=cost_center)
-                    budget = budget_qs.order_by('-fiscal_year__start_date').first()
-
-            if budget is None:
-                logger.warning(
-                    "No budget found for PO %s line item '%s'; "
-                    "skipping commitment creation.",
-                    instance.po_number,
-                    po_item.description,
-                )
-                continue
-
-            # Avoid duplicate commitments
-            commitment_ref = f"{instance.po_number}:{po_item.id}"
-            existing = BudgetCommitment.objects.filter(
-                budget=budget,
-                source='PO',
-                source_reference=commitment_ref,
-            ).exists()
-
-            if existing:
-                continue
-
-            BudgetCommitment.objects.create(
-                budget=budget,
-                commitment_date=instance.order_date or timezone.now().date(),
-                amount=line_total,
-                source='PO',
-                source_reference=commitment_ref,
-                status=BudgetCommitment.CommitmentStatus.COMMITTED,
-            )
+    from finance.budgets import commit_to_budgets, purchase_order_commitments
 
-            logger.info(
-                "Created BudgetCommitment of %s for PO %s item '%s' "
-                "against budget %s",
-                line_total,
-                instance.po_number,
-                po_item.description,
-                budget.id,
-            )
+    commitments = purchase_order_commitments([instance])
+    if commitments:
+        commit_to_budgets(commitments)
+        logger.info(
+            "Created %d BudgetCommitments totalling %s for PO %s",
+            len(commitments),
+            sum(c.amount for c in commitments),
+            instance.po_number,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -367,6 +230,7 @@ def vendor_invoice_approved_post_to_ap(sender, instance, **kwargs):
         return
 
     try:
+        from finance.balances import record_posting
         from finance.tasks import _generate_entry_number, _resolve_account
 
         with transaction.atomic():
@@ -399,6 +263,7 @@ def vendor_invoice_approved_post_to_ap(sender, instance, **kwargs):
                     debit_amount=Decimal('0'),
                     credit_amount=amount,
                 )
+                record_posting(je)
 
             logger.info("GL posted for vendor invoice %s: entry %s", instance.invoice_number, entry_number)
     except Exception:
@@ -425,6 +290,7 @@ def customer_invoice_sent_post_to_ar(sender, instance, **kwargs):
         return
 
     try:
+        from finance.balances import record_posting
         from finance.tasks import _generate_entry_number, _resolve_account
 
         with transaction.atomic():
@@ -457,6 +323,7 @@ def customer_invoice_sent_post_to_ar(sender, instance, **kwargs):
                     debit_amount=Decimal('0'),
                     credit_amount=amount,
                 )
+                record_posting(je)
 
             logger.info("GL posted for customer invoice %s: entry %s", instance.invoice_number, entry_number)
     except Exception:
@@ -479,3 +346,79 @@ def asset_disposal_approved_post_to_gl(sender, instance, **kwargs):
         logger.info("Triggered GL posting for asset disposal %s", instance.pk)
     except Exception:
         logger.exception("Failed to trigger GL posting for asset disposal %s", instance.pk)
+
+
+# ---------------------------------------------------------------------------
+# 8. Fiscal Period closed/reopened -> freeze/unfreeze balance snapshots
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender='finance.FiscalPeriod')
+def fiscal_period_close_freeze_balances(sender, instance, created, **kwargs):
+    """Materialise account balances when a period closes; release them on reopen."""
+    if created:
+        return
+
+    from finance.balances import freeze_period, is_period_frozen, unfreeze_period
+
+    if instance.is_closed:
+        if not is_period_frozen(instance):
+            count = freeze_period(instance)
+            logger.info("Froze %d account balances for fiscal period %s", count, instance)
+    else:
+        unfreeze_period(instance)
+
+
+# ---------------------------------------------------------------------------
+# 9. Budget and commitment changes -> budget consumption counters
+# ---------------------------------------------------------------------------
+
+BUDGET_COUNTER_FIELDS = {'committed_amount', 'actual_amount'}
+
+
+@receiver(post_save, sender='finance.Budget')
+def budget_saved_refresh_counters(sender, instance, update_fields=None, **kwargs):
+    """Seed a new budget's counters and correct them after edits to its dimensions."""
+    if update_fields and set(update_fields) <= BUDGET_COUNTER_FIELDS | {'updated_at'}:
+        return
+
+    from finance.budgets import refresh_budget_counters
+
+    refresh_budget_counters([instance.pk])
+
+
+@receiver(pre_save, sender='finance.BudgetCommitment')
+def budget_commitment_remember_previous(sender, instance, **kwargs):
+    """Capture what the stored row contributed before this save."""
+    from finance.budgets import commitment_value
+
+    instance._previous_commitment = None
+    if instance.pk and not instance._state.adding:
+        row = sender.all_objects.filter(pk=instance.pk).values(
+            'budget_id', 'status', 'amount', 'is_deleted',
+        ).first()
+        if row:
+            instance._previous_commitment = (
+                row['budget_id'], commitment_value(row['status'], row['amount'], row['is_deleted']),
+            )
+
+
+@receiver(post_save, sender='finance.BudgetCommitment')
+def budget_commitment_update_counter(sender, instance, **kwargs):
+    """Move the budget's committed_amount by what this save changed."""
+    from finance.budgets import apply_commitment_change, commitment_value
+
+    apply_commitment_change(
+        getattr(instance, '_previous_commitment', None),
+        (instance.budget_id, commitment_value(instance.status, instance.amount, instance.is_deleted)),
+    )
+
+
+@receiver(post_delete, sender='finance.BudgetCommitment')
+def budget_commitment_deleted_update_counter(sender, instance, **kwargs):
+    """Release a hard-deleted commitment from its budget's committed_amount."""
+    from finance.budgets import apply_commitment_change, commitment_value
+
+    apply_commitment_change(
+        (instance.budget_id, commitment_value(instance.status, instance.amount, instance.is_deleted)),
+        None,
+    )
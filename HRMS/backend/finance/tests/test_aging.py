@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.aging import aging_detail
+from finance.models import (
+    Account, Customer, CustomerInvoice, OrganizationBankAccount, Payment, Vendor, VendorInvoice,
+)
+from finance.services import FinancialStatementService
+
+ZERO = Decimal('0.00')
+
+
+def python_aging(model, party, as_of_date):
+    """The per-invoice loop the SQL engine replaced, used as the reference."""
+    rows = {}
+    for inv in model.objects.exclude(status__in=['PAID', 'CANCELLED']).select_related(party):
+        balance = inv.total_amount - inv.paid_amount
+        if balance <= ZERO:
+            continue
+        who = getattr(inv, party)
+        row = rows.setdefault(who.code, {
+            f'{party}_name': who.name, f'{party}_code': who.code, 'current': ZERO,
+            'days_30': ZERO, 'days_60': ZERO, 'days_90': ZERO, 'over_90': ZERO, 'total': ZERO,
+        })
+        days = (as_of_date - inv.due_date).days
+        key = ('current' if days <= 0 else 'days_30' if days <= 30 else 'days_60' if days <= 60
+               else 'days_90' if days <= 90 else 'over_90')
+        row[key] += balance
+        row['total'] += balance
+    return sorted(rows.values(), key=lambda r: r[f'{party}_code'])
+
+
+class AgingReportTest(TestCase):
+    """SQL aging matches the per-invoice computation and supports historical dates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        vendors = [Vendor.objects.create(code=f'V{i}', name=f'Vendor {i}') for i in range(3)]
+        customers = [Customer.objects.create(code=f'C{i}', name=f'Customer {i}') for i in range(2)]
+        # Open statuses that do not trigger GL posting signals
+        statuses = ['DRAFT', 'PARTIALLY_PAID', 'PAID', 'CANCELLED', 'PARTIALLY_PAID']
+        # Due dates straddle every bucket boundary
+        offsets = [-10, 0, 1, 30, 31, 60, 61, 90, 91, 200]
+        n = 0
+        for party_field, model, parties in (('vendor', VendorInvoice, vendors),
+                                            ('customer', CustomerInvoice, customers)):
+            for p, party in enumerate(parties):
+                for i, offset in enumerate(offsets):
+                    n += 1
+                    total = Decimal(100 * (i + 1) + p)
+                    status = statuses[(i + p) % len(statuses)]
+                    paid = {'PAID': total, 'PARTIALLY_PAID': total / 4}.get(status, ZERO)
+                    model.objects.create(
+                        **{party_field: party}, invoice_number=f'INV-{n}',
+                        invoice_date=cls.today - timedelta(days=offset + 30),
+                        due_date=cls.today - timedelta(days=offset),
+                        total_amount=total, paid_amount=paid, status=status,
+                    )
+
+    def _normalised(self, report, party):
+        return sorted(report['detail'], key=lambda r: r[f'{party}_code'])
+
+    def test_matches_python_aging(self):
+        ap = FinancialStatementService.generate_ap_aging(self.today)
+        ar = FinancialStatementService.generate_ar_aging(self.today)
+
+        self.assertEqual(self._normalised(ap, 'vendor'), python_aging(VendorInvoice, 'vendor', self.today))
+        self.assertEqual(self._normalised(ar, 'customer'),
+                         python_aging(CustomerInvoice, 'customer', self.today))
+        self.assertEqual(ap['summary']['total'], sum(r['total'] for r in ap['detail']))
+
+    def test_detail_rows_add_up_to_summary(self):
+        summary = FinancialStatementService.generate_ap_aging(self.today)['summary']
+        rows = list(aging_detail('AP', self.today).iterator())
+
+        for bucket in ('current', 'days_30', 'days_60', 'days_90', 'over_90'):
+            self.assertEqual(sum((r['balance'] for r in rows if r['bucket'] == bucket), ZERO),
+                             summary[bucket])
+        vendor = Vendor.objects.get(code='V1')
+        self.assertTrue(all(r['party_id'] == vendor.pk for r in aging_detail('AP', party_id=vendor.pk)))
+
+    def test_historical_aging_uses_payment_dates(self):
+        vendor = Vendor.objects.create(code='VH', name='Historical')
+        bank = OrganizationBankAccount.objects.create(
+            name='Main', account_number='1', bank_name='GCB',
+            gl_account=Account.objects.create(code='1110', name='Bank', account_type='ASSET'),
+        )
+        jan = date(2025, 1, 10)
+        for number, due in (('H-1', jan), ('H-2', jan + timedelta(days=20))):
+            VendorInvoice.objects.create(
+                vendor=vendor, invoice_number=number, invoice_date=due - timedelta(days=30),
+                due_date=due, total_amount=Decimal('1000.00'), paid_amount=Decimal('1000.00'),
+                status='PAID',
+            )
+        # Settled by two payments: 600 before the as-of date, 1400 after
+        for number, day, amount in (('P-1', jan, '600.00'), ('P-2', date(2025, 3, 1), '1400.00')):
+            Payment.objects.create(payment_number=number, payment_date=day, vendor=vendor,
+                                   amount=Decimal(amount), bank_account=bank)
+
+        as_of = date(2025, 2, 15)
+        row = next(r for r in FinancialStatementService.generate_ap_aging(as_of)['detail']
+                   if r['vendor_code'] == 'VH')
+
+        # 600 paid went to the older invoice first
+        self.assertEqual((row['days_30'], row['days_60'], row['total']),
+                         (Decimal('1000.00'), Decimal('400.00'), Decimal('1400.00')))
+        balances = [r['balance'] for r in aging_detail('AP', as_of, party_id=vendor.pk)]
+        self.assertEqual(balances, [Decimal('400.00'), Decimal('1000.00')])
@@ -0,0 +1,140 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.balances import cumulative_balances, rebuild_balances, verify_balances
+from finance.models import (
+    Account, AccountDimensionBalance, AccountPeriodBalance, Budget, FiscalPeriod, FiscalYear,
+    JournalEntry, JournalLine,
+)
+from organization.models import CostCenter
+from finance.services import FinancialStatementService, post_journal_entry, reverse_journal_entry
+
+
+class AccountPeriodBalanceTest(TestCase):
+    """Period balance snapshots stay consistent with the posted ledger."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+        )
+        cls.periods = [
+            FiscalPeriod.objects.create(
+                fiscal_year=cls.fy, period_number=m, name=f'2026-{m:02d}',
+                start_date=date(2026, m, 1), end_date=date(2026, m, 28),
+            )
+            for m in (1, 2, 3)
+        ]
+        cls.cash = Account.objects.create(code='1111', name='Cash', account_type='ASSET')
+        cls.payable = Account.objects.create(code='2110', name='Payables', account_type='LIABILITY')
+        cls.capital = Account.objects.create(code='3100', name='Capital', account_type='EQUITY')
+        cls.revenue = Account.objects.create(code='4100', name='Revenue', account_type='REVENUE')
+        cls.expense = Account.objects.create(code='5210', name='Rent', account_type='EXPENSE')
+
+    def _post(self, period, number, debit_account, credit_account, amount, cost_center=None):
+        entry = JournalEntry.objects.create(
+            entry_number=number, journal_date=period.start_date, fiscal_period=period,
+            description=number,
+        )
+        JournalLine.objects.create(journal_entry=entry, account=debit_account,
+                                   debit_amount=amount, credit_amount=0, cost_center=cost_center)
+        JournalLine.objects.create(journal_entry=entry, account=credit_account,
+                                   debit_amount=0, credit_amount=amount)
+        return post_journal_entry(entry, None)
+
+    def _close(self, period):
+        period.is_closed = True
+        period.save()
+
+    def test_balance_sheet_uses_frozen_snapshot_plus_open_periods(self):
+        jan, feb, mar = self.periods
+        self._post(jan, 'JV-1', self.cash, self.capital, Decimal('1000.00'))
+        self._post(jan, 'JV-2', self.cash, self.payable, Decimal('250.00'))
+        self._close(jan)
+        self._post(feb, 'JV-3', self.cash, self.revenue, Decimal('400.00'))
+        self._post(mar, 'JV-4', self.expense, self.cash, Decimal('75.50'))
+
+        self.assertTrue(all(
+            AccountPeriodBalance.objects.filter(fiscal_period=jan).values_list('is_frozen', flat=True)
+        ))
+        sheet = FinancialStatementService.generate_balance_sheet(mar)
+
+        self.assertEqual(sheet['total_assets'], Decimal('1574.50'))
+        self.assertEqual(sheet['total_liabilities'], Decimal('250.00'))
+        self.assertEqual(sheet['total_equity'], Decimal('1000.00'))
+        self.assertEqual(FinancialStatementService.generate_balance_sheet(jan)['total_assets'],
+                         Decimal('1250.00'))
+        self.assertEqual(verify_balances(None), [])
+
+    def test_cash_flow_from_period_totals(self):
+        feb = self.periods[1]
+        self._post(feb, 'JV-1', self.cash, self.revenue, Decimal('900.00'))
+        self._post(feb, 'JV-2', self.expense, self.cash, Decimal('300.00'))
+
+        flow = FinancialStatementService.generate_cash_flow(feb)
+
+        self.assertEqual(flow['operating']['net'], Decimal('600.00'))
+        self.assertEqual(flow['investing']['net'], Decimal('-600.00'))
+
+    def test_reversal_and_late_posting_invalidate_later_snapshots(self):
+        jan, feb, _ = self.periods
+        self._post(jan, 'JV-1', self.cash, self.capital, Decimal('500.00'))
+        self._close(jan)
+        self._post(feb, 'JV-2', self.cash, self.payable, Decimal('200.00'))
+        self._close(feb)
+
+        # Reopen January, post a late entry and reverse another
+        jan.is_closed = False
+        jan.save()
+        late = self._post(jan, 'JV-3', self.cash, self.capital, Decimal('50.00'))
+        stale = JournalEntry.objects.get(pk=late.pk)
+        reverse_journal_entry(late, None)
+        # A second reversal from a copy loaded before the first is rejected under the lock
+        with self.assertRaisesMessage(ValueError, 'Only posted entries can be reversed'):
+            reverse_journal_entry(stale, None)
+        self._post(jan, 'JV-4', self.cash, self.capital, Decimal('20.00'))
+
+        self.assertFalse(AccountPeriodBalance.objects.filter(fiscal_period=feb, is_frozen=True).exists())
+        self.assertEqual(cumulative_balances(feb)[self.cash.pk], Decimal('720.00'))
+        self._close(jan)
+        self._close(feb)
+        self.assertEqual(cumulative_balances(feb)[self.cash.pk], Decimal('720.00'))
+        self.assertEqual(verify_balances(None), [])
+
+    def test_trial_balance_and_budget_actuals_from_aggregates(self):
+        jan, feb, _ = self.periods
+        ops = CostCenter.objects.create(code='OPS', name='Operations')
+        self._post(jan, 'JV-1', self.expense, self.cash, Decimal('300.00'), cost_center=ops)
+        self._post(feb, 'JV-2', self.expense, self.cash, Decimal('120.00'), cost_center=ops)
+        self._post(feb, 'JV-3', self.expense, self.cash, Decimal('80.00'))
+        reverse_journal_entry(self._post(jan, 'JV-4', self.cash, self.revenue, Decimal('60.00')), None)
+        Budget.objects.create(fiscal_year=self.fy, account=self.expense, cost_center=ops,
+                              original_amount=Decimal('1000.00'), status='APPROVED')
+        Budget.objects.create(fiscal_year=self.fy, account=self.expense,
+                              original_amount=Decimal('400.00'), status='APPROVED')
+
+        trial = FinancialStatementService.generate_trial_balance(jan)
+        self.assertEqual(
+            [(r['account__code'], r['total_debit'], r['total_credit']) for r in trial],
+            [('1111', Decimal('0.00'), Decimal('300.00')), ('5210', Decimal('300.00'), Decimal('0.00'))],
+        )
+        report = FinancialStatementService.generate_budget_vs_actual(self.fy.pk)
+        actuals = sorted(item['actual'] for item in report['items'])
+        self.assertEqual(actuals, [Decimal('420.00'), Decimal('500.00')])
+        self.assertEqual(verify_balances(None), [])
+
+    def test_verify_detects_drift_and_rebuild_repairs(self):
+        jan = self.periods[0]
+        self._post(jan, 'JV-1', self.cash, self.capital, Decimal('100.00'))
+        self._close(jan)
+        AccountPeriodBalance.objects.filter(account=self.cash).update(period_debit=Decimal('999.00'))
+        AccountDimensionBalance.objects.filter(account=self.capital).delete()
+
+        checks = {p['check'] for p in verify_balances(None)}
+        self.assertEqual(checks, {'period_totals', 'dimension_totals'})
+
+        rebuild_balances(None)
+        self.assertEqual(verify_balances(None), [])
+        self.assertEqual(cumulative_balances(jan)[self.cash.pk], Decimal('100.00'))
@@ -0,0 +1,124 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from finance.budgets import check_budget_lines, rebuild_budget_counters
+from finance.models import (
+    Account, Budget, BudgetCommitment, FiscalPeriod, FiscalYear, JournalEntry, JournalLine,
+)
+from finance.services import post_journal_entry, reverse_journal_entry
+from finance.signals import check_budget_availability
+from organization.models import CostCenter
+
+
+class BudgetCounterTest(TestCase):
+    """Budget committed/actual counters follow commitments and postings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+        )
+        cls.period = FiscalPeriod.objects.create(
+            fiscal_year=cls.fy, period_number=1, name='2026-01',
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 31),
+        )
+        cls.cash = Account.objects.create(code='1111', name='Cash', account_type='ASSET')
+        cls.travel = Account.objects.create(code='5310', name='Travel', account_type='EXPENSE')
+        cls.ops = CostCenter.objects.create(code='OPS', name='Operations')
+
+    def setUp(self):
+        self.budget = Budget.objects.create(
+            fiscal_year=self.fy, account=self.travel, cost_center=self.ops,
+            original_amount=Decimal('1000.00'), status='APPROVED',
+        )
+
+    def _post(self, number, amount, cost_center=None):
+        entry = JournalEntry.objects.create(
+            entry_number=number, journal_date=self.period.start_date, fiscal_period=self.period,
+        )
+        JournalLine.objects.create(journal_entry=entry, account=self.travel, debit_amount=amount,
+                                   credit_amount=0, cost_center=cost_center)
+        JournalLine.objects.create(journal_entry=entry, account=self.cash, debit_amount=0,
+                                   credit_amount=amount)
+        return post_journal_entry(entry, None)
+
+    def _counters(self):
+        self.budget.refresh_from_db()
+        return self.budget.committed_amount, self.budget.actual_amount
+
+    def test_postings_and_commitments_move_counters(self):
+        entry = self._post('JV-1', Decimal('300.00'), cost_center=self.ops)
+        self._post('JV-2', Decimal('50.00'))  # other cost center: not this budget
+        commitment = BudgetCommitment.objects.create(
+            budget=self.budget, commitment_date=date(2026, 1, 5), amount=Decimal('200.00'),
+            source='PO', source_reference='PO-1:1',
+        )
+        self.assertEqual(self._counters(), (Decimal('200.00'), Decimal('300.00')))
+        self.assertEqual(self.budget.available_amount, Decimal('500.00'))
+
+        commitment.amount = Decimal('250.00')
+        commitment.save()
+        reverse_journal_entry(entry, None)
+        self.assertEqual(self._counters(), (Decimal('250.00'), Decimal('0.00')))
+
+        commitment.status = 'CONSUMED'
+        commitment.save()
+        self.assertEqual(self._counters(), (Decimal('0.00'), Decimal('0.00')))
+
+        BudgetCommitment.objects.create(
+            budget=self.budget, commitment_date=date(2026, 1, 6), amount=Decimal('80.00'),
+            source='PO', source_reference='PO-2:1',
+        ).delete()
+        self.assertEqual(self._counters(), (Decimal('0.00'), Decimal('0.00')))
+
+    def test_bulk_check_reads_counters_in_one_query(self):
+        self._post('JV-1', Decimal('700.00'), cost_center=self.ops)
+        lines = [
+            {'account': self.travel.pk, 'cost_center': self.ops.pk, 'amount': '200.00'},
+            {'account': self.travel.pk, 'cost_center': self.ops.pk, 'amount': '150.00'},
+            {'account': self.cash.pk, 'cost_center': None, 'amount': '10.00'},
+        ]
+
+        with transaction.atomic(), self.assertNumQueries(1):
+            ok, results = check_budget_lines(lines, self.fy, reserve=True)
+
+        self.assertFalse(ok)
+        self.assertEqual((results[0]['available'], results[0]['shortfall']),
+                         (Decimal('300.00'), Decimal('50.00')))
+        self.assertIn('error', results[2])
+
+        ok, details = check_budget_availability(self.travel, self.ops, self.fy, Decimal('300.00'))
+        self.assertTrue(ok)
+        self.assertEqual(details['actual'], Decimal('700.00'))
+
+    def test_new_budget_is_seeded_and_rebuild_repairs(self):
+        self._post('JV-1', Decimal('120.00'))
+        overall = Budget.objects.create(
+            fiscal_year=self.fy, account=self.travel, original_amount=Decimal('5000.00'),
+        )
+        overall.refresh_from_db()
+        self.assertEqual(overall.actual_amount, Decimal('120.00'))
+
+        Budget.objects.filter(pk=overall.pk).update(actual_amount=Decimal('9.00'))
+        rebuild_budget_counters(None)
+        overall.refresh_from_db()
+        self.assertEqual(overall.actual_amount, Decimal('120.00'))
+
+    def test_check_endpoint_rejects_malformed_ids(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user('budget@example.com', 'x'))
+        url = '/api/v1/finance/budgets/check/'
+        line = {'account': str(self.travel.pk), 'cost_center': None, 'amount': '10.00'}
+
+        ok = client.post(url, {'fiscal_year': str(self.fy.pk), 'lines': [line]}, format='json')
+        self.assertEqual(ok.status_code, 200)
+        for body in (
+            {'fiscal_year': 'FY2026', 'lines': [line]},
+            {'fiscal_year': str(self.fy.pk), 'lines': [dict(line, account='travel')]},
+        ):
+            self.assertEqual(client.post(url, body, format='json').status_code, 400)
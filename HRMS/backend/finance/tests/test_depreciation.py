@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.balances import verify_balances
+from finance.models import Account, FiscalPeriod, FiscalYear, JournalEntry
+from finance.tasks import calculate_depreciation
+from inventory.models import Asset, AssetDepreciation
+
+
+class DepreciationBatchTest(TestCase):
+    """Batch depreciation posts one journal per period and supports catch-up."""
+
+    @classmethod
+    def setUpTestData(cls):
+        fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+        )
+        cls.periods = [
+            FiscalPeriod.objects.create(
+                fiscal_year=fy, period_number=m, name=f'2026-{m:02d}',
+                start_date=date(2026, m, 1), end_date=date(2026, m, 28),
+            )
+            for m in (1, 2, 3)
+        ]
+        Account.objects.create(code='5280', name='Depreciation', account_type='EXPENSE')
+        Account.objects.create(code='1250', name='Accumulated Depreciation', account_type='ASSET')
+
+        def asset(number, cost, method='STRAIGHT_LINE', life=12, acquired=date(2025, 12, 1),
+                  accumulated='0.00'):
+            cost, accumulated = Decimal(cost), Decimal(accumulated)
+            return Asset.objects.create(
+                asset_number=number, name=number, acquisition_date=acquired,
+                acquisition_cost=cost, current_value=cost - accumulated,
+                accumulated_depreciation=accumulated, depreciation_method=method,
+                useful_life_months=life,
+            )
+
+        cls.straight = asset('A-SL', '1200.00')
+        cls.declining = asset('A-DDB', '1000.00', method='DECLINING_BALANCE', life=20)
+        cls.done = asset('A-DONE', '500.00', accumulated='500.00')
+        cls.future = asset('A-NEW', '900.00', acquired=date(2026, 3, 15))
+
+    def test_dry_run_writes_nothing(self):
+        result = calculate_depreciation(str(self.periods[0].pk), dry_run=True)
+
+        self.assertEqual(result['assets_processed'], 2)
+        self.assertEqual(result['total_depreciation'], '200.00')
+        self.assertEqual({row['asset_number'] for row in result['preview']}, {'A-SL', 'A-DDB'})
+        self.assertFalse(AssetDepreciation.objects.exists())
+        self.assertFalse(JournalEntry.objects.exists())
+
+    def test_catch_up_books_each_missed_period(self):
+        calculate_depreciation(str(self.periods[0].pk))
+        result = calculate_depreciation(str(self.periods[2].pk), catch_up=True)
+
+        # January was already booked; the new asset starts in March
+        self.assertEqual([p['assets'] for p in result['periods']], [0, 2, 3])
+        self.assertEqual(JournalEntry.objects.filter(source='DEPRECIATION').count(), 3)
+        self.straight.refresh_from_db()
+        self.declining.refresh_from_db()
+        self.assertEqual(self.straight.accumulated_depreciation, Decimal('300.00'))
+        self.assertEqual(self.declining.accumulated_depreciation, Decimal('271.00'))
+        march = AssetDepreciation.objects.get(asset=self.declining, fiscal_period=self.periods[2])
+        self.assertEqual((march.depreciation_amount, march.book_value),
+                         (Decimal('81.00'), Decimal('729.00')))
+        self.assertEqual(march.journal_entry.entry_number, result['journal_entry'])
+        self.assertEqual(march.journal_entry.total_debit, Decimal('256.00'))
+        self.assertEqual(verify_balances(None), [])
+
+        # Running again finds nothing left to depreciate
+        again = calculate_depreciation(str(self.periods[2].pk), catch_up=True)
+        self.assertEqual((again['assets_processed'], again['journal_entry']), (0, None))
@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.balances import verify_balances
+from finance.models import Account, FiscalPeriod, FiscalYear, JournalEntry, JournalLine
+from finance.posting import AccountResolver, JournalBuilder
+from finance.tasks import post_payroll_to_gl
+
+
+class PayrollPostingTest(TestCase):
+    """Payroll GL posting aggregates details per account and dimension."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from employees.models import Employee
+        from organization.models import CostCenter, Department, JobPosition
+        from payroll.models import (
+            PayComponent, PayrollItem, PayrollItemDetail, PayrollPeriod, PayrollRun,
+        )
+
+        fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+        )
+        FiscalPeriod.objects.create(
+            fiscal_year=fy, period_number=1, name='2026-01',
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 31),
+        )
+        for code, name, account_type in [
+            ('5110', 'Basic Salary', 'EXPENSE'),
+            ('2130', 'PAYE Payable', 'LIABILITY'),
+            ('2160', 'Net Pay Payable', 'LIABILITY'),
+        ]:
+            Account.objects.create(code=code, name=name, account_type=account_type)
+
+        cls.cost_center = CostCenter.objects.create(code='CC1', name='Head Office')
+        cls.departments = [
+            Department.objects.create(code='FIN', name='Finance'),
+            Department.objects.create(code='OPS', name='Operations'),
+        ]
+        position = JobPosition.objects.create(code='ACC', title='Accountant')
+        basic = PayComponent.objects.create(code='BASIC', name='Basic', category='BASIC')
+        paye = PayComponent.objects.create(
+            code='PAYE', name='PAYE', category='STATUTORY', component_type='DEDUCTION',
+        )
+        period = PayrollPeriod.objects.create(
+            name='2026-01', year=2026, month=1,
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 31),
+        )
+        cls.payroll_run = PayrollRun.objects.create(
+            payroll_period=period, run_number='PR-202601', status='APPROVED',
+        )
+
+        # Two employees per department in the cost center, one without a cost center
+        staff = [(d, cls.cost_center) for d in cls.departments for _ in range(2)]
+        staff.append((cls.departments[0], None))
+        for e, (department, cost_center) in enumerate(staff):
+            employee = Employee.objects.create(
+                employee_number=f'EMP{e:03d}', first_name=f'First{e}', last_name=f'Last{e}',
+                date_of_birth=date(1990, 1, 1), gender='M', mobile_phone='0200000000',
+                residential_address='Accra', residential_city='Accra',
+                date_of_joining=date(2020, 1, 1), department=department, position=position,
+                cost_center=cost_center, ssnit_number=f'SS{e}',
+            )
+            item = PayrollItem.objects.create(
+                payroll_run=cls.payroll_run, employee=employee, status='APPROVED',
+                basic_salary=Decimal('1000.00'), net_salary=Decimal('900.00'),
+            )
+            PayrollItemDetail.objects.create(payroll_item=item, pay_component=basic,
+                                             amount=Decimal('1000.00'))
+            PayrollItemDetail.objects.create(payroll_item=item, pay_component=paye,
+                                             amount=Decimal('100.00'))
+
+    def test_lines_aggregated_per_account_and_department(self):
+        result = post_payroll_to_gl(str(self.payroll_run.pk))
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['entries_count'], 2)
+        entry = JournalEntry.objects.get(description__endswith='Head Office')
+        self.assertEqual(entry.status, 'POSTED')
+        self.assertEqual(entry.total_debit, Decimal('4000.00'))
+        self.assertEqual(entry.total_credit, Decimal('4000.00'))
+
+        lines = JournalLine.objects.filter(journal_entry=entry)
+        self.assertEqual(lines.count(), 6)
+        for department in self.departments:
+            self.assertEqual(
+                {(l.account.code, l.debit_amount, l.credit_amount)
+                 for l in lines.filter(department=department)},
+                {('5110', Decimal('2000.00'), Decimal('0.00')),
+                 ('2130', Decimal('0.00'), Decimal('200.00')),
+                 ('2160', Decimal('0.00'), Decimal('1800.00'))},
+            )
+        self.assertTrue(all(l.cost_center_id == self.cost_center.pk for l in lines))
+        self.assertEqual(verify_balances(None), [])
+
+    def test_unmapped_component_is_not_posted(self):
+        from payroll.models import PayComponent, PayrollItem, PayrollItemDetail
+
+        # No 5120 account exists for the allowance default to resolve to
+        housing = PayComponent.objects.create(code='HOUSING', name='Housing', category='ALLOWANCE')
+        PayrollItemDetail.objects.create(payroll_item=PayrollItem.objects.first(), pay_component=housing,
+                                         amount=Decimal('250.00'))
+
+        result = post_payroll_to_gl(str(self.payroll_run.pk))
+
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['skipped_components'], ['HOUSING'])
+        self.assertFalse(JournalEntry.objects.exists())
+
+    def test_resolver_looks_up_each_code_once(self):
+        resolver = AccountResolver()
+        with self.assertNumQueries(2):
+            for _ in range(3):
+                resolver.code('5110')
+                resolver.code('9999')
+        self.assertEqual(resolver.code('5110').name, 'Basic Salary')
+        self.assertIsNone(resolver.code('9999'))
+
+    def test_builder_rejects_negative_and_unbalanced_amounts(self):
+        salary, net_pay = Account.objects.get(code='5110'), Account.objects.get(code='2160')
+        journal = JournalBuilder()
+        with self.assertRaisesMessage(ValueError, 'Negative debit amount -5.00 for account 5110'):
+            journal.debit(salary, Decimal('-5.00'))
+
+        # Each side rounds on its own: 0.005 + 0.005 debits 0.02, the 0.01 credit leaves it a cent short
+        journal.debit(salary, Decimal('0.005'), department_id=self.departments[0].pk)
+        journal.debit(salary, Decimal('0.005'), department_id=self.departments[1].pk)
+        journal.credit(net_pay, Decimal('0.01'))
+        with self.assertRaisesMessage(ValueError, 'debits 0.02 != credits 0.01'):
+            journal.post(
+                tenant=None, fiscal_period=FiscalPeriod.objects.get(), journal_date=date(2026, 1, 31),
+                description='Rounding', source='MANUAL', source_reference='', entry_prefix='JV-TST',
+            )
+        self.assertFalse(JournalEntry.objects.exists())
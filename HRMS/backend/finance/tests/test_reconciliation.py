@@ -0,0 +1,106 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.models import (
+    Account, BankStatement, BankStatementLine, Customer, OrganizationBankAccount, Payment, Vendor,
+)
+from finance.reconciliation import auto_reconcile, import_statement_file
+
+CSV_STATEMENT = b"""Date,Description,Reference,Debit,Credit
+02/03/2026,Supplier transfer,INV-1001,500.00,
+02/03/2026,Customer receipt,,,"1,200.00"
+04/03/2026,Transfer to Acme,,745.00,
+05/03/2026,Deposit part 1,BATCH-7788,,400.00
+05/03/2026,Deposit part 2,BATCH-7788,,500.00
+06/03/2026,Bank charges,,33.00,
+"""
+
+OFX_STATEMENT = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260302120000<TRNAMT>-500.00<FITID>F1<NAME>Supplier<MEMO>INV-1001</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20260305
+<TRNAMT>400.00
+<FITID>F2
+<CHECKNUM>BATCH-7788
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class BankReconciliationTest(TestCase):
+    """Statement import and the exact / tolerance / grouped matching passes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        gl = Account.objects.create(code='1110', name='Bank', account_type='ASSET')
+        cls.bank = OrganizationBankAccount.objects.create(
+            name='Operating', account_number='001', bank_name='GCB', gl_account=gl,
+        )
+        vendor = Vendor.objects.create(code='V1', name='Acme')
+        customer = Customer.objects.create(code='C1', name='Globex')
+
+        def payment(number, amount, day, reference='', **party):
+            return Payment.objects.create(
+                payment_number=number, payment_date=date(2026, 3, day), amount=Decimal(amount),
+                bank_account=cls.bank, reference=reference, **party,
+            )
+
+        cls.by_ref = payment('PAY-1', '500.00', 1, 'INV-1001', vendor=vendor)
+        cls.same_day = payment('PAY-2', '1200.00', 2, customer=customer)
+        cls.with_charges = payment('PAY-3', '750.00', 3, vendor=vendor)
+        cls.batched = payment('PAY-4', '900.00', 5, 'BATCH-7788', customer=customer)
+        cls.outstanding = payment('PAY-5', '2500.00', 4, vendor=vendor)
+
+    def setUp(self):
+        self.statement = BankStatement.objects.create(
+            bank_account=self.bank, statement_date=date(2026, 3, 31),
+            opening_balance=0, closing_balance=0,
+        )
+
+    def test_import_and_auto_reconcile(self):
+        created = import_statement_file(self.statement, io.BytesIO(CSV_STATEMENT), 'march.csv')
+        self.assertEqual(created, 6)
+
+        report = auto_reconcile(self.statement)
+
+        self.assertEqual(report['matched'], {'EXACT': 2, 'TOLERANCE': 1, 'GROUPED': 2})
+        self.assertEqual(report['reconciled'], 2)
+        self.assertEqual(report['suggested'], 3)
+        self.assertEqual(report['unmatched_lines_count'], 1)
+        self.assertEqual([p['payment_number'] for p in report['unmatched_payments']], ['PAY-5'])
+
+        lines = {l.description: l for l in BankStatementLine.objects.filter(statement=self.statement)}
+        exact = lines['Supplier transfer']
+        self.assertEqual((exact.matched_payment_id, exact.is_reconciled), (self.by_ref.pk, True))
+        self.assertEqual(lines['Customer receipt'].match_confidence, 90)
+        charges = lines['Transfer to Acme']
+        self.assertEqual((charges.matched_payment_id, charges.is_reconciled, charges.match_method),
+                         (self.with_charges.pk, False, 'TOLERANCE'))
+        for part in ('Deposit part 1', 'Deposit part 2'):
+            self.assertEqual(lines[part].matched_payment_id, self.batched.pk)
+        self.assertIsNone(lines['Bank charges'].matched_payment_id)
+
+        # Re-running keeps reconciled lines and leaves suggestions unchanged
+        again = auto_reconcile(self.statement)
+        self.assertEqual(again['open_lines'], 4)
+        self.assertEqual(again['matched'], {'EXACT': 0, 'TOLERANCE': 1, 'GROUPED': 2})
+
+    def test_ofx_import(self):
+        created = import_statement_file(self.statement, io.BytesIO(OFX_STATEMENT), 'march.ofx')
+
+        self.assertEqual(created, 2)
+        first, second = BankStatementLine.objects.filter(statement=self.statement).order_by('transaction_date')
+        self.assertEqual((first.transaction_date, first.debit_amount, first.description),
+                         (date(2026, 3, 2), Decimal('500.00'), 'Supplier INV-1001'))
+        self.assertEqual((second.credit_amount, second.reference), (Decimal('400.00'), 'BATCH-7788'))
+
+    def test_bad_rows_write_nothing(self):
+        bad = CSV_STATEMENT + b"31/31/2026,Broken,,1.00,\n"
+        with self.assertRaisesMessage(ValueError, 'Line 8'):
+            import_statement_file(self.statement, io.BytesIO(bad), 'bad.csv')
+        self.assertFalse(BankStatementLine.objects.filter(statement=self.statement).exists())
@@ -0,0 +1,78 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.balances import verify_balances
+from finance.models import (
+    Account, AccountPeriodBalance, FiscalPeriod, FiscalYear, JournalEntry, JournalLine,
+    RecurringJournal,
+)
+from finance.tasks import generate_recurring_journals
+
+
+class RecurringJournalGenerationTest(TestCase):
+    """Recurring journals catch up on every missed occurrence exactly once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+        )
+        for m in range(1, 10):
+            end = date(2026, m + 1, 1).toordinal() - 1
+            FiscalPeriod.objects.create(
+                fiscal_year=fy, period_number=m, name=f'2026-{m:02d}',
+                start_date=date(2026, m, 1), end_date=date.fromordinal(end),
+            )
+        cls.rent = Account.objects.create(code='5400', name='Rent', account_type='EXPENSE')
+        bank = Account.objects.create(code='1110', name='Bank', account_type='ASSET')
+        source = JournalEntry.objects.create(
+            entry_number='JV-TPL', journal_date=date(2026, 1, 1),
+            fiscal_period=FiscalPeriod.objects.get(period_number=1), description='Rent template',
+        )
+        JournalLine.objects.create(journal_entry=source, account=cls.rent,
+                                   debit_amount=Decimal('1000.00'), credit_amount=0)
+        JournalLine.objects.create(journal_entry=source, account=bank,
+                                   debit_amount=0, credit_amount=Decimal('1000.00'))
+        cls.monthly = RecurringJournal.objects.create(
+            template_name='Office rent', frequency='MONTHLY', next_run_date=date(2026, 1, 31),
+            source_entry=source,
+        )
+        cls.quarterly = RecurringJournal.objects.create(
+            template_name='Service charge', frequency='QUARTERLY', next_run_date=date(2026, 3, 15),
+            end_date=date(2026, 7, 1), source_entry=source,
+        )
+
+    def test_catch_up_posts_each_missed_occurrence(self):
+        result = generate_recurring_journals(until='2026-06-30')
+
+        self.assertEqual((result['count'], result['skipped']), (8, 0))
+        dates = list(JournalEntry.objects.filter(source_reference='Office rent')
+                     .order_by('journal_date').values_list('journal_date', flat=True))
+        # Month-end dates do not drift after February
+        self.assertEqual([d.isoformat() for d in dates], [
+            '2026-01-31', '2026-02-28', '2026-03-31', '2026-04-30', '2026-05-31', '2026-06-30',
+        ])
+        self.monthly.refresh_from_db()
+        self.quarterly.refresh_from_db()
+        self.assertEqual(self.monthly.next_run_date, date(2026, 7, 31))
+        self.assertEqual((self.quarterly.next_run_date, self.quarterly.is_active),
+                         (date(2026, 9, 15), False))
+        march = AccountPeriodBalance.objects.get(account=self.rent, fiscal_period__period_number=3)
+        self.assertEqual(march.period_debit, Decimal('2000.00'))
+        self.assertEqual(verify_balances(None), [])
+
+    def test_rerun_is_idempotent_and_stops_at_missing_period(self):
+        generate_recurring_journals(until='2026-03-31')
+        RecurringJournal.objects.filter(pk=self.monthly.pk).update(next_run_date=date(2026, 1, 31))
+
+        result = generate_recurring_journals(recurring_id=str(self.monthly.pk), until='2026-12-31')
+
+        # January-March already exist; no period is open after September
+        self.assertEqual((result['count'], result['skipped']), (6, 3))
+        self.assertEqual(JournalEntry.objects.filter(source_reference='Office rent').count(), 9)
+        self.monthly.refresh_from_db()
+        self.assertEqual((self.monthly.next_run_date, self.monthly.is_active),
+                         (date(2026, 10, 31), True))
+        self.assertEqual(verify_balances(None), [])
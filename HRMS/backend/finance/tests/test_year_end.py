@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.balances import cumulative_balances, verify_balances
+from finance.models import (
+    Account, FiscalPeriod, FiscalYear, JournalEntry, JournalLine, YearEndCloseRun,
+)
+from finance.services import FinancialStatementService, post_journal_entry
+from finance.year_end import (
+    aggregate_chunk, finalize_close, record_failure, run_progress, start_close,
+)
+
+
+class YearEndCloseTest(TestCase):
+    """The chunked close posts one closing entry and resumes after a failure."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fy = FiscalYear.objects.create(
+            name='FY2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31),
+        )
+        cls.periods = [
+            FiscalPeriod.objects.create(
+                fiscal_year=cls.fy, period_number=n, name=f'2025-H{n}',
+                start_date=date(2025, 6 * n - 5, 1), end_date=date(2025, 6 * n, 30),
+            )
+            for n in (1, 2)
+        ]
+        cash = Account.objects.create(code='1000', name='Cash', account_type='ASSET')
+        cls.retained = Account.objects.create(code='3100', name='Retained', account_type='EQUITY')
+        accounts = {
+            code: Account.objects.create(code=code, name=code, account_type=kind)
+            for code, kind in (('4000', 'REVENUE'), ('4100', 'REVENUE'), ('5000', 'EXPENSE'),
+                               ('5100', 'EXPENSE'), ('5200', 'EXPENSE'))
+        }
+        postings = [
+            (0, '4000', '0.00', '900.00'), (1, '4000', '0.00', '600.00'),
+            (1, '4100', '50.00', '0.00'),  # contra-revenue balance
+            (0, '5000', '400.00', '0.00'), (1, '5100', '250.00', '0.00'),
+            (1, '5200', '300.00', '0.00'),
+        ]
+        for n, (period, code, debit, credit) in enumerate(postings):
+            debit, credit = Decimal(debit), Decimal(credit)
+            entry = JournalEntry.objects.create(
+                entry_number=f'JV-{n}', journal_date=cls.periods[period].start_date,
+                fiscal_period=cls.periods[period],
+            )
+            JournalLine.objects.create(journal_entry=entry, account=accounts[code],
+                                       debit_amount=debit, credit_amount=credit)
+            JournalLine.objects.create(journal_entry=entry, account=cash,
+                                       debit_amount=credit, credit_amount=debit)
+            post_journal_entry(entry, None)
+        for period in cls.periods:
+            period.is_closed = True
+            period.save()
+
+    def test_chunked_close_zeroes_income_accounts(self):
+        run, dispatch = start_close(self.fy, chunk_size=2)
+        self.assertTrue(dispatch)
+        chunks = list(run.chunks.order_by('sequence'))
+        self.assertEqual([(c.first_code, c.last_code) for c in chunks],
+                         [('4000', '4100'), ('5000', '5100'), ('5200', '5200')])
+
+        for chunk in chunks:
+            aggregate_chunk(chunk.pk)
+        run = finalize_close(run.pk)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual((run.revenue_total, run.expense_total, run.net_income),
+                         (Decimal('1450.00'), Decimal('950.00'), Decimal('500.00')))
+        entry = run.closing_entry
+        self.assertEqual((entry.total_debit, entry.total_credit),
+                         (Decimal('1500.00'), Decimal('1500.00')))
+        balances = cumulative_balances(self.periods[1], ['REVENUE', 'EXPENSE', 'EQUITY'])
+        self.assertFalse([b for a, b in balances.items() if a != self.retained.pk and b])
+        self.assertEqual(balances[self.retained.pk], Decimal('-500.00'))
+        self.assertEqual(verify_balances(None), [])
+        self.fy.refresh_from_db()
+        self.assertTrue(self.fy.is_closed)
+
+        progress = run_progress(run)
+        self.assertEqual((progress['percentage'], progress['chunks_done']), (100, 3))
+        self.assertEqual(set(progress['phase_timings']), {'plan', 'aggregate', 'finalize'})
+        self.assertEqual(progress['result']['closing_entry'], entry.entry_number)
+
+    def test_failed_run_resumes_without_redoing_chunks(self):
+        run, _ = start_close(self.fy, chunk_size=2)
+        first = aggregate_chunk(run.chunks.get(sequence=0).pk)
+        with self.assertRaisesMessage(ValueError, '2 chunk(s) not aggregated') as failure:
+            finalize_close(run.pk)
+
+        # A second start returns the unfinished run without dispatching it again
+        self.assertEqual(start_close(self.fy), (run, False))
+
+        record_failure(run.pk, failure.exception)
+        self.assertEqual(YearEndCloseRun.objects.get(pk=run.pk).status, 'FAILED')
+        result = FinancialStatementService.year_end_close(self.fy.pk)
+
+        self.assertEqual(result['net_income'], '500.00')
+        run.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual((run.status, run.error), ('COMPLETED', ''))
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(len(run.phase_timings['resumed_at']), 1)
+        with self.assertRaisesMessage(ValueError, 'already closed'):
+            start_close(self.fy)
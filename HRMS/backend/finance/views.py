@@ -1,19 +1,24 @@
 """ViewSets for finance app."""
 
 from datetime import date
+from django.core.exceptions import ValidationError
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.numbering import next_number
+from core.pagination import LargeResultsSetPagination
+
 from .models import (
     Account, FiscalYear, FiscalPeriod, JournalEntry, JournalLine,
     Budget, BudgetCommitment, Vendor, VendorInvoice, Customer,
     CustomerInvoice, OrganizationBankAccount, Payment, BankStatement,
     BankStatementLine, ExchangeRate, TaxType, CreditNote, DebitNote,
-    RecurringJournal
+    RecurringJournal, YearEndCloseRun
 )
 from .serializers import (
     AccountSerializer, FiscalYearSerializer, FiscalPeriodSerializer,
@@ -26,7 +31,11 @@ from .serializers import (
     ExchangeRateSerializer, TaxTypeSerializer, CreditNoteSerializer,
     DebitNoteSerializer, RecurringJournalSerializer
 )
-from .services import FinancialStatementService, post_journal_entry
+from .aging import aging_detail
+from .budgets import check_budget_lines
+from .depreciation import run_depreciation
+from .services import FinancialStatementService, post_journal_entry, reverse_journal_entry
+from .year_end import run_progress, start_close
 
 
 class AccountViewSet(viewsets.ModelViewSet):
@@ -62,6 +71,15 @@ class FiscalPeriodViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['fiscal_year', 'is_closed']
 
+    @action(detail=True, methods=['get'])
+    def depreciation_preview(self, request, pk=None):
+        """Dry-run the depreciation batch for this period (?catch_up=true for missed months)."""
+        period = self.get_object()
+        if period.is_closed:
+            return Response({'error': 'Fiscal period is closed'}, status=status.HTTP_400_BAD_REQUEST)
+        catch_up = request.query_params.get('catch_up') == 'true'
+        return Response(run_depreciation(period, dry_run=True, catch_up=catch_up))
+
 
 class JournalEntryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -92,6 +110,16 @@ class JournalEntryViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(self.get_serializer(entry).data)
 
+    @action(detail=True, methods=['post'])
+    def reverse_entry(self, request, pk=None):
+        """Reverse a posted journal entry."""
+        entry = self.get_object()
+        try:
+            reverse_journal_entry(entry, request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(entry).data)
+
 
 class BudgetViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -106,6 +134,24 @@ class BudgetViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Budget.objects.select_related('fiscal_year', 'account', 'cost_center', 'department').all()
 
+    @action(detail=False, methods=['post'])
+    def check(self, request):
+        """Check budget availability for all lines of a document in one call."""
+        fiscal_year = request.data.get('fiscal_year')
+        lines = request.data.get('lines')
+        if not fiscal_year or not isinstance(lines, list):
+            return Response({'error': 'fiscal_year and a list of lines are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            available, results = check_budget_lines(lines, fiscal_year)
+        except (KeyError, TypeError, ArithmeticError):
+            return Response({'error': 'Each line needs an account and a numeric amount'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except (ValidationError, ValueError):
+            return Response({'error': 'fiscal_year, account and cost_center must be valid ids'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'available': available, 'lines': results})
+
 
 class BudgetCommitmentViewSet(viewsets.ModelViewSet):
     queryset = BudgetCommitment.objects.select_related('budget').all()
@@ -177,6 +223,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Payment.objects.select_related('vendor', 'customer', 'bank_account')
 
+    def perform_create(self, serializer):
+        number = next_number('PAY', tenant=getattr(self.request, 'tenant', None),
+                             model=Payment, field='payment_number')
+        serializer.save(payment_number=number)
+
 
 class BankStatementViewSet(viewsets.ModelViewSet):
     serializer_class = BankStatementSerializer
@@ -188,6 +239,30 @@ class BankStatementViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return BankStatement.objects.select_related('bank_account')
 
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def import_lines(self, request, pk=None):
+        """Import transactions from a CSV or OFX statement file."""
+        from .reconciliation import import_statement_file
+
+        statement = self.get_object()
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created = import_statement_file(
+                statement, upload, file_name=upload.name, file_format=request.data.get('format'),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'imported': created})
+
+    @action(detail=True, methods=['post'])
+    def auto_reconcile(self, request, pk=None):
+        """Match open statement lines to payments; returns counts, confidence and unmatched items."""
+        from .reconciliation import auto_reconcile
+
+        return Response(auto_reconcile(self.get_object()))
+
 
 class BankStatementLineViewSet(viewsets.ModelViewSet):
     serializer_class = BankStatementLineSerializer
@@ -272,12 +347,22 @@ class CashFlowView(APIView):
         return Response(data)
 
 
+def _aging_detail_response(view, request, kind, as_of_date, party_param):
+    """Paginated per-invoice aging rows (?detail=invoices)."""
+    rows = aging_detail(kind, as_of_date, party_id=request.query_params.get(party_param))
+    paginator = LargeResultsSetPagination()
+    page = paginator.paginate_queryset(rows, request, view=view)
+    return paginator.get_paginated_response(page)
+
+
 class APAgingView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         as_of = request.query_params.get('as_of_date')
         as_of_date = date.fromisoformat(as_of) if as_of else None
+        if request.query_params.get('detail') == 'invoices':
+            return _aging_detail_response(self, request, 'AP', as_of_date, 'vendor')
         data = FinancialStatementService.generate_ap_aging(as_of_date)
         return Response(data)
 
@@ -288,6 +373,8 @@ class ARAgingView(APIView):
     def get(self, request):
         as_of = request.query_params.get('as_of_date')
         as_of_date = date.fromisoformat(as_of) if as_of else None
+        if request.query_params.get('detail') == 'invoices':
+            return _aging_detail_response(self, request, 'AR', as_of_date, 'customer')
         data = FinancialStatementService.generate_ar_aging(as_of_date)
         return Response(data)
 
@@ -331,8 +418,8 @@ class CreditNoteViewSet(viewsets.ModelViewSet):
         )
 
     def perform_create(self, serializer):
-        from .tasks import _generate_entry_number
-        number = _generate_entry_number('CN')
+        number = next_number('CN', tenant=getattr(self.request, 'tenant', None),
+                             model=CreditNote, field='credit_note_number')
         serializer.save(credit_note_number=number)
 
     @action(detail=True, methods=['post'])
@@ -359,8 +446,8 @@ class DebitNoteViewSet(viewsets.ModelViewSet):
         )
 
     def perform_create(self, serializer):
-        from .tasks import _generate_entry_number
-        number = _generate_entry_number('DN')
+        number = next_number('DN', tenant=getattr(self.request, 'tenant', None),
+                             model=DebitNote, field='debit_note_number')
         serializer.save(debit_note_number=number)
 
     @action(detail=True, methods=['post'])
@@ -393,15 +480,50 @@ class RecurringJournalViewSet(viewsets.ModelViewSet):
 
 
 class YearEndCloseView(APIView):
-    """Year-end close process."""
+    """
+    Year-end close process, run in the background (see finance.year_end).
+
+    POST starts the close of ``fiscal_year_id`` or resumes its failed run
+    (``resume=true`` also restarts a run whose worker stopped); GET with
+    ``run_id`` or ``fiscal_year_id`` returns the run's progress and phase
+    timings.
+    """
     permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        runs = YearEndCloseRun.objects.select_related('fiscal_year')
+        run_id = request.query_params.get('run_id')
+        fiscal_year_id = request.query_params.get('fiscal_year_id')
+        if run_id:
+            run = runs.filter(pk=run_id).first()
+        elif fiscal_year_id:
+            run = runs.filter(fiscal_year_id=fiscal_year_id).order_by('-created_at').first()
+        else:
+            return Response({'error': 'run_id or fiscal_year_id is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if run is None:
+            return Response({'error': 'Year-end close run not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(run_progress(run))
+
     def post(self, request):
+        from .tasks import run_year_end_close
+
         fiscal_year_id = request.data.get('fiscal_year_id')
         if not fiscal_year_id:
             return Response({'error': 'fiscal_year_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        fiscal_year = FiscalYear.objects.filter(pk=fiscal_year_id).first()
+        if fiscal_year is None:
+            return Response({'error': 'Fiscal year not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            result = FinancialStatementService.year_end_close(fiscal_year_id)
-            return Response(result)
-        except Exception as e:
+            run, dispatch = start_close(
+                fiscal_year,
+                chunk_size=request.data.get('chunk_size'),
+                resume_running=str(request.data.get('resume')).lower() == 'true',
+            )
+        except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if dispatch:
+            task = run_year_end_close.delay(str(run.pk))
+            YearEndCloseRun.all_objects.filter(pk=run.pk).update(task_id=task.id)
+            run.task_id = task.id
+        return Response(run_progress(run), status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,375 @@
+"""
+Resumable, chunked year-end close.
+
+Closing a fiscal year zeroes every revenue and expense account into
+retained earnings. A close runs as a YearEndCloseRun in three phases, each
+timed in ``run.phase_timings``:
+
+- plan: validate the year, then split the revenue and expense accounts that
+  have postings into ranges of ``chunk_size`` account codes, one
+  YearEndCloseChunk per range.
+- aggregate: every chunk sums its accounts' AccountPeriodBalance rows for
+  the year (no journal line scan) and checkpoints the closing balances on
+  the chunk row. Chunks are independent, so the Celery workflow runs them in
+  parallel, and a chunk that is already DONE is never recomputed.
+- finalize: one transaction posts the closing entry from the checkpointed
+  balances, re-freezes the last period's snapshots and marks the year
+  closed.
+
+A failure marks the chunk (or the finalize step) and the run FAILED.
+Starting the close again resumes that run: failed and pending chunks are
+retried and finished ones are kept. Periods must all be closed before a
+close starts, so the aggregates cannot change between chunks.
+"""
+
+import logging
+import time
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .balances import freeze_period
+from .posting import JournalBuilder
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+CLOSE_TYPES = ('REVENUE', 'EXPENSE')
+RETAINED_EARNINGS_CODES = ('3100', '3200')
+DEFAULT_CHUNK_SIZE = 200
+
+
+def _model(name):
+    return apps.get_model('finance', name)
+
+
+def _timing(started, finished, **extra):
+    return {
+        'started_at': started.isoformat(),
+        'finished_at': finished.isoformat(),
+        'seconds': round((finished - started).total_seconds(), 3),
+        **extra,
+    }
+
+
+def _retained_earnings(tenant):
+    Account = _model('Account')
+
+    accounts = Account.all_objects.filter(
+        code__in=RETAINED_EARNINGS_CODES, account_type='EQUITY', is_active=True, is_deleted=False,
+    )
+    if tenant:
+        accounts = accounts.filter(tenant=tenant)
+    account = accounts.order_by('code').first()
+    if not account:
+        raise ValueError("Retained Earnings account (3100 or 3200) not found.")
+    return account
+
+
+def _validate(fiscal_year):
+    """Raise ValueError unless ``fiscal_year`` can be closed; returns its last period."""
+    FiscalPeriod = _model('FiscalPeriod')
+
+    if fiscal_year.is_closed:
+        raise ValueError(f"Fiscal year {fiscal_year.name} is already closed.")
+
+    periods = FiscalPeriod.all_objects.filter(fiscal_year=fiscal_year, is_deleted=False)
+    open_periods = list(periods.filter(is_closed=False).values_list('name', flat=True)[:5])
+    if open_periods:
+        raise ValueError(f"Cannot close year: open periods remain: {', '.join(open_periods)}")
+
+    last_period = periods.order_by('-period_number').first()
+    if not last_period:
+        raise ValueError("No fiscal periods found for this year.")
+    _retained_earnings(fiscal_year.tenant)
+    return last_period
+
+
+def _year_balances(fiscal_year):
+    AccountPeriodBalance = _model('AccountPeriodBalance')
+
+    return AccountPeriodBalance.all_objects.filter(
+        fiscal_period__fiscal_year=fiscal_year,
+        fiscal_period__is_deleted=False,
+        account__account_type__in=CLOSE_TYPES,
+    )
+
+
+def _plan_chunks(run):
+    """Split the year's revenue and expense accounts into code ranges."""
+    YearEndCloseChunk = _model('YearEndCloseChunk')
+
+    codes = list(
+        _year_balances(run.fiscal_year).exclude(period_debit=0, period_credit=0)
+        .values_list('account__code', flat=True).distinct().order_by('account__code')
+    )
+    size = max(run.chunk_size, 1)
+    YearEndCloseChunk.objects.bulk_create([
+        YearEndCloseChunk(
+            tenant_id=run.tenant_id, run=run, sequence=n,
+            first_code=codes[start], last_code=codes[min(start + size, len(codes)) - 1],
+        )
+        for n, start in enumerate(range(0, len(codes), size))
+    ])
+
+
+# ── Phases ──────────────────────────────────────────────────────────────────
+
+def start_close(fiscal_year, chunk_size=None, resume_running=False):
+    """
+    Plan a close of ``fiscal_year``, or resume its unfinished run.
+
+    A FAILED run is resumed: its failed chunks go back to PENDING. A run that
+    is still RUNNING is returned as is unless ``resume_running`` (e.g. after
+    its worker died). Returns (run, dispatch): whether the caller should run
+    the pending chunks and finalize. Raises ValueError when the year cannot
+    be closed.
+    """
+    FiscalYear = _model('FiscalYear')
+    YearEndCloseRun = _model('YearEndCloseRun')
+    Status = YearEndCloseRun.RunStatus
+
+    with transaction.atomic():
+        fiscal_year = FiscalYear.all_objects.select_for_update().get(pk=fiscal_year.pk)
+        started = timezone.now()
+        _validate(fiscal_year)
+
+        run = YearEndCloseRun.all_objects.filter(
+            fiscal_year=fiscal_year, is_deleted=False,
+        ).exclude(status=Status.COMPLETED).first()
+        if run is not None:
+            if run.status != Status.FAILED and not resume_running:
+                return run, False
+            run.chunks.filter(status='FAILED').update(status='PENDING', error='')
+            run.status = Status.RUNNING
+            run.error = ''
+            run.phase_timings.setdefault('resumed_at', []).append(started.isoformat())
+            run.save(update_fields=['status', 'error', 'phase_timings', 'updated_at'])
+            logger.info("Resuming year-end close run %s for %s", run.pk, fiscal_year.name)
+            return run, True
+
+        run = YearEndCloseRun.objects.create(
+            tenant=fiscal_year.tenant, fiscal_year=fiscal_year,
+            chunk_size=int(chunk_size) if chunk_size else DEFAULT_CHUNK_SIZE,
+        )
+        _plan_chunks(run)
+        run.phase_timings['plan'] = _timing(started, timezone.now(), chunks=run.chunks.count())
+        run.save(update_fields=['phase_timings', 'updated_at'])
+    return run, True
+
+
+def aggregate_chunk(chunk_id):
+    """Compute and checkpoint the closing balances of one chunk (idempotent)."""
+    YearEndCloseChunk = _model('YearEndCloseChunk')
+
+    with transaction.atomic():
+        chunk = YearEndCloseChunk.all_objects.select_for_update().select_related(
+            'run__fiscal_year',
+        ).get(pk=chunk_id)
+        if chunk.status == YearEndCloseChunk.ChunkStatus.DONE:
+            return chunk
+
+        chunk.started_at = timezone.now()
+        clock = time.monotonic()
+        rows = _year_balances(chunk.run.fiscal_year).filter(
+            account__code__gte=chunk.first_code, account__code__lte=chunk.last_code,
+        ).values('account_id', 'account__account_type').annotate(
+            debit=Sum('period_debit'), credit=Sum('period_credit'),
+        ).order_by('account__code')
+
+        balances = []
+        revenue = expense = ZERO
+        for row in rows:
+            debit, credit = row['debit'] or ZERO, row['credit'] or ZERO
+            if row['account__account_type'] == 'REVENUE':
+                balance = credit - debit
+                revenue += balance
+            else:
+                balance = debit - credit
+                expense += balance
+            if balance:
+                balances.append([str(row['account_id']), row['account__account_type'], str(balance)])
+
+        chunk.balances = balances
+        chunk.account_count = len(balances)
+        chunk.revenue_total = revenue
+        chunk.expense_total = expense
+        chunk.status = YearEndCloseChunk.ChunkStatus.DONE
+        chunk.attempts += 1
+        chunk.error = ''
+        chunk.completed_at = timezone.now()
+        chunk.duration_ms = int((time.monotonic() - clock) * 1000)
+        chunk.save()
+    return chunk
+
+
+def record_failure(run_id, exc, chunk_id=None):
+    """Mark a run (and the chunk that raised, if any) FAILED so it can be resumed."""
+    YearEndCloseChunk = _model('YearEndCloseChunk')
+    YearEndCloseRun = _model('YearEndCloseRun')
+
+    with transaction.atomic():
+        if chunk_id:
+            chunk = YearEndCloseChunk.all_objects.select_for_update().get(pk=chunk_id)
+            chunk.status = YearEndCloseChunk.ChunkStatus.FAILED
+            chunk.attempts += 1
+            chunk.error = str(exc)
+            chunk.save(update_fields=['status', 'attempts', 'error', 'updated_at'])
+        YearEndCloseRun.all_objects.filter(pk=run_id).exclude(
+            status=YearEndCloseRun.RunStatus.COMPLETED,
+        ).update(status=YearEndCloseRun.RunStatus.FAILED, error=str(exc), updated_at=timezone.now())
+    logger.error("Year-end close run %s failed: %s", run_id, exc)
+
+
+def finalize_close(run_id):
+    """
+    Post the closing entry from the checkpointed chunks and close the year.
+
+    Runs in one transaction, so either the entry, the frozen snapshots and
+    the closed year are all written or none is. Raises ValueError if a
+    chunk is not DONE or the year can no longer be closed.
+    """
+    Account = _model('Account')
+    FiscalYear = _model('FiscalYear')
+    YearEndCloseRun = _model('YearEndCloseRun')
+
+    with transaction.atomic():
+        run = YearEndCloseRun.all_objects.select_for_update().get(pk=run_id)
+        if run.status == YearEndCloseRun.RunStatus.COMPLETED:
+            return run
+        started = timezone.now()
+        fiscal_year = FiscalYear.all_objects.select_for_update().get(pk=run.fiscal_year_id)
+        last_period = _validate(fiscal_year)
+        retained_earnings = _retained_earnings(fiscal_year.tenant)
+
+        chunks = list(run.chunks.order_by('sequence'))
+        pending = [c.sequence for c in chunks if c.status != 'DONE']
+        if pending:
+            raise ValueError(f"Cannot finalize: {len(pending)} chunk(s) not aggregated yet.")
+
+        accounts = {
+            str(pk): account for pk, account in Account.all_objects.in_bulk(
+                [account_id for chunk in chunks for account_id, _, _ in chunk.balances]
+            ).items()
+        }
+        builder = JournalBuilder()
+        revenue = expense = ZERO
+        for chunk in chunks:
+            revenue += chunk.revenue_total
+            expense += chunk.expense_total
+            for account_id, account_type, balance in chunk.balances:
+                account = accounts[account_id]
+                balance = Decimal(balance)
+                description = f"Close {account.code}"
+                # Revenue carries a credit balance and expense a debit balance
+                if (account_type == 'REVENUE') == (balance > ZERO):
+                    builder.debit(account, abs(balance), description)
+                else:
+                    builder.credit(account, abs(balance), description)
+
+        net_income = revenue - expense
+        if net_income >= ZERO:
+            builder.credit(retained_earnings, net_income, 'Net income to Retained Earnings')
+        else:
+            builder.debit(retained_earnings, abs(net_income), 'Net loss to Retained Earnings')
+
+        entry = None
+        if not builder.is_empty():
+            entry = builder.post(
+                tenant=fiscal_year.tenant,
+                fiscal_period=last_period,
+                journal_date=fiscal_year.end_date,
+                description=f"Year-end closing entry - {fiscal_year.name}",
+                source='YEAR_END_CLOSE',
+                source_reference=fiscal_year.name,
+                entry_prefix='JV-CLS',
+            )
+            # Posting into the closed last period released its snapshots
+            freeze_period(last_period)
+
+        fiscal_year.is_closed = True
+        fiscal_year.save(update_fields=['is_closed', 'updated_at'])
+
+        finished = timezone.now()
+        done = [c for c in chunks if c.started_at]
+        if done:
+            run.phase_timings['aggregate'] = _timing(
+                min(c.started_at for c in done), max(c.completed_at for c in done),
+                chunks=len(chunks),
+                chunk_ms=sum(c.duration_ms or 0 for c in done),
+            )
+        run.phase_timings['finalize'] = _timing(started, finished)
+        run.status = YearEndCloseRun.RunStatus.COMPLETED
+        run.revenue_total = revenue
+        run.expense_total = expense
+        run.net_income = net_income
+        run.closing_entry = entry
+        run.completed_at = finished
+        run.error = ''
+        run.save()
+
+    logger.info("Year-end close of %s complete: net income %s", fiscal_year.name, net_income)
+    return run
+
+
+def run_close(fiscal_year, chunk_size=None):
+    """Plan or resume a close and run its pending chunks and finalize inline."""
+    run, _ = start_close(fiscal_year, chunk_size=chunk_size, resume_running=True)
+    chunk_id = None
+    try:
+        for chunk_id in list(run.chunks.exclude(status='DONE').values_list('pk', flat=True)):
+            aggregate_chunk(chunk_id)
+        chunk_id = None
+        run = finalize_close(run.pk)
+    except Exception as exc:
+        record_failure(run.pk, exc, chunk_id=chunk_id)
+        raise
+    return run
+
+
+def close_summary(run):
+    """The result dict of a completed run, as returned by year_end_close."""
+    return {
+        'status': 'success',
+        'fiscal_year': run.fiscal_year.name,
+        'net_income': str(run.net_income),
+        'revenue': str(run.revenue_total),
+        'expenses': str(run.expense_total),
+        'closing_entry': run.closing_entry.entry_number if run.closing_entry else None,
+    }
+
+
+def run_progress(run):
+    """Status, chunk progress and phase timings of a run."""
+    counts = {s: 0 for s in ('PENDING', 'DONE', 'FAILED')}
+    chunks = []
+    for chunk in run.chunks.order_by('sequence'):
+        counts[chunk.status] += 1
+        chunks.append({
+            'sequence': chunk.sequence,
+            'first_code': chunk.first_code,
+            'last_code': chunk.last_code,
+            'status': chunk.status,
+            'accounts': chunk.account_count,
+            'attempts': chunk.attempts,
+            'duration_ms': chunk.duration_ms,
+            'error': chunk.error,
+        })
+    total = len(chunks)
+    return {
+        'id': str(run.pk),
+        'fiscal_year': run.fiscal_year.name,
+        'status': run.status,
+        'task_id': run.task_id,
+        'error': run.error,
+        'chunks_total': total,
+        'chunks_done': counts['DONE'],
+        'chunks_failed': counts['FAILED'],
+        'percentage': round(100 * counts['DONE'] / total) if total else 100,
+        'phase_timings': run.phase_timings,
+        'chunks': chunks,
+        'result': close_summary(run) if run.status == 'COMPLETED' else None,
+    }
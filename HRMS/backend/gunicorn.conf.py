@@ -35,3 +35,12 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 limit_request_line = 8190
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+
+def post_worker_init(worker):
+    """Warm matplotlib (font cache, Agg canvas) once per worker for report charts."""
+    try:
+        from reports.chart_utils import warm_up
+        warm_up()
+    except Exception as e:
+        worker.log.warning("Chart warm-up failed: %s", e)
@@ -4,8 +4,8 @@ Admin configuration for inventory and asset management.
 
 from django.contrib import admin
 from .models import (
-    ItemCategory, Item, Warehouse, StockEntry, StockLedger,
-    Asset, AssetDepreciation, AssetTransfer, MaintenanceSchedule,
+    ItemCategory, Item, Warehouse, StockEntry, StockLedger, StockMovement,
+    StockValuationLayer, StockValuationSnapshot, ReorderSuggestion, Asset, AssetDepreciation, AssetTransfer, MaintenanceSchedule,
 )
 
 
@@ -56,6 +56,65 @@ class StockLedgerAdmin(admin.ModelAdmin):
     raw_id_fields = ['item', 'warehouse']
 
 
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['movement_date', 'item', 'warehouse', 'quantity', 'value', 'source', 'source_reference']
+    list_filter = ['source', 'warehouse']
+    search_fields = ['source_reference', 'item__code', 'item__name']
+    ordering = ['-movement_date']
+    raw_id_fields = ['item', 'warehouse', 'stock_entry']
+    date_hierarchy = 'movement_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockValuationLayer)
+class StockValuationLayerAdmin(admin.ModelAdmin):
+    list_display = ['layer_date', 'item', 'warehouse', 'quantity', 'unit_cost', 'remaining_qty', 'remaining_value']
+    list_filter = ['warehouse']
+    search_fields = ['item__code', 'item__name']
+    ordering = ['-layer_date']
+    raw_id_fields = ['item', 'warehouse', 'movement']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockValuationSnapshot)
+class StockValuationSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_date', 'item', 'warehouse', 'balance_qty', 'valuation_amount']
+    list_filter = ['warehouse']
+    search_fields = ['item__code', 'item__name']
+    ordering = ['-snapshot_date']
+    raw_id_fields = ['item', 'warehouse']
+    date_hierarchy = 'snapshot_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReorderSuggestion)
+class ReorderSuggestionAdmin(admin.ModelAdmin):
+    list_display = ['item', 'status', 'on_hand_qty', 'on_order_qty', 'reorder_level', 'suggested_qty', 'last_scanned_at']
+    list_filter = ['status']
+    search_fields = ['item__code', 'item__name']
+    ordering = ['item__code']
+    raw_id_fields = ['item', 'requisition']
+
+
 class AssetDepreciationInline(admin.TabularInline):
     model = AssetDepreciation
     extra = 0
@@ -0,0 +1,46 @@
+"""Deadline scanners for inventory (see core.deadlines)."""
+
+from core.deadlines import DeadlineScanner, register
+
+
+@register
+class MaintenanceScheduleScanner(DeadlineScanner):
+    """Active maintenance schedules due within 7 days, or overdue."""
+    kind = 'inventory.maintenance'
+    model = 'inventory.MaintenanceSchedule'
+    date_field = 'next_due_date'
+    reference_field = 'title'
+    open_filter = {'is_active': True}
+    lead_days = 7
+    select_related = ('asset__custodian', 'vendor')
+    link = '/inventory/maintenance-schedules'
+
+    def recipients(self, schedule):
+        custodian = schedule.asset.custodian
+        return {custodian.user_id} if custodian and custodian.user_id else set()
+
+    def notice(self, schedule, stage, today):
+        asset = schedule.asset
+        due = schedule.next_due_date.strftime('%d %b %Y')
+        overdue = schedule.next_due_date < today
+        return (
+            f'{"OVERDUE" if overdue else "Upcoming"} Maintenance: {asset.asset_number} - {schedule.title}',
+            f'Maintenance "{schedule.title}" for asset {asset.asset_number} ({asset.name}) is '
+            f'{"overdue since " + due if overdue else "due on " + due}.',
+        )
+
+    def summary(self, schedule, today):
+        summary = {
+            'schedule_id': str(schedule.id),
+            'asset_number': schedule.asset.asset_number,
+            'asset_name': schedule.asset.name,
+            'title': schedule.title,
+            'next_due_date': schedule.next_due_date.isoformat(),
+            'estimated_cost': float(schedule.estimated_cost),
+            'vendor_name': schedule.vendor.name if schedule.vendor else None,
+        }
+        if schedule.next_due_date < today:
+            summary['days_overdue'] = (today - schedule.next_due_date).days
+        else:
+            summary['days_until_due'] = (schedule.next_due_date - today).days
+        return summary
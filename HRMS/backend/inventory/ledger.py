@@ -0,0 +1,232 @@
+"""
+Stock posting engine.
+
+Stock balances change only through ``post_movements``. Each call appends
+StockMovement rows (the append-only journal) and applies their summed
+quantity and value deltas to the StockLedger row of every item and
+warehouse they touch, in one transaction:
+
+- missing ledger rows are inserted first with ON CONFLICT DO NOTHING, so
+  two postings creating the same row never fail or duplicate it
+- the touched rows are locked in a fixed (item, warehouse) order; a
+  transfer from A to B and one from B to A lock their rows in the same
+  order and cannot deadlock
+- balances move with F-expression deltas, never a read-modify-write in
+  Python, so concurrent postings cannot lose an update
+- all the touched rows are updated by one set-based bulk_update, so the
+  number of statements does not grow with the items in a batch
+- outbound movements are costed from the locked balances and the FIFO
+  cost layers before they are written (see inventory.valuation)
+
+A stock entry's movements are unique per (stock entry, warehouse), so
+approving the same entry twice posts it once. ``verify_stock_ledger``
+compares the ledger against the journal.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import StockEntry, StockLedger, StockMovement
+from .valuation import cost_movements, restate_snapshots, save_layers
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0')
+BATCH_SIZE = 1000
+
+INBOUND = (StockEntry.EntryType.RECEIPT, StockEntry.EntryType.RETURN, StockEntry.EntryType.ADJUSTMENT)
+
+
+@dataclass(frozen=True)
+class Movement:
+    """A signed stock change of one item in one warehouse."""
+    item_id: object
+    warehouse_id: object
+    quantity: Decimal
+    value: Decimal
+    movement_date: date
+    tenant_id: object = None
+    stock_entry_id: object = None
+    source: str = ''
+    source_reference: str = ''
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
+
+def entry_movements(stock_entry):
+    """
+    The movements a stock entry posts.
+
+    Receipts, returns and adjustments add to the entry's warehouse (an
+    adjustment's quantity is signed), issues take from it and transfers
+    move stock from the warehouse to ``to_warehouse``.
+    """
+    base = dict(
+        item_id=stock_entry.item_id, movement_date=_as_date(stock_entry.entry_date),
+        tenant_id=stock_entry.tenant_id, stock_entry_id=stock_entry.pk,
+        source=stock_entry.source, source_reference=stock_entry.source_reference,
+    )
+    qty, value = stock_entry.quantity, stock_entry.total_cost
+    if stock_entry.entry_type in INBOUND:
+        return [Movement(warehouse_id=stock_entry.warehouse_id, quantity=qty, value=value, **base)]
+
+    movements = [Movement(warehouse_id=stock_entry.warehouse_id, quantity=-qty, value=-value, **base)]
+    if stock_entry.entry_type == StockEntry.EntryType.TRANSFER and stock_entry.to_warehouse_id:
+        movements.append(Movement(warehouse_id=stock_entry.to_warehouse_id, quantity=qty, value=value, **base))
+    return movements
+
+
+def _sort_key(key):
+    return tuple(str(k) for k in key)
+
+
+def _ledger_row_ids(keys, items):
+    return {
+        (item_id, warehouse_id): pk
+        for pk, item_id, warehouse_id in StockLedger.all_objects.filter(item_id__in=items)
+        .values_list('pk', 'item_id', 'warehouse_id')
+        if (item_id, warehouse_id) in keys
+    }
+
+
+def _ensure_ledger_rows(keys, tenants):
+    """
+    Ledger row ids of the (item, warehouse) ``keys``, creating the missing
+    rows and tolerating concurrent creators.
+    """
+    rows = _ledger_row_ids(keys, {item_id for item_id, _ in keys})
+    missing = sorted((k for k in keys if k not in rows), key=_sort_key)
+    if missing:
+        StockLedger.all_objects.bulk_create(
+            [
+                StockLedger(tenant_id=tenants[key], item_id=key[0], warehouse_id=key[1],
+                            balance_qty=ZERO, valuation_amount=ZERO)
+                for key in missing
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        rows.update(_ledger_row_ids(keys, {item_id for item_id, _ in missing}))
+    return rows
+
+
+def post_movements(movements):
+    """
+    Append ``movements`` to the journal and apply them to the stock ledger.
+
+    Movements of a stock entry that was already posted to the same
+    warehouse are skipped; outbound movements are valued at their cost
+    rather than the value given. Returns the StockMovement rows created.
+    """
+    movements = list(movements)
+    with transaction.atomic():
+        entry_ids = {m.stock_entry_id for m in movements if m.stock_entry_id}
+        if entry_ids:
+            posted = set(
+                StockMovement.all_objects.filter(stock_entry_id__in=entry_ids)
+                .values_list('stock_entry_id', 'warehouse_id')
+            )
+            movements = [m for m in movements
+                         if (m.stock_entry_id, m.warehouse_id) not in posted]
+        if not movements:
+            return []
+
+        tenants = {}
+        for m in movements:
+            tenants.setdefault((m.item_id, m.warehouse_id), m.tenant_id)
+        rows = _ensure_ledger_rows(tenants.keys(), tenants)
+        # Take the row locks in a fixed order; the costing reads the locked balances
+        balances, methods = {}, {}
+        for item_id, warehouse_id, qty, value, method in (
+            StockLedger.all_objects.select_for_update(of=('self',))
+            .filter(pk__in=rows.values()).order_by('item_id', 'warehouse_id')
+            .values_list('item_id', 'warehouse_id', 'balance_qty', 'valuation_amount', 'item__valuation_method')
+        ):
+            balances[(item_id, warehouse_id)] = (qty, value)
+            methods[item_id] = method
+
+        journal = [
+            StockMovement(
+                tenant_id=m.tenant_id, item_id=m.item_id, warehouse_id=m.warehouse_id,
+                stock_entry_id=m.stock_entry_id, movement_date=m.movement_date,
+                quantity=m.quantity, value=m.value,
+                source=m.source, source_reference=m.source_reference,
+            )
+            for m in movements
+        ]
+        new_layers, consumed_layers = cost_movements(journal, balances, methods)
+
+        deltas = defaultdict(lambda: [ZERO, ZERO, None])
+        for m in journal:
+            delta = deltas[(m.item_id, m.warehouse_id)]
+            delta[0] += m.quantity
+            delta[1] += m.value
+            delta[2] = max(delta[2], m.movement_date) if delta[2] else m.movement_date
+
+        now = timezone.now()
+        updates = []
+        for key, pk in rows.items():
+            qty, value, last_date = deltas[key]
+            updates.append(StockLedger(
+                pk=pk,
+                balance_qty=F('balance_qty') + qty,
+                valuation_amount=F('valuation_amount') + value,
+                last_movement_date=Greatest(Coalesce('last_movement_date', last_date), last_date),
+                updated_at=now,
+            ))
+        StockLedger.all_objects.bulk_update(
+            updates, ['balance_qty', 'valuation_amount', 'last_movement_date', 'updated_at'],
+        )
+
+        created = StockMovement.all_objects.bulk_create(journal, batch_size=BATCH_SIZE)
+        save_layers(new_layers, consumed_layers)
+        restate_snapshots(journal)
+        return created
+
+
+def post_stock_entries(stock_entries):
+    """Post the movements of many stock entries as one batch."""
+    return post_movements(m for entry in stock_entries for m in entry_movements(entry))
+
+
+def verify_stock_ledger(tenant_id=None):
+    """
+    Ledger rows whose balance differs from the sum of their movements.
+
+    Returns a list of (item_id, warehouse_id, field, ledger, journal).
+    """
+    ledger = StockLedger.all_objects.filter(is_deleted=False)
+    journal = StockMovement.all_objects.filter(is_deleted=False)
+    if tenant_id:
+        ledger = ledger.filter(tenant_id=tenant_id)
+        journal = journal.filter(tenant_id=tenant_id)
+
+    totals = {
+        (row['item_id'], row['warehouse_id']): (row['qty'], row['value'])
+        for row in journal.values('item_id', 'warehouse_id').annotate(
+            qty=Sum('quantity'), value=Sum('value'),
+        ).order_by()
+    }
+    mismatches = []
+    for item_id, warehouse_id, qty, value in ledger.values_list(
+        'item_id', 'warehouse_id', 'balance_qty', 'valuation_amount',
+    ):
+        journal_qty, journal_value = totals.pop((item_id, warehouse_id), (ZERO, ZERO))
+        if qty != journal_qty:
+            mismatches.append((item_id, warehouse_id, 'balance_qty', qty, journal_qty))
+        if value != journal_value:
+            mismatches.append((item_id, warehouse_id, 'valuation_amount', value, journal_value))
+    for (item_id, warehouse_id), (qty, value) in totals.items():
+        if qty or value:
+            mismatches.append((item_id, warehouse_id, 'balance_qty', None, qty))
+    return mismatches
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:50
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_opening_movements(apps, schema_editor):
+    """Record each existing ledger balance as an OPENING movement."""
+    StockLedger = apps.get_model('inventory', 'StockLedger')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    today = timezone.now().date()
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            tenant_id=ledger.tenant_id, item_id=ledger.item_id, warehouse_id=ledger.warehouse_id,
+            movement_date=ledger.last_movement_date or today,
+            quantity=ledger.balance_qty, value=ledger.valuation_amount, source='OPENING',
+        )
+        for ledger in StockLedger.objects.filter(is_deleted=False).exclude(
+            balance_qty=0, valuation_amount=0,
+        ).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_add_asset_disposal_cycle_count'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('movement_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('source_reference', models.CharField(blank=True, max_length=100)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='inventory.item')),
+                ('stock_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='inventory.stockentry')),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='inventory.warehouse')),
+            ],
+            options={
+                'ordering': ['-movement_date', '-created_at'],
+                'indexes': [models.Index(fields=['item', 'warehouse', 'movement_date'], name='inventory_s_item_id_8d5f01_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('stock_entry__isnull', False)), fields=('stock_entry', 'warehouse'), name='inventory_one_movement_per_entry_warehouse')],
+            },
+        ),
+        migrations.RunPython(seed_opening_movements, migrations.RunPython.noop),
+    ]
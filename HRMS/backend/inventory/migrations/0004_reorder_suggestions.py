@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_movements'),
+        ('organization', '0007_add_license_model'),
+        ('procurement', '0002_add_rfq_vendor_scorecard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('CONVERTED', 'Converted to Requisition'), ('CLOSED', 'Closed')], default='OPEN', max_length=20)),
+                ('on_hand_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('on_order_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reorder_level', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('suggested_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_scanned_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('deleted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='inventory.item')),
+                ('requisition', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reorder_suggestions', to='procurement.purchaserequisition')),
+                ('tenant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['item__code'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'OPEN')), fields=('item',), name='inventory_one_open_reorder_suggestion_per_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_reorder_suggestions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(default=0, help_text='Days to buy or make the item'),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.1 on 2026-10-19 00:54
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_item_lead_time'),
+        ('organization', '0007_add_license_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuationLayer',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('layer_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('unit_cost', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('remaining_qty', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('remaining_value', models.DecimalField(decimal_places=2, max_digits=15)),
+            ],
+            options={
+                'ordering': ['layer_date', 'created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockValuationSnapshot',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('snapshot_date', models.DateField()),
+                ('balance_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('valuation_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+            ],
+            options={
+                'ordering': ['-snapshot_date', 'item__code'],
+            },
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='valuation_method',
+            field=models.CharField(choices=[('AVERAGE', 'Moving Average'), ('FIFO', 'FIFO')], default='AVERAGE', help_text='How issues are costed (see inventory.valuation)', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['movement_date'], name='inventory_movement_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='deleted_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_layers', to='inventory.item'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='movement',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_layer', to='inventory.stockmovement'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='tenant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationlayer',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_layers', to='inventory.warehouse'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='deleted_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_deleted', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_snapshots', to='inventory.item'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='tenant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_set', to='organization.organization'),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockvaluationsnapshot',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_snapshots', to='inventory.warehouse'),
+        ),
+        migrations.AddIndex(
+            model_name='stockvaluationlayer',
+            index=models.Index(condition=models.Q(('remaining_qty__gt', 0)), fields=['item', 'warehouse', 'layer_date'], name='inventory_open_layer_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockvaluationsnapshot',
+            constraint=models.UniqueConstraint(fields=('snapshot_date', 'item', 'warehouse'), name='inventory_one_snapshot_per_day'),
+        ),
+    ]
@@ -23,6 +23,11 @@ class ItemCategory(BaseModel):
 
 class Item(BaseModel):
     """Item master."""
+
+    class ValuationMethod(models.TextChoices):
+        AVERAGE = 'AVERAGE', 'Moving Average'
+        FIFO = 'FIFO', 'FIFO'
+
     code = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=300)
     description = models.TextField(blank=True)
@@ -31,6 +36,11 @@ class Item(BaseModel):
     reorder_level = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     reorder_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     standard_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    lead_time_days = models.PositiveIntegerField(default=0, help_text='Days to buy or make the item')
+    valuation_method = models.CharField(
+        max_length=10, choices=ValuationMethod.choices, default=ValuationMethod.AVERAGE,
+        help_text='How issues are costed (see inventory.valuation)',
+    )
     is_stockable = models.BooleanField(default=True)
     is_asset = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -109,6 +119,138 @@ class StockLedger(BaseModel):
         return f"{self.item.code} @ {self.warehouse.code}: {self.balance_qty}"
 
 
+class StockMovement(BaseModel):
+    """
+    Append-only journal of stock changes (see inventory.ledger).
+
+    Every change to a StockLedger balance is recorded here as a signed
+    quantity and value delta; rows are never updated, so the ledger can be
+    verified or rebuilt from the sum of its movements.
+    """
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='stock_movements')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='stock_movements')
+    stock_entry = models.ForeignKey(
+        StockEntry, on_delete=models.PROTECT, null=True, blank=True, related_name='movements'
+    )
+    movement_date = models.DateField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    value = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    source = models.CharField(max_length=50, blank=True)  # e.g., 'GRN', 'CYCLE_COUNT', 'OPENING'
+    source_reference = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['-movement_date', '-created_at']
+        indexes = [
+            models.Index(fields=['item', 'warehouse', 'movement_date']),
+            models.Index(fields=['movement_date'], name='inventory_movement_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['stock_entry', 'warehouse'],
+                condition=models.Q(stock_entry__isnull=False),
+                name='inventory_one_movement_per_entry_warehouse',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} @ {self.warehouse.code}: {self.quantity:+}"
+
+
+class StockValuationLayer(BaseModel):
+    """
+    A FIFO cost layer: the stock one inbound movement brought into a
+    warehouse, and what is left of it (see inventory.valuation).
+
+    Issues consume the open layers of the item and warehouse oldest first;
+    fully consumed layers drop out of the partial index the costing reads.
+    """
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='valuation_layers')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='valuation_layers')
+    movement = models.OneToOneField(StockMovement, on_delete=models.PROTECT, related_name='valuation_layer')
+    layer_date = models.DateField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=18, decimal_places=6)
+    remaining_qty = models.DecimalField(max_digits=12, decimal_places=2)
+    remaining_value = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        ordering = ['layer_date', 'created_at']
+        indexes = [
+            models.Index(
+                fields=['item', 'warehouse', 'layer_date'],
+                condition=models.Q(remaining_qty__gt=0),
+                name='inventory_open_layer_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} @ {self.warehouse.code} {self.layer_date}: {self.remaining_qty}/{self.quantity}"
+
+
+class StockValuationSnapshot(BaseModel):
+    """
+    Stock quantity and value of an item in a warehouse at the end of a day.
+
+    Taken periodically (see inventory.valuation) so an as-of valuation reads
+    the latest snapshot and only the movements after it.
+    """
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='valuation_snapshots')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='valuation_snapshots')
+    snapshot_date = models.DateField()
+    balance_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    valuation_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-snapshot_date', 'item__code']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot_date', 'item', 'warehouse'], name='inventory_one_snapshot_per_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code} @ {self.warehouse.code} {self.snapshot_date}: {self.valuation_amount}"
+
+
+class ReorderSuggestion(BaseModel):
+    """
+    An item whose stock position has fallen to its reorder level.
+
+    Refreshed by the nightly reorder scan (see inventory.reorder); procurement
+    converts open suggestions into purchase requisitions in bulk.
+    """
+
+    class Status(models.TextChoices):
+        OPEN = 'OPEN', 'Open'
+        CONVERTED = 'CONVERTED', 'Converted to Requisition'
+        CLOSED = 'CLOSED', 'Closed'
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='reorder_suggestions')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    on_hand_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    on_order_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reorder_level = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    suggested_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_scanned_at = models.DateTimeField()
+    requisition = models.ForeignKey(
+        'procurement.PurchaseRequisition', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='reorder_suggestions'
+    )
+
+    class Meta:
+        ordering = ['item__code']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['item'],
+                condition=models.Q(status='OPEN'),
+                name='inventory_one_open_reorder_suggestion_per_item',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.code}: order {self.suggested_qty} ({self.status})"
+
+
 class Asset(BaseModel):
     """Fixed asset register."""
 
@@ -0,0 +1,267 @@
+"""
+Reorder level scanning.
+
+``scan_reorder_levels`` finds every stockable item whose stock position
+(on-hand balance across warehouses plus quantity still due on open
+purchase orders) is at or below its reorder level in one query: the
+ledger balances and open PO quantities are aggregated per item in
+subqueries of the item scan, instead of one aggregate per item.
+
+The result is kept in ReorderSuggestion: one OPEN row per item below its
+level, refreshed on every scan and closed once the item recovers.
+Procurement turns open suggestions into a purchase requisition in bulk
+with ``convert_to_requisition``.
+
+Warehouse managers get one notification per scan listing the items held
+in their warehouses, plus items not stocked anywhere yet; all of them are
+written with a single bulk insert.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.numbering import next_number
+
+from .models import Item, ReorderSuggestion, StockLedger, Warehouse
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0.00')
+BATCH_SIZE = 1000
+NOTIFICATION_ITEMS = 20
+
+OPEN_PO_STATUSES = ('APPROVED', 'SENT', 'PARTIAL')
+
+
+def _per_item_total(qs, expression):
+    return Coalesce(
+        Subquery(
+            qs.filter(item=OuterRef('pk')).order_by().values('item')
+            .annotate(total=Sum(expression)).values('total')[:1]
+        ),
+        Value(ZERO),
+    )
+
+
+def below_reorder_level():
+    """Active stockable items at or below their reorder level, with their stock position."""
+    PurchaseOrderItem = apps.get_model('procurement', 'PurchaseOrderItem')
+
+    on_hand = StockLedger.all_objects.filter(is_deleted=False)
+    on_order = PurchaseOrderItem.all_objects.filter(
+        is_deleted=False,
+        purchase_order__is_deleted=False,
+        purchase_order__status__in=OPEN_PO_STATUSES,
+        quantity__gt=F('received_qty'),
+    )
+    return Item.all_objects.filter(
+        is_deleted=False, is_stockable=True, is_active=True, reorder_level__gt=0,
+    ).annotate(
+        on_hand=_per_item_total(on_hand, 'balance_qty'),
+        on_order=_per_item_total(on_order, F('quantity') - F('received_qty')),
+    ).filter(
+        on_hand__lte=F('reorder_level') - F('on_order'),
+    )
+
+
+def suggested_quantity(reorder_level, reorder_qty, position):
+    """The reorder quantity, or more if that would not lift stock back to the reorder level."""
+    return max(reorder_qty, reorder_level - position)
+
+
+def _notify_managers(suggestions):
+    """One notification per warehouse manager, listing the items they hold."""
+    Notification = apps.get_model('core', 'Notification')
+
+    by_item = {s.item_id: s for s in suggestions}
+    held = defaultdict(set)
+    stocked = set()
+    for user_id, item_id in StockLedger.all_objects.filter(
+        item_id__in=by_item, is_deleted=False, warehouse__is_active=True,
+    ).values_list('warehouse__manager__user_id', 'item_id').distinct():
+        stocked.add(item_id)
+        if user_id:
+            held[user_id].add(item_id)
+    unstocked = defaultdict(list)
+    for suggestion in suggestions:
+        if suggestion.item_id not in stocked:
+            unstocked[suggestion.tenant_id].append(suggestion)
+
+    notifications = []
+    for user_id, tenant_id in Warehouse.all_objects.filter(
+        is_active=True, is_deleted=False, manager__user__isnull=False,
+    ).values_list('manager__user_id', 'tenant_id').distinct():
+        items = sorted(
+            [by_item[item_id] for item_id in held.get(user_id, ())] + unstocked.get(tenant_id, []),
+            key=lambda s: s.item.code,
+        )
+        if not items:
+            continue
+        codes = ', '.join(s.item.code for s in items[:5])
+        notifications.append(Notification(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            notification_type='WARNING',
+            title=f'Reorder Alert: {len(items)} items below reorder level',
+            message=f'{len(items)} items are at or below their reorder levels and need to be '
+                    f'replenished. Items: {codes}{"..." if len(items) > 5 else ""}',
+            link='/inventory/reorder-suggestions',
+            extra_data={'reorder_items': [
+                {
+                    'item_code': s.item.code,
+                    'item_name': s.item.name,
+                    'on_hand': float(s.on_hand_qty),
+                    'on_order': float(s.on_order_qty),
+                    'reorder_level': float(s.reorder_level),
+                    'suggested_qty': float(s.suggested_qty),
+                }
+                for s in items[:NOTIFICATION_ITEMS]
+            ]},
+        ))
+    Notification.all_objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    return len(notifications)
+
+
+def scan_reorder_levels(notify=True):
+    """
+    Refresh the reorder suggestions from current stock positions.
+
+    Returns a summary with the items below their reorder level and the
+    suggestions opened, refreshed and closed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        below = list(below_reorder_level().order_by('code'))
+        current = {
+            s.item_id: s for s in ReorderSuggestion.all_objects.select_for_update().filter(
+                status=ReorderSuggestion.Status.OPEN, is_deleted=False,
+            )
+        }
+
+        opened, refreshed = [], []
+        for item in below:
+            suggestion = current.pop(item.pk, None)
+            if suggestion is None:
+                suggestion = ReorderSuggestion(tenant_id=item.tenant_id, item=item)
+                opened.append(suggestion)
+            else:
+                suggestion.item = item
+                refreshed.append(suggestion)
+            suggestion.on_hand_qty = item.on_hand
+            suggestion.on_order_qty = item.on_order
+            suggestion.reorder_level = item.reorder_level
+            suggestion.suggested_qty = suggested_quantity(
+                item.reorder_level, item.reorder_qty, item.on_hand + item.on_order,
+            )
+            suggestion.last_scanned_at = now
+            suggestion.updated_at = now
+
+        closed = list(current.values())
+        for suggestion in closed:
+            suggestion.status = ReorderSuggestion.Status.CLOSED
+            suggestion.updated_at = now
+
+        ReorderSuggestion.all_objects.bulk_create(opened, batch_size=BATCH_SIZE)
+        ReorderSuggestion.all_objects.bulk_update(
+            refreshed + closed,
+            ['status', 'on_hand_qty', 'on_order_qty', 'reorder_level', 'suggested_qty',
+             'last_scanned_at', 'updated_at'],
+            batch_size=BATCH_SIZE,
+        )
+
+    suggestions = opened + refreshed
+    notified = _notify_managers(suggestions) if notify and suggestions else 0
+    logger.info(
+        f"Reorder scan: {len(suggestions)} items below reorder level "
+        f"({len(opened)} new, {len(closed)} recovered), {notified} managers notified"
+    )
+    return {
+        'reorder_needed': len(suggestions),
+        'opened': len(opened),
+        'refreshed': len(refreshed),
+        'closed': len(closed),
+        'notified': notified,
+        'items': [
+            {
+                'item_code': s.item.code,
+                'item_name': s.item.name,
+                'current_stock': float(s.on_hand_qty),
+                'on_order': float(s.on_order_qty),
+                'reorder_level': float(s.reorder_level),
+                'suggested_qty': float(s.suggested_qty),
+            }
+            for s in suggestions[:NOTIFICATION_ITEMS]
+        ],
+    }
+
+
+def convert_to_requisition(suggestion_ids, requested_by, department, cost_center=None, required_date=None):
+    """
+    Turn open reorder suggestions into one draft purchase requisition.
+
+    Each suggestion becomes a requisition line for its suggested quantity at
+    the item's standard cost; the suggestions are marked CONVERTED.
+
+    Raises:
+        ValueError: If none of the suggestions is still open
+    """
+    PurchaseRequisition = apps.get_model('procurement', 'PurchaseRequisition')
+    RequisitionItem = apps.get_model('procurement', 'RequisitionItem')
+
+    with transaction.atomic():
+        suggestions = list(
+            ReorderSuggestion.objects.select_for_update(of=('self',))
+            .filter(pk__in=suggestion_ids, status=ReorderSuggestion.Status.OPEN)
+            .select_related('item')
+        )
+        if not suggestions:
+            raise ValueError("No open reorder suggestions to convert")
+
+        today = timezone.now().date()
+        tenant_id = suggestions[0].tenant_id
+        requisition = PurchaseRequisition.objects.create(
+            tenant_id=tenant_id,
+            requisition_number=next_number(
+                'PR', model=PurchaseRequisition, field='requisition_number',
+            ),
+            requested_by=requested_by,
+            department=department,
+            cost_center=cost_center,
+            requisition_date=today,
+            required_date=required_date,
+            justification=f"Replenishment of {len(suggestions)} items at or below reorder level",
+        )
+        lines = [
+            RequisitionItem(
+                tenant_id=tenant_id,
+                requisition=requisition,
+                description=s.item.name,
+                item=s.item,
+                quantity=s.suggested_qty,
+                unit_of_measure=s.item.unit_of_measure,
+                unit_price=s.item.standard_cost,
+                estimated_total=(s.suggested_qty * s.item.standard_cost).quantize(Decimal('0.01')),
+            )
+            for s in suggestions
+        ]
+        RequisitionItem.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+        requisition.total_estimated = sum((line.estimated_total for line in lines), ZERO)
+        requisition.save(update_fields=['total_estimated', 'updated_at'])
+
+        ReorderSuggestion.all_objects.filter(pk__in=[s.pk for s in suggestions]).update(
+            status=ReorderSuggestion.Status.CONVERTED, requisition=requisition,
+            updated_at=timezone.now(),
+        )
+
+    logger.info(
+        f"Converted {len(suggestions)} reorder suggestions into requisition "
+        f"{requisition.requisition_number}"
+    )
+    return requisition
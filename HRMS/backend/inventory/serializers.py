@@ -7,7 +7,7 @@ from rest_framework import serializers
 from .models import (
     ItemCategory, Item, Warehouse, StockEntry, StockLedger,
     Asset, AssetDepreciation, AssetTransfer, MaintenanceSchedule,
-    AssetDisposal, CycleCount, CycleCountItem,
+    AssetDisposal, CycleCount, CycleCountItem, ReorderSuggestion,
 )
 
 
@@ -39,7 +39,7 @@ class ItemSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'code', 'name', 'description', 'category', 'category_name',
             'unit_of_measure', 'reorder_level', 'reorder_qty', 'standard_cost',
-            'is_stockable', 'is_asset', 'is_active',
+            'lead_time_days', 'valuation_method', 'is_stockable', 'is_asset', 'is_active',
             'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -284,3 +284,32 @@ class CycleCountSerializer(serializers.ModelSerializer):
 
     def get_items_count(self, obj):
         return obj.items.count()
+
+
+class ReorderSuggestionSerializer(serializers.ModelSerializer):
+    """Serializer for ReorderSuggestion model."""
+    item_code = serializers.CharField(source='item.code', read_only=True)
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    requisition_number = serializers.CharField(
+        source='requisition.requisition_number', read_only=True, default=None
+    )
+
+    class Meta:
+        model = ReorderSuggestion
+        fields = [
+            'id', 'item', 'item_code', 'item_name',
+            'status', 'status_display',
+            'on_hand_qty', 'on_order_qty', 'reorder_level', 'suggested_qty',
+            'last_scanned_at', 'requisition', 'requisition_number',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class ReorderConversionSerializer(serializers.Serializer):
+    """Input for converting reorder suggestions into a purchase requisition."""
+    suggestions = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    department = serializers.UUIDField()
+    cost_center = serializers.UUIDField(required=False, allow_null=True)
+    required_date = serializers.DateField(required=False, allow_null=True)
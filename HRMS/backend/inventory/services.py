@@ -8,6 +8,7 @@ from django.apps import apps
 from django.db import transaction
 from django.utils import timezone
 
+from .ledger import post_stock_entries
 from .models import (
     StockEntry, StockLedger, Asset, AssetTransfer,
     AssetDisposal, CycleCount, CycleCountItem, MaintenanceSchedule,
@@ -21,47 +22,12 @@ logger = logging.getLogger('hrms')
 # ========================================================================
 
 def approve_stock_entry(stock_entry):
-    """Approve a stock entry and update stock ledger accordingly.
+    """Approve a stock entry and post its movements to the stock ledger.
 
-    Handles RECEIPT, ISSUE, TRANSFER, RETURN, and ADJUSTMENT entry types.
+    Handles RECEIPT, ISSUE, TRANSFER, RETURN, and ADJUSTMENT entry types
+    (see inventory.ledger); approving an entry again does not repost it.
     """
-    with transaction.atomic():
-        ledger, _ = StockLedger.objects.get_or_create(
-            item=stock_entry.item,
-            warehouse=stock_entry.warehouse,
-            defaults={'balance_qty': 0, 'valuation_amount': 0},
-        )
-
-        if stock_entry.entry_type in (StockEntry.EntryType.RECEIPT, StockEntry.EntryType.RETURN):
-            ledger.balance_qty += stock_entry.quantity
-            ledger.valuation_amount += stock_entry.total_cost
-
-        elif stock_entry.entry_type == StockEntry.EntryType.ISSUE:
-            ledger.balance_qty -= stock_entry.quantity
-            ledger.valuation_amount -= stock_entry.total_cost
-
-        elif stock_entry.entry_type == StockEntry.EntryType.TRANSFER:
-            ledger.balance_qty -= stock_entry.quantity
-            ledger.valuation_amount -= stock_entry.total_cost
-
-            if stock_entry.to_warehouse:
-                to_ledger, _ = StockLedger.objects.get_or_create(
-                    item=stock_entry.item,
-                    warehouse=stock_entry.to_warehouse,
-                    defaults={'balance_qty': 0, 'valuation_amount': 0},
-                )
-                to_ledger.balance_qty += stock_entry.quantity
-                to_ledger.valuation_amount += stock_entry.total_cost
-                to_ledger.last_movement_date = stock_entry.entry_date
-                to_ledger.save()
-
-        elif stock_entry.entry_type == StockEntry.EntryType.ADJUSTMENT:
-            ledger.balance_qty += stock_entry.quantity
-            ledger.valuation_amount += stock_entry.total_cost
-
-        ledger.last_movement_date = stock_entry.entry_date
-        ledger.save()
-
+    post_stock_entries([stock_entry])
     return stock_entry
 
 
@@ -192,7 +158,13 @@ def complete_cycle_count(cycle_count):
 
 
 def approve_cycle_count(cycle_count, user):
-    """Approve a cycle count and create stock adjustment entries for variances."""
+    """Approve a cycle count and create stock adjustment entries for variances.
+
+    Variance lines are read with their items' standard costs in one query,
+    the adjustment entries are bulk-created and posted as one batch and the
+    lines are back-linked with one bulk_update, so the number of statements
+    does not grow with the number of items counted.
+    """
     if cycle_count.status != CycleCount.Status.COMPLETED:
         raise ValueError("Only completed cycle counts can be approved")
 
@@ -201,30 +173,35 @@ def approve_cycle_count(cycle_count, user):
         cycle_count.approved_by = user
         cycle_count.save(update_fields=['status', 'approved_by', 'updated_at'])
 
-        for count_item in cycle_count.items.filter(adjustment_entry__isnull=True).exclude(variance=0):
-            adjustment = StockEntry.objects.create(
+        count_items = list(
+            cycle_count.items.filter(adjustment_entry__isnull=True).exclude(variance=0)
+            .select_related('item')
+        )
+        now = timezone.now()
+        for count_item in count_items:
+            unit_cost = count_item.item.standard_cost
+            count_item.adjustment_entry = StockEntry(
+                tenant_id=cycle_count.tenant_id,
                 entry_type=StockEntry.EntryType.ADJUSTMENT,
                 entry_date=cycle_count.count_date,
-                item=count_item.item,
-                warehouse=cycle_count.warehouse,
+                item_id=count_item.item_id,
+                warehouse_id=cycle_count.warehouse_id,
                 quantity=count_item.variance,
-                unit_cost=count_item.item.standard_cost,
+                unit_cost=unit_cost,
+                total_cost=(count_item.variance * unit_cost).quantize(Decimal('0.01')),
                 source='CYCLE_COUNT',
                 source_reference=str(cycle_count.pk),
                 notes=f"Cycle count adjustment: system={count_item.system_qty}, counted={count_item.counted_qty}",
             )
-            count_item.adjustment_entry = adjustment
-            count_item.save(update_fields=['adjustment_entry', 'updated_at'])
+            count_item.updated_at = now
 
-            ledger, _ = StockLedger.objects.get_or_create(
-                item=count_item.item,
-                warehouse=cycle_count.warehouse,
-                defaults={'balance_qty': 0, 'valuation_amount': 0},
-            )
-            ledger.balance_qty += count_item.variance
-            ledger.valuation_amount += count_item.variance * count_item.item.standard_cost
-            ledger.last_movement_date = cycle_count.count_date
-            ledger.save()
+        adjustments = StockEntry.all_objects.bulk_create(
+            [count_item.adjustment_entry for count_item in count_items], batch_size=1000,
+        )
+        post_stock_entries(adjustments)
+        CycleCountItem.all_objects.bulk_update(
+            count_items, ['adjustment_entry', 'updated_at'], batch_size=1000,
+        )
 
     return cycle_count
 
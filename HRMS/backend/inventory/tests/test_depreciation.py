@@ -0,0 +1,72 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.models import FiscalPeriod, FiscalYear
+from inventory.models import Asset, AssetDepreciation
+from inventory.tasks import calculate_monthly_depreciation
+
+
+class MonthlyDepreciationTaskTest(TestCase):
+    """The batched task books each method's monthly charge once per period."""
+
+    @classmethod
+    def setUpTestData(cls):
+        fy = FiscalYear.objects.create(
+            name='FY2026', start_date=date(2025, 1, 1), end_date=date(2026, 12, 31),
+        )
+        periods = [
+            FiscalPeriod.objects.create(
+                fiscal_year=fy, period_number=m + 1, name=f'P{m + 1}',
+                start_date=date(2025 + m // 12, m % 12 + 1, 1),
+                end_date=date(2025 + m // 12, m % 12 + 1, 28),
+            )
+            for m in range(13)
+        ]
+        cls.period = periods[-1]
+
+        def asset(number, method, cost, life, salvage='0', accumulated='0'):
+            cost, accumulated = Decimal(cost), Decimal(accumulated)
+            return Asset.objects.create(
+                asset_number=number, name=number, acquisition_date=date(2024, 1, 1),
+                acquisition_cost=cost, salvage_value=Decimal(salvage),
+                accumulated_depreciation=accumulated, current_value=cost - accumulated,
+                depreciation_method=method, useful_life_months=life,
+            )
+
+        cls.straight = asset('SL', 'STRAIGHT_LINE', '12000', 60)
+        cls.declining = asset('DB', 'DECLINING_BALANCE', '10000', 60)
+        cls.syd = asset('SYD', 'SUM_OF_YEARS', '6000', 36)
+        cls.capped = asset('CAP', 'STRAIGHT_LINE', '1200', 12, salvage='100', accumulated='1050')
+        asset('UOP', 'UNITS_OF_PRODUCTION', '5000', 60)
+        asset('NOLIFE', 'STRAIGHT_LINE', '5000', 0)
+        for period in periods[:12]:
+            AssetDepreciation.objects.create(
+                asset=cls.syd, fiscal_period=period, depreciation_amount=0,
+                accumulated_depreciation=0, book_value=Decimal('6000'),
+            )
+
+    def test_charges_match_each_method_and_run_once(self):
+        result = calculate_monthly_depreciation(str(self.period.pk))
+
+        self.assertEqual((result['processed'], result['skipped'], result['errors']), (4, 2, 0))
+        expected = {
+            self.straight: ('200.00', '11800.00'),
+            self.declining: ('333.33', '9666.67'),
+            # Second year of three: 6000 * 2/6 / 12
+            self.syd: ('166.67', '5833.33'),
+            # Capped at the remaining value above salvage
+            self.capped: ('50.00', '100.00'),
+        }
+        for asset, (amount, book_value) in expected.items():
+            record = AssetDepreciation.objects.get(asset=asset, fiscal_period=self.period)
+            asset.refresh_from_db()
+            self.assertEqual((record.depreciation_amount, record.book_value),
+                             (Decimal(amount), Decimal(book_value)))
+            self.assertEqual((asset.current_value, asset.accumulated_depreciation),
+                             (record.book_value, record.accumulated_depreciation))
+
+        again = calculate_monthly_depreciation(str(self.period.pk))
+        self.assertEqual(again['processed'], 0)
+        self.assertEqual(AssetDepreciation.objects.filter(fiscal_period=self.period).count(), 4)
@@ -0,0 +1,123 @@
+import threading
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventory.ledger import verify_stock_ledger
+from inventory.models import (
+    CycleCount, CycleCountItem, Item, StockEntry, StockLedger, StockMovement, Warehouse,
+)
+from inventory.services import approve_cycle_count, approve_stock_entry
+
+
+def _entry(entry_type, item, warehouse, qty, cost='2.00', to_warehouse=None):
+    return StockEntry.objects.create(
+        entry_type=entry_type, entry_date=date(2026, 3, 1), item=item, warehouse=warehouse,
+        to_warehouse=to_warehouse, quantity=Decimal(qty), unit_cost=Decimal(cost),
+    )
+
+
+def _balance(item, warehouse):
+    ledger = StockLedger.objects.get(item=item, warehouse=warehouse)
+    return ledger.balance_qty, ledger.valuation_amount
+
+
+class StockPostingTest(TestCase):
+    """Stock entries post once through the movement journal."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.item = Item.objects.create(code='BOLT', name='Bolt', standard_cost=Decimal('2.00'))
+        cls.main = Warehouse.objects.create(code='MAIN', name='Main')
+        cls.site = Warehouse.objects.create(code='SITE', name='Site')
+
+    def test_transfer_posts_both_sides_once(self):
+        approve_stock_entry(_entry('RECEIPT', self.item, self.main, '100'))
+        transfer = _entry('TRANSFER', self.item, self.main, '30', to_warehouse=self.site)
+        approve_stock_entry(transfer)
+        approve_stock_entry(transfer)
+
+        self.assertEqual(_balance(self.item, self.main), (Decimal('70.00'), Decimal('140.00')))
+        self.assertEqual(_balance(self.item, self.site), (Decimal('30.00'), Decimal('60.00')))
+        self.assertEqual(transfer.movements.count(), 2)
+        self.assertEqual(verify_stock_ledger(), [])
+
+    def test_cycle_count_adjustments_post_as_one_batch(self):
+        approve_stock_entry(_entry('RECEIPT', self.item, self.main, '10'))
+        nut = Item.objects.create(code='NUT', name='Nut', standard_cost=Decimal('1.00'))
+        count = CycleCount.objects.create(warehouse=self.main, count_date=date(2026, 3, 31),
+                                          status='COMPLETED')
+        CycleCountItem.objects.create(cycle_count=count, item=self.item,
+                                      system_qty=Decimal('10'), counted_qty=Decimal('8'))
+        CycleCountItem.objects.create(cycle_count=count, item=nut,
+                                      system_qty=Decimal('0'), counted_qty=Decimal('5'))
+
+        approve_cycle_count(count, None)
+
+        self.assertEqual(_balance(self.item, self.main), (Decimal('8.00'), Decimal('16.00')))
+        self.assertEqual(_balance(nut, self.main), (Decimal('5.00'), Decimal('5.00')))
+        ledger = StockLedger.objects.get(item=nut, warehouse=self.main)
+        self.assertEqual(ledger.last_movement_date, date(2026, 3, 31))
+        self.assertEqual(StockMovement.objects.filter(source='CYCLE_COUNT').count(), 2)
+        self.assertEqual(verify_stock_ledger(), [])
+
+    def test_cycle_count_statements_do_not_grow_with_items(self):
+        items = [Item.objects.create(code=f'SKU{n:03d}', name=f'SKU {n}', standard_cost=Decimal('1.50'))
+                 for n in range(40)]
+
+        def approve(warehouse, count_items):
+            count = CycleCount.objects.create(warehouse=warehouse, count_date=date(2026, 4, 30),
+                                              status='COMPLETED')
+            for item in count_items:
+                CycleCountItem.objects.create(cycle_count=count, item=item, counted_qty=Decimal('3'))
+            with CaptureQueriesContext(connection) as queries:
+                approve_cycle_count(count, None)
+            self.assertEqual(count.items.filter(adjustment_entry__isnull=False).count(), len(count_items))
+            return len(queries)
+
+        self.assertEqual(approve(self.main, items[:4]), approve(self.site, items))
+        self.assertEqual(_balance(items[-1], self.site), (Decimal('3.00'), Decimal('4.50')))
+        self.assertEqual(verify_stock_ledger(), [])
+
+
+class ConcurrentStockPostingTest(TransactionTestCase):
+    """Parallel receipts, issues and opposing transfers keep exact balances."""
+
+    THREADS = 4
+    ROUNDS = 15
+
+    def setUp(self):
+        self.item = Item.objects.create(code='PIPE', name='Pipe')
+        self.main = Warehouse.objects.create(code='MAIN', name='Main')
+        self.site = Warehouse.objects.create(code='SITE', name='Site')
+
+    def _worker(self, n, errors):
+        try:
+            there, back = (self.main, self.site) if n % 2 else (self.site, self.main)
+            for _ in range(self.ROUNDS):
+                approve_stock_entry(_entry('RECEIPT', self.item, there, '5'))
+                approve_stock_entry(_entry('ISSUE', self.item, there, '2'))
+                approve_stock_entry(_entry('TRANSFER', self.item, there, '1', to_warehouse=back))
+        except Exception as exc:  # surfaced by the assertion below
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_postings_are_exact(self):
+        errors = []
+        threads = [threading.Thread(target=self._worker, args=(n, errors)) for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Each warehouse: 2 threads x 15 rounds x (5 in - 2 out - 1 sent + 1 received)
+        expected_qty = Decimal(2 * self.ROUNDS * 3)
+        for warehouse in (self.main, self.site):
+            self.assertEqual(_balance(self.item, warehouse), (expected_qty, expected_qty * 2))
+        self.assertEqual(StockMovement.objects.count(), self.THREADS * self.ROUNDS * 4)
+        self.assertEqual(verify_stock_ledger(), [])
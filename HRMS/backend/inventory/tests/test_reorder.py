@@ -0,0 +1,92 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Notification
+from employees.models import Employee
+from finance.models import Vendor
+from inventory.models import Item, ReorderSuggestion, StockLedger, Warehouse
+from inventory.reorder import convert_to_requisition, scan_reorder_levels
+from organization.models import Department, JobPosition
+from procurement.models import PurchaseOrder, PurchaseOrderItem
+
+
+class ReorderScanTest(TestCase):
+    """The reorder scan keeps one suggestion per item below its level."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(code='STO', name='Stores')
+        position = JobPosition.objects.create(code='STK', title='Storekeeper')
+        cls.managers = []
+        for n in range(2):
+            cls.managers.append(Employee.objects.create(
+                employee_number=f'EMP{n:03d}', first_name=f'First{n}', last_name=f'Last{n}',
+                date_of_birth=date(1990, 1, 1), gender='M', mobile_phone='0200000000',
+                residential_address='Accra', residential_city='Accra',
+                date_of_joining=date(2020, 1, 1), department=cls.department, position=position,
+                user=get_user_model().objects.create_user(f'keeper{n}@example.com', 'x'),
+            ))
+        cls.main = Warehouse.objects.create(code='MAIN', name='Main', manager=cls.managers[0])
+        cls.site = Warehouse.objects.create(code='SITE', name='Site', manager=cls.managers[1])
+
+        def item(code, level, qty, cost='4.00'):
+            return Item.objects.create(code=code, name=code, reorder_level=Decimal(level),
+                                       reorder_qty=Decimal(qty), standard_cost=Decimal(cost))
+
+        cls.low = item('LOW', '10', '25')
+        cls.deep = item('DEEP', '50', '10')
+        cls.stocked = item('OK', '10', '25')
+        cls.on_order = item('ONPO', '10', '25')
+        cls.unstocked = item('NEW', '5', '20')
+        for it, warehouse, qty in ((cls.low, cls.main, '4'), (cls.low, cls.site, '3'),
+                                   (cls.deep, cls.site, '5'), (cls.stocked, cls.main, '30'),
+                                   (cls.on_order, cls.main, '2')):
+            StockLedger.objects.create(item=it, warehouse=warehouse, balance_qty=Decimal(qty))
+        vendor = Vendor.objects.create(code='V1', name='Vendor')
+        po = PurchaseOrder.objects.create(po_number='PO-1', vendor=vendor, order_date=date(2026, 5, 1),
+                                          status='SENT')
+        PurchaseOrderItem.objects.create(purchase_order=po, item=cls.on_order, description='On order',
+                                         quantity=Decimal('20'), unit_price=Decimal('4'),
+                                         received_qty=Decimal('5'))
+
+    def test_scan_opens_refreshes_and_closes_suggestions(self):
+        result = scan_reorder_levels()
+
+        self.assertEqual((result['reorder_needed'], result['opened'], result['notified']), (3, 3, 2))
+        rows = {s.item.code: s for s in ReorderSuggestion.objects.select_related('item')}
+        self.assertEqual(set(rows), {'LOW', 'DEEP', 'NEW'})
+        self.assertEqual((rows['LOW'].on_hand_qty, rows['LOW'].suggested_qty),
+                         (Decimal('7.00'), Decimal('25.00')))
+        # The reorder quantity alone would leave DEEP below its level
+        self.assertEqual(rows['DEEP'].suggested_qty, Decimal('45.00'))
+
+        notices = {n.user_id: n for n in Notification.objects.all()}
+        main_items = [r['item_code'] for r in notices[self.managers[0].user_id].extra_data['reorder_items']]
+        site_items = [r['item_code'] for r in notices[self.managers[1].user_id].extra_data['reorder_items']]
+        self.assertEqual((main_items, site_items), (['LOW', 'NEW'], ['DEEP', 'LOW', 'NEW']))
+
+        StockLedger.objects.filter(item=self.low, warehouse=self.main).update(balance_qty=Decimal('40'))
+        with CaptureQueriesContext(connection) as queries:
+            result = scan_reorder_levels(notify=False)
+        self.assertEqual((result['refreshed'], result['closed']), (2, 1))
+        self.assertLess(len(queries), 8)
+        self.assertEqual(ReorderSuggestion.objects.get(item=self.low).status, 'CLOSED')
+        self.assertEqual(ReorderSuggestion.objects.filter(status='OPEN').count(), 2)
+
+    def test_open_suggestions_convert_into_one_requisition(self):
+        scan_reorder_levels(notify=False)
+        ids = list(ReorderSuggestion.objects.values_list('pk', flat=True))
+
+        requisition = convert_to_requisition(ids, self.managers[0], self.department)
+
+        self.assertEqual(requisition.items.count(), 3)
+        # 25 x LOW + 45 x DEEP + 20 x NEW at 4.00
+        self.assertEqual(requisition.total_estimated, Decimal('360.00'))
+        self.assertFalse(ReorderSuggestion.objects.exclude(requisition=requisition).exists())
+        with self.assertRaisesMessage(ValueError, 'No open reorder suggestions'):
+            convert_to_requisition(ids, self.managers[0], self.department)
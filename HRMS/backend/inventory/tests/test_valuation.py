@@ -0,0 +1,112 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventory.ledger import verify_stock_ledger
+from inventory.models import (
+    Item, StockEntry, StockLedger, StockMovement, StockValuationLayer, StockValuationSnapshot, Warehouse,
+)
+from inventory.services import approve_stock_entry
+from inventory.valuation import take_snapshot, valuation_as_of
+
+
+def _post(entry_type, item, warehouse, qty, cost, day, to_warehouse=None):
+    entry = StockEntry.objects.create(
+        entry_type=entry_type, entry_date=date(2026, 3, day), item=item, warehouse=warehouse,
+        to_warehouse=to_warehouse, quantity=Decimal(qty), unit_cost=Decimal(cost),
+    )
+    approve_stock_entry(entry)
+    return entry
+
+
+def _value(entry, warehouse):
+    return StockMovement.objects.get(stock_entry=entry, warehouse=warehouse).value
+
+
+def _balance(item, warehouse):
+    ledger = StockLedger.objects.get(item=item, warehouse=warehouse)
+    return ledger.balance_qty, ledger.valuation_amount
+
+
+class StockCostingTest(TestCase):
+    """Outbound movements are costed by the item's valuation method."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = Warehouse.objects.create(code='MAIN', name='Main')
+        cls.site = Warehouse.objects.create(code='SITE', name='Site')
+        cls.bolt = Item.objects.create(code='BOLT', name='Bolt', standard_cost=Decimal('2.00'),
+                                       valuation_method='FIFO')
+        cls.nut = Item.objects.create(code='NUT', name='Nut', standard_cost=Decimal('1.00'))
+
+    def test_fifo_issue_consumes_oldest_layers(self):
+        _post('RECEIPT', self.bolt, self.main, '10', '2.00', 1)
+        _post('RECEIPT', self.bolt, self.main, '10', '3.00', 2)
+        issue = _post('ISSUE', self.bolt, self.main, '15', '9.99', 3)
+
+        self.assertEqual(_value(issue, self.main), Decimal('-35.00'))
+        self.assertEqual(_balance(self.bolt, self.main), (Decimal('5.00'), Decimal('15.00')))
+        self.assertEqual(
+            list(StockValuationLayer.objects.order_by('layer_date').values_list('remaining_qty', 'remaining_value')),
+            [(Decimal('0.00'), Decimal('0.00')), (Decimal('5.00'), Decimal('15.00'))],
+        )
+        self.assertEqual(verify_stock_ledger(), [])
+
+    def test_average_issue_and_transfer_carry_cost(self):
+        _post('RECEIPT', self.nut, self.main, '10', '1.00', 1)
+        _post('RECEIPT', self.nut, self.main, '10', '2.00', 2)
+        issue = _post('ISSUE', self.nut, self.main, '4', '9.99', 3)
+        self.assertEqual(_value(issue, self.main), Decimal('-6.00'))
+
+        # A FIFO item moved to another warehouse opens a layer there at the cost it left at
+        _post('RECEIPT', self.bolt, self.main, '4', '2.50', 1)
+        transfer = _post('TRANSFER', self.bolt, self.main, '4', '9.99', 4, to_warehouse=self.site)
+        self.assertEqual(_value(transfer, self.site), Decimal('10.00'))
+        self.assertEqual(StockValuationLayer.objects.get(warehouse=self.site).unit_cost, Decimal('2.500000'))
+
+        # Issues beyond the layers are costed at the value they were posted with
+        shortfall = _post('ISSUE', self.bolt, self.site, '6', '3.00', 5)
+        self.assertEqual(_value(shortfall, self.site), Decimal('-16.00'))
+        self.assertEqual(verify_stock_ledger(), [])
+
+
+class StockSnapshotTest(TestCase):
+    """As-of valuation reads the latest snapshot plus the movements after it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = Warehouse.objects.create(code='MAIN', name='Main')
+        cls.nut = Item.objects.create(code='NUT', name='Nut', standard_cost=Decimal('1.00'))
+
+    def test_snapshot_and_backdated_restatement(self):
+        _post('RECEIPT', self.nut, self.main, '10', '1.00', 1)
+        _post('RECEIPT', self.nut, self.main, '10', '2.00', 5)
+        key = (self.nut.pk, self.main.pk)
+
+        self.assertEqual(take_snapshot(date(2026, 3, 3)), 1)
+        self.assertEqual(valuation_as_of(date(2026, 3, 3))[key], (Decimal('10.00'), Decimal('10.00')))
+        self.assertEqual(valuation_as_of(date(2026, 3, 31))[key], (Decimal('20.00'), Decimal('30.00')))
+
+        # A posting dated before the snapshot restates it
+        _post('ISSUE', self.nut, self.main, '5', '9.99', 2)
+        snapshot = StockValuationSnapshot.objects.get(snapshot_date=date(2026, 3, 3))
+        self.assertEqual((snapshot.balance_qty, snapshot.valuation_amount), (Decimal('5.00'), Decimal('2.50')))
+        self.assertEqual(valuation_as_of(date(2026, 3, 31))[key], _balance(self.nut, self.main))
+        self.assertEqual(verify_stock_ledger(), [])
+
+    def test_valuation_endpoint(self):
+        _post('RECEIPT', self.nut, self.main, '4', '1.50', 1)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user('clerk@example.com', 'x'))
+
+        response = client.get('/api/v1/inventory/stock-ledger/valuation/', {'as_of': '2026-03-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_value'], Decimal('6.00'))
+        self.assertEqual(
+            [(r['item_code'], r['balance_qty'], r['unit_cost']) for r in response.data['results']],
+            [('NUT', Decimal('4.00'), Decimal('1.500000'))],
+        )
+        self.assertEqual(client.get('/api/v1/inventory/stock-ledger/valuation/', {'as_of': 'March'}).status_code, 400)
@@ -15,6 +15,7 @@ router.register(r'items', views.ItemViewSet, basename='item')
 router.register(r'warehouses', views.WarehouseViewSet, basename='warehouse')
 router.register(r'stock-entries', views.StockEntryViewSet, basename='stock-entry')
 router.register(r'stock-ledger', views.StockLedgerViewSet, basename='stock-ledger')
+router.register(r'reorder-suggestions', views.ReorderSuggestionViewSet, basename='reorder-suggestion')
 router.register(r'assets', views.AssetViewSet, basename='asset')
 router.register(r'asset-depreciations', views.AssetDepreciationViewSet, basename='asset-depreciation')
 router.register(r'asset-transfers', views.AssetTransferViewSet, basename='asset-transfer')
@@ -0,0 +1,253 @@
+"""
+Stock valuation.
+
+Inbound movements keep the value they are posted with. Outbound movements
+(issues, the sending side of transfers, negative adjustments) are costed
+when they are posted, from the stock they draw on, by the item's
+valuation method:
+
+- AVERAGE: the moving average of the item in the warehouse, i.e. the
+  locked ledger row's valuation_amount / balance_qty
+- FIFO: the open StockValuationLayers of the item in the warehouse, oldest
+  first; every inbound movement of a FIFO item opens a layer
+
+Only the ledger rows and open layers of the keys in a batch are read, never
+the movement history. Issues beyond the stock on hand (or beyond the FIFO
+layers, e.g. after switching an item to FIFO) are costed at the average of
+the remaining stock, else at the value they were posted with. The receiving
+side of a transfer takes the cost of the sending side.
+
+StockValuationSnapshots hold every item's quantity and value per warehouse
+at the end of a day. ``take_snapshot`` builds one from the previous
+snapshot plus the movements since; ``valuation_as_of`` reads the latest
+snapshot on or before a date plus the movements after it. Postings dated
+on or before an existing snapshot restate it (``restate_snapshots``).
+"""
+
+import logging
+from collections import defaultdict, deque
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import Item, StockMovement, StockValuationLayer, StockValuationSnapshot
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+UNIT_COST = Decimal('0.000001')
+BATCH_SIZE = 1000
+
+
+def _average(qty, stock_qty, stock_value, fallback):
+    """Cost of taking ``qty`` out of ``stock_qty`` worth ``stock_value``."""
+    if stock_qty <= 0:
+        return fallback
+    if qty == stock_qty:
+        return stock_value
+    return (stock_value * qty / stock_qty).quantize(CENT)
+
+
+def cost_movements(movements, balances, methods):
+    """
+    Value the outbound ``movements`` of a batch, in posting order.
+
+    ``movements`` are unsaved StockMovement rows; the value of each outbound
+    one is replaced by its cost. ``balances`` is {(item_id, warehouse_id):
+    (balance_qty, valuation_amount)} of the locked ledger rows before the
+    batch and ``methods`` {item_id: valuation_method}. Returns (new_layers,
+    consumed_layers) to save with the movements.
+    """
+    fifo_keys = {
+        (m.item_id, m.warehouse_id) for m in movements if methods.get(m.item_id) == Item.ValuationMethod.FIFO
+    }
+    layers = defaultdict(deque)
+    if fifo_keys:
+        for layer in StockValuationLayer.all_objects.filter(
+            item_id__in={item_id for item_id, _ in fifo_keys},
+            warehouse_id__in={warehouse_id for _, warehouse_id in fifo_keys},
+            remaining_qty__gt=0,
+        ).order_by('layer_date', 'created_at', 'pk'):
+            key = (layer.item_id, layer.warehouse_id)
+            if key in fifo_keys:
+                layers[key].append(layer)
+
+    stock = {key: list(balance) for key, balance in balances.items()}
+    transferred = {}
+    new_layers, consumed = [], {}
+    for m in movements:
+        key = (m.item_id, m.warehouse_id)
+        qty, value = stock.setdefault(key, [ZERO, ZERO])
+        if m.quantity < 0:
+            out_qty = -m.quantity
+            fallback = -m.value
+            if key in fifo_keys:
+                cost, out_qty = _consume_layers(layers[key], out_qty, consumed)
+                if out_qty:
+                    # The layers ran out: cost the rest from the stock they do not track
+                    fallback = (fallback * out_qty / -m.quantity).quantize(CENT)
+                    untracked_qty = qty + m.quantity + out_qty
+                    cost += _average(out_qty, untracked_qty, value - cost, fallback)
+            else:
+                cost = _average(out_qty, qty, value, fallback)
+            m.value = -cost
+            if m.stock_entry_id:
+                transferred[m.stock_entry_id] = cost
+        elif m.stock_entry_id in transferred:
+            m.value = transferred[m.stock_entry_id]
+
+        if m.quantity > 0 and key in fifo_keys:
+            layer = StockValuationLayer(
+                tenant_id=m.tenant_id, item_id=m.item_id, warehouse_id=m.warehouse_id, movement=m,
+                layer_date=m.movement_date, quantity=m.quantity,
+                unit_cost=(m.value / m.quantity).quantize(UNIT_COST),
+                remaining_qty=m.quantity, remaining_value=m.value,
+            )
+            layers[key].append(layer)
+            new_layers.append(layer)
+        stock[key] = [qty + m.quantity, value + m.value]
+
+    new = {id(layer) for layer in new_layers}
+    return new_layers, [layer for layer in consumed.values() if id(layer) not in new]
+
+
+def _consume_layers(open_layers, qty, consumed):
+    """Take ``qty`` from the oldest layers; returns (cost, quantity not covered)."""
+    cost = ZERO
+    while qty > 0 and open_layers:
+        layer = open_layers[0]
+        take = min(qty, layer.remaining_qty)
+        if take == layer.remaining_qty:
+            part = layer.remaining_value
+            open_layers.popleft()
+        else:
+            part = (take * layer.unit_cost).quantize(CENT)
+        layer.remaining_qty -= take
+        layer.remaining_value -= part
+        consumed[id(layer)] = layer
+        cost += part
+        qty -= take
+    return cost, qty
+
+
+def save_layers(new_layers, consumed_layers):
+    """Insert the layers a batch opened and update the ones it drew on."""
+    now = timezone.now()
+    for layer in consumed_layers:
+        layer.updated_at = now
+    StockValuationLayer.all_objects.bulk_create(new_layers, batch_size=BATCH_SIZE)
+    StockValuationLayer.all_objects.bulk_update(
+        consumed_layers, ['remaining_qty', 'remaining_value', 'updated_at'], batch_size=BATCH_SIZE,
+    )
+
+
+def restate_snapshots(movements):
+    """Add backdated ``movements`` to the snapshots taken on or after their dates."""
+    earliest = min(m.movement_date for m in movements)
+    dates = sorted(
+        StockValuationSnapshot.all_objects.filter(snapshot_date__gte=earliest)
+        .order_by().values_list('snapshot_date', flat=True).distinct()
+    )
+    if not dates:
+        return 0
+
+    deltas = defaultdict(lambda: [ZERO, ZERO, None])
+    for m in movements:
+        for snapshot_date in dates:
+            if m.movement_date <= snapshot_date:
+                delta = deltas[(snapshot_date, m.item_id, m.warehouse_id)]
+                delta[0] += m.quantity
+                delta[1] += m.value
+                delta[2] = m.tenant_id
+    existing = {
+        (s.snapshot_date, s.item_id, s.warehouse_id): s
+        for s in StockValuationSnapshot.all_objects.filter(
+            snapshot_date__in=dates, item_id__in={key[1] for key in deltas},
+        )
+    }
+
+    now = timezone.now()
+    new, changed = [], []
+    for key, (qty, value, tenant_id) in deltas.items():
+        snapshot = existing.get(key)
+        if snapshot is None:
+            new.append(StockValuationSnapshot(
+                tenant_id=tenant_id, snapshot_date=key[0], item_id=key[1], warehouse_id=key[2],
+                balance_qty=qty, valuation_amount=value,
+            ))
+            continue
+        snapshot.balance_qty += qty
+        snapshot.valuation_amount += value
+        snapshot.updated_at = now
+        changed.append(snapshot)
+    StockValuationSnapshot.all_objects.bulk_create(new, batch_size=BATCH_SIZE)
+    StockValuationSnapshot.all_objects.bulk_update(
+        changed, ['balance_qty', 'valuation_amount', 'updated_at'], batch_size=BATCH_SIZE,
+    )
+    return len(new) + len(changed)
+
+
+def valuation_as_of(as_of, tenant_id=None, warehouse_id=None):
+    """
+    Stock on hand at the end of ``as_of``: {(item_id, warehouse_id):
+    (balance_qty, valuation_amount)}, without the keys holding nothing.
+
+    Reads the latest snapshot on or before the date and the movements
+    after it.
+    """
+    snapshots = StockValuationSnapshot.all_objects.filter(is_deleted=False)
+    movements = StockMovement.all_objects.filter(is_deleted=False, movement_date__lte=as_of)
+    if tenant_id:
+        snapshots = snapshots.filter(tenant_id=tenant_id)
+        movements = movements.filter(tenant_id=tenant_id)
+    if warehouse_id:
+        snapshots = snapshots.filter(warehouse_id=warehouse_id)
+        movements = movements.filter(warehouse_id=warehouse_id)
+
+    positions = defaultdict(lambda: [ZERO, ZERO])
+    base_date = snapshots.filter(snapshot_date__lte=as_of).aggregate(latest=Max('snapshot_date'))['latest']
+    if base_date:
+        for item_id, wh_id, qty, value in snapshots.filter(snapshot_date=base_date).values_list(
+            'item_id', 'warehouse_id', 'balance_qty', 'valuation_amount',
+        ):
+            positions[(item_id, wh_id)] = [qty, value]
+        movements = movements.filter(movement_date__gt=base_date)
+
+    for row in movements.values('item_id', 'warehouse_id').annotate(
+        qty=Sum('quantity'), value=Sum('value'),
+    ).order_by():
+        position = positions[(row['item_id'], row['warehouse_id'])]
+        position[0] += row['qty']
+        position[1] += row['value']
+    return {key: (qty, value) for key, (qty, value) in positions.items() if qty or value}
+
+
+def take_snapshot(as_of=None):
+    """
+    Snapshot every item's stock per warehouse at the end of ``as_of``
+    (default yesterday), replacing a snapshot already taken that day.
+    Returns the number of rows stored.
+    """
+    as_of = as_of or timezone.now().date() - timedelta(days=1)
+    positions = valuation_as_of(as_of)
+    tenants = dict(
+        Item.all_objects.filter(pk__in={item_id for item_id, _ in positions}).values_list('pk', 'tenant_id')
+    )
+    with transaction.atomic():
+        StockValuationSnapshot.all_objects.filter(snapshot_date=as_of).delete()
+        StockValuationSnapshot.all_objects.bulk_create(
+            [
+                StockValuationSnapshot(
+                    tenant_id=tenants.get(item_id), snapshot_date=as_of, item_id=item_id,
+                    warehouse_id=warehouse_id, balance_qty=qty, valuation_amount=value,
+                )
+                for (item_id, warehouse_id), (qty, value) in positions.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    logger.info(f"Stock valuation snapshot {as_of}: {len(positions)} rows")
+    return len(positions)
@@ -2,18 +2,25 @@
 Views for inventory and asset management.
 """
 
+from datetime import date
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.numbering import next_number
+
 from .models import (
     ItemCategory, Item, Warehouse, StockEntry, StockLedger,
     Asset, AssetDepreciation, AssetTransfer, MaintenanceSchedule,
-    AssetDisposal, CycleCount, CycleCountItem,
+    AssetDisposal, CycleCount, CycleCountItem, ReorderSuggestion,
 )
 from . import services
+from .valuation import valuation_as_of
 from .serializers import (
     ItemCategorySerializer, ItemSerializer, WarehouseSerializer,
     StockEntrySerializer, StockLedgerSerializer,
@@ -21,6 +28,7 @@ from .serializers import (
     AssetDepreciationSerializer, AssetTransferSerializer,
     MaintenanceScheduleSerializer,
     AssetDisposalSerializer, CycleCountSerializer, CycleCountItemSerializer,
+    ReorderSuggestionSerializer, ReorderConversionSerializer,
 )
 
 
@@ -101,6 +109,14 @@ class StockEntryViewSet(viewsets.ModelViewSet):
             'item', 'warehouse', 'to_warehouse'
         )
 
+    def perform_create(self, serializer):
+        if serializer.validated_data.get('reference_number'):
+            serializer.save()
+            return
+        number = next_number('STE', tenant=getattr(self.request, 'tenant', None),
+                             model=StockEntry, field='reference_number')
+        serializer.save(reference_number=number)
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve a stock entry and update stock ledger."""
@@ -123,6 +139,98 @@ class StockLedgerViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return StockLedger.objects.select_related('item', 'warehouse')
 
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """Stock quantity and value per item and warehouse at the end of ?as_of= (default today)."""
+        from core.middleware import get_current_tenant
+
+        as_of = request.query_params.get('as_of')
+        try:
+            as_of_date = date.fromisoformat(as_of) if as_of else timezone.now().date()
+        except ValueError:
+            return Response({'error': 'as_of must be a date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tenant = get_current_tenant()
+        positions = valuation_as_of(
+            as_of_date, tenant_id=tenant.pk if tenant else None,
+            warehouse_id=request.query_params.get('warehouse') or None,
+        )
+        items = {
+            item.pk: item for item in Item.all_objects.filter(pk__in={key[0] for key in positions}).only('code', 'name')
+        }
+        warehouses = {
+            warehouse.pk: warehouse
+            for warehouse in Warehouse.all_objects.filter(pk__in={key[1] for key in positions}).only('code', 'name')
+        }
+
+        rows = []
+        for (item_id, warehouse_id), (qty, value) in positions.items():
+            item, warehouse = items[item_id], warehouses[warehouse_id]
+            rows.append({
+                'item': item_id, 'item_code': item.code, 'item_name': item.name,
+                'warehouse': warehouse_id, 'warehouse_code': warehouse.code, 'warehouse_name': warehouse.name,
+                'balance_qty': qty, 'valuation_amount': value,
+                'unit_cost': (value / qty).quantize(Decimal('0.000001')) if qty else None,
+            })
+        rows.sort(key=lambda row: (row['item_code'], row['warehouse_code']))
+        return Response({
+            'as_of': as_of_date,
+            'total_value': sum((row['valuation_amount'] for row in rows), Decimal('0')),
+            'results': rows,
+        })
+
+
+class ReorderSuggestionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Reorder suggestions written by the nightly reorder scan."""
+    serializer_class = ReorderSuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['status', 'item', 'requisition']
+    search_fields = ['item__code', 'item__name']
+    ordering_fields = ['suggested_qty', 'last_scanned_at']
+    ordering = ['item__code']
+
+    def get_queryset(self):
+        return ReorderSuggestion.objects.select_related('item', 'requisition')
+
+    @action(detail=False, methods=['post'])
+    def convert(self, request):
+        """Convert open suggestions into one draft purchase requisition."""
+        from organization.models import CostCenter, Department
+        from .reorder import convert_to_requisition
+
+        if not hasattr(request.user, 'employee') or request.user.employee is None:
+            return Response(
+                {'error': 'User has no employee record.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ReorderConversionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        department = Department.objects.filter(pk=data['department']).first()
+        if department is None:
+            return Response({'error': 'Department not found.'}, status=status.HTTP_400_BAD_REQUEST)
+        cost_center = None
+        if data.get('cost_center'):
+            cost_center = CostCenter.objects.filter(pk=data['cost_center']).first()
+            if cost_center is None:
+                return Response({'error': 'Cost center not found.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            requisition = convert_to_requisition(
+                data['suggestions'], request.user.employee, department,
+                cost_center=cost_center, required_date=data.get('required_date'),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'requisition': str(requisition.pk),
+            'requisition_number': requisition.requisition_number,
+            'total_estimated': str(requisition.total_estimated),
+            'lines': requisition.items.count(),
+        }, status=status.HTTP_201_CREATED)
+
 
 class AssetViewSet(viewsets.ModelViewSet):
     """ViewSet for assets."""
@@ -4,7 +4,7 @@ from django.contrib import admin
 from .models import (
     BillOfMaterials, BOMLine, WorkCenter, ProductionRouting,
     WorkOrder, WorkOrderOperation, MaterialConsumption,
-    QualityCheck, ProductionBatch
+    QualityCheck, ProductionBatch, MRPRun, PlannedOrder
 )
 
 
@@ -43,3 +43,17 @@ class QualityCheckAdmin(admin.ModelAdmin):
 @admin.register(ProductionBatch)
 class ProductionBatchAdmin(admin.ModelAdmin):
     list_display = ['batch_number', 'work_order', 'quantity', 'manufacture_date']
+
+
+@admin.register(MRPRun)
+class MRPRunAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'status', 'work_order_count', 'planned_order_count', 'duration_ms']
+    list_filter = ['status']
+
+
+@admin.register(PlannedOrder)
+class PlannedOrderAdmin(admin.ModelAdmin):
+    list_display = ['item', 'order_type', 'quantity', 'release_date', 'due_date', 'low_level_code', 'run']
+    list_filter = ['order_type']
+    search_fields = ['item__code', 'item__name']
+    raw_id_fields = ['run', 'item', 'bom']
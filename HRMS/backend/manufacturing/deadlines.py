@@ -0,0 +1,33 @@
+"""Deadline scanners for manufacturing (see core.deadlines)."""
+
+from core.deadlines import DeadlineScanner, register
+
+
+@register
+class WorkOrderEndScanner(DeadlineScanner):
+    """Released and in-progress work orders past their planned end."""
+    kind = 'manufacturing.work_order_end'
+    model = 'manufacturing.WorkOrder'
+    date_field = 'planned_end'
+    reference_field = 'work_order_number'
+    open_filter = {'status__in': ('RELEASED', 'IN_PROGRESS')}
+    lead_days = -1
+    select_related = ('product',)
+    link = '/manufacturing/work-orders'
+
+    def recipients(self, wo):
+        return {wo.created_by_id} - {None}
+
+    def notice(self, wo, stage, today):
+        return (
+            f'Overdue Work Order: {wo.work_order_number}',
+            f'Work order {wo.work_order_number} for {wo.product} was planned to finish on '
+            f'{wo.planned_end:%d %b %Y} and is {(today - wo.planned_end).days} days late.',
+        )
+
+    def summary(self, wo, today):
+        return {
+            'work_order': wo.work_order_number,
+            'product': str(wo.product),
+            'days_overdue': (today - wo.planned_end).days,
+        }
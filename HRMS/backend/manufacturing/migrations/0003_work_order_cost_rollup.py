@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manufacturing', '0002_mrp_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workorder',
+            name='costed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='labor_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='material_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+    ]
@@ -145,6 +145,10 @@ class WorkOrder(BaseModel):
     )
     estimated_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     actual_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Cost roll-up cache, refreshed by manufacturing.posting.roll_up_costs
+    material_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    labor_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    costed_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
 
     class Meta:
@@ -284,3 +288,58 @@ class ProductionBatch(BaseModel):
 
     def __str__(self):
         return f"Batch {self.batch_number} — {self.quantity} units"
+
+
+class MRPRun(BaseModel):
+    """One material requirements planning run (see manufacturing.mrp)."""
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    work_order_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    planned_order_count = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'manufacturing_mrp_runs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"MRP run {self.created_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class PlannedOrder(BaseModel):
+    """A production or purchase order suggested by an MRP run."""
+    class OrderType(models.TextChoices):
+        MAKE = 'MAKE', 'Production'
+        BUY = 'BUY', 'Purchase'
+
+    run = models.ForeignKey(MRPRun, on_delete=models.CASCADE, related_name='planned_orders')
+    item = models.ForeignKey(
+        'inventory.Item', on_delete=models.CASCADE, related_name='planned_orders'
+    )
+    bom = models.ForeignKey(
+        BillOfMaterials, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='planned_orders'
+    )
+    order_type = models.CharField(max_length=4, choices=OrderType.choices)
+    quantity = models.DecimalField(max_digits=14, decimal_places=4)
+    due_date = models.DateField()
+    release_date = models.DateField()
+    low_level_code = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = 'manufacturing_planned_orders'
+        ordering = ['low_level_code', 'release_date', 'item__code']
+        indexes = [
+            models.Index(fields=['run', 'order_type', 'release_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_order_type_display()} {self.item} × {self.quantity} by {self.due_date}"
@@ -0,0 +1,275 @@
+"""
+Work order posting pipeline.
+
+Material issues, production receipts and cost roll-ups for many work
+orders at once. Each call runs in one transaction and issues a fixed
+number of statements however many work orders and lines it covers:
+
+- the work orders are locked together, in primary key order
+- stock entries are bulk-created and posted to the stock ledger as one
+  batch (inventory.ledger.post_stock_entries)
+- work order quantities and statuses move with set-based updates
+- costs are aggregated in the database and cached on the work order
+  (material_cost, labor_cost, actual_cost and costed_at), so readers such
+  as the variance report do not re-aggregate consumptions and operations
+
+The single work order services in manufacturing.services wrap these.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.numbering import allocate_numbers
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+BATCH_SIZE = 1000
+
+ISSUABLE_STATUSES = ('RELEASED', 'IN_PROGRESS')
+
+
+def _lock_work_orders(wo_ids, statuses, message):
+    """The work orders of ``wo_ids`` by pk, locked; all must be in ``statuses``."""
+    WorkOrder = apps.get_model('manufacturing', 'WorkOrder')
+
+    work_orders = {
+        wo.pk: wo
+        for wo in WorkOrder.objects.select_for_update(of=('self',)).select_related('product')
+        .filter(pk__in=set(wo_ids)).order_by('pk')
+    }
+    missing = {str(pk) for pk in wo_ids} - {str(pk) for pk in work_orders}
+    if missing:
+        raise ValueError(f"Work orders not found: {', '.join(sorted(missing))}")
+    invalid = sorted(wo.work_order_number for wo in work_orders.values() if wo.status not in statuses)
+    if invalid:
+        raise ValueError(f"{message} ({', '.join(invalid)})")
+    return work_orders
+
+
+def issue_materials_batch(wo_ids):
+    """
+    Issue the pending material consumptions of many work orders.
+
+    Every consumption with an actual quantity and no stock entry becomes a
+    stock ISSUE at the item's standard cost. The work orders must be
+    RELEASED or IN_PROGRESS; released ones move to IN_PROGRESS. Returns
+    {work_order_id: entries_created}.
+    """
+    StockEntry = apps.get_model('inventory', 'StockEntry')
+    WorkOrder = apps.get_model('manufacturing', 'WorkOrder')
+    MaterialConsumption = apps.get_model('manufacturing', 'MaterialConsumption')
+    from inventory.ledger import post_stock_entries
+
+    with transaction.atomic():
+        work_orders = _lock_work_orders(
+            wo_ids, ISSUABLE_STATUSES, "Work order must be RELEASED or IN_PROGRESS to issue materials",
+        )
+        consumptions = list(
+            MaterialConsumption.objects.filter(
+                work_order_id__in=work_orders, stock_entry__isnull=True, actual_qty__gt=0,
+            ).select_related('item').order_by('work_order_id', 'created_at', 'pk')
+        )
+
+        now = timezone.now()
+        created = defaultdict(int)
+        for mc in consumptions:
+            wo = work_orders[mc.work_order_id]
+            unit_cost = mc.item.standard_cost or ZERO
+            mc.stock_entry = StockEntry(
+                tenant_id=wo.tenant_id,
+                entry_type=StockEntry.EntryType.ISSUE,
+                entry_date=now.date(),
+                item_id=mc.item_id,
+                warehouse_id=mc.warehouse_id,
+                quantity=mc.actual_qty,
+                unit_cost=unit_cost,
+                total_cost=(mc.actual_qty * unit_cost).quantize(CENT),
+                source='MANUFACTURING',
+                source_reference=wo.work_order_number,
+                notes=f"Material issue for WO {wo.work_order_number}",
+            )
+            mc.consumed_at = now
+            mc.updated_at = now
+            created[wo.pk] += 1
+
+        issues = StockEntry.all_objects.bulk_create(
+            [mc.stock_entry for mc in consumptions], batch_size=BATCH_SIZE,
+        )
+        post_stock_entries(issues)
+        MaterialConsumption.all_objects.bulk_update(
+            consumptions, ['stock_entry', 'consumed_at', 'updated_at'], batch_size=BATCH_SIZE,
+        )
+        WorkOrder.all_objects.filter(pk__in=work_orders, status=WorkOrder.Status.RELEASED).update(
+            status=WorkOrder.Status.IN_PROGRESS, actual_start=now, updated_at=now,
+        )
+        roll_up_costs(work_orders)
+
+    return {pk: created[pk] for pk in work_orders}
+
+
+def _receipt_warehouses(work_orders):
+    """
+    Finished goods warehouse of each work order: the warehouse of its BOM's
+    last routing step, else the first active warehouse.
+    """
+    ProductionRouting = apps.get_model('manufacturing', 'ProductionRouting')
+    Warehouse = apps.get_model('inventory', 'Warehouse')
+
+    last_step = {}
+    for bom_id, warehouse_id in ProductionRouting.objects.filter(
+        bom_id__in={wo.bom_id for wo in work_orders},
+    ).values_list('bom_id', 'work_center__warehouse_id').order_by('bom_id', '-sort_order'):
+        last_step.setdefault(bom_id, warehouse_id)
+
+    warehouses = {wo.pk: last_step.get(wo.bom_id) for wo in work_orders}
+    if not all(warehouses.values()):
+        fallback = Warehouse.objects.filter(is_active=True).values_list('pk', flat=True).first()
+        if not fallback:
+            raise ValueError("No warehouse available for finished goods receipt")
+        warehouses = {pk: warehouse_id or fallback for pk, warehouse_id in warehouses.items()}
+    return warehouses
+
+
+def report_production_batch(reports):
+    """
+    Record production output for many work orders.
+
+    ``reports`` is a list of (work_order_id, quantity, batch_data) where
+    batch_data may hold an ``expiry_date``. Each report becomes a
+    ProductionBatch with a finished goods RECEIPT at the product's standard
+    cost and adds to the work order's completed quantity. The work orders
+    must be RELEASED or IN_PROGRESS. Returns one {'batch_number',
+    'stock_entry_id'} per report, in order.
+    """
+    StockEntry = apps.get_model('inventory', 'StockEntry')
+    WorkOrder = apps.get_model('manufacturing', 'WorkOrder')
+    ProductionBatch = apps.get_model('manufacturing', 'ProductionBatch')
+    from inventory.ledger import post_stock_entries
+
+    reports = [(wo_id, Decimal(str(qty)), batch_data or {}) for wo_id, qty, batch_data in reports]
+    if any(qty <= 0 for _, qty, _ in reports):
+        raise ValueError("Production quantity must be positive")
+
+    with transaction.atomic():
+        work_orders = _lock_work_orders(
+            [wo_id for wo_id, _, _ in reports], ISSUABLE_STATUSES,
+            "Work order must be IN_PROGRESS or RELEASED",
+        )
+        by_id = {str(pk): wo for pk, wo in work_orders.items()}
+        warehouses = _receipt_warehouses(work_orders.values())
+
+        per_tenant = defaultdict(int)
+        for wo_id, _, _ in reports:
+            per_tenant[by_id[str(wo_id)].tenant_id] += 1
+        numbers = {
+            tenant_id: iter(allocate_numbers(
+                'BAT', count, tenant=tenant_id, model=ProductionBatch, field='batch_number',
+            ))
+            for tenant_id, count in per_tenant.items()
+        }
+
+        now = timezone.now()
+        today = now.date()
+        batches = []
+        completed = defaultdict(lambda: ZERO)
+        for wo_id, qty, batch_data in reports:
+            wo = by_id[str(wo_id)]
+            unit_cost = wo.product.standard_cost or ZERO
+            batches.append(ProductionBatch(
+                tenant_id=wo.tenant_id,
+                batch_number=next(numbers[wo.tenant_id]),
+                work_order=wo,
+                quantity=qty,
+                manufacture_date=today,
+                expiry_date=batch_data.get('expiry_date'),
+                stock_entry=StockEntry(
+                    tenant_id=wo.tenant_id,
+                    entry_type=StockEntry.EntryType.RECEIPT,
+                    entry_date=today,
+                    item_id=wo.product_id,
+                    warehouse_id=warehouses[wo.pk],
+                    quantity=qty,
+                    unit_cost=unit_cost,
+                    total_cost=(qty * unit_cost).quantize(CENT),
+                    source='MANUFACTURING',
+                    source_reference=wo.work_order_number,
+                    notes=f"Production receipt for WO {wo.work_order_number}",
+                ),
+            ))
+            completed[wo.pk] += qty
+
+        receipts = StockEntry.all_objects.bulk_create(
+            [batch.stock_entry for batch in batches], batch_size=BATCH_SIZE,
+        )
+        post_stock_entries(receipts)
+        ProductionBatch.all_objects.bulk_create(batches, batch_size=BATCH_SIZE)
+        WorkOrder.all_objects.bulk_update(
+            [
+                WorkOrder(pk=pk, completed_qty=F('completed_qty') + qty, updated_at=now)
+                for pk, qty in completed.items()
+            ],
+            ['completed_qty', 'updated_at'],
+        )
+        roll_up_costs(work_orders)
+
+    return [
+        {'batch_number': batch.batch_number, 'stock_entry_id': str(batch.stock_entry_id)}
+        for batch in batches
+    ]
+
+
+def roll_up_costs(wo_ids):
+    """
+    Recompute and cache the costs of many work orders.
+
+    Material cost is the issued quantity at each item's standard cost;
+    labour cost is each operation's time (actual, else planned run time)
+    at its work center's hourly rate. Returns {work_order_id:
+    {'material_cost', 'labor_cost', 'total_cost'}} rounded to cents.
+    """
+    WorkOrder = apps.get_model('manufacturing', 'WorkOrder')
+    MaterialConsumption = apps.get_model('manufacturing', 'MaterialConsumption')
+    WorkOrderOperation = apps.get_model('manufacturing', 'WorkOrderOperation')
+
+    wo_ids = list(WorkOrder.objects.filter(pk__in=set(wo_ids)).values_list('pk', flat=True))
+    amount = DecimalField(max_digits=28, decimal_places=6)
+    material = dict(
+        MaterialConsumption.objects.filter(work_order_id__in=wo_ids).values('work_order_id').annotate(
+            cost=Sum(F('actual_qty') * Coalesce('item__standard_cost', ZERO), output_field=amount),
+        ).values_list('work_order_id', 'cost').order_by()
+    )
+    minutes = Case(When(actual_time__gt=0, then=F('actual_time')), default=F('run_time'))
+    labor_minutes = dict(
+        WorkOrderOperation.objects.filter(work_order_id__in=wo_ids).values('work_order_id').annotate(
+            cost=Sum(minutes * F('work_center__hourly_rate'), output_field=amount),
+        ).values_list('work_order_id', 'cost').order_by()
+    )
+
+    now = timezone.now()
+    costs, rows = {}, []
+    for pk in wo_ids:
+        material_cost = material.get(pk) or ZERO
+        labor_cost = (labor_minutes.get(pk) or ZERO) / 60
+        costs[pk] = {
+            'material_cost': material_cost.quantize(CENT),
+            'labor_cost': labor_cost.quantize(CENT),
+            'total_cost': (material_cost + labor_cost).quantize(CENT),
+        }
+        rows.append(WorkOrder(
+            pk=pk, material_cost=costs[pk]['material_cost'], labor_cost=costs[pk]['labor_cost'],
+            actual_cost=costs[pk]['total_cost'], costed_at=now, updated_at=now,
+        ))
+    WorkOrder.all_objects.bulk_update(
+        rows, ['material_cost', 'labor_cost', 'actual_cost', 'costed_at', 'updated_at'],
+        batch_size=BATCH_SIZE,
+    )
+    return costs
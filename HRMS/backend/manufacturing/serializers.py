@@ -4,7 +4,7 @@ from rest_framework import serializers
 from .models import (
     BillOfMaterials, BOMLine, WorkCenter, ProductionRouting,
     WorkOrder, WorkOrderOperation, MaterialConsumption,
-    QualityCheck, ProductionBatch
+    QualityCheck, ProductionBatch, MRPRun, PlannedOrder
 )
 
 
@@ -122,7 +122,7 @@ class WorkOrderListSerializer(serializers.ModelSerializer):
             'planned_qty', 'completed_qty', 'rejected_qty',
             'planned_start', 'planned_end', 'actual_start', 'actual_end',
             'status', 'priority', 'completion_percent',
-            'estimated_cost', 'actual_cost',
+            'estimated_cost', 'actual_cost', 'material_cost', 'labor_cost', 'costed_at',
             'created_at', 'updated_at',
         ]
 
@@ -143,5 +143,30 @@ class WorkOrderDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id', 'work_order_number', 'completed_qty', 'rejected_qty',
-            'actual_start', 'actual_end', 'actual_cost', 'created_at', 'updated_at'
+            'actual_start', 'actual_end', 'actual_cost', 'material_cost', 'labor_cost',
+            'costed_at', 'created_at', 'updated_at'
         ]
+
+
+class PlannedOrderSerializer(serializers.ModelSerializer):
+    item_code = serializers.CharField(source='item.code', read_only=True)
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    bom_code = serializers.CharField(source='bom.code', read_only=True, default=None)
+
+    class Meta:
+        model = PlannedOrder
+        fields = [
+            'id', 'run', 'item', 'item_code', 'item_name', 'bom', 'bom_code',
+            'order_type', 'quantity', 'due_date', 'release_date', 'low_level_code',
+        ]
+        read_only_fields = fields
+
+
+class MRPRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MRPRun
+        fields = [
+            'id', 'status', 'work_order_count', 'item_count', 'planned_order_count',
+            'duration_ms', 'completed_at', 'error', 'created_at',
+        ]
+        read_only_fields = fields
@@ -1,9 +1,7 @@
 """Business logic for manufacturing module."""
 
 import logging
-from decimal import Decimal
 from django.apps import apps
-from django.db import transaction
 from django.utils import timezone
 
 logger = logging.getLogger('hrms')
@@ -38,25 +36,6 @@ def _generate_wo_number(tenant=None):
     return f"{base}-{seq:04d}"
 
 
-def _generate_batch_number(tenant=None):
-    """Generate BAT-YYYYMM-NNNN number."""
-    from .models import ProductionBatch
-    now = timezone.now()
-    base = f"BAT-{now.year}{now.month:02d}"
-    qs = ProductionBatch.all_objects.filter(batch_number__startswith=base)
-    if tenant:
-        qs = qs.filter(tenant=tenant)
-    last = qs.order_by('-batch_number').first()
-    if last:
-        try:
-            seq = int(last.batch_number.rsplit('-', 1)[-1]) + 1
-        except (ValueError, IndexError):
-            seq = 1
-    else:
-        seq = 1
-    return f"{base}-{seq:04d}"
-
-
 def copy_bom_version(bom):
     """Create a new version of a BOM, copying all lines and routings."""
     from .models import BillOfMaterials, BOMLine, ProductionRouting
@@ -145,25 +124,26 @@ def release_work_order(wo_id):
         if ops:
             WorkOrderOperation.objects.bulk_create(ops)
 
-    # Create material consumption plan from BOM lines
+    # Create material consumption plan from BOM lines. Only the BOM's own
+    # level is consumed here; sub-assemblies are planned by MRP (see mrp.py).
     from .models import MaterialConsumption
     if not wo.material_consumptions.exists():
-        lines = bom.lines.all()
-        consumptions = []
-        for line in lines:
-            planned = line.effective_quantity * wo.planned_qty / bom.yield_qty
-            wh = line.bom.lines.first()  # Use BOM's work center warehouse if available
-            warehouse = bom.routings.first().work_center.warehouse if bom.routings.exists() and bom.routings.first().work_center.warehouse else None
-            if warehouse:
-                consumptions.append(MaterialConsumption(
+        # Materials are drawn from the first operation's work center warehouse
+        first_routing = bom.routings.select_related('work_center__warehouse').first()
+        warehouse = first_routing.work_center.warehouse if first_routing else None
+        if warehouse:
+            consumptions = [
+                MaterialConsumption(
                     tenant=wo.tenant,
                     work_order=wo,
-                    item=line.raw_material,
+                    item_id=line.raw_material_id,
                     warehouse=warehouse,
-                    planned_qty=planned,
-                ))
-        if consumptions:
-            MaterialConsumption.objects.bulk_create(consumptions)
+                    planned_qty=line.effective_quantity * wo.planned_qty / bom.yield_qty,
+                )
+                for line in bom.lines.all()
+            ]
+            if consumptions:
+                MaterialConsumption.objects.bulk_create(consumptions)
 
     wo.status = WorkOrder.Status.RELEASED
     wo.save(update_fields=['status', 'updated_at'])
@@ -172,154 +152,28 @@ def release_work_order(wo_id):
 
 def issue_materials(wo_id):
     """Create StockEntry ISSUE for each MaterialConsumption line."""
-    from .models import WorkOrder, MaterialConsumption
-    StockEntry = _get_inventory_model('StockEntry')
-    StockLedger = _get_inventory_model('StockLedger')
+    from .posting import issue_materials_batch
 
-    wo = WorkOrder.objects.get(pk=wo_id)
-    if wo.status not in (WorkOrder.Status.RELEASED, WorkOrder.Status.IN_PROGRESS):
-        raise ValueError("Work order must be RELEASED or IN_PROGRESS to issue materials")
-
-    consumptions = wo.material_consumptions.filter(stock_entry__isnull=True, actual_qty__gt=0)
-    entries_created = []
-
-    with transaction.atomic():
-        for mc in consumptions:
-            stock_entry = StockEntry(
-                tenant=wo.tenant,
-                entry_type=StockEntry.EntryType.ISSUE,
-                entry_date=timezone.now(),
-                item=mc.item,
-                warehouse=mc.warehouse,
-                quantity=mc.actual_qty,
-                unit_cost=mc.item.standard_cost or Decimal('0.00'),
-                source='MANUFACTURING',
-                source_reference=wo.work_order_number,
-                notes=f"Material issue for WO {wo.work_order_number}",
-            )
-            stock_entry.save()
-
-            # Update StockLedger
-            ledger, _ = StockLedger.objects.get_or_create(
-                item=mc.item, warehouse=mc.warehouse,
-                defaults={'tenant': wo.tenant, 'balance_qty': 0, 'valuation_amount': 0}
-            )
-            ledger.balance_qty -= mc.actual_qty
-            ledger.last_movement_date = timezone.now().date()
-            ledger.save(update_fields=['balance_qty', 'last_movement_date', 'updated_at'])
-
-            mc.stock_entry = stock_entry
-            mc.consumed_at = timezone.now()
-            mc.save(update_fields=['stock_entry', 'consumed_at', 'updated_at'])
-            entries_created.append(str(stock_entry.pk))
-
-        if wo.status == WorkOrder.Status.RELEASED:
-            wo.status = WorkOrder.Status.IN_PROGRESS
-            wo.actual_start = timezone.now()
-            wo.save(update_fields=['status', 'actual_start', 'updated_at'])
-
-    return {'entries_created': len(entries_created)}
+    created = issue_materials_batch([wo_id])
+    return {'entries_created': sum(created.values())}
 
 
 def report_production(wo_id, qty, batch_data=None):
     """Record production output — create ProductionBatch and StockEntry RECEIPT."""
-    from .models import WorkOrder, ProductionBatch
-    StockEntry = _get_inventory_model('StockEntry')
-    StockLedger = _get_inventory_model('StockLedger')
-    Warehouse = _get_inventory_model('Warehouse')
-
-    wo = WorkOrder.objects.get(pk=wo_id)
-    if wo.status not in (WorkOrder.Status.IN_PROGRESS, WorkOrder.Status.RELEASED):
-        raise ValueError("Work order must be IN_PROGRESS or RELEASED")
-
-    qty = Decimal(str(qty))
-    tenant = wo.tenant
-
-    with transaction.atomic():
-        batch_number = _generate_batch_number(tenant=tenant)
-
-        # Determine warehouse for finished goods receipt
-        warehouse = None
-        if wo.bom.routings.exists():
-            last_routing = wo.bom.routings.order_by('-sort_order').first()
-            if last_routing and last_routing.work_center.warehouse:
-                warehouse = last_routing.work_center.warehouse
-        if not warehouse:
-            warehouse = Warehouse.objects.filter(is_active=True).first()
-
-        if not warehouse:
-            raise ValueError("No warehouse available for finished goods receipt")
-
-        # Create stock entry for finished goods
-        stock_entry = StockEntry(
-            tenant=tenant,
-            entry_type=StockEntry.EntryType.RECEIPT,
-            entry_date=timezone.now(),
-            item=wo.product,
-            warehouse=warehouse,
-            quantity=qty,
-            unit_cost=wo.product.standard_cost or Decimal('0.00'),
-            source='MANUFACTURING',
-            source_reference=wo.work_order_number,
-            notes=f"Production receipt for WO {wo.work_order_number}",
-        )
-        stock_entry.save()
-
-        # Update stock ledger
-        ledger, _ = StockLedger.objects.get_or_create(
-            item=wo.product, warehouse=warehouse,
-            defaults={'tenant': tenant, 'balance_qty': 0, 'valuation_amount': 0}
-        )
-        ledger.balance_qty += qty
-        ledger.last_movement_date = timezone.now().date()
-        ledger.save(update_fields=['balance_qty', 'last_movement_date', 'updated_at'])
-
-        batch = ProductionBatch(
-            tenant=tenant,
-            batch_number=batch_number,
-            work_order=wo,
-            quantity=qty,
-            manufacture_date=timezone.now().date(),
-            expiry_date=batch_data.get('expiry_date') if batch_data else None,
-            stock_entry=stock_entry,
-        )
-        batch.save()
+    from .posting import report_production_batch
 
-        wo.completed_qty += qty
-        wo.save(update_fields=['completed_qty', 'updated_at'])
-
-    return {'batch_number': batch_number, 'stock_entry_id': str(stock_entry.pk)}
+    return report_production_batch([(wo_id, qty, batch_data)])[0]
 
 
 def calculate_production_cost(wo_id):
-    """Calculate total production cost: materials + labor + overhead."""
+    """Calculate total production cost: materials + labor, cached on the work order."""
     from .models import WorkOrder
+    from .posting import roll_up_costs
 
-    wo = WorkOrder.objects.prefetch_related(
-        'material_consumptions__item', 'operations__work_center'
-    ).get(pk=wo_id)
-
-    # Material cost
-    material_cost = Decimal('0.00')
-    for mc in wo.material_consumptions.all():
-        unit_cost = mc.item.standard_cost or Decimal('0.00')
-        material_cost += mc.actual_qty * unit_cost
-
-    # Labor cost (operation time × work center hourly rate)
-    labor_cost = Decimal('0.00')
-    for op in wo.operations.all():
-        hours = Decimal(op.actual_time or op.run_time or 0) / Decimal('60')
-        labor_cost += hours * (op.work_center.hourly_rate or Decimal('0.00'))
-
-    total_cost = material_cost + labor_cost
-    wo.actual_cost = total_cost
-    wo.save(update_fields=['actual_cost', 'updated_at'])
-
-    return {
-        'material_cost': str(material_cost),
-        'labor_cost': str(labor_cost),
-        'total_cost': str(total_cost),
-    }
+    costs = roll_up_costs([wo_id])
+    if not costs:
+        raise WorkOrder.DoesNotExist(f"Work order {wo_id} not found")
+    return {key: str(value) for key, value in costs.popitem()[1].items()}
 
 
 def close_work_order(wo_id):
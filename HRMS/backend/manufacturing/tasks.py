@@ -2,48 +2,60 @@
 
 import logging
 from celery import shared_task
-from django.utils import timezone
 
 logger = logging.getLogger('hrms')
 
 
 @shared_task(bind=True, queue='default', max_retries=2, default_retry_delay=60)
 def check_overdue_work_orders(self):
-    """Find work orders past their planned end date and log warnings."""
-    from .models import WorkOrder
+    """Find work orders past their planned end date and notify their owners once."""
+    from core.deadlines import scan_deadlines
 
-    today = timezone.now().date()
-    overdue = WorkOrder.objects.filter(
-        status__in=[WorkOrder.Status.RELEASED, WorkOrder.Status.IN_PROGRESS],
-        planned_end__lt=today,
-    )
+    scan = scan_deadlines('manufacturing.work_order_end')
+    for wo in scan['due']:
+        logger.warning(f"Overdue work order: {wo['work_order']} — {wo['days_overdue']} days late")
 
-    overdue_list = []
-    for wo in overdue:
-        days = (today - wo.planned_end).days
-        logger.warning(
-            f"Overdue work order: {wo.work_order_number} — {days} days late"
-        )
-        overdue_list.append({
-            'work_order': wo.work_order_number,
-            'product': str(wo.product),
-            'days_overdue': days,
-        })
+    return {
+        'status': 'success',
+        'overdue_count': len(scan['due']),
+        'notified': scan['notified'],
+        'work_orders': scan['due'],
+    }
 
-    return {'status': 'success', 'overdue_count': len(overdue_list), 'work_orders': overdue_list}
+
+@shared_task(bind=True, queue='default', max_retries=0)
+def run_mrp_plan(self, run_id):
+    """Plan the open work orders of an MRPRun (see manufacturing.mrp)."""
+    from .mrp import run_mrp
+
+    run = run_mrp(run_id)
+    return {
+        'status': 'success',
+        'run_id': str(run.pk),
+        'work_orders': run.work_order_count,
+        'planned_orders': run.planned_order_count,
+        'duration_ms': run.duration_ms,
+    }
 
 
 @shared_task(bind=True, queue='finance', max_retries=2, default_retry_delay=60)
 def calculate_manufacturing_variance(self, work_order_id):
-    """Compare planned vs actual costs and report variance."""
+    """
+    Compare planned vs actual costs and report variance.
+
+    Reads the cached cost roll-up (see manufacturing.posting), computing it
+    only for a work order that has never been costed.
+    """
     from .models import WorkOrder
-    from .services import calculate_production_cost
+    from .posting import roll_up_costs
 
     wo = WorkOrder.all_objects.get(pk=work_order_id)
-    cost_data = calculate_production_cost(str(wo.pk))
+    if wo.costed_at is None:
+        roll_up_costs([wo.pk])
+        wo.refresh_from_db(fields=['material_cost', 'labor_cost', 'actual_cost', 'costed_at'])
 
     from decimal import Decimal
-    actual = Decimal(cost_data['total_cost'])
+    actual = wo.actual_cost
     planned = wo.estimated_cost or Decimal('0.00')
     variance = actual - planned
 
@@ -57,5 +69,7 @@ def calculate_manufacturing_variance(self, work_order_id):
         'work_order': wo.work_order_number,
         'planned_cost': str(planned),
         'actual_cost': str(actual),
+        'material_cost': str(wo.material_cost),
+        'labor_cost': str(wo.labor_cost),
         'variance': str(variance),
     }
@@ -1,3 +1,175 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from finance.models import Vendor
+from inventory.models import Item, StockEntry, StockLedger, Warehouse
+from procurement.models import PurchaseOrder, PurchaseOrderItem
+
+from .models import (
+    BillOfMaterials, BOMLine, MaterialConsumption, MRPRun, ProductionRouting,
+    WorkCenter, WorkOrder, WorkOrderOperation,
+)
+from .mrp import plan, run_mrp, start_run
+from .posting import issue_materials_batch, report_production_batch
+from .services import report_production
+from .tasks import calculate_manufacturing_variance
+
+
+class MRPPlanningTest(TestCase):
+    """MRP explodes multi-level BOMs, nets supply and offsets lead times."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = {
+            code: Item.objects.create(code=code, name=code, lead_time_days=lead_time)
+            for code, lead_time in (('BIKE', 2), ('FRAME', 5), ('WHEEL', 3), ('TUBE', 7),
+                                    ('PAINT', 0), ('RIM', 2), ('SPOKE', 10))
+        }
+
+        def bom(product, lines):
+            b = BillOfMaterials.objects.create(code=product, name=product, status='ACTIVE',
+                                               finished_product=cls.items[product])
+            for n, (code, qty, scrap) in enumerate(lines):
+                BOMLine.objects.create(bom=b, raw_material=cls.items[code], sort_order=n,
+                                       quantity=Decimal(qty), scrap_percent=Decimal(scrap))
+            return b
+
+        bike = bom('BIKE', [('FRAME', '1', '0'), ('WHEEL', '2', '0'), ('TUBE', '1', '0')])
+        bom('FRAME', [('TUBE', '2', '0'), ('PAINT', '0.5', '0')])
+        bom('WHEEL', [('RIM', '1', '0'), ('SPOKE', '36', '10')])
+        for number, qty, done, start in (('WO-1', '10', '0', date(2026, 6, 10)),
+                                         ('WO-2', '5', '1', date(2026, 6, 20))):
+            WorkOrder.objects.create(work_order_number=number, bom=bike, product=cls.items['BIKE'],
+                                     planned_qty=Decimal(qty), completed_qty=Decimal(done),
+                                     planned_start=start, planned_end=start, status='RELEASED')
+
+        warehouse = Warehouse.objects.create(code='MAIN', name='Main')
+        StockLedger.objects.create(item=cls.items['FRAME'], warehouse=warehouse, balance_qty=3)
+        StockLedger.objects.create(item=cls.items['TUBE'], warehouse=warehouse, balance_qty=10)
+        po = PurchaseOrder.objects.create(po_number='PO-1', vendor=Vendor.objects.create(code='V', name='V'),
+                                          order_date=date(2026, 5, 1), status='APPROVED')
+        PurchaseOrderItem.objects.create(purchase_order=po, item=cls.items['SPOKE'], description='Spokes',
+                                         quantity=Decimal('100'), unit_price=Decimal('1'))
+
+    def _orders(self, planned, code):
+        return [(p.order_type, p.quantity, p.release_date.isoformat(), p.due_date.isoformat())
+                for p in planned if p.item_id == self.items[code].pk]
+
+    def test_plan_nets_and_offsets_every_level(self):
+        planned, stats = plan()
+
+        self.assertEqual((stats['work_orders'], len(planned)), (2, 14))
+        # Three frames on hand cover part of the first order
+        self.assertEqual(self._orders(planned, 'FRAME'), [
+            ('MAKE', Decimal('7.0000'), '2026-06-05', '2026-06-10'),
+            ('MAKE', Decimal('4.0000'), '2026-06-15', '2026-06-20'),
+        ])
+        # Tubes are demanded by bikes and by planned frames, after both are planned
+        self.assertEqual(self._orders(planned, 'TUBE'), [
+            ('BUY', Decimal('4.0000'), '2026-05-29', '2026-06-05'),
+            ('BUY', Decimal('10.0000'), '2026-06-03', '2026-06-10'),
+            ('BUY', Decimal('8.0000'), '2026-06-08', '2026-06-15'),
+            ('BUY', Decimal('4.0000'), '2026-06-13', '2026-06-20'),
+        ])
+        # 36 spokes plus 10% scrap per wheel, less the 100 on order
+        self.assertEqual(self._orders(planned, 'SPOKE'), [
+            ('BUY', Decimal('692.0000'), '2026-05-28', '2026-06-07'),
+            ('BUY', Decimal('316.8000'), '2026-06-07', '2026-06-17'),
+        ])
+        self.assertEqual({p.low_level_code for p in planned if p.item_id == self.items['TUBE'].pk}, {2})
+        self.assertEqual(plan()[0], planned)
+
+    def test_run_records_planned_orders_and_rejects_cycles(self):
+        run = run_mrp(start_run().pk)
+        self.assertEqual((run.status, run.planned_order_count, run.planned_orders.count()),
+                         ('COMPLETED', 14, 14))
+
+        paint = BillOfMaterials.objects.create(code='PAINT', name='Paint', status='ACTIVE',
+                                               finished_product=self.items['PAINT'])
+        BOMLine.objects.create(bom=paint, raw_material=self.items['FRAME'], quantity=1)
+        failed = start_run()
+        with self.assertRaisesMessage(ValueError, 'BOM cycle'):
+            run_mrp(failed.pk)
+        self.assertEqual(MRPRun.objects.get(pk=failed.pk).status, 'FAILED')
+
+
+class WorkOrderPostingTest(TestCase):
+    """Material issues and production receipts post many work orders at once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.floor = Warehouse.objects.create(code='FLOOR', name='Shop floor')
+        cls.bolt = Item.objects.create(code='BOLT', name='Bolt', standard_cost=Decimal('2.50'))
+        cls.plate = Item.objects.create(code='PLATE', name='Plate', standard_cost=Decimal('4.00'))
+        cls.frame = Item.objects.create(code='FRAME', name='Frame', standard_cost=Decimal('20.00'))
+        cls.bench = WorkCenter.objects.create(code='WELD', name='Welding', warehouse=cls.floor,
+                                              hourly_rate=Decimal('30.00'))
+        bom = BillOfMaterials.objects.create(code='FRAME', name='Frame', status='ACTIVE',
+                                             finished_product=cls.frame)
+        ProductionRouting.objects.create(bom=bom, operation_number=10, name='Weld', work_center=cls.bench)
+
+        cls.work_orders = []
+        for n, (lines, minutes) in enumerate((
+            ([(cls.bolt, '10'), (cls.plate, '3')], [(30, 45)]),
+            ([(cls.bolt, '4')], [(20, 0)]),
+            ([(cls.plate, '1.5')], []),
+        )):
+            wo = WorkOrder.objects.create(work_order_number=f'WO-{n}', bom=bom, product=cls.frame,
+                                          planned_qty=Decimal('10'), planned_start=date(2026, 6, 1),
+                                          planned_end=date(2026, 6, 5), status='RELEASED')
+            for item, qty in lines:
+                MaterialConsumption.objects.create(work_order=wo, item=item, warehouse=cls.floor,
+                                                   actual_qty=Decimal(qty))
+            for run_time, actual_time in minutes:
+                WorkOrderOperation.objects.create(work_order=wo, operation_number=10, name='Weld',
+                                                  work_center=cls.bench, run_time=run_time,
+                                                  actual_time=actual_time)
+            cls.work_orders.append(wo)
+
+    def _balance(self, item):
+        return StockLedger.objects.get(item=item, warehouse=self.floor).balance_qty
+
+    def test_issue_posts_every_work_order_and_caches_costs(self):
+        ids = [wo.pk for wo in self.work_orders]
+        with CaptureQueriesContext(connection) as queries:
+            created = issue_materials_batch(ids)
+
+        self.assertEqual(created, {ids[0]: 2, ids[1]: 1, ids[2]: 1})
+        self.assertLessEqual(len(queries), 21)
+        self.assertEqual((self._balance(self.bolt), self._balance(self.plate)),
+                         (Decimal('-14.00'), Decimal('-4.50')))
+        self.assertFalse(MaterialConsumption.objects.filter(stock_entry__isnull=True).exists())
+        # 10 x 2.50 + 3 x 4.00 materials, 45 minutes at 30.00/h
+        costs = {wo.work_order_number: (wo.status, wo.material_cost, wo.labor_cost, wo.actual_cost)
+                 for wo in WorkOrder.objects.all()}
+        self.assertEqual(costs, {
+            'WO-0': ('IN_PROGRESS', Decimal('37.00'), Decimal('22.50'), Decimal('59.50')),
+            'WO-1': ('IN_PROGRESS', Decimal('10.00'), Decimal('10.00'), Decimal('20.00')),
+            'WO-2': ('IN_PROGRESS', Decimal('6.00'), Decimal('0.00'), Decimal('6.00')),
+        })
+        # Already issued lines are not issued again
+        self.assertEqual(sum(issue_materials_batch(ids).values()), 0)
+        self.assertEqual(StockEntry.objects.filter(entry_type='ISSUE').count(), 4)
+
+    def test_report_production_receives_output_in_one_batch(self):
+        first, second, _ = self.work_orders
+        batches = report_production_batch([(first.pk, '4', None), (second.pk, 2, None),
+                                           (str(first.pk), '1.5', {'expiry_date': date(2027, 1, 1)})])
+
+        self.assertEqual([b['batch_number'][-4:] for b in batches], ['0001', '0002', '0003'])
+        self.assertEqual(self._balance(self.frame), Decimal('7.50'))
+        first.refresh_from_db()
+        self.assertEqual((first.completed_qty, first.actual_cost), (Decimal('5.50'), Decimal('59.50')))
+        self.assertEqual(report_production(second.pk, 1)['batch_number'][-4:], '0004')
+
+        WorkOrder.objects.filter(pk=first.pk).update(actual_cost=Decimal('99.00'))
+        result = calculate_manufacturing_variance(str(first.pk))
+        self.assertEqual(result['actual_cost'], '99.00')
 
-# Create your tests here.
+        WorkOrder.objects.filter(pk=second.pk).update(status='DRAFT')
+        with self.assertRaisesMessage(ValueError, 'must be IN_PROGRESS or RELEASED (WO-1)'):
+            report_production_batch([(first.pk, 1, None), (second.pk, 1, None)])
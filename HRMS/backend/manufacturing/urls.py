@@ -15,6 +15,8 @@ router.register(r'work-order-operations', views.WorkOrderOperationViewSet, basen
 router.register(r'material-consumptions', views.MaterialConsumptionViewSet, basename='material-consumption')
 router.register(r'quality-checks', views.QualityCheckViewSet, basename='quality-check')
 router.register(r'production-batches', views.ProductionBatchViewSet, basename='production-batch')
+router.register(r'mrp-runs', views.MRPRunViewSet, basename='mrp-run')
+router.register(r'planned-orders', views.PlannedOrderViewSet, basename='planned-order')
 
 urlpatterns = [
     path('', include(router.urls)),
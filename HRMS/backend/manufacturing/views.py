@@ -9,14 +9,15 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .models import (
     BillOfMaterials, BOMLine, WorkCenter, ProductionRouting,
     WorkOrder, WorkOrderOperation, MaterialConsumption,
-    QualityCheck, ProductionBatch
+    QualityCheck, ProductionBatch, MRPRun, PlannedOrder
 )
 from .serializers import (
     BOMListSerializer, BOMDetailSerializer, BOMLineSerializer,
     WorkCenterSerializer, ProductionRoutingSerializer,
     WorkOrderListSerializer, WorkOrderDetailSerializer,
     WorkOrderOperationSerializer, MaterialConsumptionSerializer,
-    QualityCheckSerializer, ProductionBatchSerializer
+    QualityCheckSerializer, ProductionBatchSerializer,
+    MRPRunSerializer, PlannedOrderSerializer
 )
 from . import services
 
@@ -184,6 +185,40 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-issue-materials')
+    def bulk_issue_materials(self, request):
+        """Issue the pending materials of many work orders in one posting."""
+        from .posting import issue_materials_batch
+
+        wo_ids = request.data.get('work_orders') or []
+        if not wo_ids:
+            return Response({'error': 'work_orders is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created = issue_materials_batch(wo_ids)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'work_orders': len(created),
+            'entries_created': {str(pk): count for pk, count in created.items()},
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk-report-production')
+    def bulk_report_production(self, request):
+        """Record the output of many work orders in one posting."""
+        from .posting import report_production_batch
+
+        reports = request.data.get('reports') or []
+        if not reports or any(not r.get('work_order') or not r.get('quantity') for r in reports):
+            return Response(
+                {'error': 'reports with work_order and quantity are required'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            batches = report_production_batch([(r['work_order'], r['quantity'], r) for r in reports])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'batches': batches}, status=status.HTTP_201_CREATED)
+
 
 class WorkOrderOperationViewSet(viewsets.ModelViewSet):
     serializer_class = WorkOrderOperationSerializer
@@ -226,3 +261,38 @@ class ProductionBatchViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return ProductionBatch.objects.select_related('work_order')
+
+
+class MRPRunViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = MRPRunSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return MRPRun.objects.all()
+
+    @action(detail=False, methods=['post'])
+    def start(self, request):
+        """Queue an MRP run over all open work orders."""
+        from .mrp import start_run
+        from .tasks import run_mrp_plan
+
+        run = start_run()
+        result = run_mrp_plan.delay(str(run.pk))
+        run.task_id = result.id
+        run.save(update_fields=['task_id', 'updated_at'])
+        return Response(self.get_serializer(run).data, status=status.HTTP_202_ACCEPTED)
+
+
+class PlannedOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = PlannedOrderSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['run', 'order_type', 'item']
+    search_fields = ['item__code', 'item__name']
+    ordering_fields = ['release_date', 'due_date', 'quantity']
+
+    def get_queryset(self):
+        return PlannedOrder.objects.select_related('item', 'bom')
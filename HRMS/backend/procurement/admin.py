@@ -5,7 +5,8 @@ from .models import (
     PurchaseRequisition, RequisitionItem,
     PurchaseOrder, PurchaseOrderItem,
     GoodsReceiptNote, GRNItem,
-    Contract, ContractMilestone
+    Contract, ContractMilestone,
+    InvoiceMatchRun, InvoiceMatchResult, InvoiceMatchException
 )
 
 
@@ -96,3 +97,25 @@ class ContractMilestoneAdmin(admin.ModelAdmin):
     list_display = ['contract', 'description', 'due_date', 'amount', 'status', 'completion_date']
     list_filter = ['status']
     search_fields = ['description', 'contract__contract_number']
+
+
+@admin.register(InvoiceMatchRun)
+class InvoiceMatchRunAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'status', 'invoice_count', 'processed_count', 'matched_count', 'exception_count']
+    list_filter = ['status']
+    readonly_fields = ['invoice_ids', 'started_at', 'completed_at', 'task_id', 'error']
+
+
+class InvoiceMatchExceptionInline(admin.TabularInline):
+    model = InvoiceMatchException
+    extra = 0
+    fields = ['check_name', 'message']
+    readonly_fields = fields
+
+
+@admin.register(InvoiceMatchResult)
+class InvoiceMatchResultAdmin(admin.ModelAdmin):
+    list_display = ['vendor_invoice', 'purchase_order', 'matched', 'run']
+    list_filter = ['matched', 'exceptions__check_name']
+    search_fields = ['vendor_invoice__invoice_number', 'purchase_order__po_number']
+    inlines = [InvoiceMatchExceptionInline]
@@ -0,0 +1,212 @@
+"""
+Requisition-to-PO consolidation.
+
+``consolidate_requisitions`` turns many approved requisitions into
+purchase orders in one transaction. Each requisition is sourced from a
+vendor, in a currency, for delivery to a warehouse (``Sourcing``). The
+lines of all requisitions that share those three become one PO:
+
+- the requisitions are locked and validated together
+- the PO numbers are reserved as one block (core.numbering)
+- the POs and their lines are bulk-inserted, one line per requisition item
+- the requisitions move to ORDERED with one update
+- the budget commitments of every line are resolved and created in bulk
+  (finance.budgets), instead of per PO by the approval signal, which
+  skips lines that are already committed
+
+``procurement.services.convert_requisition_to_po`` converts a single
+requisition through the same path.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+from core.numbering import allocate_numbers
+
+logger = logging.getLogger('hrms')
+
+CENT = Decimal('0.01')
+BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Sourcing:
+    """Where one requisition is bought from and delivered to."""
+    requisition_id: object
+    vendor_id: object
+    currency: str = 'GHS'
+    warehouse_id: object = None
+
+
+def sourcing_from_data(rows):
+    """Sourcing entries from API/task payload dicts (requisition, vendor, currency, warehouse)."""
+    sourcing = []
+    for row in rows:
+        if not row.get('requisition') or not row.get('vendor'):
+            raise ValueError("Each entry needs a requisition and a vendor")
+        sourcing.append(Sourcing(
+            requisition_id=row['requisition'], vendor_id=row['vendor'],
+            currency=(row.get('currency') or 'GHS').upper(), warehouse_id=row.get('warehouse') or None,
+        ))
+    return sourcing
+
+
+def _scoped(model, tenant_id):
+    """The model's rows, restricted to ``tenant_id`` when given.
+
+    The tenant-aware managers only filter while a request has set the
+    current tenant; background jobs pass the tenant explicitly.
+    """
+    qs = model.objects.all()
+    return qs.filter(tenant_id=tenant_id) if tenant_id else qs
+
+
+def _lock_requisitions(sourcing, tenant_id=None):
+    PurchaseRequisition = apps.get_model('procurement', 'PurchaseRequisition')
+
+    ids = [str(s.requisition_id) for s in sourcing]
+    if len(set(ids)) != len(ids):
+        raise ValueError("A requisition can only be sourced once")
+    requisitions = {
+        str(r.pk): r
+        for r in _scoped(PurchaseRequisition, tenant_id).select_for_update().filter(pk__in=ids).order_by('pk')
+    }
+    missing = set(ids) - set(requisitions)
+    if missing:
+        raise ValueError(f"Requisitions not found: {', '.join(sorted(missing))}")
+    not_approved = sorted(
+        f"{r.requisition_number} (status: {r.status})"
+        for r in requisitions.values() if r.status != PurchaseRequisition.Status.APPROVED
+    )
+    if not_approved:
+        raise ValueError(f"Requisitions are not approved: {', '.join(not_approved)}")
+    return requisitions
+
+
+def consolidate_requisitions(sourcing, created_by=None, commit_budget=True, tenant_id=None):
+    """
+    Convert approved requisitions into consolidated purchase orders.
+
+    Args:
+        sourcing: Sourcing entries, one per requisition
+        created_by: User creating the POs
+        commit_budget: Commit every line to its budget now
+        tenant_id: Only source requisitions, vendors and warehouses of this
+            tenant (required outside a request, where no tenant is current)
+
+    Returns:
+        The PurchaseOrders created, in the order their groups first appear.
+
+    Raises:
+        ValueError: If a requisition is missing, repeated or not APPROVED,
+            or a vendor or warehouse does not exist
+    """
+    Vendor = apps.get_model('finance', 'Vendor')
+    Warehouse = apps.get_model('inventory', 'Warehouse')
+    PurchaseRequisition = apps.get_model('procurement', 'PurchaseRequisition')
+    RequisitionItem = apps.get_model('procurement', 'RequisitionItem')
+    PurchaseOrder = apps.get_model('procurement', 'PurchaseOrder')
+    PurchaseOrderItem = apps.get_model('procurement', 'PurchaseOrderItem')
+
+    sourcing = list(sourcing)
+    if not sourcing:
+        return []
+
+    with transaction.atomic():
+        requisitions = _lock_requisitions(sourcing, tenant_id)
+        vendor_ids = {str(s.vendor_id) for s in sourcing}
+        vendors = {
+            str(pk): pk
+            for pk in _scoped(Vendor, tenant_id).filter(pk__in=vendor_ids).values_list('pk', flat=True)
+        }
+        if len(vendors) != len(vendor_ids):
+            raise ValueError(f"Vendors not found: {', '.join(sorted(vendor_ids - set(vendors)))}")
+        warehouses = {
+            str(pk): (pk, address)
+            for pk, address in _scoped(Warehouse, tenant_id).filter(
+                pk__in={s.warehouse_id for s in sourcing if s.warehouse_id},
+            ).values_list('pk', 'address')
+        }
+        missing = {str(s.warehouse_id) for s in sourcing if s.warehouse_id} - set(warehouses)
+        if missing:
+            raise ValueError(f"Warehouses not found: {', '.join(sorted(missing))}")
+
+        groups = defaultdict(list)
+        for s in sourcing:
+            requisition = requisitions[str(s.requisition_id)]
+            warehouse_id = str(s.warehouse_id) if s.warehouse_id else None
+            key = (requisition.tenant_id, str(s.vendor_id), s.currency, warehouse_id)
+            groups[key].append(requisition)
+
+        items = defaultdict(list)
+        for req_item in RequisitionItem.objects.filter(requisition_id__in=requisitions).order_by('id'):
+            items[req_item.requisition_id].append(req_item)
+
+        now = timezone.now()
+        numbers = allocate_numbers('PO', count=len(groups), model=PurchaseOrder, field='po_number')
+        orders, lines = [], []
+        for po_number, ((tenant_id, vendor_id, currency, warehouse_id), members) in zip(numbers, groups.items()):
+            members.sort(key=lambda r: r.requisition_number)
+            required = [r.required_date for r in members if r.required_date]
+            po = PurchaseOrder(
+                tenant_id=tenant_id,
+                po_number=po_number,
+                vendor_id=vendors[vendor_id],
+                requisition=members[0] if len(members) == 1 else None,
+                order_date=now.date(),
+                delivery_date=min(required) if required else None,
+                delivery_warehouse_id=warehouses[warehouse_id][0] if warehouse_id else None,
+                shipping_address=warehouses[warehouse_id][1] if warehouse_id else '',
+                currency=currency,
+                status=PurchaseOrder.Status.DRAFT,
+                created_by=created_by,
+                notes=(
+                    f"Auto-generated from requisition {members[0].requisition_number}" if len(members) == 1
+                    else f"Consolidated from requisitions {', '.join(r.requisition_number for r in members)}"
+                ),
+            )
+            total = Decimal('0')
+            for requisition in members:
+                for req_item in items[requisition.pk]:
+                    item_total = (req_item.quantity * req_item.unit_price).quantize(CENT)
+                    lines.append(PurchaseOrderItem(
+                        tenant_id=tenant_id,
+                        purchase_order=po,
+                        requisition_item=req_item,
+                        description=req_item.description,
+                        item_id=req_item.item_id,
+                        quantity=req_item.quantity,
+                        unit_of_measure=req_item.unit_of_measure,
+                        unit_price=req_item.unit_price,
+                        total=item_total,
+                    ))
+                    total += item_total
+            po.total_amount = total
+            orders.append(po)
+
+        PurchaseOrder.all_objects.bulk_create(orders, batch_size=BATCH_SIZE)
+        PurchaseOrderItem.all_objects.bulk_create(lines, batch_size=BATCH_SIZE)
+        PurchaseRequisition.all_objects.filter(pk__in=requisitions).update(
+            status=PurchaseRequisition.Status.ORDERED, updated_at=now,
+        )
+
+        committed = 0
+        if commit_budget:
+            from finance.budgets import commit_to_budgets, purchase_order_commitments
+
+            commitments = purchase_order_commitments(orders)
+            if commitments:
+                commit_to_budgets(commitments)
+            committed = len(commitments)
+
+    logger.info(
+        "Consolidated %d requisitions into %d POs (%d lines, %d budget commitments)",
+        len(requisitions), len(orders), len(lines), committed,
+    )
+    return orders
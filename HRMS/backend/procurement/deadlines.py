@@ -0,0 +1,72 @@
+"""Deadline scanners for procurement (see core.deadlines)."""
+
+from core.deadlines import DeadlineScanner, register
+
+
+@register
+class PurchaseOrderDeliveryScanner(DeadlineScanner):
+    """Approved and sent POs past their delivery date."""
+    kind = 'procurement.po_delivery'
+    model = 'procurement.PurchaseOrder'
+    date_field = 'delivery_date'
+    reference_field = 'po_number'
+    open_filter = {'status__in': ('APPROVED', 'SENT', 'PARTIAL')}
+    lead_days = -1
+    select_related = ('vendor',)
+    link = '/procurement/purchase-orders'
+
+    def recipients(self, po):
+        return {po.created_by_id, po.approved_by_id} - {None}
+
+    def notice(self, po, stage, today):
+        days = (today - po.delivery_date).days
+        return (
+            f'Overdue Delivery: PO {po.po_number}',
+            f'PO {po.po_number} from {po.vendor} was due for delivery on '
+            f'{po.delivery_date:%d %b %Y} and is {days} days overdue.',
+        )
+
+    def summary(self, po, today):
+        return {
+            'po_number': po.po_number,
+            'vendor': str(po.vendor),
+            'delivery_date': str(po.delivery_date),
+            'days_overdue': (today - po.delivery_date).days,
+            'status': po.status,
+            'total_amount': str(po.total_amount),
+        }
+
+
+@register
+class ContractRenewalScanner(DeadlineScanner):
+    """Active contracts within 30 days of their end date, or past it."""
+    kind = 'procurement.contract_renewal'
+    model = 'procurement.Contract'
+    date_field = 'end_date'
+    reference_field = 'contract_number'
+    open_filter = {'status': 'ACTIVE'}
+    lead_days = 30
+    select_related = ('vendor',)
+    link = '/procurement/contracts'
+
+    def recipients(self, contract):
+        return {contract.created_by_id, contract.signed_by_id} - {None}
+
+    def notice(self, contract, stage, today):
+        days = (contract.end_date - today).days
+        when = f'expired on {contract.end_date:%d %b %Y}' if days < 0 else f'expires in {days} days'
+        return (
+            f'Contract {"Expired" if days < 0 else "Renewal"}: {contract.contract_number}',
+            f'Contract {contract.contract_number} ({contract.title}) with {contract.vendor} {when}. '
+            f'Auto-renew: {"yes" if contract.auto_renew else "no"}.',
+        )
+
+    def summary(self, contract, today):
+        return {
+            'contract_number': contract.contract_number,
+            'title': contract.title,
+            'end_date': str(contract.end_date),
+            'days_remaining': (contract.end_date - today).days,
+            'auto_renew': contract.auto_renew,
+            'vendor': str(contract.vendor),
+        }
@@ -0,0 +1,309 @@
+"""
+Three-way invoice matching: PO <-> GRN <-> Vendor Invoice.
+
+``match_invoices`` matches a batch of vendor invoices with a fixed number
+of queries, however many invoices it is given:
+
+1. the purchase order of every invoice (its vendor's latest open PO) in
+   one query
+2. the PO headers, the PO lines and the accepted GRN quantities and
+   values per PO line, aggregated in the database, in one query each
+3. the PO-level checks (GRN found, quantities received) are evaluated
+   once per PO and shared by every invoice against it; the invoice-level
+   checks compare each invoice total with the PO and GRN totals
+
+``run_invoice_matching`` runs a batch as an InvoiceMatchRun, writing the
+results and their exceptions in bulk and recording progress after every
+chunk. ``procurement.services.match_invoice_to_po_grn`` matches a single
+invoice through the same engine.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+logger = logging.getLogger('hrms')
+
+ZERO = Decimal('0')
+DEFAULT_TOLERANCE = Decimal('5.0')
+CHUNK_SIZE = 500
+
+MATCHABLE_PO_STATUSES = ('APPROVED', 'SENT', 'PARTIAL', 'RECEIVED', 'INVOICED')
+OPEN_INVOICE_STATUSES = ('DRAFT', 'PENDING')
+
+
+@dataclass
+class _PurchaseOrderFacts:
+    """What the checks need to know about one PO and its accepted GRNs."""
+    pk: object
+    vendor_id: object
+    po_number: str
+    total: Decimal
+    grn_found: bool = False
+    grn_value: Decimal = ZERO
+    shortfalls: list = field(default_factory=list)
+
+
+@dataclass
+class Match:
+    """The checks of one invoice and the exceptions they raised."""
+    invoice: object
+    purchase_order: _PurchaseOrderFacts = None
+    checks: list = field(default_factory=list)
+    exceptions: list = field(default_factory=list)
+
+    @property
+    def matched(self):
+        return all(passed for _, passed, _ in self.checks)
+
+    def as_dict(self):
+        """The result in the shape returned by match_invoice_to_po_grn."""
+        result = {'matched': self.matched}
+        if self.purchase_order:
+            result['po_number'] = self.purchase_order.po_number
+        result['checks'] = self.checks
+        result['discrepancies'] = [message for _, message in self.exceptions]
+        return result
+
+
+def _variance_pct(actual, expected):
+    if expected > 0:
+        return abs(actual - expected) / expected * 100
+    return Decimal('100') if actual > 0 else Decimal('0')
+
+
+def _purchase_orders(invoices):
+    """{invoice pk: _PurchaseOrderFacts or None} for a batch of invoices."""
+    Vendor = apps.get_model('finance', 'Vendor')
+    PurchaseOrder = apps.get_model('procurement', 'PurchaseOrder')
+    PurchaseOrderItem = apps.get_model('procurement', 'PurchaseOrderItem')
+    GoodsReceiptNote = apps.get_model('procurement', 'GoodsReceiptNote')
+    GRNItem = apps.get_model('procurement', 'GRNItem')
+
+    latest_po = dict(
+        Vendor.all_objects.filter(pk__in={inv.vendor_id for inv in invoices}).annotate(
+            po_id=Subquery(
+                PurchaseOrder.objects.filter(
+                    vendor_id=OuterRef('pk'), status__in=MATCHABLE_PO_STATUSES,
+                ).order_by('-order_date').values('pk')[:1]
+            ),
+        ).values_list('pk', 'po_id')
+    )
+    po_ids = {pk for pk in latest_po.values() if pk}
+
+    facts = {
+        pk: _PurchaseOrderFacts(pk=pk, vendor_id=vendor_id, po_number=po_number, total=total or ZERO)
+        for pk, vendor_id, po_number, total in PurchaseOrder.objects.filter(pk__in=po_ids).values_list(
+            'pk', 'vendor_id', 'po_number', 'total_amount',
+        )
+    }
+    for po_id in GoodsReceiptNote.objects.filter(
+        purchase_order_id__in=po_ids, status=GoodsReceiptNote.Status.ACCEPTED,
+    ).values_list('purchase_order_id', flat=True).order_by().distinct():
+        facts[po_id].grn_found = True
+
+    received = defaultdict(lambda: ZERO)
+    for po_id, po_item_id, qty, value in GRNItem.objects.filter(
+        grn__purchase_order_id__in=po_ids, grn__status=GoodsReceiptNote.Status.ACCEPTED,
+        grn__is_deleted=False,
+    ).values('grn__purchase_order_id', 'po_item_id').annotate(
+        qty=Sum('accepted_qty'), value=Sum(F('accepted_qty') * F('po_item__unit_price')),
+    ).values_list('grn__purchase_order_id', 'po_item_id', 'qty', 'value').order_by():
+        received[po_item_id] += qty or ZERO
+        facts[po_id].grn_value += value or ZERO
+
+    for po_id, po_item_id, description, quantity in PurchaseOrderItem.objects.filter(
+        purchase_order_id__in={pk for pk, po in facts.items() if po.grn_found},
+    ).values_list('purchase_order_id', 'pk', 'description', 'quantity'):
+        if received[po_item_id] < quantity:
+            facts[po_id].shortfalls.append(
+                f"Item '{description}': ordered {quantity}, received {received[po_item_id]}"
+            )
+
+    return {inv.pk: facts.get(latest_po.get(inv.vendor_id)) for inv in invoices}
+
+
+def _match(invoice, po, tolerance_pct):
+    match = Match(invoice=invoice, purchase_order=po)
+    if po is None:
+        match.checks.append(('po_found', False, 'No matching PO found for this invoice'))
+        match.exceptions.append(('po_found', 'No PO found'))
+        return match
+
+    # Check 1: Vendor match
+    vendor_match = invoice.vendor_id == po.vendor_id
+    match.checks.append((
+        'vendor_match', vendor_match,
+        f"Invoice vendor: {invoice.vendor_id}, PO vendor: {po.vendor_id}",
+    ))
+    if not vendor_match:
+        match.exceptions.append(('vendor_match', "Invoice vendor does not match PO vendor"))
+
+    # Check 2: Invoice total vs PO total (within tolerance)
+    inv_total = invoice.total_amount or ZERO
+    variance_pct = _variance_pct(inv_total, po.total)
+    amount_match = variance_pct <= tolerance_pct
+    match.checks.append((
+        'amount_match', amount_match,
+        f"PO total: {po.total}, Invoice total: {inv_total}, Variance: {variance_pct:.2f}%",
+    ))
+    if not amount_match:
+        match.exceptions.append((
+            'amount_match',
+            f"Invoice amount variance ({variance_pct:.2f}%) exceeds tolerance ({tolerance_pct}%)",
+        ))
+
+    if not po.grn_found:
+        match.checks.append(('grn_found', False, 'No accepted GRN found for this PO'))
+        match.exceptions.append(('grn_found', "No accepted GRN found for PO"))
+        return match
+
+    # Check 3: GRN quantities match PO
+    qty_match = not po.shortfalls
+    match.exceptions.extend(('quantity_match', shortfall) for shortfall in po.shortfalls)
+    match.checks.append((
+        'quantity_match', qty_match,
+        f"GRN quantities {'match' if qty_match else 'do not match'} PO quantities",
+    ))
+
+    # Check 4: Invoice vs GRN value
+    grn_variance = _variance_pct(inv_total, po.grn_value)
+    grn_value_match = grn_variance <= tolerance_pct
+    match.checks.append((
+        'grn_value_match', grn_value_match,
+        f"GRN value: {po.grn_value}, Invoice: {inv_total}, Variance: {grn_variance:.2f}%",
+    ))
+    if not grn_value_match:
+        match.exceptions.append((
+            'grn_value_match',
+            f"Invoice vs GRN value variance ({grn_variance:.2f}%) exceeds tolerance",
+        ))
+    return match
+
+
+def match_invoices(invoices, tolerance_pct=DEFAULT_TOLERANCE):
+    """
+    Three-way match vendor invoices against their POs and accepted GRNs.
+
+    Checks, per invoice:
+      1. Invoice vendor matches PO vendor
+      2. Invoice total is within tolerance of PO total
+      3. GRN accepted quantities match PO ordered quantities
+      4. Invoice amount is within tolerance of GRN received value
+
+    Returns {invoice pk: Match}.
+    """
+    invoices = list(invoices)
+    tolerance_pct = Decimal(str(tolerance_pct))
+    purchase_orders = _purchase_orders(invoices)
+    return {inv.pk: _match(inv, purchase_orders[inv.pk], tolerance_pct) for inv in invoices}
+
+
+def start_match_run(invoice_ids=None, tolerance_pct=DEFAULT_TOLERANCE):
+    """
+    Create a PENDING InvoiceMatchRun over ``invoice_ids``, or over every
+    DRAFT or PENDING vendor invoice when None.
+
+    Ids are kept only if the current tenant's invoices include them: the
+    run's worker loads them without a tenant.
+    """
+    VendorInvoice = apps.get_model('finance', 'VendorInvoice')
+    InvoiceMatchRun = apps.get_model('procurement', 'InvoiceMatchRun')
+
+    if invoice_ids is None:
+        invoice_ids = VendorInvoice.objects.filter(status__in=OPEN_INVOICE_STATUSES).order_by(
+            'invoice_date', 'invoice_number', 'pk',
+        ).values_list('pk', flat=True)
+    invoice_ids = list(dict.fromkeys(str(pk) for pk in invoice_ids))
+    if invoice_ids:
+        visible = {
+            str(pk) for pk in VendorInvoice.objects.filter(pk__in=invoice_ids).values_list('pk', flat=True)
+        }
+        invoice_ids = [pk for pk in invoice_ids if pk in visible]
+    return InvoiceMatchRun.objects.create(
+        invoice_ids=invoice_ids, invoice_count=len(invoice_ids), tolerance_pct=tolerance_pct,
+    )
+
+
+def _save_chunk(run, matches):
+    InvoiceMatchRun = apps.get_model('procurement', 'InvoiceMatchRun')
+    InvoiceMatchResult = apps.get_model('procurement', 'InvoiceMatchResult')
+    InvoiceMatchException = apps.get_model('procurement', 'InvoiceMatchException')
+
+    results, exceptions = [], []
+    for match in matches:
+        result = InvoiceMatchResult(
+            tenant_id=match.invoice.tenant_id, run=run, vendor_invoice=match.invoice,
+            purchase_order_id=match.purchase_order.pk if match.purchase_order else None,
+            matched=match.matched,
+            checks=[{'check': name, 'passed': passed, 'detail': detail}
+                    for name, passed, detail in match.checks],
+        )
+        results.append(result)
+        exceptions.extend(
+            InvoiceMatchException(tenant_id=result.tenant_id, result=result,
+                                  check_name=name, message=message)
+            for name, message in match.exceptions
+        )
+
+    matched = sum(1 for match in matches if match.matched)
+    with transaction.atomic():
+        InvoiceMatchResult.all_objects.bulk_create(results)
+        InvoiceMatchException.all_objects.bulk_create(exceptions)
+        InvoiceMatchRun.all_objects.filter(pk=run.pk).update(
+            processed_count=F('processed_count') + len(matches),
+            matched_count=F('matched_count') + matched,
+            exception_count=F('exception_count') + len(matches) - matched,
+            updated_at=timezone.now(),
+        )
+
+
+def run_invoice_matching(run_id, progress=None):
+    """
+    Match the invoices of an InvoiceMatchRun in chunks of CHUNK_SIZE.
+
+    Each chunk's results are written in one transaction and added to the
+    run's counters; ``progress(processed, total)`` is called after each.
+    """
+    VendorInvoice = apps.get_model('finance', 'VendorInvoice')
+    InvoiceMatchRun = apps.get_model('procurement', 'InvoiceMatchRun')
+
+    run = InvoiceMatchRun.all_objects.get(pk=run_id)
+    run.status = InvoiceMatchRun.Status.RUNNING
+    run.started_at = timezone.now()
+    run.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    try:
+        processed = 0
+        for start in range(0, len(run.invoice_ids), CHUNK_SIZE):
+            chunk = run.invoice_ids[start:start + CHUNK_SIZE]
+            invoices = VendorInvoice.all_objects.filter(pk__in=chunk, is_deleted=False)
+            if run.tenant_id:
+                invoices = invoices.filter(tenant_id=run.tenant_id)
+            matches = list(match_invoices(invoices, run.tolerance_pct).values())
+            _save_chunk(run, matches)
+            processed += len(chunk)
+            if progress:
+                progress(processed, run.invoice_count)
+    except Exception as e:
+        logger.exception(f"Invoice match run {run_id} failed: {e}")
+        InvoiceMatchRun.all_objects.filter(pk=run_id).update(
+            status=InvoiceMatchRun.Status.FAILED, error=str(e)[:2000], completed_at=timezone.now(),
+        )
+        raise
+
+    run.refresh_from_db()
+    run.status = InvoiceMatchRun.Status.COMPLETED
+    run.completed_at = timezone.now()
+    run.save(update_fields=['status', 'completed_at', 'updated_at'])
+    logger.info(
+        f"Invoice match run {run_id}: {run.processed_count} invoices, "
+        f"{run.matched_count} matched, {run.exception_count} exceptions"
+    )
+    return run
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_item_lead_time'),
+        ('procurement', '0003_invoice_matching'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='currency',
+            field=models.CharField(default='GHS', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='delivery_warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_orders', to='inventory.warehouse'),
+        ),
+    ]
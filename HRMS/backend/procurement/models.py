@@ -78,6 +78,8 @@ class PurchaseOrder(BaseModel):
     requisition = models.ForeignKey(PurchaseRequisition, on_delete=models.SET_NULL, null=True, blank=True, related_name='purchase_orders')
     order_date = models.DateField()
     delivery_date = models.DateField(null=True, blank=True)
+    delivery_warehouse = models.ForeignKey('inventory.Warehouse', on_delete=models.SET_NULL, null=True, blank=True, related_name='purchase_orders')
+    currency = models.CharField(max_length=3, default='GHS')
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.DRAFT)
     total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     tax_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
@@ -340,3 +342,68 @@ class VendorBlacklist(BaseModel):
 
     def __str__(self):
         return f"{self.vendor} — blacklisted {'(active)' if self.is_active else '(inactive)'}"
+
+
+# ---- Three-way Invoice Matching ----
+
+class InvoiceMatchRun(BaseModel):
+    """A batch three-way match of vendor invoices (see procurement.matching)."""
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    tolerance_pct = models.DecimalField(max_digits=5, decimal_places=2, default=5)
+    invoice_ids = models.JSONField(default=list, blank=True)
+    invoice_count = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    matched_count = models.PositiveIntegerField(default=0)
+    exception_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Invoice match {self.created_at:%Y-%m-%d %H:%M} ({self.status})"
+
+    @property
+    def percentage(self):
+        if not self.invoice_count:
+            return 100 if self.status == self.Status.COMPLETED else 0
+        return round(100 * self.processed_count / self.invoice_count)
+
+
+class InvoiceMatchResult(BaseModel):
+    """Outcome of matching one vendor invoice in a run."""
+    run = models.ForeignKey(InvoiceMatchRun, on_delete=models.CASCADE, related_name='results')
+    vendor_invoice = models.ForeignKey('finance.VendorInvoice', on_delete=models.CASCADE, related_name='match_results')
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoice_matches')
+    matched = models.BooleanField(default=False)
+    checks = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = [('run', 'vendor_invoice')]
+        indexes = [models.Index(fields=['run', 'matched'])]
+
+    def __str__(self):
+        return f"{self.vendor_invoice} — {'matched' if self.matched else 'exception'}"
+
+
+class InvoiceMatchException(BaseModel):
+    """A failed check of an invoice match, for AP follow-up."""
+    result = models.ForeignKey(InvoiceMatchResult, on_delete=models.CASCADE, related_name='exceptions')
+    check_name = models.CharField(max_length=30, db_index=True)
+    message = models.TextField()
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.check_name}: {self.message}"
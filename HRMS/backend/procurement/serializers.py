@@ -1,13 +1,16 @@
 """Serializers for procurement app."""
 
 from rest_framework import serializers
+
+from .matching import DEFAULT_TOLERANCE
 from .models import (
     PurchaseRequisition, RequisitionItem,
     PurchaseOrder, PurchaseOrderItem,
     GoodsReceiptNote, GRNItem,
     Contract, ContractMilestone,
     RequestForQuotation, RFQVendor, RFQItem,
-    VendorScorecard, VendorBlacklist
+    VendorScorecard, VendorBlacklist,
+    InvoiceMatchRun, InvoiceMatchResult, InvoiceMatchException
 )
 
 
@@ -74,7 +77,7 @@ class PurchaseOrderListSerializer(serializers.ModelSerializer):
             'id', 'po_number', 'vendor', 'vendor_name',
             'requisition', 'requisition_number',
             'order_date', 'delivery_date', 'status',
-            'total_amount', 'payment_terms', 'items_count',
+            'total_amount', 'currency', 'delivery_warehouse', 'payment_terms', 'items_count',
             'created_at', 'updated_at',
         ]
 
@@ -266,3 +269,52 @@ class VendorBlacklistSerializer(serializers.ModelSerializer):
         model = VendorBlacklist
         fields = '__all__'
         read_only_fields = ['id', 'blacklisted_at', 'created_at', 'updated_at']
+
+
+# ---- Three-way Invoice Matching ----
+
+class InvoiceMatchRunSerializer(serializers.ModelSerializer):
+    percentage = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = InvoiceMatchRun
+        fields = [
+            'id', 'status', 'tolerance_pct', 'invoice_count', 'processed_count',
+            'matched_count', 'exception_count', 'percentage', 'started_at', 'completed_at',
+            'task_id', 'error', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class InvoiceMatchExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InvoiceMatchException
+        fields = ['id', 'check_name', 'message']
+        read_only_fields = fields
+
+
+class InvoiceMatchResultSerializer(serializers.ModelSerializer):
+    invoice_number = serializers.CharField(source='vendor_invoice.invoice_number', read_only=True)
+    vendor_name = serializers.CharField(source='vendor_invoice.vendor.name', read_only=True)
+    po_number = serializers.CharField(source='purchase_order.po_number', read_only=True, default=None)
+    exceptions = InvoiceMatchExceptionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = InvoiceMatchResult
+        fields = [
+            'id', 'run', 'vendor_invoice', 'invoice_number', 'vendor_name',
+            'purchase_order', 'po_number', 'matched', 'checks', 'exceptions', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class RequisitionConsolidationSerializer(serializers.Serializer):
+    """Input for consolidating approved requisitions into purchase orders."""
+    requisitions = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    commit_budget = serializers.BooleanField(default=True)
+
+
+class InvoiceMatchStartSerializer(serializers.Serializer):
+    """Input for starting a three-way match run; no invoice_ids matches every open invoice."""
+    invoice_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_null=True, default=None)
+    tolerance_pct = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, default=DEFAULT_TOLERANCE)
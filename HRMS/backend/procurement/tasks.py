@@ -1,10 +1,8 @@
 """Celery tasks for procurement module."""
 
 import logging
-from datetime import timedelta
 
 from celery import shared_task
-from django.utils import timezone
 
 logger = logging.getLogger('hrms')
 
@@ -13,39 +11,19 @@ logger = logging.getLogger('hrms')
 def check_contract_renewals(self):
     """Check for contracts nearing expiry and flag for renewal.
 
-    Looks for active contracts that will expire within the next 30 days
-    and creates notifications for the relevant users.
+    Scans the deadline index for active contracts that expire within the
+    next 30 days (or already have) and notifies their owners once per
+    stage (see procurement.deadlines).
     """
-    from procurement.models import Contract
+    from core.deadlines import scan_deadlines
 
-    threshold_date = timezone.now().date() + timedelta(days=30)
-    expiring_contracts = Contract.objects.filter(
-        status=Contract.Status.ACTIVE,
-        end_date__lte=threshold_date,
-        end_date__gte=timezone.now().date(),
-    )
-
-    results = []
-    for contract in expiring_contracts:
-        days_remaining = (contract.end_date - timezone.now().date()).days
-        logger.info(
-            f"Contract {contract.contract_number} ({contract.title}) "
-            f"expires in {days_remaining} days. Auto-renew: {contract.auto_renew}"
-        )
-        results.append({
-            'contract_number': contract.contract_number,
-            'title': contract.title,
-            'end_date': str(contract.end_date),
-            'days_remaining': days_remaining,
-            'auto_renew': contract.auto_renew,
-            'vendor': str(contract.vendor),
-        })
-
-    logger.info(f"Found {len(results)} contracts nearing expiry.")
+    scan = scan_deadlines('procurement.contract_renewal')
+    logger.info(f"Found {len(scan['due'])} contracts nearing expiry, {scan['notified']} notifications sent.")
     return {
         'status': 'success',
-        'expiring_count': len(results),
-        'contracts': results,
+        'expiring_count': len(scan['due']),
+        'notified': scan['notified'],
+        'contracts': scan['due'],
     }
 
 
@@ -53,40 +31,63 @@ def check_contract_renewals(self):
 def check_overdue_deliveries(self):
     """Check for purchase orders past their expected delivery date.
 
-    Looks for approved/sent POs where the delivery date has passed
-    and the order has not been fully received.
+    Scans the deadline index for approved/sent POs whose delivery date has
+    passed and notifies their owners once (see procurement.deadlines).
     """
-    from procurement.models import PurchaseOrder
-
-    today = timezone.now().date()
-    overdue_pos = PurchaseOrder.objects.filter(
-        status__in=[
-            PurchaseOrder.Status.APPROVED,
-            PurchaseOrder.Status.SENT,
-            PurchaseOrder.Status.PARTIAL,
-        ],
-        delivery_date__lt=today,
-    )
+    from core.deadlines import scan_deadlines
+
+    scan = scan_deadlines('procurement.po_delivery')
+    logger.info(f"Found {len(scan['due'])} overdue purchase orders, {scan['notified']} notifications sent.")
+    return {
+        'status': 'success',
+        'overdue_count': len(scan['due']),
+        'notified': scan['notified'],
+        'purchase_orders': scan['due'],
+    }
+
+
+@shared_task(bind=True, queue='procurement', max_retries=0)
+def run_invoice_match(self, run_id):
+    """Three-way match the invoices of an InvoiceMatchRun (see procurement.matching).
+
+    Progress is kept on the run and, when running under a worker, reported
+    as the task's PROGRESS state.
+    """
+    from procurement.matching import run_invoice_matching
 
-    results = []
-    for po in overdue_pos:
-        days_overdue = (today - po.delivery_date).days
-        logger.warning(
-            f"PO {po.po_number} is {days_overdue} days overdue. "
-            f"Vendor: {po.vendor}. Status: {po.status}"
-        )
-        results.append({
-            'po_number': po.po_number,
-            'vendor': str(po.vendor),
-            'delivery_date': str(po.delivery_date),
-            'days_overdue': days_overdue,
-            'status': po.status,
-            'total_amount': str(po.total_amount),
-        })
-
-    logger.info(f"Found {len(results)} overdue purchase orders.")
+    def progress(processed, total):
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total})
+
+    run = run_invoice_matching(run_id, progress=progress)
+    return {
+        'status': 'success',
+        'run_id': str(run.pk),
+        'invoices': run.processed_count,
+        'matched': run.matched_count,
+        'exceptions': run.exception_count,
+    }
+
+
+@shared_task(bind=True, queue='procurement', max_retries=0)
+def consolidate_requisitions_job(self, sourcing_rows, user_id=None, commit_budget=True, tenant_id=None):
+    """Convert approved requisitions into consolidated POs (see procurement.consolidation).
+
+    ``sourcing_rows`` are dicts with requisition, vendor, currency and
+    warehouse ids; only those of ``tenant_id`` (the requesting user's
+    tenant) are accepted.
+    """
+    from django.contrib.auth import get_user_model
+    from procurement.consolidation import consolidate_requisitions, sourcing_from_data
+
+    created_by = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    orders = consolidate_requisitions(
+        sourcing_from_data(sourcing_rows), created_by=created_by, commit_budget=commit_budget,
+        tenant_id=tenant_id,
+    )
     return {
         'status': 'success',
-        'overdue_count': len(results),
-        'purchase_orders': results,
+        'requisitions': len(sourcing_rows),
+        'purchase_orders': [po.po_number for po in orders],
+        'total_amount': str(sum(po.total_amount for po in orders)),
     }
@@ -0,0 +1,151 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from employees.models import Employee
+from finance.models import Account, Budget, BudgetCommitment, FiscalYear, Vendor
+from inventory.models import Warehouse
+from organization.models import CostCenter, Department, JobPosition, Organization
+from procurement.consolidation import Sourcing, consolidate_requisitions
+from procurement.models import PurchaseOrder, PurchaseRequisition, RequisitionItem
+from procurement.services import convert_requisition_to_po
+from procurement.tasks import consolidate_requisitions_job
+
+
+class RequisitionConsolidationTest(TestCase):
+    """Approved requisitions become one PO per vendor, currency and warehouse."""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(code='OPS', name='Operations')
+        cls.requester = Employee.objects.create(
+            employee_number='EMP001', first_name='Kofi', last_name='Boateng',
+            date_of_birth=date(1990, 1, 1), gender='M', mobile_phone='0200000000',
+            residential_address='Accra', residential_city='Accra', date_of_joining=date(2020, 1, 1),
+            department=department, position=JobPosition.objects.create(code='OFF', title='Officer'),
+            user=get_user_model().objects.create_user('kofi@example.com', 'x'),
+        )
+        cls.department = department
+        cls.cost_center = CostCenter.objects.create(code='OPS', name='Operations')
+        fiscal_year = FiscalYear.objects.create(name='FY2026', start_date=date(2026, 1, 1),
+                                                end_date=date(2026, 12, 31))
+        cls.budget = Budget.objects.create(
+            fiscal_year=fiscal_year, cost_center=cls.cost_center, status='APPROVED',
+            account=Account.objects.create(code='5200', name='Supplies', account_type='EXPENSE'),
+            original_amount=Decimal('100000.00'),
+        )
+        cls.stationer = Vendor.objects.create(code='STA', name='Stationer')
+        cls.printer = Vendor.objects.create(code='PRI', name='Printer')
+        cls.main = Warehouse.objects.create(code='MAIN', name='Main', address='1 Ring Road')
+
+    def _requisition(self, number, lines, status='APPROVED', required=None):
+        requisition = PurchaseRequisition.objects.create(
+            requisition_number=number, requested_by=self.requester, department=self.department,
+            cost_center=self.cost_center, requisition_date=date(2026, 5, 1), required_date=required,
+            status=status,
+        )
+        for description, qty, price in lines:
+            RequisitionItem.objects.create(requisition=requisition, description=description,
+                                           quantity=Decimal(qty), unit_price=Decimal(price),
+                                           budget=self.budget)
+        return requisition
+
+    def test_requisitions_are_grouped_into_purchase_orders(self):
+        paper = self._requisition('PR-1', [('Paper', '10', '5.00'), ('Pens', '20', '1.50')],
+                                  required=date(2026, 6, 20))
+        toner = self._requisition('PR-2', [('Toner', '2', '80.00')], required=date(2026, 6, 10))
+        cards = self._requisition('PR-3', [('Cards', '500', '0.20')])
+        dollars = self._requisition('PR-4', [('Ink', '1', '40.00')])
+        sourcing = [
+            Sourcing(paper.pk, self.stationer.pk, warehouse_id=self.main.pk),
+            Sourcing(toner.pk, self.stationer.pk, warehouse_id=str(self.main.pk)),
+            Sourcing(cards.pk, self.printer.pk),
+            Sourcing(dollars.pk, self.stationer.pk, currency='USD', warehouse_id=self.main.pk),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            orders = consolidate_requisitions(sourcing)
+        self.assertLessEqual(len(queries), 25)
+
+        rows = {
+            (po.vendor.code, po.currency): (po.total_amount, po.delivery_date, po.shipping_address,
+                                            po.requisition_id, sorted(po.items.values_list('description', flat=True)))
+            for po in PurchaseOrder.objects.filter(pk__in=[o.pk for o in orders]).select_related('vendor')
+        }
+        self.assertEqual(rows, {
+            ('STA', 'GHS'): (Decimal('240.00'), date(2026, 6, 10), '1 Ring Road', None,
+                             ['Paper', 'Pens', 'Toner']),
+            ('PRI', 'GHS'): (Decimal('100.00'), None, '', cards.pk, ['Cards']),
+            ('STA', 'USD'): (Decimal('40.00'), None, '1 Ring Road', dollars.pk, ['Ink']),
+        })
+        self.assertEqual(len({po.po_number for po in orders}), 3)
+        self.assertFalse(PurchaseRequisition.objects.exclude(status='ORDERED').exists())
+
+        # Every line is committed once, and approval does not commit it again
+        self.budget.refresh_from_db()
+        self.assertEqual(BudgetCommitment.objects.count(), 5)
+        self.assertEqual(self.budget.committed_amount, Decimal('380.00'))
+        for po in PurchaseOrder.objects.all():
+            po.status = 'APPROVED'
+            po.save()
+        self.assertEqual(BudgetCommitment.objects.count(), 5)
+
+    def test_unapproved_requisitions_are_rejected_together(self):
+        approved = self._requisition('PR-1', [('Paper', '1', '5.00')])
+        draft = self._requisition('PR-2', [('Pens', '1', '1.00')], status='SUBMITTED')
+        with self.assertRaisesMessage(ValueError, 'not approved: PR-2 (status: SUBMITTED)'):
+            consolidate_requisitions([Sourcing(approved.pk, self.stationer.pk),
+                                      Sourcing(draft.pk, self.stationer.pk)])
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+        po = convert_requisition_to_po(approved, self.printer)
+        self.assertEqual((po.vendor_id, po.requisition_id, po.total_amount),
+                         (self.printer.pk, approved.pk, Decimal('5.00')))
+        self.assertEqual(approved.status, 'ORDERED')
+        self.assertFalse(BudgetCommitment.objects.exists())
+        with self.assertRaisesMessage(ValueError, 'is not approved'):
+            convert_requisition_to_po(draft, self.printer)
+
+    def test_endpoint_parses_commit_budget_flag(self):
+        client = APIClient()
+        client.force_authenticate(self.requester.user)
+        url = '/api/v1/procurement/requisitions/consolidate/'
+        paper = self._requisition('PR-1', [('Paper', '10', '5.00')])
+        row = {'requisition': str(paper.pk), 'vendor': str(self.stationer.pk)}
+
+        response = client.post(url, {'requisitions': [row], 'commit_budget': 'false'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(BudgetCommitment.objects.exists())
+
+        invalid = client.post(url, {'requisitions': [row], 'commit_budget': 'maybe'}, format='json')
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_queued_job_only_sources_the_callers_tenant(self):
+        home = Organization.objects.create(name='Home', code='HOME', slug='home')
+        other = Organization.objects.create(name='Other', code='OTHER', slug='other')
+        paper = self._requisition('PR-1', [('Paper', '10', '5.00')])
+        foreign = self._requisition('PR-2', [('Pens', '20', '1.50')])
+        PurchaseRequisition.all_objects.filter(pk=paper.pk).update(tenant=home)
+        PurchaseRequisition.all_objects.filter(pk=foreign.pk).update(tenant=other)
+        Vendor.all_objects.filter(pk=self.stationer.pk).update(tenant=home)
+        Vendor.all_objects.filter(pk=self.printer.pk).update(tenant=other)
+
+        def row(requisition, vendor):
+            return {'requisition': str(requisition.pk), 'vendor': str(vendor.pk)}
+
+        with self.assertRaisesMessage(ValueError, f'Requisitions not found: {foreign.pk}'):
+            consolidate_requisitions_job([row(foreign, self.stationer)], None, True, str(home.pk))
+        with self.assertRaisesMessage(ValueError, f'Vendors not found: {self.printer.pk}'):
+            consolidate_requisitions_job([row(paper, self.printer)], None, True, str(home.pk))
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+        result = consolidate_requisitions_job([row(paper, self.stationer)], None, False, str(home.pk))
+        self.assertEqual(len(result['purchase_orders']), 1)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'APPROVED')
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.deadlines import rebuild_deadlines, scan_deadlines
+from core.models import Deadline, Notification
+from finance.models import Vendor
+from procurement.models import Contract, PurchaseOrder
+from procurement.tasks import check_overdue_deliveries
+
+
+class DeadlineScanTest(TestCase):
+    """Overdue deliveries and contract renewals are scanned through the deadline index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = get_user_model().objects.create_user('buyer@example.com', 'x')
+        cls.vendor = Vendor.objects.create(code='V1', name='Vendor')
+        cls.today = timezone.now().date()
+
+        def order(number, status, delivery):
+            return PurchaseOrder.objects.create(
+                po_number=number, vendor=cls.vendor, order_date=cls.today - timedelta(days=30),
+                delivery_date=cls.today + timedelta(days=delivery), status=status, created_by=cls.buyer,
+            )
+
+        cls.late = order('PO-LATE', 'APPROVED', -3)
+        cls.future = order('PO-NEXT', 'SENT', 5)
+        order('PO-DRAFT', 'DRAFT', -3)
+        order('PO-DONE', 'RECEIVED', -3)
+        for number, ends in (('C-SOON', 10), ('C-LATER', 60)):
+            Contract.objects.create(
+                contract_number=number, vendor=cls.vendor, contract_type='SERVICE', title=number,
+                start_date=date(2026, 1, 1), end_date=cls.today + timedelta(days=ends), value=1000,
+                status='ACTIVE', created_by=cls.buyer,
+            )
+
+    def test_index_follows_saves_and_alerts_once_per_stage(self):
+        self.assertEqual(
+            sorted(Deadline.objects.filter(state='OPEN').values_list('reference', flat=True)),
+            ['C-LATER', 'C-SOON', 'PO-LATE', 'PO-NEXT'],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = check_overdue_deliveries()
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual((result['overdue_count'], result['notified']), (1, 1))
+        self.assertEqual(result['purchase_orders'][0]['po_number'], 'PO-LATE')
+        self.assertEqual(result['purchase_orders'][0]['days_overdue'], 3)
+        # Already alerted: still reported as due, not notified again
+        self.assertEqual(check_overdue_deliveries()['notified'], 0)
+
+        # A new delivery date re-arms the alert; receiving the order closes it
+        self.late.delivery_date = self.today - timedelta(days=1)
+        self.late.save()
+        self.assertEqual(scan_deadlines('procurement.po_delivery')['notified'], 1)
+        self.late.status = 'RECEIVED'
+        self.late.save(update_fields=['status', 'updated_at'])
+        self.assertEqual(scan_deadlines('procurement.po_delivery')['due'], [])
+
+        # Contracts alert ahead of their end date, then again once expired
+        soon = scan_deadlines('procurement.contract_renewal')
+        self.assertEqual([(c['contract_number'], c['stage']) for c in soon['due']], [('C-SOON', 'UPCOMING')])
+        expired = scan_deadlines('procurement.contract_renewal', today=self.today + timedelta(days=11))
+        self.assertEqual([c['stage'] for c in expired['due']], ['OVERDUE'])
+        self.assertEqual(
+            list(Notification.objects.filter(title__startswith='Contract').order_by('created_at')
+                 .values_list('notification_type', flat=True)),
+            ['TASK', 'WARNING'],
+        )
+        self.assertEqual(Notification.objects.filter(user=self.buyer).count(), 4)
+
+    def test_rebuild_reindexes_open_records(self):
+        Deadline.all_objects.all().delete()
+        PurchaseOrder.objects.filter(pk=self.future.pk).update(status='RECEIVED')
+        Deadline.objects.create(kind='procurement.po_delivery', object_id=self.future.pk,
+                                reference='PO-NEXT', due_date=self.today)
+
+        counts = rebuild_deadlines()
+
+        self.assertEqual(counts['procurement.po_delivery'], 1)
+        self.assertEqual(counts['procurement.contract_renewal'], 2)
+        self.assertEqual(Deadline.objects.get(object_id=self.future.pk).state, 'CLOSED')
+        self.assertEqual(Deadline.objects.get(object_id=self.late.pk).state, 'OPEN')
+
+    def test_migration_backfills_existing_records(self):
+        backfill = import_module('core.migrations.0009_backfill_deadlines').backfill_deadlines
+        Deadline.all_objects.all().delete()
+        state = MigrationExecutor(connection).loader.project_state(('core', '0009_backfill_deadlines'))
+
+        backfill(state.apps, None)
+
+        self.assertEqual(
+            sorted(Deadline.objects.filter(state='OPEN').values_list('reference', flat=True)),
+            ['C-LATER', 'C-SOON', 'PO-LATE', 'PO-NEXT'],
+        )
@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.middleware import set_current_tenant
+
+from employees.models import Employee
+from finance.models import Vendor, VendorInvoice
+from organization.models import Department, JobPosition, Organization
+from procurement.matching import match_invoices, run_invoice_matching, start_match_run
+from procurement.models import (
+    GoodsReceiptNote, GRNItem, InvoiceMatchException, PurchaseOrder, PurchaseOrderItem,
+)
+from procurement.services import match_invoice_to_po_grn
+
+
+class InvoiceMatchingTest(TestCase):
+    """Invoices are three-way matched in batches through one engine."""
+
+    @classmethod
+    def setUpTestData(cls):
+        clerk = Employee.objects.create(
+            employee_number='EMP001', first_name='Ama', last_name='Mensah',
+            date_of_birth=date(1990, 1, 1), gender='F', mobile_phone='0200000000',
+            residential_address='Accra', residential_city='Accra', date_of_joining=date(2020, 1, 1),
+            department=Department.objects.create(code='STO', name='Stores'),
+            position=JobPosition.objects.create(code='CLK', title='Clerk'),
+            user=get_user_model().objects.create_user('clerk@example.com', 'x'),
+        )
+
+        def order(code, lines, accepted=None, grn_status='ACCEPTED'):
+            vendor = Vendor.objects.create(code=code, name=f'Vendor {code}')
+            po = PurchaseOrder.objects.create(
+                po_number=f'PO-{code}', vendor=vendor, order_date=date(2026, 5, 1), status='APPROVED',
+                total_amount=sum(Decimal(qty) * Decimal(price) for qty, price in lines),
+            )
+            items = [PurchaseOrderItem.objects.create(purchase_order=po, description=f'{code} line {n}',
+                                                      quantity=Decimal(qty), unit_price=Decimal(price))
+                     for n, (qty, price) in enumerate(lines)]
+            if accepted is not None:
+                grn = GoodsReceiptNote.objects.create(grn_number=f'GRN-{code}', purchase_order=po,
+                                                      received_by=clerk, receipt_date=date(2026, 5, 5),
+                                                      status=grn_status)
+                for item, qty in zip(items, accepted):
+                    GRNItem.objects.create(grn=grn, po_item=item, received_qty=Decimal(qty),
+                                           accepted_qty=Decimal(qty))
+            return vendor
+
+        def invoice(vendor, number, total):
+            return VendorInvoice.objects.create(vendor=vendor, invoice_number=number, total_amount=Decimal(total),
+                                                invoice_date=date(2026, 5, 10), due_date=date(2026, 6, 10))
+
+        full = order('A', [('10', '50'), ('5', '100')], accepted=['10', '5'])
+        short = order('B', [('3', '100')], accepted=['2'])
+        unreceived = order('C', [('1', '80')], accepted=['1'], grn_status='DRAFT')
+        cls.invoices = [
+            invoice(full, 'A-1', '1020.00'),
+            invoice(full, 'A-2', '1200.00'),
+            invoice(short, 'B-1', '300.00'),
+            invoice(unreceived, 'C-1', '80.00'),
+            invoice(Vendor.objects.create(code='D', name='Vendor D'), 'D-1', '50.00'),
+        ]
+
+    def test_batch_checks_every_invoice_in_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            matches = match_invoices(self.invoices)
+        self.assertLessEqual(len(queries), 5)
+
+        failed = {inv.invoice_number: [name for name, _ in matches[inv.pk].exceptions]
+                  for inv in self.invoices}
+        self.assertEqual(failed, {
+            'A-1': [],
+            'A-2': ['amount_match', 'grn_value_match'],
+            'B-1': ['quantity_match', 'grn_value_match'],
+            'C-1': ['grn_found'],
+            'D-1': ['po_found'],
+        })
+
+        result = match_invoice_to_po_grn(self.invoices[2])
+        self.assertEqual((result['matched'], result['po_number']), (False, 'PO-B'))
+        self.assertEqual(result['discrepancies'], [
+            "Item 'B line 0': ordered 3.00, received 2.00",
+            'Invoice vs GRN value variance (50.00%) exceeds tolerance',
+        ])
+        self.assertTrue(match_invoice_to_po_grn(self.invoices[1], Decimal('20'))['matched'])
+        self.assertNotIn('po_number', match_invoice_to_po_grn(self.invoices[4]))
+
+    def test_run_writes_results_and_exceptions_with_progress(self):
+        run = start_match_run()
+        self.assertEqual(run.invoice_count, 5)
+
+        progress = []
+        with mock.patch('procurement.matching.CHUNK_SIZE', 2):
+            run = run_invoice_matching(run.pk, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual((run.status, run.percentage), ('COMPLETED', 100))
+        self.assertEqual((run.processed_count, run.matched_count, run.exception_count), (5, 1, 4))
+        self.assertEqual(run.results.filter(matched=False).count(), 4)
+        self.assertEqual(InvoiceMatchException.objects.filter(result__run=run).count(), 6)
+
+    def test_start_validates_ids_and_keeps_the_callers_invoices(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.get(email='clerk@example.com'))
+        url = '/api/v1/procurement/invoice-match-runs/start/'
+        self.assertEqual(client.post(url, {'invoice_ids': ['A-1']}, format='json').status_code, 400)
+
+        home = Organization.objects.create(name='Home', code='HOME', slug='home')
+        other = Organization.objects.create(name='Other', code='OTHER', slug='other')
+        VendorInvoice.all_objects.update(tenant=home)
+        VendorInvoice.all_objects.filter(pk=self.invoices[4].pk).update(tenant=other)
+        set_current_tenant(home)
+        try:
+            run = start_match_run([inv.pk for inv in reversed(self.invoices)])
+        finally:
+            set_current_tenant(None)
+        self.assertEqual(run.invoice_ids, [str(inv.pk) for inv in reversed(self.invoices[:4])])
+
+        with mock.patch('procurement.tasks.run_invoice_match.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = client.post(url, {'invoice_ids': [str(self.invoices[0].pk)]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(response.data['id'])
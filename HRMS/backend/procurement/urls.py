@@ -19,6 +19,8 @@ router.register(r'rfq-vendors', views.RFQVendorViewSet, basename='rfq-vendor')
 router.register(r'rfq-items', views.RFQItemViewSet, basename='rfq-item')
 router.register(r'vendor-scorecards', views.VendorScorecardViewSet, basename='vendor-scorecard')
 router.register(r'vendor-blacklist', views.VendorBlacklistViewSet, basename='vendor-blacklist')
+router.register(r'invoice-match-runs', views.InvoiceMatchRunViewSet, basename='invoice-match-run')
+router.register(r'invoice-match-results', views.InvoiceMatchResultViewSet, basename='invoice-match-result')
 
 urlpatterns = [
     path('', include(router.urls)),
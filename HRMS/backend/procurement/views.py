@@ -13,7 +13,8 @@ from .models import (
     GoodsReceiptNote, GRNItem,
     Contract, ContractMilestone,
     RequestForQuotation, RFQVendor, RFQItem,
-    VendorScorecard, VendorBlacklist
+    VendorScorecard, VendorBlacklist,
+    InvoiceMatchRun, InvoiceMatchResult
 )
 from .serializers import (
     PurchaseRequisitionListSerializer, PurchaseRequisitionDetailSerializer,
@@ -26,9 +27,14 @@ from .serializers import (
     ContractMilestoneSerializer,
     RequestForQuotationListSerializer, RequestForQuotationDetailSerializer,
     RFQVendorSerializer, RFQItemSerializer,
-    VendorScorecardSerializer, VendorBlacklistSerializer
+    VendorScorecardSerializer, VendorBlacklistSerializer,
+    InvoiceMatchRunSerializer, InvoiceMatchResultSerializer,
+    RequisitionConsolidationSerializer, InvoiceMatchStartSerializer,
 )
 
+# Requisitions converted within the request by the consolidate action
+CONSOLIDATE_SYNC_LIMIT = 100
+
 
 class PurchaseRequisitionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -100,6 +106,40 @@ class PurchaseRequisitionViewSet(viewsets.ModelViewSet):
         requisition.save(update_fields=['status', 'rejection_reason', 'updated_at'])
         return Response(self.get_serializer(requisition).data)
 
+    @action(detail=False, methods=['post'])
+    def consolidate(self, request):
+        """Convert approved requisitions into POs, one per vendor, currency and warehouse.
+
+        Small batches are converted in the request; larger ones are queued.
+        """
+        from .consolidation import consolidate_requisitions, sourcing_from_data
+        from .tasks import consolidate_requisitions_job
+
+        serializer = RequisitionConsolidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data['requisitions']
+        commit_budget = serializer.validated_data['commit_budget']
+        try:
+            sourcing = sourcing_from_data(rows)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not sourcing:
+            return Response({'error': 'No requisitions given.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(sourcing) > CONSOLIDATE_SYNC_LIMIT:
+            # The worker has no current tenant: scope its lookups to the caller's
+            tenant = getattr(request, 'tenant', None)
+            result = consolidate_requisitions_job.delay(
+                rows, request.user.pk, commit_budget, str(tenant.pk) if tenant else None,
+            )
+            return Response({'task_id': result.id, 'requisitions': len(sourcing)},
+                            status=status.HTTP_202_ACCEPTED)
+        try:
+            orders = consolidate_requisitions(sourcing, created_by=request.user, commit_budget=commit_budget)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PurchaseOrderListSerializer(orders, many=True).data, status=status.HTTP_201_CREATED)
+
 
 class RequisitionItemViewSet(viewsets.ModelViewSet):
     serializer_class = RequisitionItemSerializer
@@ -282,8 +322,7 @@ class RequestForQuotationViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         from .services import _generate_rfq_number
-        tenant = getattr(self.request, 'tenant', None)
-        number = _generate_rfq_number(tenant=tenant)
+        number = _generate_rfq_number()
         serializer.save(rfq_number=number)
 
     @action(detail=True, methods=['post'])
@@ -379,3 +418,45 @@ class VendorBlacklistViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return VendorBlacklist.objects.select_related('vendor')
+
+
+# ---- Three-way Invoice Matching ----
+
+class InvoiceMatchRunViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = InvoiceMatchRunSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return InvoiceMatchRun.objects.all()
+
+    @action(detail=False, methods=['post'])
+    def start(self, request):
+        """Queue a three-way match of the given invoices, or of all open invoices."""
+        from .matching import start_match_run
+        from .tasks import run_invoice_match
+
+        serializer = InvoiceMatchStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        run = start_match_run(
+            serializer.validated_data['invoice_ids'], serializer.validated_data['tolerance_pct'],
+        )
+        result = run_invoice_match.delay(str(run.pk))
+        run.task_id = result.id
+        run.save(update_fields=['task_id', 'updated_at'])
+        return Response(self.get_serializer(run).data, status=status.HTTP_202_ACCEPTED)
+
+
+class InvoiceMatchResultViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = InvoiceMatchResultSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['run', 'matched', 'vendor_invoice', 'purchase_order', 'exceptions__check_name']
+    search_fields = ['vendor_invoice__invoice_number', 'purchase_order__po_number']
+
+    def get_queryset(self):
+        return InvoiceMatchResult.objects.select_related(
+            'vendor_invoice__vendor', 'purchase_order'
+        ).prefetch_related('exceptions').distinct()
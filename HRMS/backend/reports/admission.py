@@ -0,0 +1,260 @@
+"""
+Admission control for report jobs.
+
+Before a report job is enqueued its cost is estimated from the number of rows
+it will produce and the output format. Cheap jobs go to the ``reports_light``
+queue and expensive ones to ``reports_heavy``, so a single large export can no
+longer hold up dozens of small ones. Interactive (user-triggered) jobs are
+sent with a higher broker priority than scheduled batch reports.
+
+When a job starts it takes a per-tenant slot for its tier; if the tenant is
+already running its quota of jobs in that tier the job is re-queued with a
+short delay instead of occupying a worker. Queue wait and run times are
+recorded per job type and surfaced in the admin system status.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from core.caching import get_cache, VOLATILE_CACHE, CACHE_PREFIX_REPORT
+
+logger = logging.getLogger(__name__)
+
+TIER_LIGHT = 'light'
+TIER_HEAVY = 'heavy'
+
+QUEUES = {
+    TIER_LIGHT: 'reports_light',
+    TIER_HEAVY: 'reports_heavy',
+}
+
+# Redis transport: lower numbers are consumed first (0-9)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SCHEDULED = 6
+
+# Relative rendering cost per output row
+FORMAT_WEIGHTS = {
+    'csv': 1,
+    'excel': 2,
+    'pdf': 5,
+}
+
+# Export types whose row count is the number of payroll items in a run
+PAYROLL_RUN_EXPORTS = {
+    'payroll_summary', 'paye', 'paye_gra', 'ssnit', 'bank_advice', 'payroll_master',
+}
+
+# Exports that render one wide row per item (every pay component as a column)
+ROW_MULTIPLIERS = {
+    'payroll_master': 3,
+    'payroll_reconciliation': 2,
+}
+
+DEFAULT_HEAVY_COST = 20000
+DEFAULT_TENANT_CONCURRENCY = {TIER_LIGHT: 4, TIER_HEAVY: 1}
+DEFAULT_RETRY_SECONDS = 15
+DEFAULT_SLOT_TIMEOUT = 900  # Slots expire after the hard task time limit, plus margin
+
+STATS_KEY_PREFIX = f'{CACHE_PREFIX_REPORT}:queue_stats'
+STATS_TIMEOUT = 7 * 86400
+
+
+def _queue_setting(key, default):
+    return getattr(settings, 'REPORT_QUEUE_SETTINGS', {}).get(key, default)
+
+
+@dataclass(frozen=True)
+class JobCost:
+    """Estimated cost of a report job."""
+    rows: int
+    units: int
+    tier: str
+
+    @property
+    def queue(self):
+        return QUEUES[self.tier]
+
+
+# ── Cost estimation ──────────────────────────────────────────────────────────
+
+def _estimate_rows(export_type, params):
+    from employees.models import Employee
+    from payroll.models import PayrollItem
+
+    if export_type in PAYROLL_RUN_EXPORTS:
+        run_id = params.get('payroll_run_id')
+        if not run_id:
+            return 0
+        return PayrollItem.objects.filter(payroll_run_id=run_id).count()
+
+    if export_type == 'payroll_reconciliation':
+        run_ids = [r for r in (params.get('current_run_id'), params.get('previous_run_id')) if r]
+        return PayrollItem.objects.filter(payroll_run_id__in=run_ids).count()
+
+    return Employee.objects.count()
+
+
+def estimate_export_cost(export_type, params=None, file_format='excel'):
+    """
+    Estimate the cost of an export from its row count and output format.
+
+    Row counts are single COUNT queries; if one fails the job is treated as
+    heavy so that an unknown cost never crowds out the light queue.
+    """
+    params = params or {}
+    try:
+        rows = _estimate_rows(export_type, params) * ROW_MULTIPLIERS.get(export_type, 1)
+    except Exception as e:
+        logger.warning("Could not estimate rows for %s export: %s", export_type, e)
+        return JobCost(rows=0, units=0, tier=TIER_HEAVY)
+
+    units = rows * FORMAT_WEIGHTS.get(file_format, FORMAT_WEIGHTS['excel'])
+    tier = TIER_HEAVY if units >= _queue_setting('HEAVY_COST_THRESHOLD', DEFAULT_HEAVY_COST) else TIER_LIGHT
+    return JobCost(rows=rows, units=units, tier=tier)
+
+
+# ── Per-tenant concurrency slots ─────────────────────────────────────────────
+
+def _slot_key(tenant_id, tier):
+    return f'{CACHE_PREFIX_REPORT}:slots:{tenant_id or "global"}:{tier}'
+
+
+def acquire_slot(tenant_id, tier):
+    """Take a running slot for the tenant in this tier; False if at capacity."""
+    caps = _queue_setting('TENANT_CONCURRENCY', DEFAULT_TENANT_CONCURRENCY)
+    cap = caps.get(tier, DEFAULT_TENANT_CONCURRENCY[tier])
+    cache = get_cache(VOLATILE_CACHE)
+    key = _slot_key(tenant_id, tier)
+    try:
+        cache.add(key, 0, _queue_setting('SLOT_TIMEOUT', DEFAULT_SLOT_TIMEOUT))
+        if cache.incr(key) <= cap:
+            return True
+        cache.decr(key)
+        return False
+    except Exception as e:
+        # Never block reporting because the cache is unavailable
+        logger.warning("Report slot cache unavailable, admitting job: %s", e)
+        return True
+
+
+def release_slot(tenant_id, tier):
+    cache = get_cache(VOLATILE_CACHE)
+    key = _slot_key(tenant_id, tier)
+    try:
+        if cache.decr(key) < 0:
+            cache.set(key, 0, _queue_setting('SLOT_TIMEOUT', DEFAULT_SLOT_TIMEOUT))
+    except ValueError:
+        pass  # Slot counter expired while the job ran
+    except Exception as e:
+        logger.warning("Could not release report slot: %s", e)
+
+
+def retry_delay():
+    return _queue_setting('ADMISSION_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)
+
+
+# ── Enqueueing ───────────────────────────────────────────────────────────────
+
+def submit_export(export_type, params=None, file_format='excel', user_id=None,
+                  tenant_id=None, interactive=True):
+    """
+    Estimate, route and enqueue an export job.
+
+    Returns:
+        (AsyncResult, JobCost)
+    """
+    from .tasks import generate_export_task, _set_progress
+
+    cost = estimate_export_cost(export_type, params, file_format)
+    priority = PRIORITY_INTERACTIVE if interactive else PRIORITY_SCHEDULED
+    admission = {
+        'tier': cost.tier,
+        'tenant_id': str(tenant_id) if tenant_id else None,
+        'priority': priority,
+        'estimated_rows': cost.rows,
+        'enqueued_at': time.time(),
+    }
+
+    result = generate_export_task.apply_async(
+        kwargs={
+            'export_type': export_type,
+            'params': params or {},
+            'file_format': file_format,
+            'user_id': user_id,
+            'admission': admission,
+        },
+        queue=cost.queue,
+        priority=priority,
+    )
+    _set_progress(result.id, 'queued', 0, export_type=export_type,
+                  tier=cost.tier, estimated_rows=cost.rows)
+    logger.info(
+        "Export queued: type=%s format=%s rows=%d tier=%s priority=%d",
+        export_type, file_format, cost.rows, cost.tier, priority,
+    )
+    return result, cost
+
+
+# ── Queue metrics ────────────────────────────────────────────────────────────
+
+def _stats_key(job_type, tier, metric):
+    return f'{STATS_KEY_PREFIX}:{job_type}:{tier}:{metric}'
+
+
+def _incr(cache, key, amount):
+    cache.add(key, 0, STATS_TIMEOUT)
+    cache.incr(key, amount)
+
+
+def record_job_timing(job_type, tier, wait_ms, run_ms):
+    """Accumulate queue wait and run time for a job type."""
+    cache = get_cache(VOLATILE_CACHE)
+    try:
+        _incr(cache, _stats_key(job_type, tier, 'count'), 1)
+        _incr(cache, _stats_key(job_type, tier, 'wait_ms'), int(wait_ms))
+        _incr(cache, _stats_key(job_type, tier, 'run_ms'), int(run_ms))
+        for metric, value in (('max_wait_ms', wait_ms), ('max_run_ms', run_ms)):
+            key = _stats_key(job_type, tier, metric)
+            if value > (cache.get(key) or 0):
+                cache.set(key, int(value), STATS_TIMEOUT)
+        known = cache.get(STATS_KEY_PREFIX) or []
+        if [job_type, tier] not in known:
+            cache.set(STATS_KEY_PREFIX, known + [[job_type, tier]], STATS_TIMEOUT)
+    except Exception as e:
+        logger.warning("Could not record report queue timing: %s", e)
+
+    logger.info(
+        "Report job timing: type=%s tier=%s wait=%dms run=%dms",
+        job_type, tier, wait_ms, run_ms,
+        extra={'event': 'report_job_timing', 'job_type': job_type, 'tier': tier,
+               'wait_ms': round(wait_ms, 2), 'run_ms': round(run_ms, 2)},
+    )
+
+
+def get_queue_stats():
+    """Average and max queue wait/run times per job type and tier."""
+    cache = get_cache(VOLATILE_CACHE)
+    stats = {}
+    for job_type, tier in cache.get(STATS_KEY_PREFIX) or []:
+        values = cache.get_many([
+            _stats_key(job_type, tier, m)
+            for m in ('count', 'wait_ms', 'run_ms', 'max_wait_ms', 'max_run_ms')
+        ])
+
+        def value(metric):
+            return values.get(_stats_key(job_type, tier, metric)) or 0
+
+        count = value('count')
+        if not count:
+            continue
+        stats.setdefault(job_type, {})[tier] = {
+            'count': count,
+            'avg_wait_ms': round(value('wait_ms') / count, 2),
+            'avg_run_ms': round(value('run_ms') / count, 2),
+            'max_wait_ms': value('max_wait_ms'),
+            'max_run_ms': value('max_run_ms'),
+        }
+    return stats
@@ -826,48 +826,80 @@ class MasterDashboard:
     """Consolidated master dashboard with all key metrics."""
 
     @staticmethod
-    def get_all_kpis():
-        """Get all KPIs for master dashboard."""
+    def _active_employee_count():
         from employees.models import Employee
+        return Employee.objects.filter(status='ACTIVE').count()
+
+    @staticmethod
+    def _pending_leave_count():
         from leave.models import LeaveRequest
+        return LeaveRequest.objects.filter(status='PENDING').count()
+
+    @staticmethod
+    def _active_loan_count():
         from benefits.models import LoanAccount
+        return LoanAccount.objects.filter(status__in=['ACTIVE', 'DISBURSED']).count()
+
+    @staticmethod
+    def _latest_payroll_date():
         from payroll.models import PayrollRun
+        latest_payroll = PayrollRun.objects.filter(status='APPROVED').order_by('-run_date').first()
+        return latest_payroll.run_date if latest_payroll else None
 
-        today = timezone.now().date()
-        current_year = today.year
+    @staticmethod
+    def get_providers(current_year=None):
+        """KPI providers backing the master dashboard, keyed by output path."""
+        from .kpi_engine import KPIProvider
 
-        # Basic counts
-        active_employees = Employee.objects.filter(status='ACTIVE').count()
-        pending_leaves = LeaveRequest.objects.filter(status='PENDING').count()
-        active_loans = LoanAccount.objects.filter(status__in=['ACTIVE', 'DISBURSED']).count()
+        if current_year is None:
+            current_year = timezone.now().year
 
-        # Latest payroll
-        latest_payroll = PayrollRun.objects.filter(status='APPROVED').order_by('-run_date').first()
+        return [
+            # Basic counts
+            KPIProvider('summary.active_employees', MasterDashboard._active_employee_count, cache_ttl=60),
+            KPIProvider('summary.pending_leave_requests', MasterDashboard._pending_leave_count, cache_ttl=60),
+            KPIProvider('summary.active_loans', MasterDashboard._active_loan_count, cache_ttl=60),
+            KPIProvider('summary.latest_payroll_date', MasterDashboard._latest_payroll_date, cache_ttl=300),
+            # Workforce
+            KPIProvider('workforce.fte', RecruitmentAnalytics.get_fte_count, cache_ttl=300),
+            KPIProvider('workforce.hiring_rate',
+                        lambda: RecruitmentAnalytics.get_hiring_rate(current_year), cache_ttl=900),
+            KPIProvider('workforce.attrition_rate',
+                        lambda: RecruitmentAnalytics.get_attrition_rate(current_year), cache_ttl=900),
+            # Demographics
+            KPIProvider('demographics.age_distribution', DemographicsAnalytics.get_age_distribution, cache_ttl=3600),
+            KPIProvider('demographics.gender_distribution', DemographicsAnalytics.get_gender_distribution, cache_ttl=3600),
+            KPIProvider('demographics.tenure_distribution', DemographicsAnalytics.get_tenure_distribution, cache_ttl=3600),
+            # Compensation
+            KPIProvider('compensation.payroll_summary',
+                        lambda: CompensationAnalytics.get_payroll_cost_summary(current_year), cache_ttl=900),
+            KPIProvider('compensation.salary_by_grade', CompensationAnalytics.get_average_salary_by_grade, cache_ttl=900),
+            # Turnover
+            KPIProvider('turnover.rate', lambda: ExitAnalytics.get_turnover_rate(current_year), cache_ttl=900),
+            KPIProvider('turnover.breakdown', lambda: ExitAnalytics.get_exit_breakdown(current_year), cache_ttl=900),
+        ]
 
-        return {
-            'summary': {
-                'active_employees': active_employees,
-                'pending_leave_requests': pending_leaves,
-                'active_loans': active_loans,
-                'latest_payroll_date': latest_payroll.run_date if latest_payroll else None,
-            },
-            'workforce': {
-                'fte': RecruitmentAnalytics.get_fte_count(),
-                'hiring_rate': RecruitmentAnalytics.get_hiring_rate(current_year),
-                'attrition_rate': RecruitmentAnalytics.get_attrition_rate(current_year),
-            },
-            'demographics': {
-                'age_distribution': DemographicsAnalytics.get_age_distribution(),
-                'gender_distribution': DemographicsAnalytics.get_gender_distribution(),
-                'tenure_distribution': DemographicsAnalytics.get_tenure_distribution(),
-            },
-            'compensation': {
-                'payroll_summary': CompensationAnalytics.get_payroll_cost_summary(current_year),
-                'salary_by_grade': CompensationAnalytics.get_average_salary_by_grade(),
-            },
-            'turnover': {
-                'rate': ExitAnalytics.get_turnover_rate(current_year),
-                'breakdown': ExitAnalytics.get_exit_breakdown(current_year),
-            },
-            'generated_at': timezone.now()
-        }
+    @staticmethod
+    def get_all_kpis(force_refresh=False):
+        """
+        Get all KPIs for master dashboard.
+
+        Providers run concurrently; any that fail or time out come back as
+        None and are flagged in 'kpi_timings', with 'partial' set to True.
+        """
+        from core.middleware import get_current_tenant
+        from .kpi_engine import KPIExecutor
+
+        tenant = get_current_tenant()
+        executor = KPIExecutor(
+            MasterDashboard.get_providers(),
+            cache_scope=f'master:{tenant.pk}' if tenant is not None else 'master',
+        )
+        report = executor.run(force_refresh=force_refresh)
+
+        data = report.to_nested()
+        data['partial'] = report.is_partial
+        data['kpi_timings'] = report.timings()
+        data['total_ms'] = report.total_ms
+        data['generated_at'] = timezone.now()
+        return data
@@ -0,0 +1,144 @@
+"""
+Cached and batched chart rendering for report exports.
+
+Charts are keyed by a hash of their type, data series, title, style options
+and output format, and the rendered PNG/SVG bytes are cached, so re-exporting
+a report whose series have not changed skips matplotlib entirely. Reports
+that embed many charts can render their cache misses across a process pool.
+"""
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from django.conf import settings
+
+from core.caching import get_cache, LONG_CACHE, CACHE_PREFIX_REPORT, CACHE_TIMEOUT_DAY
+from reports.chart_utils import CHART_FORMATS, render_chart_bytes, warm_up
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_VERSION = 1  # Bump when chart styling changes to invalidate cached images
+
+_pool = None
+
+
+def _chart_setting(key, default):
+    return getattr(settings, 'REPORT_CHART_SETTINGS', {}).get(key, default)
+
+
+def chart_cache_key(chart_type, data, title='', options=None, fmt='png'):
+    """Stable cache key derived from everything that affects the rendered image."""
+    payload = json.dumps(
+        [CHART_CACHE_VERSION, chart_type, data, title, options or {}, fmt],
+        sort_keys=True, default=str, separators=(',', ':'),
+    )
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return f'{CACHE_PREFIX_REPORT}:chart:{fmt}:{digest}'
+
+
+def _spec(section, fmt):
+    return (
+        section.get('chart_type'),
+        section.get('data') or [],
+        section.get('title', ''),
+        section.get('options') or {},
+        fmt,
+    )
+
+
+def render_chart(chart_type, data, title='', options=None, fmt='png'):
+    """
+    Render a single chart, serving it from cache when the series is unchanged.
+
+    Returns:
+        Image bytes, or None when there is nothing to draw.
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format '{fmt}'")
+    if not data:
+        return None
+
+    cache = get_cache(LONG_CACHE)
+    key = chart_cache_key(chart_type, data, title, options, fmt)
+    image = cache.get(key)
+    if image is not None:
+        return image
+
+    warm_up()
+    image = render_chart_bytes(chart_type, data, title, options, fmt)
+    if image is not None:
+        cache.set(key, image, _chart_setting('CACHE_TIMEOUT', CACHE_TIMEOUT_DAY))
+    return image
+
+
+def _get_pool():
+    """Lazily start the chart process pool (spawned workers, warmed on start)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=_chart_setting('POOL_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_up,
+        )
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the chart process pool (e.g. on worker shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_charts_batch(sections, fmt='png', use_pool=None):
+    """
+    Render many chart sections, returning image bytes (or None) in input order.
+
+    Cached charts are fetched in one cache round trip. Misses are rendered in
+    the process pool when there are at least BATCH_POOL_THRESHOLD of them,
+    otherwise inline. Callers already running inside a daemonic process
+    (e.g. a prefork Celery worker) fall back to inline rendering.
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format '{fmt}'")
+
+    specs = [_spec(section, fmt) for section in sections]
+    keys = [chart_cache_key(*spec) if spec[1] else None for spec in specs]
+    cache = get_cache(LONG_CACHE)
+    cached = cache.get_many([k for k in keys if k])
+
+    results = [cached.get(k) if k else None for k in keys]
+    misses = [i for i, k in enumerate(keys) if k and results[i] is None]
+    if not misses:
+        return results
+
+    if use_pool is None:
+        use_pool = (
+            len(misses) >= _chart_setting('BATCH_POOL_THRESHOLD', 8)
+            and not multiprocessing.current_process().daemon
+        )
+
+    rendered = None
+    if use_pool:
+        try:
+            pool = _get_pool()
+            rendered = list(pool.map(render_chart_bytes, *zip(*(specs[i] for i in misses))))
+        except Exception as e:
+            logger.warning("Chart process pool unavailable, rendering inline: %s", e)
+            shutdown_pool()
+    if rendered is None:
+        warm_up()
+        rendered = [render_chart_bytes(*specs[i]) for i in misses]
+
+    to_cache = {}
+    for i, image in zip(misses, rendered):
+        results[i] = image
+        if image is not None:
+            to_cache[keys[i]] = image
+    if to_cache:
+        cache.set_many(to_cache, _chart_setting('CACHE_TIMEOUT', CACHE_TIMEOUT_DAY))
+    return results
@@ -1,6 +1,10 @@
 """
 Server-side chart image generation using matplotlib.
-Generates PNG chart images for embedding in PDF/Excel report exports.
+Generates PNG (or SVG) chart images for embedding in PDF/Excel report exports.
+
+This module only depends on matplotlib so it can be imported by chart
+rendering worker processes without Django. Caching and batch rendering
+live in reports.chart_service.
 """
 
 import io
@@ -23,6 +27,37 @@ CHART_COLORS = [
 ]
 
 
+CHART_FORMATS = ('png', 'svg')
+
+_warmed_up = False
+
+
+def warm_up():
+    """
+    Pay matplotlib's one-off costs (font cache, text layout, Agg canvas)
+    once per process so the first real chart renders at steady-state speed.
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.set_title('warm-up', fontsize=11, fontweight='bold')
+    ax.text(0, 0, '0', fontsize=8)
+    fig.savefig(io.BytesIO(), format='png', dpi=10)
+    plt.close(fig)
+    _warmed_up = True
+
+
+def _save_figure(fig, fmt='png'):
+    """Serialize and close a figure, returning a rewound BytesIO buffer."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=150, bbox_inches='tight',
+                facecolor='white', edgecolor='none')
+    plt.close(fig)
+    buf.seek(0)
+    return buf
+
+
 def _get_colors(count):
     """Get a list of colors cycling through the palette."""
     colors = []
@@ -31,7 +66,7 @@ def _get_colors(count):
     return colors
 
 
-def generate_pie_chart(data, title, donut=False, center_label=None):
+def generate_pie_chart(data, title, donut=False, center_label=None, fmt='png'):
     """
     Generate a pie/donut chart as a PNG image.
 
@@ -40,9 +75,10 @@ def generate_pie_chart(data, title, donut=False, center_label=None):
         title: chart title
         donut: if True, render as donut chart with hole in center
         center_label: text to display in center of donut
+        fmt: 'png' or 'svg'
 
     Returns:
-        BytesIO PNG buffer, or None if no data
+        BytesIO image buffer (PNG unless fmt='svg'), or None if no data
     """
     if not data or all(d.get('value', 0) == 0 for d in data):
         return None
@@ -79,15 +115,10 @@ def generate_pie_chart(data, title, donut=False, center_label=None):
 
     fig.subplots_adjust(right=0.65)
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                facecolor='white', edgecolor='none')
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+    return _save_figure(fig, fmt)
 
 
-def generate_bar_chart(data, title, horizontal=False, color=None, value_key='value'):
+def generate_bar_chart(data, title, horizontal=False, color=None, value_key='value', fmt='png'):
     """
     Generate a bar chart as a PNG image.
 
@@ -97,9 +128,10 @@ def generate_bar_chart(data, title, horizontal=False, color=None, value_key='val
         horizontal: if True, render horizontal bars
         color: override bar color
         value_key: key in data dicts for the value
+        fmt: 'png' or 'svg'
 
     Returns:
-        BytesIO PNG buffer, or None if no data
+        BytesIO image buffer (PNG unless fmt='svg'), or None if no data
     """
     if not data:
         return None
@@ -134,15 +166,10 @@ def generate_bar_chart(data, title, horizontal=False, color=None, value_key='val
 
     plt.tight_layout()
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                facecolor='white', edgecolor='none')
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+    return _save_figure(fig, fmt)
 
 
-def generate_line_chart(data, title, x_key='name', y_key='value'):
+def generate_line_chart(data, title, x_key='name', y_key='value', fmt='png'):
     """
     Generate a line chart as a PNG image.
 
@@ -151,9 +178,10 @@ def generate_line_chart(data, title, x_key='name', y_key='value'):
         title: chart title
         x_key: key for x-axis values
         y_key: key for y-axis values
+        fmt: 'png' or 'svg'
 
     Returns:
-        BytesIO PNG buffer, or None if no data
+        BytesIO image buffer (PNG unless fmt='svg'), or None if no data
     """
     if not data:
         return None
@@ -178,15 +206,10 @@ def generate_line_chart(data, title, x_key='name', y_key='value'):
 
     plt.tight_layout()
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                facecolor='white', edgecolor='none')
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+    return _save_figure(fig, fmt)
 
 
-def generate_area_chart(data, title, x_key='name', y_key='value', fill_color=None):
+def generate_area_chart(data, title, x_key='name', y_key='value', fill_color=None, fmt='png'):
     """
     Generate an area chart as a PNG image.
 
@@ -196,9 +219,10 @@ def generate_area_chart(data, title, x_key='name', y_key='value', fill_color=Non
         x_key: key for x-axis values
         y_key: key for y-axis values
         fill_color: override fill color
+        fmt: 'png' or 'svg'
 
     Returns:
-        BytesIO PNG buffer, or None if no data
+        BytesIO image buffer (PNG unless fmt='svg'), or None if no data
     """
     if not data:
         return None
@@ -223,9 +247,29 @@ def generate_area_chart(data, title, x_key='name', y_key='value', fill_color=Non
 
     plt.tight_layout()
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                facecolor='white', edgecolor='none')
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+    return _save_figure(fig, fmt)
+
+
+def render_chart_bytes(chart_type, data, title='', options=None, fmt='png'):
+    """
+    Render a chart spec to raw image bytes (None when there is nothing to draw).
+
+    Module-level and picklable so it can run in a process pool.
+    """
+    options = options or {}
+    if not data:
+        return None
+
+    if chart_type == 'pie':
+        buf = generate_pie_chart(data, title, donut=options.get('donut', False),
+                                 center_label=options.get('center_label'), fmt=fmt)
+    elif chart_type == 'bar':
+        buf = generate_bar_chart(data, title, horizontal=options.get('horizontal', False),
+                                 color=options.get('color'), fmt=fmt)
+    elif chart_type == 'line':
+        buf = generate_line_chart(data, title, fmt=fmt)
+    elif chart_type == 'area':
+        buf = generate_area_chart(data, title, fill_color=options.get('fill_color'), fmt=fmt)
+    else:
+        return None
+    return buf.getvalue() if buf else None
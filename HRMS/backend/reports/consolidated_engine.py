@@ -0,0 +1,247 @@
+"""
+SQL-side aggregation engine for consolidated per-employee statements.
+
+The statement reports (SSF, income tax, allowances) span many payroll
+periods. Instead of materialising every PayrollItem/PayrollItemDetail as ORM
+objects and summing in Python, this engine:
+
+1. Streams one `values()` row per payroll item, ordered by employee and
+   period, with per-employee/per-year subtotals attached as window sums.
+2. Pushes allowance detail grouping into grouped `values().annotate()`
+   queries ordered the same way, and merges them into the item stream.
+3. Yields one employee statement dict at a time, so exporters can write
+   rows as they arrive.
+
+Output matches the shape produced by `_build_detail_statements`.
+"""
+
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum, Value, Window
+from django.db.models.functions import Coalesce
+
+from payroll.models import PayrollItemDetail
+
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+# Employee attributes rendered on every statement, keyed by values() alias
+EMPLOYEE_VALUES = {
+    'emp_number': F('employee__employee_number'),
+    'emp_first_name': F('employee__first_name'),
+    'emp_last_name': F('employee__last_name'),
+    'emp_department': F('employee__department__name'),
+    'emp_division': F('employee__division__name'),
+    'emp_directorate': F('employee__directorate__name'),
+    'emp_staff_category': F('employee__staff_category__name'),
+    'emp_ssnit': F('employee__ssnit_number'),
+    'emp_tin': F('employee__tin_number'),
+    'emp_dob': F('employee__date_of_birth'),
+    'emp_hire_date': F('employee__date_of_joining'),
+}
+
+# One ordering shared by every stream so they can be merged without lookups
+EMPLOYEE_ORDERING = ('employee__employee_number', 'employee_id')
+ITEM_ORDERING = EMPLOYEE_ORDERING + ('payroll_run__payroll_period__start_date', 'id')
+
+STREAM_CHUNK_SIZE = 2000
+
+
+class _MergeStream:
+    """Forward-only cursor over rows sorted in the same order as the driving stream."""
+
+    _END = object()
+
+    def __init__(self, rows, key):
+        self._rows = iter(rows)
+        self._key = key
+        self._head = next(self._rows, self._END)
+
+    def take(self, key_value):
+        """Consume and return the consecutive rows whose key equals key_value."""
+        taken = []
+        while self._head is not self._END and self._head[self._key] == key_value:
+            taken.append(self._head)
+            self._head = next(self._rows, self._END)
+        return taken
+
+
+def _coalesced(field):
+    return Coalesce(F(field), ZERO)
+
+
+def _employee_dict(row, periods_key, period_data):
+    return {
+        'employee_number': row['emp_number'],
+        'full_name': f"{row['emp_first_name'] or ''} {row['emp_last_name'] or ''}".strip(),
+        'department': row['emp_department'] or '',
+        'division': row['emp_division'] or '',
+        'directorate': row['emp_directorate'] or '',
+        'staff_category': row['emp_staff_category'] or '',
+        'ssf_number': row['emp_ssnit'] or '',
+        'tin': row['emp_tin'] or '',
+        'dob': str(row['emp_dob']) if row['emp_dob'] else '',
+        'hire_date': str(row['emp_hire_date']) if row['emp_hire_date'] else '',
+        periods_key: period_data,
+    }
+
+
+def _finalize_totals(emp_dict, yearly):
+    """Attach yearly subtotals and grand total (summed in year order, as floats)."""
+    yearly_subtotals = {}
+    grand_total = {}
+    for year, sums in sorted(yearly.items()):
+        yearly_subtotals[str(year)] = sums
+        for k, v in sums.items():
+            grand_total[k] = grand_total.get(k, 0) + v
+    emp_dict['yearly_subtotals'] = yearly_subtotals
+    emp_dict['grand_total'] = grand_total
+    return emp_dict
+
+
+class ConsolidatedStatementEngine:
+    """
+    Aggregates a filtered PayrollItem queryset into per-employee statements.
+
+    Usage:
+        items, _periods, from_period, to_period = get_items_for_period_range(...)
+        engine = ConsolidatedStatementEngine(items)
+        for emp in engine.iter_column_statements({'basic': 'basic_salary', ...}):
+            ...
+    """
+
+    def __init__(self, items):
+        # Drop select_related/prefetch from the caller; only values() are read here
+        self.items = items.select_related(None).prefetch_related(None)
+
+    def _item_rows(self, columns, derived):
+        """Stream item rows with window subtotals per (employee, year)."""
+        partition = [F('employee_id'), F('payroll_run__payroll_period__year')]
+        annotations = {}
+        for key, field in columns.items():
+            annotations[f'col_{key}'] = _coalesced(field)
+            annotations[f'year_{key}'] = Window(Sum(_coalesced(field)), partition_by=partition)
+        for key, parts in (derived or {}).items():
+            expr = sum((_coalesced(columns[p]) for p in parts[1:]), _coalesced(columns[parts[0]]))
+            annotations[f'col_{key}'] = expr
+            annotations[f'year_{key}'] = Window(Sum(expr), partition_by=partition)
+
+        return self.items.annotate(**annotations).values(
+            'id', 'employee_id', *annotations,
+            period_name=F('payroll_run__payroll_period__name'),
+            period_year=F('payroll_run__payroll_period__year'),
+            **EMPLOYEE_VALUES,
+        ).order_by(*ITEM_ORDERING).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    def _iter_employee_rows(self, columns, derived=None):
+        """Yield (employee_id, [item rows]) groups from the ordered item stream."""
+        current_emp = None
+        rows = []
+        for row in self._item_rows(columns, derived):
+            if row['employee_id'] != current_emp:
+                if rows:
+                    yield current_emp, rows
+                current_emp = row['employee_id']
+                rows = []
+            rows.append(row)
+        if rows:
+            yield current_emp, rows
+
+    def iter_column_statements(self, columns, derived=None, periods_key='periods'):
+        """
+        Yield employee statements whose period rows are PayrollItem columns.
+
+        columns: {output_key: PayrollItem field}, e.g. {'paye': 'paye'}.
+        derived: {output_key: (column_key, ...)} summed per row, e.g.
+                 {'total': ('employee_ssf', 'employer_ssf')}.
+        """
+        keys = list(columns) + list(derived or {})
+
+        for _emp_id, rows in self._iter_employee_rows(columns, derived):
+            period_data = []
+            yearly = {}
+            for row in rows:
+                period_row = {'period_name': row['period_name'], 'year': row['period_year']}
+                for key in keys:
+                    period_row[key] = float(row[f'col_{key}'])
+                period_data.append(period_row)
+                if row['period_year'] not in yearly:
+                    yearly[row['period_year']] = {key: float(row[f'year_{key}']) for key in keys}
+
+            yield _finalize_totals(_employee_dict(rows[0], periods_key, period_data), yearly)
+
+    # ── Allowances ───────────────────────────────────────────────────────
+
+    def _allowance_details(self):
+        return PayrollItemDetail.objects.filter(
+            payroll_item__in=self.items.values('id'),
+            pay_component__category='ALLOWANCE',
+        ).order_by()
+
+    def allowance_names(self):
+        """Sorted distinct allowance component names in the range."""
+        return sorted(
+            self._allowance_details().values_list('pay_component__name', flat=True).distinct()
+        )
+
+    def _item_allowance_rows(self):
+        """Allowance amounts grouped per (payroll item, component name)."""
+        return self._allowance_details().values(
+            'payroll_item_id',
+            name=F('pay_component__name'),
+            employee_number=F('payroll_item__employee__employee_number'),
+            emp_id=F('payroll_item__employee_id'),
+            start_date=F('payroll_item__payroll_run__payroll_period__start_date'),
+        ).annotate(
+            amount=Sum(_coalesced('amount')),
+        ).order_by(
+            'employee_number', 'emp_id', 'start_date', 'payroll_item_id', 'name',
+        ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    def _yearly_allowance_rows(self):
+        """Allowance amounts grouped per (employee, year, component name)."""
+        return self._allowance_details().values(
+            name=F('pay_component__name'),
+            employee_number=F('payroll_item__employee__employee_number'),
+            emp_id=F('payroll_item__employee_id'),
+            year=F('payroll_item__payroll_run__payroll_period__year'),
+        ).annotate(
+            amount=Sum(_coalesced('amount')),
+        ).order_by('employee_number', 'emp_id', 'year', 'name').iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    def iter_allowance_statements(self, allowance_names, periods_key='periods'):
+        """Yield employee allowance statements (basic + per-allowance amounts)."""
+        item_allowances = _MergeStream(self._item_allowance_rows(), 'payroll_item_id')
+        yearly_allowances = _MergeStream(self._yearly_allowance_rows(), 'emp_id')
+
+        for emp_id, rows in self._iter_employee_rows({'basic': 'basic_salary'}):
+            period_data = []
+            yearly_basic = {}
+            for row in rows:
+                allowances = {
+                    a['name']: a['amount'] for a in item_allowances.take(row['id'])
+                }
+                period_data.append({
+                    'period_name': row['period_name'],
+                    'year': row['period_year'],
+                    'basic': float(row['col_basic']),
+                    'allowances': {name: float(amt) for name, amt in allowances.items()},
+                    'total_allowances': float(sum(allowances.values(), Decimal('0'))),
+                })
+                yearly_basic.setdefault(row['period_year'], row['year_basic'])
+
+            per_year_names = {}
+            for a in yearly_allowances.take(emp_id):
+                per_year_names.setdefault(a['year'], {})[a['name']] = a['amount']
+
+            yearly = {}
+            for year, basic in yearly_basic.items():
+                amounts = per_year_names.get(year, {})
+                sums = {
+                    'basic': float(basic),
+                    'total_allowances': float(sum(amounts.values(), Decimal('0'))),
+                }
+                for name in allowance_names:
+                    sums[name] = float(amounts.get(name, Decimal('0')))
+                yearly[year] = sums
+
+            yield _finalize_totals(_employee_dict(rows[0], periods_key, period_data), yearly)
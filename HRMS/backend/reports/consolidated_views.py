@@ -18,6 +18,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from payroll.models import PayrollPeriod, PayrollItem, PayrollItemDetail
+from reports.consolidated_engine import ConsolidatedStatementEngine
 from reports.exports import ReportExporter
 
 
@@ -285,81 +286,57 @@ def _compute_labour_cost(from_period_id, to_period_id, group_by='department', fi
     return rows_list, grand_totals, from_period, to_period
 
 
-def _compute_ssf_data(from_period_id, to_period_id, filters=None):
-    """Compute SSF contribution statement data."""
-    def period_extractor(item):
-        period = item.payroll_run.payroll_period
-        basic = item.basic_salary or Decimal('0')
-        emp_ssf = item.ssnit_employee or Decimal('0')
-        er_ssf = item.ssnit_employer or Decimal('0')
-        total = emp_ssf + er_ssf
-        return {
-            'row': {
-                'period_name': period.name,
-                'year': period.year,
-                'basic': float(basic),
-                'employee_ssf': float(emp_ssf),
-                'employer_ssf': float(er_ssf),
-                'total': float(total),
-            },
-            'sums': {
-                'basic': basic,
-                'employee_ssf': emp_ssf,
-                'employer_ssf': er_ssf,
-                'total': total,
-            },
-        }
+# Python reference extractors for _build_detail_statements. The statement
+# reports run on ConsolidatedStatementEngine (SQL-side aggregation); these
+# remain as the reference implementation the engine is tested against.
 
-    _, employees, from_period, to_period = _build_detail_statements(
-        from_period_id, to_period_id, filters, period_extractor
-    )
-    return employees, from_period, to_period
-
-
-def _compute_tax_data(from_period_id, to_period_id, filters=None):
-    """Compute income tax statement data."""
-    def period_extractor(item):
-        period = item.payroll_run.payroll_period
-        basic = item.basic_salary or Decimal('0')
-        taxable = item.taxable_income or Decimal('0')
-        paye = item.paye or Decimal('0')
-        return {
-            'row': {
-                'period_name': period.name,
-                'year': period.year,
-                'basic': float(basic),
-                'taxable': float(taxable),
-                'paye': float(paye),
-            },
-            'sums': {
-                'basic': basic,
-                'taxable': taxable,
-                'paye': paye,
-            },
-        }
-
-    _, employees, from_period, to_period = _build_detail_statements(
-        from_period_id, to_period_id, filters, period_extractor
-    )
-    return employees, from_period, to_period
+def _ssf_period_extractor(item):
+    period = item.payroll_run.payroll_period
+    basic = item.basic_salary or Decimal('0')
+    emp_ssf = item.ssnit_employee or Decimal('0')
+    er_ssf = item.ssnit_employer or Decimal('0')
+    total = emp_ssf + er_ssf
+    return {
+        'row': {
+            'period_name': period.name,
+            'year': period.year,
+            'basic': float(basic),
+            'employee_ssf': float(emp_ssf),
+            'employer_ssf': float(er_ssf),
+            'total': float(total),
+        },
+        'sums': {
+            'basic': basic,
+            'employee_ssf': emp_ssf,
+            'employer_ssf': er_ssf,
+            'total': total,
+        },
+    }
 
 
-def _compute_allowance_data(from_period_id, to_period_id, filters=None):
-    """Compute allowance statement data."""
-    # Pre-fetch items and scan for all unique allowance names
-    items, _periods, _fp, _tp = get_items_for_period_range(
-        from_period_id, to_period_id, filters
-    )
-    items_list = list(items.prefetch_related('details', 'details__pay_component'))
+def _tax_period_extractor(item):
+    period = item.payroll_run.payroll_period
+    basic = item.basic_salary or Decimal('0')
+    taxable = item.taxable_income or Decimal('0')
+    paye = item.paye or Decimal('0')
+    return {
+        'row': {
+            'period_name': period.name,
+            'year': period.year,
+            'basic': float(basic),
+            'taxable': float(taxable),
+            'paye': float(paye),
+        },
+        'sums': {
+            'basic': basic,
+            'taxable': taxable,
+            'paye': paye,
+        },
+    }
 
-    all_allowance_names = set()
-    for item in items_list:
-        for detail in item.details.all():
-            if detail.pay_component.category == 'ALLOWANCE':
-                all_allowance_names.add(detail.pay_component.name)
-    allowance_names = sorted(all_allowance_names)
 
-    # period_extractor uses closure over allowance_names
+def _make_allowance_period_extractor(allowance_names):
+    """Build an allowance period_extractor closed over allowance_names."""
     def period_extractor(item):
         period = item.payroll_run.payroll_period
         basic = item.basic_salary or Decimal('0')
@@ -384,11 +361,61 @@ def _compute_allowance_data(from_period_id, to_period_id, filters=None):
             sums[name] = Decimal(str(row['allowances'].get(name, 0)))
         return {'row': row, 'sums': sums}
 
-    _, employees, from_period, to_period = _build_detail_statements(
-        from_period_id, to_period_id, filters, period_extractor,
-        prefetched_items=items_list,
+    return period_extractor
+
+
+SSF_COLUMNS = {
+    'basic': 'basic_salary',
+    'employee_ssf': 'ssnit_employee',
+    'employer_ssf': 'ssnit_employer',
+}
+SSF_DERIVED = {'total': ('employee_ssf', 'employer_ssf')}
+
+TAX_COLUMNS = {
+    'basic': 'basic_salary',
+    'taxable': 'taxable_income',
+    'paye': 'paye',
+}
+
+
+def _compute_ssf_data(from_period_id, to_period_id, filters=None, stream=False):
+    """
+    Compute SSF contribution statement data.
+    With stream=True, employees is a generator yielding one statement at a time.
+    """
+    items, _periods, from_period, to_period = get_items_for_period_range(
+        from_period_id, to_period_id, filters
     )
-    return employees, allowance_names, from_period, to_period
+    employees = ConsolidatedStatementEngine(items).iter_column_statements(
+        SSF_COLUMNS, derived=SSF_DERIVED
+    )
+    return (employees if stream else list(employees)), from_period, to_period
+
+
+def _compute_tax_data(from_period_id, to_period_id, filters=None, stream=False):
+    """
+    Compute income tax statement data.
+    With stream=True, employees is a generator yielding one statement at a time.
+    """
+    items, _periods, from_period, to_period = get_items_for_period_range(
+        from_period_id, to_period_id, filters
+    )
+    employees = ConsolidatedStatementEngine(items).iter_column_statements(TAX_COLUMNS)
+    return (employees if stream else list(employees)), from_period, to_period
+
+
+def _compute_allowance_data(from_period_id, to_period_id, filters=None, stream=False):
+    """
+    Compute allowance statement data.
+    With stream=True, employees is a generator yielding one statement at a time.
+    """
+    items, _periods, from_period, to_period = get_items_for_period_range(
+        from_period_id, to_period_id, filters
+    )
+    engine = ConsolidatedStatementEngine(items)
+    allowance_names = engine.allowance_names()
+    employees = engine.iter_allowance_statements(allowance_names)
+    return (employees if stream else list(employees)), allowance_names, from_period, to_period
 
 
 # =============================================================================
@@ -570,12 +597,11 @@ def _flatten_employees_for_export(employees, row_extractor, periods_key='periods
     Generic flattener for any per-employee statement export (OCP).
     row_extractor(emp, period_row): returns a dict of {column_header: value}.
     New export formats are added by supplying a new row_extractor, not modifying this function.
+    Yields rows lazily so streamed employee statements flow straight into the exporter.
     """
-    data = []
     for emp in employees:
         for period in emp[periods_key]:
-            data.append(row_extractor(emp, period))
-    return data
+            yield row_extractor(emp, period)
 
 
 class ExportConsolidatedSummaryView(APIView):
@@ -651,7 +677,7 @@ class ExportSSFStatementView(APIView):
 
         filters = _get_statement_filters(request)
         employees, from_period, to_period = _compute_ssf_data(
-            from_period_id, to_period_id, filters
+            from_period_id, to_period_id, filters, stream=True
         )
 
         headers = ['Employee #', 'Name', 'Department', 'Period', 'Basic Salary', 'Employee SSF', 'Employer SSF', 'Total']
@@ -680,7 +706,7 @@ class ExportTaxStatementView(APIView):
 
         filters = _get_statement_filters(request)
         employees, from_period, to_period = _compute_tax_data(
-            from_period_id, to_period_id, filters
+            from_period_id, to_period_id, filters, stream=True
         )
 
         headers = ['Employee #', 'Name', 'Department', 'Period', 'Basic Salary', 'Taxable Income', 'PAYE Tax']
@@ -708,7 +734,7 @@ class ExportAllowanceStatementView(APIView):
 
         filters = _get_statement_filters(request)
         employees, allowance_names, from_period, to_period = _compute_allowance_data(
-            from_period_id, to_period_id, filters
+            from_period_id, to_period_id, filters, stream=True
         )
 
         headers = ['Employee #', 'Name', 'Department', 'Period', 'Basic Salary'] + allowance_names + ['Total Allowances']
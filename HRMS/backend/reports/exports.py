@@ -7,7 +7,7 @@ import io
 from datetime import datetime
 from decimal import Decimal
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db.models import Sum, Count, F, Avg
 
 from openpyxl import Workbook
@@ -30,7 +30,7 @@ from training.models import TrainingProgram, TrainingSession
 
 from openpyxl.chart import PieChart as XlPieChart, BarChart as XlBarChart, LineChart as XlLineChart, AreaChart as XlAreaChart, Reference as XlReference
 
-from reports.chart_utils import generate_pie_chart, generate_bar_chart, generate_line_chart, generate_area_chart
+from reports.chart_service import render_charts_batch
 
 
 def decimal_to_float(obj):
@@ -62,6 +62,28 @@ def generate_csv_response(data: list, headers: list, filename: str) -> HttpRespo
     return response
 
 
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer."""
+
+    def write(self, value):
+        return value
+
+
+def generate_csv_streaming_response(rows, headers: list, filename: str) -> StreamingHttpResponse:
+    """Stream a CSV file, writing each row as ``rows`` yields it."""
+    writer = csv.writer(_Echo())
+    keys = [h.lower().replace(' ', '_').replace('(', '').replace(')', '').replace('%', '') for h in headers]
+
+    def lines():
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([decimal_to_float(row.get(key, '')) for key in keys])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # =============================================================================
 # Excel Export Functions
 # =============================================================================
@@ -246,29 +268,6 @@ def generate_pdf_response(data: list, headers: list, filename: str, title: str =
 # PDF/Excel with Charts Export Functions
 # =============================================================================
 
-def _render_chart_image(section):
-    """Render a chart section dict to a BytesIO PNG image using chart_utils."""
-    chart_type = section.get('chart_type')
-    data = section.get('data', [])
-    title = section.get('title', '')
-    options = section.get('options', {})
-
-    if not data:
-        return None
-
-    if chart_type == 'pie':
-        return generate_pie_chart(data, title, donut=options.get('donut', False),
-                                  center_label=options.get('center_label'))
-    elif chart_type == 'bar':
-        return generate_bar_chart(data, title, horizontal=options.get('horizontal', False),
-                                  color=options.get('color'))
-    elif chart_type == 'line':
-        return generate_line_chart(data, title)
-    elif chart_type == 'area':
-        return generate_area_chart(data, title, fill_color=options.get('fill_color'))
-    return None
-
-
 def generate_pdf_with_charts_response(sections: list, filename: str, title: str = None,
                                        landscape_mode: bool = False) -> HttpResponse:
     """
@@ -337,11 +336,15 @@ def generate_pdf_with_charts_response(sections: list, filename: str, title: str
         leading=14, alignment=TA_RIGHT
     )
 
+    # Render every chart up front: cache hits in one round trip, misses in a batch
+    chart_sections = [s for s in sections if s['type'] == 'chart']
+    chart_images = dict(zip(map(id, chart_sections), render_charts_batch(chart_sections)))
+
     for section in sections:
         if section['type'] == 'chart':
-            chart_image = _render_chart_image(section)
+            chart_image = chart_images.get(id(section))
             if chart_image:
-                img = RLImage(chart_image, width=5 * inch, height=3.5 * inch)
+                img = RLImage(io.BytesIO(chart_image), width=5 * inch, height=3.5 * inch)
                 elements.append(img)
                 elements.append(Spacer(1, 0.3 * inch))
 
@@ -2841,50 +2844,56 @@ class ReportExporter:
     """
 
     @staticmethod
-    def export_data(data: list, headers: list, filename: str, format_type: str = 'csv', title: str = None):
+    def export_data(data, headers: list, filename: str, format_type: str = 'csv', title: str = None):
         """
         Export data to the specified format.
 
+        CSV is streamed: rows are normalized and written as ``data`` yields
+        them, so a generator is never held in memory. Excel and PDF need
+        every row to lay out the document and materialize it.
+
         Args:
-            data: List of dictionaries containing the data to export
+            data: Iterable of dictionaries containing the data to export
             headers: List of column headers
             filename: Base filename (without extension)
             format_type: One of 'csv', 'excel', 'pdf'
             title: Optional title for the report
 
         Returns:
-            HttpResponse with the exported file
+            HttpResponse (StreamingHttpResponse for CSV) with the exported file
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         # Normalize data to use header keys
-        normalized_data = []
-        for row in data:
-            normalized_row = {}
-            for header in headers:
-                # Try both original header and normalized key
-                key = header.lower().replace(' ', '_').replace('(', '').replace(')', '').replace('%', '')
-                normalized_row[key] = row.get(header, row.get(key, ''))
-            normalized_data.append(normalized_row)
+        keys = [
+            (header, header.lower().replace(' ', '_').replace('(', '').replace(')', '').replace('%', ''))
+            for header in headers
+        ]
+        normalized_rows = (
+            # Try both original header and normalized key
+            {key: row.get(header, row.get(key, '')) for header, key in keys}
+            for row in data
+        )
+
+        if format_type.lower() not in ('excel', 'pdf'):
+            return generate_csv_streaming_response(
+                normalized_rows, headers,
+                f"{filename}_{timestamp}.csv"
+            )
 
+        normalized_data = list(normalized_rows)
         if format_type.lower() == 'excel':
             return generate_excel_response(
                 normalized_data, headers,
                 f"{filename}_{timestamp}.xlsx",
                 title=title
             )
-        elif format_type.lower() == 'pdf':
-            return generate_pdf_response(
-                normalized_data, headers,
-                f"{filename}_{timestamp}.pdf",
-                title=title,
-                landscape_mode=True
-            )
-        else:
-            return generate_csv_response(
-                normalized_data, headers,
-                f"{filename}_{timestamp}.csv"
-            )
+        return generate_pdf_response(
+            normalized_data, headers,
+            f"{filename}_{timestamp}.pdf",
+            title=title,
+            landscape_mode=True
+        )
 
 
 # =============================================================================
@@ -0,0 +1,313 @@
+"""
+Concurrent KPI execution for analytics dashboards.
+
+KPI providers declare their dependencies and cache TTLs. Independent
+providers run in a thread pool (each worker thread holds its own database
+connection), so dashboard latency approaches the slowest single KPI rather
+than the sum of all of them. A provider that errors or exceeds its timeout
+yields a partial result instead of failing the whole dashboard, and every
+provider's timing is reported alongside the data.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+from core.caching import (
+    get_cache, make_cache_key, VOLATILE_CACHE, CACHE_PREFIX_DASHBOARD,
+)
+from core.db_routing import current_read_alias, has_written, read_only, reset_routing_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 6
+DEFAULT_TIMEOUT = 10  # seconds per provider, counted from when a worker picks it up
+QUEUED_POLL_SECONDS = 0.05
+
+STATUS_OK = 'ok'
+STATUS_CACHED = 'cached'
+STATUS_TIMEOUT = 'timeout'
+STATUS_ERROR = 'error'
+STATUS_SKIPPED = 'skipped'
+
+
+def _analytics_setting(key, default):
+    return getattr(settings, 'ANALYTICS_SETTINGS', {}).get(key, default)
+
+
+@dataclass(frozen=True)
+class KPIProvider:
+    """
+    A single KPI computation.
+
+    Attributes:
+        name: Dotted output path, e.g. 'workforce.fte'.
+        func: Callable producing the KPI value. Providers with dependencies
+              receive a dict of ``{dependency_name: value}`` as their only
+              positional argument.
+        depends_on: Names of providers whose results this one needs.
+        cache_ttl: Seconds to cache the value (0 disables caching).
+        timeout: Per-provider timeout in seconds (None uses the default).
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+    cache_ttl: int = 0
+    timeout: Optional[float] = None
+
+
+@dataclass
+class KPIResult:
+    """Outcome of one provider run."""
+    name: str
+    status: str
+    value: Any = None
+    duration_ms: float = 0.0
+    error: str = ''
+
+    def as_timing(self):
+        timing = {'status': self.status, 'duration_ms': self.duration_ms}
+        if self.error:
+            timing['error'] = self.error
+        return timing
+
+
+@dataclass
+class KPIReport:
+    """Collected results of a KPI execution."""
+    results: Dict[str, KPIResult] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    @property
+    def is_partial(self):
+        return any(
+            r.status in (STATUS_TIMEOUT, STATUS_ERROR, STATUS_SKIPPED)
+            for r in self.results.values()
+        )
+
+    def to_nested(self):
+        """Fold dotted provider names into a nested dict of values."""
+        data = {}
+        for name, result in self.results.items():
+            node = data
+            parts = name.split('.')
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = result.value
+        return data
+
+    def timings(self):
+        return {name: r.as_timing() for name, r in self.results.items()}
+
+
+class KPIExecutor:
+    """
+    Runs a set of KPI providers concurrently, honouring dependencies.
+
+    Usage:
+        executor = KPIExecutor([
+            KPIProvider('summary.active_employees', count_active, cache_ttl=60),
+            KPIProvider('workforce.fte', get_fte, timeout=5),
+        ])
+        report = executor.run()
+        data = report.to_nested()
+    """
+
+    def __init__(self, providers: List[KPIProvider], max_workers: int = None,
+                 default_timeout: float = None, cache_alias: str = VOLATILE_CACHE,
+                 cache_scope: str = ''):
+        self.providers = {p.name: p for p in providers}
+        self.max_workers = max_workers or _analytics_setting('KPI_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        self.default_timeout = default_timeout or _analytics_setting('KPI_TIMEOUT_SECONDS', DEFAULT_TIMEOUT)
+        self.cache_alias = cache_alias
+        self.cache_scope = cache_scope
+        self._validate()
+
+    def _validate(self):
+        for provider in self.providers.values():
+            for dep in provider.depends_on:
+                if dep not in self.providers:
+                    raise ValueError(f"KPI '{provider.name}' depends on unknown KPI '{dep}'")
+
+        # Detect cycles with a depth-first walk
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Circular KPI dependency involving '{name}'")
+            visiting.add(name)
+            for dep in self.providers[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.providers:
+            visit(name)
+
+    # ── Caching ──────────────────────────────────────────────────────────
+
+    def _cache_key(self, provider):
+        return make_cache_key(CACHE_PREFIX_DASHBOARD, 'kpi', self.cache_scope or 'global', provider.name)
+
+    def _read_cache(self, provider):
+        if not provider.cache_ttl:
+            return None
+        try:
+            return get_cache(self.cache_alias).get(self._cache_key(provider))
+        except Exception as e:
+            logger.warning("KPI cache read failed for %s: %s", provider.name, e)
+            return None
+
+    def _write_cache(self, provider, value):
+        if not provider.cache_ttl:
+            return
+        try:
+            get_cache(self.cache_alias).set(
+                self._cache_key(provider), {'value': value}, provider.cache_ttl
+            )
+        except Exception as e:
+            logger.warning("KPI cache write failed for %s: %s", provider.name, e)
+
+    # ── Execution ────────────────────────────────────────────────────────
+
+    def _timeout_for(self, provider):
+        return provider.timeout if provider.timeout is not None else self.default_timeout
+
+    def _run_provider(self, provider, dep_values, tenant, user, caller_wrote, started_at):
+        """Execute one provider inside a worker thread (read-only, replica-eligible)."""
+        from core.middleware import set_current_tenant, set_current_user
+
+        start = time.monotonic()
+        # The caller's timeout clock starts here, not while the provider waits for a worker
+        started_at[provider.name] = start
+        set_current_tenant(tenant)
+        set_current_user(user)
+        try:
+            with read_only(pin_primary=caller_wrote):
+                return self._execute(provider, dep_values, start)
+        finally:
+            reset_routing_state()
+            set_current_tenant(None)
+            set_current_user(None)
+            # Worker threads own their connections; release them per provider
+            connections.close_all()
+
+    def _execute(self, provider, dep_values, start):
+        conn = connections[current_read_alias()]
+        if conn.vendor == 'postgresql':
+            # Let the server abandon queries the caller will no longer wait for
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    'SET statement_timeout = %s',
+                    [int(self._timeout_for(provider) * 1000)],
+                )
+        value = provider.func(dep_values) if provider.depends_on else provider.func()
+        return value, round((time.monotonic() - start) * 1000, 2)
+
+    def run(self, force_refresh: bool = False) -> KPIReport:
+        """Execute all providers and return a KPIReport (never raises)."""
+        from core.middleware import get_current_tenant, get_current_user
+
+        tenant = get_current_tenant()
+        user = get_current_user()
+        caller_wrote = has_written()
+        report = KPIReport()
+        started = time.monotonic()
+
+        pending = dict(self.providers)
+        running = {}  # future -> provider
+        started_at = {}  # provider name -> monotonic time a worker picked it up
+
+        # Serve cached providers first
+        if not force_refresh:
+            for name, provider in list(pending.items()):
+                cached = self._read_cache(provider)
+                if cached is not None:
+                    report.results[name] = KPIResult(name, STATUS_CACHED, cached['value'])
+                    del pending[name]
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='kpi')
+        try:
+            while pending or running:
+                # Submit every provider whose dependencies have resolved
+                for name, provider in list(pending.items()):
+                    deps = [report.results.get(d) for d in provider.depends_on]
+                    if any(d is None for d in deps):
+                        continue
+                    del pending[name]
+                    failed = [d.name for d in deps if d.status not in (STATUS_OK, STATUS_CACHED)]
+                    if failed:
+                        report.results[name] = KPIResult(
+                            name, STATUS_SKIPPED,
+                            error=f"Dependency unavailable: {', '.join(failed)}",
+                        )
+                        continue
+                    dep_values = {d.name: d.value for d in deps}
+                    future = pool.submit(
+                        self._run_provider, provider, dep_values, tenant, user, caller_wrote, started_at
+                    )
+                    running[future] = provider
+
+                if not running:
+                    if pending:
+                        # Remaining providers wait on skipped ones; loop resolves them
+                        continue
+                    break
+
+                # Only providers a worker has picked up are on the clock; while
+                # some are still queued, wake up shortly to start theirs
+                now = time.monotonic()
+                deadlines = [
+                    started_at[p.name] + self._timeout_for(p)
+                    for p in running.values() if p.name in started_at
+                ]
+                if len(deadlines) < len(running):
+                    deadlines.append(now + QUEUED_POLL_SECONDS)
+                done, _ = wait(list(running), timeout=max(min(deadlines) - now, 0),
+                               return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    provider = running.pop(future)
+                    try:
+                        value, duration_ms = future.result()
+                    except Exception as e:
+                        logger.exception("KPI provider %s failed", provider.name)
+                        report.results[provider.name] = KPIResult(
+                            provider.name, STATUS_ERROR,
+                            duration_ms=round(
+                                (time.monotonic() - started_at.get(provider.name, now)) * 1000, 2
+                            ),
+                            error=str(e),
+                        )
+                        continue
+                    report.results[provider.name] = KPIResult(
+                        provider.name, STATUS_OK, value, duration_ms
+                    )
+                    self._write_cache(provider, value)
+
+                now = time.monotonic()
+                for future, provider in list(running.items()):
+                    timeout = self._timeout_for(provider)
+                    began = started_at.get(provider.name)
+                    if began is not None and now - began >= timeout:
+                        running.pop(future)
+                        future.cancel()
+                        logger.warning("KPI provider %s timed out after %ss", provider.name, timeout)
+                        report.results[provider.name] = KPIResult(
+                            provider.name, STATUS_TIMEOUT,
+                            duration_ms=round((now - began) * 1000, 2),
+                            error=f'Timed out after {timeout}s',
+                        )
+        finally:
+            # Do not block on timed-out providers; their threads finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        report.total_ms = round((time.monotonic() - started) * 1000, 2)
+        return report
@@ -5,6 +5,8 @@ from django.apps import apps
 from django.db.models import Count, Sum, Avg, Min, Max, Q
 from django.db.models.fields.related import ForeignKey, ManyToManyField
 
+from core.db_routing import read_only
+
 logger = logging.getLogger('hrms')
 
 
@@ -141,8 +143,9 @@ class ReportQueryBuilder:
 
         return qs
 
+    @read_only()
     def execute(self, page=1, page_size=50):
-        """Run the query with pagination."""
+        """Run the query with pagination (read-only; may be served by the replica)."""
         import time
         start = time.monotonic()
 
@@ -9,11 +9,16 @@ served by the task-status polling endpoint.
 import base64
 import io
 import logging
+import time
 from datetime import datetime
 
 from celery import shared_task
 from django.core.cache import cache
 
+from core.db_routing import read_only
+
+from .admission import QUEUES, acquire_slot, release_slot, record_job_timing, retry_delay
+
 logger = logging.getLogger(__name__)
 
 EXPORT_CACHE_TIMEOUT = 3600  # 1 hour
@@ -33,10 +38,10 @@ def _set_progress(task_id, status, percentage=0, **extra):
 
 # ─── Generic export task ────────────────────────────────────────────────────
 
-@shared_task(bind=True, queue='reports', max_retries=2, default_retry_delay=30,
+@shared_task(bind=True, queue='reports_light', max_retries=2, default_retry_delay=30,
              time_limit=600, soft_time_limit=300)
 def generate_export_task(self, export_type, params=None, file_format='excel',
-                         user_id=None):
+                         user_id=None, admission=None):
     """
     Generate a report export asynchronously.
 
@@ -49,16 +54,38 @@ def generate_export_task(self, export_type, params=None, file_format='excel',
         params:      Dict of filter parameters from the request.
         file_format: 'csv', 'excel', or 'pdf'.
         user_id:     Requesting user id (for audit).
+        admission:   Routing metadata from reports.admission.submit_export
+                     (tier, tenant_id, priority, enqueued_at).
 
     Returns:
         Dict with 'file_b64' (base64-encoded bytes) and 'filename'.
     """
     task_id = self.request.id
+    admission = admission or {}
+    tier = admission.get('tier')
+    tenant_id = admission.get('tenant_id')
+
+    if tier and not acquire_slot(tenant_id, tier):
+        # Tenant is at its concurrency cap for this tier; requeue rather than hold a worker
+        self.apply_async(
+            args=self.request.args, kwargs=self.request.kwargs, task_id=task_id,
+            countdown=retry_delay(), queue=QUEUES[tier], priority=admission.get('priority'),
+        )
+        _set_progress(task_id, 'queued', 0, export_type=export_type, tier=tier)
+        return {'status': 'deferred'}
+
+    started = time.monotonic()
+    if admission.get('enqueued_at'):
+        wait_ms = max(time.time() - admission['enqueued_at'], 0) * 1000
+    else:
+        wait_ms = 0
     _set_progress(task_id, 'processing', 10, export_type=export_type)
     params = params or {}
 
     try:
-        response = _dispatch_export(export_type, params, file_format)
+        # Exports only read; let them use the replica when it is healthy
+        with read_only():
+            response = _dispatch_export(export_type, params, file_format)
         _set_progress(task_id, 'processing', 80)
 
         # Extract bytes and filename from the HttpResponse
@@ -94,6 +121,11 @@ def generate_export_task(self, export_type, params=None, file_format='excel',
         logger.exception("Export task failed: type=%s", export_type)
         raise self.retry(exc=exc)
 
+    finally:
+        if tier:
+            release_slot(tenant_id, tier)
+            record_job_timing(export_type, tier, wait_ms, (time.monotonic() - started) * 1000)
+
 
 def _dispatch_export(export_type, params, file_format):
     """Route to the correct export function and return an HttpResponse."""
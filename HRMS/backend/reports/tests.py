@@ -1,3 +1,370 @@
+import time
+
 from django.test import TestCase
 
-# Create your tests here.
+from reports.kpi_engine import (
+    KPIExecutor, KPIProvider,
+    STATUS_OK, STATUS_CACHED, STATUS_TIMEOUT, STATUS_ERROR, STATUS_SKIPPED,
+)
+
+
+def _slow(value, seconds):
+    def provider():
+        time.sleep(seconds)
+        return value
+    return provider
+
+
+def _boom():
+    raise RuntimeError('query failed')
+
+
+class KPIExecutorTest(TestCase):
+    """KPIExecutor concurrency, dependency, timeout and caching behaviour."""
+
+    def test_independent_providers_run_concurrently(self):
+        executor = KPIExecutor([
+            KPIProvider(f'group.kpi_{i}', _slow(i, 0.3)) for i in range(4)
+        ], max_workers=4)
+
+        report = executor.run()
+
+        self.assertEqual(report.to_nested(), {'group': {f'kpi_{i}': i for i in range(4)}})
+        # Four 0.3s providers in parallel finish well under the 1.2s sequential sum
+        self.assertLess(report.total_ms, 1000)
+        self.assertFalse(report.is_partial)
+
+    def test_dependencies_receive_upstream_values(self):
+        executor = KPIExecutor([
+            KPIProvider('headcount', lambda: 40),
+            KPIProvider('exits', lambda: 4),
+            KPIProvider('attrition', lambda deps: deps['exits'] / deps['headcount'] * 100,
+                        depends_on=('headcount', 'exits')),
+        ])
+
+        report = executor.run()
+
+        self.assertEqual(report.results['attrition'].status, STATUS_OK)
+        self.assertEqual(report.results['attrition'].value, 10.0)
+
+    def test_timeout_returns_partial_result(self):
+        executor = KPIExecutor([
+            KPIProvider('fast', lambda: 1),
+            KPIProvider('slow', _slow(2, 2), timeout=0.2),
+        ])
+
+        report = executor.run()
+
+        self.assertTrue(report.is_partial)
+        self.assertEqual(report.results['fast'].value, 1)
+        self.assertEqual(report.results['slow'].status, STATUS_TIMEOUT)
+        self.assertIsNone(report.to_nested()['slow'])
+        self.assertLess(report.total_ms, 1500)
+
+    def test_queued_providers_get_their_full_timeout(self):
+        executor = KPIExecutor([
+            KPIProvider(f'queued_{i}', _slow(i, 0.15), timeout=0.25) for i in range(3)
+        ], max_workers=1)
+
+        report = executor.run()
+
+        # Each waits behind the others for longer than its timeout, but runs within it
+        self.assertFalse(report.is_partial)
+        self.assertEqual([report.results[f'queued_{i}'].status for i in range(3)], [STATUS_OK] * 3)
+
+    def test_error_skips_dependents_only(self):
+        executor = KPIExecutor([
+            KPIProvider('broken', _boom),
+            KPIProvider('dependent', lambda deps: deps['broken'], depends_on=('broken',)),
+            KPIProvider('independent', lambda: 'fine'),
+        ])
+
+        report = executor.run()
+
+        self.assertEqual(report.results['broken'].status, STATUS_ERROR)
+        self.assertIn('query failed', report.results['broken'].error)
+        self.assertEqual(report.results['dependent'].status, STATUS_SKIPPED)
+        self.assertEqual(report.results['independent'].value, 'fine')
+
+    def test_cached_values_skip_execution(self):
+        calls = []
+
+        def counted():
+            calls.append(1)
+            return len(calls)
+
+        providers = [KPIProvider('counted', counted, cache_ttl=60)]
+        first = KPIExecutor(providers, cache_scope='test-cache').run(force_refresh=True)
+        second = KPIExecutor(providers, cache_scope='test-cache').run()
+
+        self.assertEqual(first.results['counted'].status, STATUS_OK)
+        self.assertEqual(second.results['counted'].status, STATUS_CACHED)
+        self.assertEqual(second.results['counted'].value, 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_rejects_unknown_and_circular_dependencies(self):
+        with self.assertRaises(ValueError):
+            KPIExecutor([KPIProvider('a', lambda deps: 1, depends_on=('missing',))])
+        with self.assertRaises(ValueError):
+            KPIExecutor([
+                KPIProvider('a', lambda deps: 1, depends_on=('b',)),
+                KPIProvider('b', lambda deps: 1, depends_on=('a',)),
+            ])
+
+
+class ConsolidatedStatementEngineTest(TestCase):
+    """SQL-side statement aggregation must match the Python reference implementation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import date
+        from decimal import Decimal
+
+        from employees.models import Employee
+        from organization.models import Department, JobPosition
+        from payroll.models import (
+            PayComponent, PayrollItem, PayrollItemDetail, PayrollPeriod, PayrollRun,
+        )
+
+        department = Department.objects.create(code='FIN', name='Finance')
+        position = JobPosition.objects.create(code='ACC', title='Accountant')
+        components = [
+            PayComponent.objects.create(code='HSG', name='Housing', category='ALLOWANCE'),
+            PayComponent.objects.create(code='TRN', name='Transport', category='ALLOWANCE'),
+            PayComponent.objects.create(code='LOAN', name='Loan', category='LOAN'),
+        ]
+
+        periods = []
+        for year, month in [(2025, 11), (2025, 12), (2026, 1)]:
+            period = PayrollPeriod.objects.create(
+                name=f'{year}-{month:02d}', year=year, month=month,
+                start_date=date(year, month, 1), end_date=date(year, month, 28),
+            )
+            run = PayrollRun.objects.create(
+                payroll_period=period, run_number=f'PR-{year}{month:02d}', status='APPROVED',
+            )
+            periods.append((period, run))
+        cls.from_period_id = periods[0][0].id
+        cls.to_period_id = periods[-1][0].id
+
+        for e in range(3):
+            employee = Employee.objects.create(
+                employee_number=f'EMP{e:03d}', first_name=f'First{e}', last_name=f'Last{e}',
+                date_of_birth=date(1990, 1, 1), gender='M', mobile_phone='0200000000',
+                residential_address='Accra', residential_city='Accra',
+                date_of_joining=date(2020, 1, 1), department=department, position=position,
+                ssnit_number=f'SS{e}',
+            )
+            for p, (_period, run) in enumerate(periods):
+                basic = Decimal('3000.33') + e * 101 + p
+                item = PayrollItem.objects.create(
+                    payroll_run=run, employee=employee, status='APPROVED',
+                    basic_salary=basic, taxable_income=basic - Decimal('412.50'),
+                    paye=Decimal('310.17') + p, ssnit_employee=basic * Decimal('0.055'),
+                    ssnit_employer=basic * Decimal('0.13'),
+                )
+                # Employee 2 gets no transport allowance; employee 1 none at all in period 0
+                for c, component in enumerate(components):
+                    if (e == 2 and c == 1) or (e == 1 and p == 0):
+                        continue
+                    PayrollItemDetail.objects.create(
+                        payroll_item=item, pay_component=component,
+                        amount=Decimal('250.10') * (c + 1) + e + p,
+                    )
+
+    def test_ssf_statement_matches_python_reference(self):
+        from reports.consolidated_views import (
+            _build_detail_statements, _compute_ssf_data, _ssf_period_extractor,
+        )
+
+        _, expected, _, _ = _build_detail_statements(
+            self.from_period_id, self.to_period_id, {}, _ssf_period_extractor
+        )
+        employees, _, _ = _compute_ssf_data(self.from_period_id, self.to_period_id, {})
+
+        self.assertEqual(len(employees), 3)
+        self.assertEqual(employees, expected)
+
+    def test_tax_statement_matches_python_reference(self):
+        from reports.consolidated_views import (
+            _build_detail_statements, _compute_tax_data, _tax_period_extractor,
+        )
+
+        _, expected, _, _ = _build_detail_statements(
+            self.from_period_id, self.to_period_id, {}, _tax_period_extractor
+        )
+        employees, _, _ = _compute_tax_data(self.from_period_id, self.to_period_id, {})
+
+        self.assertEqual(employees, expected)
+
+    def test_allowance_statement_matches_python_reference(self):
+        from reports.consolidated_views import (
+            _build_detail_statements, _compute_allowance_data,
+            _make_allowance_period_extractor, get_items_for_period_range,
+        )
+
+        employees, names, _, _ = _compute_allowance_data(self.from_period_id, self.to_period_id, {})
+
+        items, _, _, _ = get_items_for_period_range(self.from_period_id, self.to_period_id, {})
+        items_list = list(items.prefetch_related('details', 'details__pay_component'))
+        _, expected, _, _ = _build_detail_statements(
+            self.from_period_id, self.to_period_id, {}, _make_allowance_period_extractor(names),
+            prefetched_items=items_list,
+        )
+
+        self.assertEqual(names, ['Housing', 'Transport'])
+        self.assertEqual(employees, expected)
+
+    def test_filters_and_streaming(self):
+        from reports.consolidated_views import _compute_ssf_data
+
+        stream, _, _ = _compute_ssf_data(
+            self.from_period_id, self.to_period_id, {'search': 'EMP001'}, stream=True
+        )
+        employees = list(stream)
+
+        self.assertEqual([e['employee_number'] for e in employees], ['EMP001'])
+        self.assertEqual(len(employees[0]['periods']), 3)
+        self.assertEqual(set(employees[0]['yearly_subtotals']), {'2025', '2026'})
+
+    def test_csv_export_streams_rows(self):
+        from reports.consolidated_views import _compute_ssf_data, _flatten_employees_for_export
+        from reports.exports import ReportExporter
+
+        stream, _, _ = _compute_ssf_data(self.from_period_id, self.to_period_id, {}, stream=True)
+        pulled = []
+
+        def rows():
+            for row in _flatten_employees_for_export(stream, lambda emp, p: {
+                'Employee #': emp['employee_number'], 'Period': p['period_name'], 'Total': p.get('total', 0),
+            }):
+                pulled.append(row)
+                yield row
+
+        response = ReportExporter.export_data(rows(), ['Employee #', 'Period', 'Total'], 'ssf', 'csv')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(pulled, [])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Employee #,Period,Total')
+        self.assertGreater(len(pulled), 0)
+        self.assertEqual(len(lines) - 1, len(pulled))
+
+
+class ChartServiceTest(TestCase):
+    """Chart rendering cache and batch rendering."""
+
+    PNG_MAGIC = b'\x89PNG'
+
+    def setUp(self):
+        from core.caching import get_cache, LONG_CACHE
+        get_cache(LONG_CACHE).clear()
+
+    def _section(self, n, chart_type='bar'):
+        return {
+            'type': 'chart', 'chart_type': chart_type, 'title': f'Chart {n}',
+            'data': [{'name': 'A', 'value': n}, {'name': 'B', 'value': n + 1}],
+        }
+
+    def test_cache_key_tracks_data_and_style(self):
+        from reports.chart_service import chart_cache_key
+
+        data = [{'name': 'A', 'value': 1}]
+        key = chart_cache_key('bar', data, 'T', {'color': '#000'})
+        self.assertEqual(key, chart_cache_key('bar', [{'value': 1, 'name': 'A'}], 'T', {'color': '#000'}))
+        self.assertNotEqual(key, chart_cache_key('bar', [{'name': 'A', 'value': 2}], 'T', {'color': '#000'}))
+        self.assertNotEqual(key, chart_cache_key('bar', data, 'T', {'color': '#fff'}))
+        self.assertNotEqual(key, chart_cache_key('bar', data, 'T', {'color': '#000'}, fmt='svg'))
+
+    def test_render_chart_is_cached(self):
+        from unittest.mock import patch
+        from reports import chart_service
+
+        first = chart_service.render_chart('pie', self._section(1)['data'], 'Pie')
+        with patch.object(chart_service, 'render_chart_bytes') as render:
+            second = chart_service.render_chart('pie', self._section(1)['data'], 'Pie')
+        render.assert_not_called()
+        self.assertTrue(first.startswith(self.PNG_MAGIC))
+        self.assertEqual(first, second)
+
+    def test_svg_output(self):
+        from reports.chart_service import render_chart
+
+        image = render_chart('line', self._section(3)['data'], 'Line', fmt='svg')
+        self.assertIn(b'<svg', image)
+
+    def test_batch_preserves_order_and_skips_empty(self):
+        from reports.chart_service import render_chart, render_charts_batch
+
+        sections = [self._section(1), {'type': 'chart', 'chart_type': 'bar', 'data': []}, self._section(2, 'area')]
+        results = render_charts_batch(sections, use_pool=False)
+
+        self.assertIsNone(results[1])
+        self.assertEqual(results[0], render_chart('bar', sections[0]['data'], 'Chart 1'))
+        self.assertEqual(results[2], render_chart('area', sections[2]['data'], 'Chart 2'))
+
+    def test_batch_process_pool(self):
+        from reports.chart_service import render_charts_batch, shutdown_pool
+
+        try:
+            results = render_charts_batch([self._section(n) for n in range(4)], use_pool=True)
+        finally:
+            shutdown_pool()
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r.startswith(self.PNG_MAGIC) for r in results))
+
+
+class ReportAdmissionTest(TestCase):
+    """Cost-based routing and per-tenant concurrency for report jobs."""
+
+    def setUp(self):
+        from core.caching import get_cache, VOLATILE_CACHE
+        get_cache(VOLATILE_CACHE).clear()
+
+    def test_cost_estimate_routes_by_rows_and_format(self):
+        from unittest.mock import patch
+        from reports import admission
+
+        with patch.object(admission, '_estimate_rows', return_value=5000):
+            csv = admission.estimate_export_cost('employee_master', {}, 'csv')
+            pdf = admission.estimate_export_cost('employee_master', {}, 'pdf')
+
+        self.assertEqual((csv.units, csv.queue), (5000, 'reports_light'))
+        self.assertEqual((pdf.units, pdf.queue), (25000, 'reports_heavy'))
+
+    def test_tenant_concurrency_cap(self):
+        from reports.admission import acquire_slot, release_slot, TIER_HEAVY
+
+        with self.settings(REPORT_QUEUE_SETTINGS={'TENANT_CONCURRENCY': {'light': 2, 'heavy': 1}}):
+            self.assertTrue(acquire_slot('t1', TIER_HEAVY))
+            self.assertFalse(acquire_slot('t1', TIER_HEAVY))
+            self.assertTrue(acquire_slot('t2', TIER_HEAVY))
+            release_slot('t1', TIER_HEAVY)
+            self.assertTrue(acquire_slot('t1', TIER_HEAVY))
+
+    def test_submit_export_sets_queue_and_priority(self):
+        from unittest.mock import patch
+        from reports import admission
+        from reports.tasks import generate_export_task
+
+        with patch.object(admission, '_estimate_rows', return_value=10), \
+                patch.object(generate_export_task, 'apply_async') as apply_async:
+            apply_async.return_value.id = 'job-1'
+            admission.submit_export('headcount', {}, 'csv', interactive=False)
+
+        options = apply_async.call_args.kwargs
+        self.assertEqual(options['queue'], 'reports_light')
+        self.assertEqual(options['priority'], admission.PRIORITY_SCHEDULED)
+        self.assertEqual(options['kwargs']['admission']['tier'], 'light')
+
+    def test_queue_stats(self):
+        from reports.admission import get_queue_stats, record_job_timing
+
+        record_job_timing('ssnit', 'light', 100, 400)
+        record_job_timing('ssnit', 'light', 300, 200)
+
+        self.assertEqual(get_queue_stats()['ssnit']['light'], {
+            'count': 2, 'avg_wait_ms': 200.0, 'avg_run_ms': 300.0,
+            'max_wait_ms': 300, 'max_run_ms': 400,
+        })
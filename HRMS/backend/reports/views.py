@@ -2394,7 +2394,8 @@ class MasterAnalyticsDashboardView(APIView):
 
     def get(self, request):
         try:
-            data = MasterDashboard.get_all_kpis()
+            force_refresh = request.query_params.get('refresh', '').lower() == 'true'
+            data = MasterDashboard.get_all_kpis(force_refresh=force_refresh)
             return Response(data)
         except Exception as e:
             return Response(
@@ -4175,14 +4176,19 @@ class AsyncExportView(APIView):
     POST /api/v1/reports/export/async/
     Body: { "export_type": "payroll_summary", "file_format": "excel", "filters": {...}, ... }
 
-    Response: { "task_id": "...", "status_url": "/api/v1/core/tasks/<task_id>/status/" }
+    Response: { "task_id": "...", "queue": "reports_light", "estimated_rows": 1200,
+                "status_url": "/api/v1/core/tasks/<task_id>/status/" }
+
+    The job's cost is estimated before it is enqueued and it is routed to the
+    light or heavy report queue (see reports.admission).
 
     Poll the status_url until status=="completed", then download from
     /api/v1/core/tasks/<task_id>/download/.
     """
 
     def post(self, request):
-        from .tasks import generate_export_task
+        from core.middleware import get_current_tenant
+        from .admission import submit_export
 
         export_type = request.data.get('export_type')
         if not export_type:
@@ -4197,15 +4203,19 @@ class AsyncExportView(APIView):
             'previous_run_id': request.data.get('previous_run_id'),
         }
 
-        result = generate_export_task.delay(
-            export_type=export_type,
+        tenant = get_current_tenant()
+        result, cost = submit_export(
+            export_type,
             params=params,
             file_format=file_format,
             user_id=str(request.user.id),
+            tenant_id=tenant.pk if tenant else None,
         )
 
         return Response({
             'task_id': result.id,
+            'queue': cost.queue,
+            'estimated_rows': cost.rows,
             'status_url': f'/api/v1/core/tasks/{result.id}/status/',
             'download_url': f'/api/v1/core/tasks/{result.id}/download/',
         }, status=status.HTTP_202_ACCEPTED)
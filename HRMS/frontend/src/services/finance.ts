@@ -662,4 +662,8 @@ export const financeService = {
     const response = await api.post('/finance/year-end-close/', { fiscal_year_id: fiscalYearId })
     return response.data
   },
+  getYearEndCloseStatus: async (fiscalYearId: string): Promise<any> => {
+    const response = await api.get('/finance/year-end-close/', { params: { fiscal_year_id: fiscalYearId } })
+    return response.data
+  },
 }
@@ -26,6 +26,7 @@ export interface Item {
   reorder_level: number
   reorder_qty: number
   standard_cost: number
+  valuation_method?: 'AVERAGE' | 'FIFO'
   is_stockable: boolean
   is_asset: boolean
   is_active: boolean
@@ -88,6 +89,24 @@ export interface StockLedger {
   average_cost: number
 }
 
+export interface StockValuationRow {
+  item: string
+  item_code: string
+  item_name: string
+  warehouse: string
+  warehouse_code: string
+  warehouse_name: string
+  balance_qty: number
+  valuation_amount: number
+  unit_cost: number | null
+}
+
+export interface StockValuation {
+  as_of: string
+  total_value: number
+  results: StockValuationRow[]
+}
+
 export type DepreciationMethod = 'STRAIGHT_LINE' | 'DECLINING_BALANCE' | 'SUM_OF_YEARS'
 export type AssetStatus = 'ACTIVE' | 'DISPOSED' | 'TRANSFERRED' | 'UNDER_MAINTENANCE' | 'WRITTEN_OFF'
 
@@ -369,6 +388,28 @@ export const inventoryService = {
     return response.data
   },
 
+  getStockValuation: async (params: { as_of?: string; warehouse?: string } = {}): Promise<StockValuation> => {
+    const response = await api.get('/inventory/stock-ledger/valuation/', { params })
+    return response.data
+  },
+
+  // ==================== Reorder Suggestions ====================
+
+  getReorderSuggestions: async (params?: Record<string, any>): Promise<PaginatedResponse<any>> => {
+    const response = await api.get('/inventory/reorder-suggestions/', { params })
+    return response.data
+  },
+
+  convertReorderSuggestions: async (data: {
+    suggestions: string[]
+    department: string
+    cost_center?: string | null
+    required_date?: string | null
+  }): Promise<any> => {
+    const response = await api.post('/inventory/reorder-suggestions/convert/', data)
+    return response.data
+  },
+
   // ==================== Assets ====================
 
   getAssets: async (filters: AssetFilters = {}): Promise<PaginatedResponse<Asset>> => {
@@ -84,6 +84,9 @@ export interface WorkOrder {
   cost_center: string | null
   estimated_cost: number
   actual_cost: number
+  material_cost: number
+  labor_cost: number
+  costed_at: string | null
   notes: string
   completion_percent?: number
   created_at: string
@@ -428,6 +431,18 @@ export const manufacturingService = {
     return response.data
   },
 
+  bulkIssueMaterials: async (workOrderIds: string[]): Promise<{ work_orders: number; entries_created: Record<string, number> }> => {
+    const response = await api.post('/manufacturing/work-orders/bulk-issue-materials/', { work_orders: workOrderIds })
+    return response.data
+  },
+
+  bulkReportProduction: async (
+    reports: { work_order: string; quantity: number; expiry_date?: string }[]
+  ): Promise<{ batches: { batch_number: string; stock_entry_id: string }[] }> => {
+    const response = await api.post('/manufacturing/work-orders/bulk-report-production/', { reports })
+    return response.data
+  },
+
   // ==================== Work Order Operations ====================
 
   getWorkOrderOperations: async (workOrderId: string, filters: WorkOrderOperationFilters = {}): Promise<PaginatedResponse<WorkOrderOperation>> => {
@@ -222,6 +222,14 @@ export const procurementService = {
     return response.data
   },
 
+  consolidateRequisitions: async (data: {
+    requisitions: { requisition: string; vendor: string; currency?: string; warehouse?: string }[]
+    commit_budget?: boolean
+  }): Promise<any> => {
+    const response = await api.post('/procurement/requisitions/consolidate/', data)
+    return response.data
+  },
+
   // ==================== Purchase Orders ====================
 
   getPurchaseOrders: async (filters: POFilters = {}): Promise<PaginatedResponse<PurchaseOrder>> => {
@@ -441,4 +449,18 @@ export const procurementService = {
     const response = await api.patch(`/procurement/vendor-blacklist/${id}/`, data)
     return response.data
   },
+
+  // ==================== Three-way Invoice Matching ====================
+  startInvoiceMatchRun: async (data: { invoice_ids?: string[]; tolerance_pct?: number } = {}): Promise<any> => {
+    const response = await api.post('/procurement/invoice-match-runs/start/', data)
+    return response.data
+  },
+  getInvoiceMatchRun: async (id: string): Promise<any> => {
+    const response = await api.get(`/procurement/invoice-match-runs/${id}/`)
+    return response.data
+  },
+  getInvoiceMatchResults: async (params?: Record<string, any>): Promise<PaginatedResponse<any>> => {
+    const response = await api.get('/procurement/invoice-match-results/', { params })
+    return response.data
+  },
 }